@@ -0,0 +1,104 @@
+"""Candle load throughput: SQLite market_data versus the columnar store
+
+Fills a temporary database with 1min candles, migrates it into a
+CandleStore and loads through `DatabaseManager.get_market_data` both ways:
+each symbol's full history, and a trailing window like the one the live
+loop reads every cycle. Results must be identical.
+
+    python benchmarks/candle_store.py [--symbols 4] [--days 180] [--window-minutes 200]
+
+Exits non-zero if the two paths return different frames.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config import Config
+
+
+def fill(db, symbols: int, rows: int) -> list:
+    rng = np.random.default_rng(0)
+    names = [f"SYM{i}-USDT" for i in range(symbols)]
+    timestamps = 1_700_000_040 + np.arange(rows) * 60
+    for symbol in names:
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, rows)))
+        with db.conn:
+            db.conn.executemany(
+                "INSERT INTO market_data VALUES (?, ?, ?, ?, ?, ?, ?)",
+                zip(timestamps.tolist(), [symbol] * rows, close.tolist(), (close * 1.001).tolist(),
+                    (close * 0.999).tolist(), close.tolist(), rng.uniform(1, 100, rows).tolist())
+            )
+    return names
+
+
+def timed_loads(db, symbols: list, start_time: datetime = None, repeat: int = 1):
+    frames = {}
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for symbol in symbols:
+            frames[symbol] = db.get_market_data(symbol, start_time=start_time)
+    elapsed = time.perf_counter() - start
+    return frames, elapsed, sum(len(frame) for frame in frames.values()) * repeat
+
+
+def main(symbols: int, days: int, window_minutes: int) -> int:
+    workdir = tempfile.mkdtemp()
+    Config.DB_PATH = os.path.join(workdir, 'bench.db')
+    Config.USE_COLUMNAR_STORE = False
+    Config.ROLLUP_TIMEFRAMES = []
+    from src.database.candle_store import CandleStore, migrate_from_sqlite
+    from src.database.db_manager import DatabaseManager
+
+    db = DatabaseManager()
+    rows = days * 1440
+    names = fill(db, symbols, rows)
+    print(f"{symbols} symbols x {rows} 1min candles")
+
+    store = CandleStore(os.path.join(workdir, 'candles'))
+    start = time.perf_counter()
+    migrate_from_sqlite(Config.DB_PATH, store)
+    elapsed = time.perf_counter() - start
+    print(f"{'migration':<24} {symbols * rows / elapsed:12,.0f} rows/s")
+
+    window_start = datetime.fromtimestamp(1_700_000_040 + (rows - window_minutes) * 60)
+    ok = True
+    results = {}
+    for label, candle_store in (('sqlite', None), ('columnar', store)):
+        db.candle_store = candle_store
+        full, elapsed, loaded = timed_loads(db, names)
+        print(f"{label + ' full history':<24} {loaded / elapsed:12,.0f} rows/s")
+        window, elapsed, loaded = timed_loads(db, names, window_start, repeat=20)
+        per_call = elapsed / (20 * len(names)) * 1e6
+        print(f"{label + ' last ' + str(window_minutes) + 'min':<24} {per_call:12,.0f} us/symbol")
+        results[label] = (full, window)
+
+    for symbol in names:
+        for sqlite_frame, columnar_frame in zip(*(results[label] for label in ('sqlite', 'columnar'))):
+            try:
+                pd.testing.assert_frame_equal(sqlite_frame[symbol], columnar_frame[symbol],
+                                              check_dtype=False)
+            except AssertionError as e:
+                print(f"FAIL: {symbol} differs between the two paths: {e}")
+                ok = False
+
+    db.close()
+    shutil.rmtree(workdir, ignore_errors=True)
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--symbols', type=int, default=4)
+    parser.add_argument('--days', type=int, default=180)
+    parser.add_argument('--window-minutes', type=int, default=200)
+    args = parser.parse_args()
+    sys.exit(main(args.symbols, args.days, args.window_minutes))
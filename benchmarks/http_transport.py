@@ -0,0 +1,142 @@
+"""KuCoinClient transport throughput, tail latency and 429 handling
+
+Runs against the local FakeExchange with 500 concurrent callers:
+
+- coalescing: every caller asks for the account balance at once and the
+  exchange must see a single request;
+- throughput: each caller sends distinct (uncoalesced) requests through
+  the pooled session with the client-side buckets opened wide, compared
+  with a fresh session per request;
+- rate limiting: the exchange enforces a small quota, so the burst is
+  answered with 429s that the client must back off from and retry.
+
+    python benchmarks/http_transport.py [--callers 500] [--requests 4] [--latency-ms 5]
+
+Exits non-zero if coalescing leaks requests or any call fails.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+import aiohttp
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config import Config
+from src.api.fake_exchange import FakeExchange
+from src.api.kucoin_client import KuCoinClient
+from src.api.rate_limiter import RATE_LIMIT_POOLS, TokenBucket, endpoint_weight
+
+ORDERS_PATH = '/api/v1/orders'
+BALANCE_PATH = '/api/v1/account-overview'
+
+
+def report(label: str, latencies: list, elapsed: float) -> None:
+    ms = np.array(latencies) * 1000
+    p50, p99 = np.percentile(ms, [50, 99])
+    print(f"{label:<28} {len(ms):6d} req {len(ms) / elapsed:9.0f} req/s "
+          f"p50={p50:7.2f}ms p99={p99:7.2f}ms max={ms.max():7.2f}ms")
+
+
+async def timed(call, latencies: list) -> None:
+    start = time.perf_counter()
+    await call()
+    latencies.append(time.perf_counter() - start)
+
+
+async def run_callers(callers: int, requests: int, call) -> tuple:
+    """`callers` tasks each awaiting `requests` calls one after another"""
+    latencies = []
+
+    async def caller(n: int) -> None:
+        for i in range(requests):
+            await timed(lambda: call(n * requests + i), latencies)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(caller(n) for n in range(callers)))
+    return latencies, time.perf_counter() - start
+
+
+def open_buckets(client: KuCoinClient) -> None:
+    """Remove client-side throttling so only the transport is measured"""
+    for pool in client._buckets:
+        client._buckets[pool] = TokenBucket(10 ** 9, 1)
+
+
+async def coalescing(callers: int, latency: float) -> bool:
+    exchange = FakeExchange(latency=latency)
+    await exchange.start()
+    client = KuCoinClient(exchange.url)
+    latencies = []
+    start = time.perf_counter()
+    balances = await asyncio.gather(*(timed(client.get_account_balance, latencies)
+                                      for _ in range(callers)))
+    report('coalesced balance', latencies, time.perf_counter() - start)
+    sent = exchange.request_counts.get(BALANCE_PATH, 0)
+    print(f"{'':<28} {callers} callers -> {sent} exchange request(s)")
+    await client.close()
+    await exchange.stop()
+    return sent == 1 and len(balances) == callers
+
+
+async def throughput(callers: int, requests: int, latency: float) -> None:
+    exchange = FakeExchange(latency=latency)
+    await exchange.start()
+
+    client = KuCoinClient(exchange.url)
+    open_buckets(client)
+    latencies, elapsed = await run_callers(
+        callers, requests, lambda i: client.get_orders(start_at=i))
+    report(f"pooled ({Config.HTTP_POOL_SIZE} conns)", latencies, elapsed)
+    await client.close()
+
+    # Baseline: what a client without a shared session pays per call
+    async def fresh_session(i: int) -> None:
+        async with aiohttp.ClientSession() as session:
+            async with session.get(exchange.url + ORDERS_PATH,
+                                   params={'status': 'active', 'startAt': i}) as response:
+                await response.json(content_type=None)
+
+    latencies, elapsed = await run_callers(callers, requests, fresh_session)
+    report('session per request', latencies, elapsed)
+    await exchange.stop()
+
+
+async def rate_limited(callers: int, latency: float, quota: int, window: float) -> bool:
+    exchange = FakeExchange(latency=latency, quota=quota, quota_window=window)
+    await exchange.start()
+    client = KuCoinClient(exchange.url)
+    latencies, elapsed = await run_callers(callers, 1, lambda i: client.get_orders(start_at=i))
+    report(f"quota {quota}/{window}s", latencies, elapsed)
+    pool, weight = endpoint_weight(ORDERS_PATH)
+    quota_weight, quota_window = RATE_LIMIT_POOLS[pool]
+    print(f"{'':<28} {exchange.rate_limited} responses were 429, "
+          f"{exchange.request_counts.get(ORDERS_PATH, 0)} requests sent; after the first burst "
+          f"the client paces itself at {quota_weight / quota_window / weight:.0f} req/s")
+    await client.close()
+    await exchange.stop()
+    return len(latencies) == callers
+
+
+async def main(callers: int, requests: int, latency: float) -> int:
+    ok = await coalescing(callers, latency)
+    await throughput(callers, requests, latency)
+    ok &= await rate_limited(callers, latency, quota=100, window=0.5)
+    if not ok:
+        print("FAIL: coalescing leaked requests or calls were lost")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    logging.disable(logging.WARNING)  # one rate-limit warning per retried request
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--callers', type=int, default=500)
+    parser.add_argument('--requests', type=int, default=4)
+    parser.add_argument('--latency-ms', type=float, default=5)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.callers, args.requests, args.latency_ms / 1000)))
@@ -0,0 +1,175 @@
+"""Inference and order placement latency while models retrain in the background
+
+Serves a NumPy LSTM the size of MarketPredictionModel through an
+InferenceServer and, on the same event loop, places limit orders through
+KuCoinClient against the local fake exchange. Both are measured at a
+steady rate, first with the machine idle and then while the
+TrainingScheduler retrains models in its process pool. Without
+TensorFlow the training load is replaced by one busy process per
+training worker.
+
+    python benchmarks/inference_under_training.py [--seconds 20] [--max-p99-ms 50]
+
+Exits non-zero when the inference or order p99 under training exceeds
+--max-p99-ms.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config import Config
+from src.api.fake_exchange import FakeExchange
+from src.api.kucoin_client import KuCoinClient
+from src.strategies.inference_server import InferenceServer
+from src.strategies.numpy_lstm import NumpyLSTMModel
+
+FEATURES = 17
+LAYERS = [(128, True), (64, True), (32, False)]
+
+
+def random_network(rng: np.random.Generator) -> NumpyLSTMModel:
+    """Random weights in the MarketPredictionModel layout"""
+    layers, inputs = [], FEATURES
+    for units, return_sequences in LAYERS:
+        layers.append({
+            'type': 'lstm', 'units': units, 'return_sequences': return_sequences,
+            'kernel': rng.normal(0, 0.1, (inputs, 4 * units)).astype(np.float32), 'kernel_scale': None,
+            'recurrent': rng.normal(0, 0.1, (units, 4 * units)).astype(np.float32), 'recurrent_scale': None,
+            'bias': np.zeros(4 * units, dtype=np.float32),
+        })
+        inputs = units
+    for units, activation in ((16, 'relu'), (1, 'tanh')):
+        layers.append({
+            'type': 'dense', 'activation': activation,
+            'kernel': rng.normal(0, 0.1, (inputs, units)).astype(np.float32), 'kernel_scale': None,
+            'bias': np.zeros(units, dtype=np.float32),
+        })
+        inputs = units
+    return NumpyLSTMModel(layers)
+
+
+def synthetic_candles(rng: np.random.Generator, rows: int) -> pd.DataFrame:
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, rows)))
+    return pd.DataFrame({
+        'timestamp': np.arange(rows) * 60 + 1_700_000_000,
+        'open': close, 'high': close * 1.001, 'low': close * 0.999,
+        'close': close, 'volume': rng.uniform(1, 10, rows),
+    })
+
+
+def _burn(seconds: float) -> None:
+    end = time.time() + seconds
+    x = 0.0
+    while time.time() < end:
+        x += 1.0
+
+
+async def measure(server: InferenceServer, window: np.ndarray, seconds: float,
+                  interval: float = 0.01) -> np.ndarray:
+    latencies = []
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        start = time.perf_counter()
+        await server.predict(window)
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(interval)
+    return np.array(latencies) * 1000
+
+
+async def measure_orders(client: KuCoinClient, seconds: float,
+                         interval: float = 0.05) -> np.ndarray:
+    latencies = []
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        start = time.perf_counter()
+        await client.place_order('XBTUSDTM', 'long', 5, 1, price=100.0)
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(interval)
+    return np.array(latencies) * 1000
+
+
+async def measure_both(server: InferenceServer, client: KuCoinClient, window: np.ndarray,
+                       seconds: float, label: str) -> float:
+    inference, orders = await asyncio.gather(measure(server, window, seconds),
+                                             measure_orders(client, seconds))
+    return max(report(f"{label} inference", inference), report(f"{label} orders", orders))
+
+
+def report(label: str, latencies: np.ndarray) -> float:
+    p50, p99 = np.percentile(latencies, [50, 99])
+    print(f"{label:<30} n={len(latencies):5d} p50={p50:7.2f}ms p99={p99:7.2f}ms max={latencies.max():7.2f}ms")
+    return p99
+
+
+async def main(seconds: float, max_p99_ms: float) -> int:
+    rng = np.random.default_rng(0)
+    network = random_network(rng)
+    window = rng.normal(size=(Config.SEQUENCE_LENGTH, FEATURES)).astype(np.float32)
+    server = InferenceServer(network.predict, max_batch_size=Config.INFERENCE_MAX_BATCH_SIZE,
+                             max_wait=Config.INFERENCE_MAX_WAIT)
+    await server.start()
+    exchange = FakeExchange()
+    await exchange.start()
+    client = KuCoinClient(exchange.url)
+    await client.get_contracts()
+    await client.place_order('XBTUSDTM', 'long', 5, 1, price=100.0)  # open the connection
+    await measure_both(server, client, window, seconds, 'idle')
+
+    workers = Config.TRAINING_WORKERS or os.cpu_count() or 1
+    try:
+        import tensorflow  # noqa: F401
+        import sklearn  # noqa: F401
+        training = True
+    except ImportError:
+        training = False
+
+    if training:
+        from src.models.training_scheduler import TrainingScheduler
+
+        async def promoted(symbol, model):
+            pass
+
+        Config.TRAINING_EPOCHS = 1000  # keep training busy for the whole measurement
+        scheduler = TrainingScheduler(promoted, artifact_dir=tempfile.mkdtemp(), max_workers=workers)
+        scheduler.schedule({f"SYM{i}": synthetic_candles(rng, 3000) for i in range(workers)})
+        await asyncio.sleep(5)  # let the workers import TensorFlow and start fitting
+        label = f"training x{workers}"
+    else:
+        context = multiprocessing.get_context('spawn')
+        burners = [context.Process(target=_burn, args=(seconds + 2,)) for _ in range(workers)]
+        for process in burners:
+            process.start()
+        label = f"cpu load x{workers}"
+
+    p99 = await measure_both(server, client, window, seconds, label)
+
+    if training:
+        await scheduler.shutdown()
+    else:
+        for process in burners:
+            process.join()
+    await server.stop()
+    await client.close()
+    await exchange.stop()
+
+    if p99 > max_p99_ms:
+        print(f"FAIL: p99 {p99:.2f}ms under load exceeds {max_p99_ms}ms")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=20)
+    parser.add_argument('--max-p99-ms', type=float, default=50)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.seconds, args.max_p99_ms)))
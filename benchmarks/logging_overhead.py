@@ -0,0 +1,157 @@
+"""Per-symbol loop cost with logging off, synchronous, queued and sampled
+
+Each mode runs in its own interpreter (logging configuration is
+process-wide) and times a cycle of `--symbols` symbols that log the
+per-symbol lines the trading loop emits: the analysis line and the
+outcome line. Modes:
+
+- off: nothing below CRITICAL is handled, the floor for the loop;
+- sync: the original setup, f-strings into stdout and a FileHandler on
+  the calling thread;
+- queued: LogPipeline with sampling disabled, so every line is enqueued
+  and written by the listener thread;
+- sampled: LogPipeline with the configured LOG_SAMPLE_INTERVAL, so
+  repeated per-symbol lines are suppressed.
+
+`--slow-disk` adds a handler that stalls 0.5ms per write, like a busy
+volume or a network filesystem. Cycles are spaced out so the listener
+can drain between them, as the loop interval does in production.
+
+    python benchmarks/logging_overhead.py [--symbols 200] [--cycles 30] [--slow-disk]
+
+Exits non-zero if the queued mode loses lines.
+"""
+import argparse
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config import Config
+
+MODES = ('off', 'sync', 'queued', 'sampled')
+
+
+class SlowFile:
+    """A stream whose writes stall like a congested disk"""
+
+    def write(self, text: str) -> None:
+        time.sleep(0.0005)
+
+    def flush(self) -> None:
+        pass
+
+
+def work(symbol: str) -> str:
+    """Stand-in for the non-logging part of a symbol iteration"""
+    total = 0
+    for i in range(400):
+        total += i
+    return "no trading opportunity"
+
+
+def run_mode(mode: str, symbols: int, cycles: int, log_path: str, slow_disk: bool) -> int:
+    """Child process: configure logging for `mode`, time the cycles, report on stderr"""
+    from src.monitoring.logs import setup_logging, sampled
+
+    if mode == 'queued':
+        Config.LOG_SAMPLE_INTERVAL = 1e-9
+    pipeline = None
+    if mode == 'off':
+        logging.basicConfig(level=logging.CRITICAL)
+    elif mode == 'sync':
+        logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s',
+                            handlers=[logging.StreamHandler(sys.stdout), logging.FileHandler(log_path)])
+    else:
+        pipeline = setup_logging(log_path)
+    if slow_disk and mode != 'off':
+        slow = logging.StreamHandler(SlowFile())
+        if pipeline is None:
+            logging.getLogger().addHandler(slow)
+        else:
+            pipeline.listener.handlers += (slow,)
+
+    logger = logging.getLogger('bench')
+    names = [f"SYM{i}-USDTM" for i in range(symbols)]
+
+    def cycle() -> None:
+        results = []
+        for symbol in names:
+            if mode == 'sync':
+                logger.info(f"Analyzing market for {symbol}")
+            else:
+                logger.info("Analyzing market for %s", symbol, extra=sampled('analyze'))
+            results.append(work(symbol))
+        for symbol, result in zip(names, results):
+            if mode == 'sync':
+                logger.info(f"{symbol}: {result}")
+            else:
+                logger.info("%s: %s", symbol, result, extra=sampled(symbol, result))
+
+    cycle()
+    times = []
+    for _ in range(cycles):
+        start = time.perf_counter()
+        cycle()
+        times.append(time.perf_counter() - start)
+        time.sleep(0.25 if slow_disk else 0.02)
+    times.sort()
+
+    dropped = suppressed = 0
+    if pipeline is not None:
+        dropped, suppressed = pipeline.queue_handler.dropped, pipeline.sampler.suppressed
+        pipeline.stop()
+    logging.shutdown()
+    lines = sum(1 for _ in open(log_path)) if os.path.exists(log_path) else 0
+    print(times[len(times) // 2], times[-1], lines, dropped, suppressed, file=sys.stderr)
+    return 0
+
+
+def main(symbols: int, cycles: int, slow_disk: bool) -> int:
+    workdir = tempfile.mkdtemp()
+    expected = 2 * symbols * (cycles + 1)
+    print(f"{symbols} symbols x 2 lines per cycle, {cycles} cycles"
+          f"{', disk stalls 0.5ms per write' if slow_disk else ''}")
+    ok = True
+    try:
+        floor = None
+        for mode in MODES:
+            command = [sys.executable, os.path.abspath(__file__), '--mode', mode,
+                       '--symbols', str(symbols), '--cycles', str(cycles),
+                       '--log-path', os.path.join(workdir, f"{mode}.log")]
+            if slow_disk:
+                command.append('--slow-disk')
+            result = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+            if result.returncode != 0:
+                print(f"FAIL: {mode} mode crashed: {result.stderr.strip().splitlines()[-1]}")
+                return 1
+            p50, worst, lines, dropped, suppressed = result.stderr.split()[-5:]
+            p50, worst = float(p50), float(worst)
+            floor = floor or p50
+            print(f"{mode:<8} cycle p50 {p50 * 1000:7.2f}ms max {worst * 1000:7.2f}ms  "
+                  f"{p50 / symbols * 1e6:6.1f}us/symbol ({p50 / floor:4.2f}x off)  "
+                  f"{lines} lines written, {dropped} dropped, {suppressed} suppressed")
+            if mode == 'queued' and (int(lines) != expected or int(dropped)):
+                print(f"FAIL: queued mode wrote {lines} of {expected} lines")
+                ok = False
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--symbols', type=int, default=200)
+    parser.add_argument('--cycles', type=int, default=30)
+    parser.add_argument('--slow-disk', action='store_true')
+    parser.add_argument('--mode', choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument('--log-path', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.mode:
+        sys.exit(run_mode(args.mode, args.symbols, args.cycles, args.log_path, args.slow_disk))
+    sys.exit(main(args.symbols, args.cycles, args.slow_disk))
@@ -0,0 +1,194 @@
+"""Metrics instrumentation overhead as a share of trading-cycle time
+
+Runs a stand-in trading cycle: `--symbols` symbols processed under the
+MAX_CONCURRENT_SYMBOLS semaphore, each advancing the streaming indicators
+by one candle and sweeping stop loss / take profit over a few open
+positions. This is far less work than a real cycle (no database read, no
+model inference), so overhead measured against it is an upper bound.
+
+Bare cycles alternate with cycles carrying the instrumentation TradingBot
+adds (stage timers, symbol_seconds, slowest_symbols, cycle_seconds,
+stage_seconds), then with the sampling profiler running as well. Those
+differences are at the level of run-to-run noise, so the instrumentation
+alone is also replayed with synthetic timings to get its cost per cycle;
+that figure is the one checked against the 1% budget. Finally a /metrics
+scrape is rendered.
+
+    python benchmarks/metrics_overhead.py [--symbols 500] [--cycles 30]
+
+Exits non-zero if instrumentation costs 1% of the cycle or more.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+from collections import defaultdict
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config import Config
+from src.models.position_manager import PositionManager
+from src.monitoring.metrics import MetricsRegistry
+from src.monitoring.profiler import SamplingProfiler
+from src.strategies.indicators import IndicatorEngine
+
+POSITIONS_PER_SYMBOL = 4
+WARM_UP_CANDLES = 30  # past the longest indicator window
+BUDGET = 0.01
+
+
+class Cycle:
+    """One symbol universe with the per-symbol work of a trading cycle"""
+
+    def __init__(self, symbols: int):
+        rng = np.random.default_rng(0)
+        self.symbols = [f"SYM{i}-USDT" for i in range(symbols)]
+        self.indicators = IndicatorEngine()
+        idx = self.indicators.slots_for(self.symbols)
+        closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, (WARM_UP_CANDLES, symbols)), axis=0))
+        for close in closes:
+            self.indicators.update_batch(idx, close, rng.uniform(1, 100, symbols))
+        self.positions = PositionManager()
+        for symbol in self.symbols:
+            for _ in range(POSITIONS_PER_SYMBOL):
+                self.positions.open_position(symbol, 'long', 100.0, 10.0, 2, entry_time=0.0)
+        self.price = 100.0
+        self.instrument(None)
+
+    def instrument(self, metrics: MetricsRegistry = None) -> None:
+        self.metrics = metrics
+        if metrics is not None:
+            self.symbol_seconds = metrics.histogram('symbol_seconds')
+            self.slowest_symbols = metrics.top('slowest_symbol_seconds', 'symbol', Config.METRICS_TOP_SYMBOLS)
+
+    def work(self, symbol: str) -> None:
+        self.indicators.update(symbol, {'close': self.price, 'volume': 1.0})
+        self.positions.check_price(symbol, self.price)
+
+    async def bare(self, symbol: str, semaphore: asyncio.Semaphore) -> None:
+        async with semaphore:
+            await asyncio.sleep(0)  # a database read would yield here
+            self.work(symbol)
+
+    async def instrumented(self, symbol: str, semaphore: asyncio.Semaphore, timings) -> None:
+        # Mirrors TradingBot._run_symbol / process_symbol
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await asyncio.sleep(0)
+                stage_start = time.perf_counter()
+                self.work(symbol)
+                timings['analyze'].append(time.perf_counter() - stage_start)
+            finally:
+                elapsed = time.perf_counter() - start
+                timings['symbol'].append(elapsed)
+                self.symbol_seconds.record(elapsed)
+                self.slowest_symbols.set(symbol, elapsed)
+
+    async def run(self) -> float:
+        semaphore = asyncio.Semaphore(Config.MAX_CONCURRENT_SYMBOLS)
+        self.price *= 1.0001
+        start = time.perf_counter()
+        if self.metrics is None:
+            await asyncio.gather(*(self.bare(symbol, semaphore) for symbol in self.symbols))
+            return time.perf_counter() - start
+
+        timings = defaultdict(list)
+        await asyncio.gather(*(self.instrumented(symbol, semaphore, timings) for symbol in self.symbols))
+        for symbol in set(self.slowest_symbols.values).difference(self.symbols):
+            self.slowest_symbols.discard(symbol)
+        cycle_time = time.perf_counter() - start
+        record_cycle(self.metrics, timings, cycle_time)
+        return time.perf_counter() - start
+
+
+def record_cycle(metrics: MetricsRegistry, timings, cycle_time: float) -> None:
+    """The metrics half of TradingBot._log_latency_summary"""
+    metrics.histogram('cycle_seconds').record(cycle_time)
+    for stage, samples in timings.items():
+        metrics.histogram('stage_seconds', stage=stage).record_many(samples)
+
+
+def replay(symbols: list, cycles: int) -> float:
+    """Seconds per cycle spent in instrumentation alone, on synthetic timings"""
+    metrics = MetricsRegistry()
+    symbol_seconds = metrics.histogram('symbol_seconds')
+    slowest = metrics.top('slowest_symbol_seconds', 'symbol', Config.METRICS_TOP_SYMBOLS)
+    elapsed = np.random.default_rng(0).lognormal(-7, 1, len(symbols)).tolist()
+    start = time.perf_counter()
+    for _ in range(cycles):
+        timings = defaultdict(list)
+        for symbol, seconds in zip(symbols, elapsed):
+            symbol_start = time.perf_counter()
+            stage_start = time.perf_counter()
+            timings['analyze'].append(time.perf_counter() - stage_start)
+            timings['symbol'].append(time.perf_counter() - symbol_start)
+            symbol_seconds.record(seconds)
+            slowest.set(symbol, seconds)
+        for symbol in set(slowest.values).difference(symbols):
+            slowest.discard(symbol)
+        record_cycle(metrics, timings, 1.0)
+    return (time.perf_counter() - start) / cycles
+
+
+def interleaved(cycle: Cycle, cycles: int, metrics: MetricsRegistry,
+                profiler: SamplingProfiler = None) -> tuple:
+    """Cycle times bare and instrumented, alternating so drift hits both alike"""
+    times = {False: [], True: []}
+    asyncio.run(cycle.run())  # warm-up
+    for i in range(2 * cycles):
+        on = bool(i % 2)
+        cycle.instrument(metrics if on else None)
+        if on and profiler is not None:
+            profiler.start()
+        times[on].append(asyncio.run(cycle.run()))
+        if profiler is not None:
+            profiler.stop()
+    return np.array(times[False]), np.array(times[True])
+
+
+def report(label: str, times: np.ndarray, bare: float = None) -> None:
+    p50 = np.percentile(times, 50)
+    extra = f"  {(p50 - bare) / bare * 100:+6.2f}% vs bare" if bare else ''
+    print(f"{label:<24} p50 cycle {p50 * 1000:8.2f}ms{extra}")
+
+
+def main(symbols: int, cycles: int) -> int:
+    logging.disable(logging.WARNING)
+    print(f"{symbols} symbols, {POSITIONS_PER_SYMBOL} positions each, {cycles} cycles")
+
+    cycle = Cycle(symbols)
+    metrics = MetricsRegistry()
+    bare, instrumented = interleaved(cycle, cycles, metrics)
+    bare_p50 = float(np.percentile(bare, 50))
+    report('bare', bare)
+    report('instrumented', instrumented, bare_p50)
+
+    bare, profiled = interleaved(cycle, cycles, MetricsRegistry(), SamplingProfiler(Config.PROFILER_INTERVAL))
+    report(f"+profiler ({Config.PROFILER_INTERVAL * 1000:g}ms)", profiled, float(np.percentile(bare, 50)))
+
+    cost = replay(cycle.symbols, cycles * 4)
+    share = cost / bare_p50
+    print(f"{'instrumentation alone':<24} {cost * 1e6:8.1f}us per cycle = {share * 100:.2f}% of the bare cycle")
+
+    start = time.perf_counter()
+    body = metrics.render()
+    print(f"{'/metrics render':<24} {(time.perf_counter() - start) * 1000:8.2f}ms, "
+          f"{body.count(chr(10))} lines, {len(body) / 1024:.1f} KiB")
+
+    if share >= BUDGET:
+        print(f"FAIL: instrumentation is {share * 100:.2f}% of the cycle (budget {BUDGET * 100:g}%)")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--symbols', type=int, default=500)
+    parser.add_argument('--cycles', type=int, default=30)
+    args = parser.parse_args()
+    sys.exit(main(args.symbols, args.cycles))
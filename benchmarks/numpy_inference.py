@@ -0,0 +1,171 @@
+"""Per-symbol LSTM inference latency and process RSS, Keras against NumPy
+
+Runs a network the size of MarketPredictionModel over `--candles`
+consecutive candles for `--symbols` symbols, the way MarketAnalyzer
+serves it on the NumPy backend, at each storage precision:
+
+- window: the full SEQUENCE_LENGTH-step forward pass per candle, what
+  every analysis cost before the LSTM state was kept between candles;
+- streamed: `_predict_streaming`, one timestep per new candle plus a
+  rebuild from the window every NUMPY_LSTM_RESYNC candles.
+
+Streamed outputs are compared with the windowed ones to show the drift
+the resync bounds. Resident memory is measured in fresh interpreters:
+one that imports the bot's analyzer and serves a NumPy model, and, where
+TensorFlow is importable (see `--python`), one that builds and runs the
+Keras model, also timing its per-candle predict.
+
+    python benchmarks/numpy_inference.py [--symbols 20] [--candles 100] [--python PATH]
+
+Exits non-zero if the NumPy process loads TensorFlow or streaming is not
+faster than the windowed pass.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from config.config import Config
+from src.strategies.numpy_lstm import PRECISIONS, NumpyLSTMModel, _quantize
+
+FEATURES = 17
+LAYERS = [(128, True), (64, True), (32, False)]
+
+RSS_SCRIPT = """
+import sys, time
+sys.path.insert(0, {root!r})
+import numpy as np
+backend, features, steps = {backend!r}, {features}, {steps}
+window = np.random.default_rng(0).normal(size=(1, steps, features)).astype(np.float32)
+if backend == 'numpy':
+    from src.models.market_analyzer import MarketAnalyzer
+    sys.path.insert(0, {benchmarks!r})
+    from numpy_inference import network
+    predict = network(np.random.default_rng(0), 'float32').predict
+else:
+    from src.strategies.ml_models import MarketPredictionModel
+    model = MarketPredictionModel((steps, features))
+    predict = lambda x: model.model.predict(x, verbose=0)
+predict(window)
+times = []
+for _ in range(50):
+    start = time.perf_counter()
+    predict(window)
+    times.append(time.perf_counter() - start)
+rss = next(int(line.split()[1]) for line in open('/proc/self/status') if line.startswith('VmRSS'))
+print(rss, sorted(times)[len(times) // 2], 'tensorflow' in sys.modules, sep='|')
+"""
+
+
+def network(rng: np.random.Generator, precision: str) -> NumpyLSTMModel:
+    """Random weights in the MarketPredictionModel layout, stored at `precision`"""
+    layers, inputs = [], FEATURES
+    for units, return_sequences in LAYERS:
+        kernel, kernel_scale = _quantize(rng.normal(0, 0.1, (inputs, 4 * units)), precision)
+        recurrent, recurrent_scale = _quantize(rng.normal(0, 0.1, (units, 4 * units)), precision)
+        layers.append({
+            'type': 'lstm', 'units': units, 'return_sequences': return_sequences,
+            'kernel': kernel, 'kernel_scale': kernel_scale,
+            'recurrent': recurrent, 'recurrent_scale': recurrent_scale,
+            'bias': np.zeros(4 * units, dtype=np.float32),
+        })
+        inputs = units
+    for units, activation in ((16, 'relu'), (1, 'tanh')):
+        kernel, kernel_scale = _quantize(rng.normal(0, 0.3, (inputs, units)), precision)
+        layers.append({
+            'type': 'dense', 'activation': activation,
+            'kernel': kernel, 'kernel_scale': kernel_scale,
+            'bias': np.zeros(units, dtype=np.float32),
+        })
+        inputs = units
+    return NumpyLSTMModel(layers, precision)
+
+
+class Served:
+    """The parts of MarketPredictionModel MarketAnalyzer streams through"""
+
+    def __init__(self, numpy_model: NumpyLSTMModel):
+        self.numpy_model = numpy_model
+        self.version = numpy_model.precision
+
+
+def latency(symbols: int, candles: int) -> bool:
+    from src.models.market_analyzer import MarketAnalyzer
+
+    steps = Config.SEQUENCE_LENGTH
+    rng = np.random.default_rng(1)
+    rows = rng.normal(size=(symbols, steps + candles, FEATURES)).astype(np.float32)
+    timestamps = np.arange(steps + candles) * 60
+    print(f"{symbols} symbols x {candles} candles, window {steps}, resync every "
+          f"{Config.NUMPY_LSTM_RESYNC} candles")
+
+    ok = True
+    for precision in PRECISIONS:
+        model = Served(network(np.random.default_rng(0), precision))
+        analyzer = MarketAnalyzer()
+        windowed, streamed, drift = [], [], 0.0
+        for t in range(candles):
+            end = steps + t
+            for s in range(symbols):
+                window = rows[s, end - steps:end]
+                start = time.perf_counter()
+                expected = float(model.numpy_model.predict(window[None])[0, 0])
+                windowed.append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                output = analyzer._predict_streaming(f"S{s}", model, window, timestamps[end - 2:end])
+                streamed.append(time.perf_counter() - start)
+                drift = max(drift, abs(output - expected))
+
+        window_p50, window_p99 = np.percentile(np.array(windowed) * 1e6, [50, 99])
+        stream_p50, stream_p99 = np.percentile(np.array(streamed) * 1e6, [50, 99])
+        print(f"{precision:<8} weights {model.numpy_model.nbytes / 1024:6.0f} KiB  "
+              f"window p50={window_p50:7.1f}us p99={window_p99:7.1f}us  "
+              f"streamed p50={stream_p50:6.1f}us p99={stream_p99:7.1f}us  "
+              f"({window_p50 / stream_p50:4.1f}x)  max drift {drift:.1e}")
+        ok &= stream_p50 < window_p50
+    if not ok:
+        print("FAIL: streamed prediction is not faster than the windowed pass")
+    return ok
+
+
+def rss(python: str) -> bool:
+    ok = True
+    for backend in ('numpy', 'keras'):
+        script = RSS_SCRIPT.format(root=ROOT, benchmarks=os.path.dirname(os.path.abspath(__file__)),
+                                   backend=backend, features=FEATURES, steps=Config.SEQUENCE_LENGTH)
+        result = subprocess.run([python if backend == 'keras' else sys.executable, '-c', script],
+                                capture_output=True, text=True, cwd=ROOT)
+        if result.returncode != 0:
+            print(f"{backend + ' process':<16} not runnable under {python} "
+                  f"({result.stderr.strip().splitlines()[-1]})")
+            ok &= backend == 'keras'
+            continue
+        kib, p50, tensorflow = result.stdout.strip().splitlines()[-1].split('|')
+        print(f"{backend + ' process':<16} RSS {int(kib) / 1024:7.0f} MiB  one-window predict "
+              f"p50={float(p50) * 1e3:7.2f}ms  TensorFlow loaded: {tensorflow}")
+        if backend == 'numpy' and tensorflow == 'True':
+            print("FAIL: serving a NumPy model imported TensorFlow")
+            ok = False
+    return ok
+
+
+def main(symbols: int, candles: int, python: str) -> int:
+    ok = latency(symbols, candles)
+    ok &= rss(python)
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--symbols', type=int, default=20)
+    parser.add_argument('--candles', type=int, default=100)
+    parser.add_argument('--python', default=sys.executable)
+    args = parser.parse_args()
+    sys.exit(main(args.symbols, args.candles, args.python))
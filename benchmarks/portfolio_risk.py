@@ -0,0 +1,109 @@
+"""PortfolioRiskEngine update and query cost at several hundred symbols
+
+For each universe size, warms the engine with price samples and random
+net exposures, then times:
+
+- update_prices: one sample of every symbol folded into the covariance;
+- set_exposure: one symbol's exposure changed (Σw and w'Σw kept in step);
+- order_impact: VaR before and after a candidate order, the query made
+  before every place_order;
+- recompute: the same candidate priced from scratch as w'Σw, which is
+  what order_impact would cost without the cached Σw.
+
+Every order_impact and the VaR after each set_exposure are checked
+against the brute-force w'Σw.
+
+    python benchmarks/portfolio_risk.py [--symbols 100 300 500 1000] [--samples 50]
+
+Exits non-zero if the incremental VaR drifts from the full recompute.
+"""
+import argparse
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.models.portfolio_risk import PortfolioRiskEngine
+
+QUERIES = 2000
+TOLERANCE = 1e-9
+
+
+def report(label: str, per_call: list) -> None:
+    p50, p99 = np.percentile(np.array(per_call) * 1e6, [50, 99])
+    print(f"  {label:<16} p50={p50:9.2f}us p99={p99:9.2f}us")
+
+
+def timed(fn, args_list: list) -> tuple:
+    per_call, results = [], []
+    for args in args_list:
+        start = time.perf_counter()
+        results.append(fn(*args))
+        per_call.append(time.perf_counter() - start)
+    return per_call, results
+
+
+def full_var(engine: PortfolioRiskEngine, exposure: np.ndarray) -> float:
+    n = engine.size
+    return engine.z * math.sqrt(max(exposure @ engine.cov[:n, :n] @ exposure, 0.0)) * engine.horizon_scale
+
+
+def run(symbols: int, samples: int) -> bool:
+    rng = np.random.default_rng(symbols)
+    names = [f"SYM{i}-USDT" for i in range(symbols)]
+    engine = PortfolioRiskEngine()
+    paths = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, (samples, symbols)), axis=0))
+    batches = [dict(zip(names, row.tolist())) for row in paths]
+
+    print(f"{symbols} symbols")
+    per_call, _ = timed(engine.update_prices, [(batch,) for batch in batches])
+    report('update_prices', per_call)
+    engine.set_exposures(dict(zip(names, rng.normal(0, 1000, symbols).tolist())))
+
+    orders = [(names[i], float(d)) for i, d in zip(rng.integers(0, symbols, QUERIES),
+                                                    rng.normal(0, 500, QUERIES))]
+    per_call, impacts = timed(engine.order_impact, orders)
+    report('order_impact', per_call)
+
+    n = engine.size
+    exposure = engine.exposure[:n].copy()
+
+    def recompute(symbol: str, delta: float) -> float:
+        after = exposure.copy()
+        after[engine.index[symbol]] += delta
+        return full_var(engine, after)
+
+    per_call, expected = timed(recompute, orders)
+    report('recompute', per_call)
+    ok = all(math.isclose(impact['var_after'], var, rel_tol=TOLERANCE)
+             for impact, var in zip(impacts, expected))
+
+    per_call, _ = timed(engine.set_exposure, orders[:QUERIES // 4])
+    report('set_exposure', per_call)
+    for symbol, value in orders[:QUERIES // 4]:
+        exposure[engine.index[symbol]] = value
+    drift = abs(engine.value_at_risk() - full_var(engine, exposure)) / full_var(engine, exposure)
+    print(f"  {'VaR drift':<16} {drift:.1e} relative after {QUERIES // 4} set_exposure calls")
+    return ok and drift < TOLERANCE
+
+
+def main(sizes: list, samples: int) -> int:
+    ok = True
+    for symbols in sizes:
+        ok &= run(symbols, samples)
+    if not ok:
+        print("FAIL: incremental VaR differs from the full w'Σw recompute")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--symbols', type=int, nargs='+', default=[100, 300, 500, 1000])
+    parser.add_argument('--samples', type=int, default=50)
+    args = parser.parse_args()
+    sys.exit(main(args.symbols, args.samples))
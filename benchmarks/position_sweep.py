@@ -0,0 +1,128 @@
+"""Per-tick stop loss / take profit cost at thousands of open positions
+
+Opens `--positions` random long and short positions on one symbol and
+times `PositionManager.check_price` on quiet ticks (nothing triggers, the
+common case) against the per-position loop it replaced: `_calculate_pnl`
+plus the two threshold comparisons for every position. Then walks the
+price through a random path that closes the book down tick by tick,
+checking at every tick that the vectorized trigger masks select exactly
+the positions the scalar rules do, and that the column rows still match
+their positions after the swap-removes.
+
+    python benchmarks/position_sweep.py [--positions 10000] [--ticks 200]
+
+Exits non-zero if the vectorized and scalar checks disagree.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.models.position_manager import PositionColumns, PositionManager
+
+SYMBOL = 'BTC-USDT'
+
+
+def report(label: str, per_tick: np.ndarray, positions: int) -> None:
+    p50, p99 = np.percentile(per_tick * 1e6, [50, 99])
+    print(f"{label:<22} {positions:6d} positions  per tick p50={p50:9.1f}us p99={p99:9.1f}us")
+
+
+def open_book(positions: int) -> PositionManager:
+    rng = np.random.default_rng(0)
+    manager = PositionManager()
+    for _ in range(positions):
+        manager.open_position(
+            SYMBOL, 'long' if rng.random() < 0.5 else 'short',
+            entry_price=100 * (1 + rng.normal(0, 0.001)), size=float(rng.uniform(5, 20)),
+            leverage=int(rng.integers(1, 11)), stop_loss_pct=float(rng.uniform(1, 4)),
+            take_profit_pct=float(rng.uniform(2, 8)), entry_time=0.0
+        )
+    return manager
+
+
+def scalar_triggered(manager: PositionManager, price: float):
+    """The loop check_price ran before the position columns"""
+    stops, takes = [], []
+    for position in manager.get_positions(SYMBOL):
+        pnl = manager._calculate_pnl(position, price)
+        if pnl <= -position.stop_loss_pct:
+            stops.append(position)
+        elif pnl >= position.take_profit_pct:
+            takes.append(position)
+    return stops, takes
+
+
+def quiet_ticks(manager: PositionManager, ticks: int) -> None:
+    # Price exactly at 100: every entry is within about 0.3% of it, so PnL
+    # stays below the smallest threshold and neither path closes anything
+    columns = manager._columns[SYMBOL]
+    assert columns.triggered(100.0) == ([], [])
+    for label, check in (('vectorized sweep', lambda: manager.check_price(SYMBOL, 100.0)),
+                         ('per-position loop', lambda: scalar_triggered(manager, 100.0))):
+        per_tick = []
+        for _ in range(ticks):
+            start = time.perf_counter()
+            check()
+            per_tick.append(time.perf_counter() - start)
+        report(label, np.array(per_tick), columns.count)
+
+
+def ids(triggered) -> list:
+    return [{position.id for position in positions} for positions in triggered]
+
+
+def consistent(columns: PositionColumns) -> bool:
+    """Every row belongs to the position that claims it and holds its values"""
+    for slot, position in enumerate(columns.positions):
+        if position.slot != slot:
+            return False
+    saved = columns.data[:, :columns.count].copy()
+    for position in columns.positions:
+        columns.update(position)
+    return np.array_equal(saved, columns.data[:, :columns.count])
+
+
+def closing_walk(manager: PositionManager, ticks: int) -> bool:
+    rng = np.random.default_rng(1)
+    prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.005, ticks)))
+    ok = True
+    per_tick = []
+    for price in prices:
+        columns = manager._columns.get(SYMBOL)
+        if columns is None:
+            break
+        if ids(columns.triggered(price)) != ids(scalar_triggered(manager, price)):
+            print(f"FAIL: trigger sets differ at price {price:.4f}")
+            ok = False
+        start = time.perf_counter()
+        manager.check_price(SYMBOL, price)
+        per_tick.append(time.perf_counter() - start)
+        if SYMBOL in manager._columns and not consistent(manager._columns[SYMBOL]):
+            print(f"FAIL: position columns out of step after closes at {price:.4f}")
+            ok = False
+
+    stops = sum(trade['reason'] == 'stop_loss' for trade in manager.position_history)
+    print(f"{'closing walk':<22} {len(per_tick)} ticks closed {manager.closed_count} positions "
+          f"({stops} stop loss), {len(manager.open_positions)} still open; "
+          f"p50={np.percentile(np.array(per_tick) * 1e6, 50):.1f}us per tick")
+    return ok
+
+
+def main(positions: int, ticks: int) -> int:
+    manager = open_book(positions)
+    quiet_ticks(manager, ticks)
+    ok = closing_walk(manager, ticks)
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--positions', type=int, default=10000)
+    parser.add_argument('--ticks', type=int, default=200)
+    args = parser.parse_args()
+    sys.exit(main(args.positions, args.ticks))
@@ -0,0 +1,162 @@
+"""Multi-timeframe rollups: live ingest, year-scale rebuilds and reads
+
+Three measurements over the configured rollup timeframes:
+
+- live: `CandleRollup.ingest` fed one closed candle per symbol per
+  minute, the way the trading loop stores candles;
+- rebuild: a year of 1min candles per symbol aggregated into every
+  timeframe with `aggregate` (what `recompute` runs for late data and
+  backfills), against pandas resample, checking both agree;
+- read: a year of 1hour bars for one symbol read from candle_rollups
+  versus resampled from market_data on every call.
+
+    python benchmarks/rollup.py [--symbols 300] [--days 365] [--live-minutes 60]
+
+Exits non-zero if any bars differ from pandas.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config import Config
+from src.database.rollup import OHLCV, TIMEFRAME_SECONDS, CandleRollup, aggregate
+
+BASE_TIMESTAMP = 1_704_067_200  # 2024-01-01 00:00 UTC
+PANDAS_RULES = {'5min': '5min', '15min': '15min', '30min': '30min', '1hour': '1h', '2hour': '2h',
+                '4hour': '4h', '8hour': '8h', '12hour': '12h', '1day': '1D'}
+
+
+def candles(rng: np.random.Generator, rows: int, start: int = BASE_TIMESTAMP) -> pd.DataFrame:
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, rows)))
+    spread = rng.uniform(0, 0.002, rows)
+    return pd.DataFrame({
+        'timestamp': start + np.arange(rows, dtype=np.int64) * 60,
+        'open': np.roll(close, 1), 'high': close * (1 + spread), 'low': close * (1 - spread),
+        'close': close, 'volume': rng.uniform(1, 100, rows),
+    })
+
+
+def pandas_bars(data: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+    """What callers did before rollups: resample the 1min frame"""
+    indexed = data.set_index(pd.to_datetime(data['timestamp'], unit='s'))
+    bars = indexed.resample(PANDAS_RULES[timeframe]).agg(
+        {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'}
+    ).dropna()
+    bars.insert(0, 'timestamp', (bars.index - pd.Timestamp(0)) // pd.Timedelta(seconds=1))
+    return bars.reset_index(drop=True)
+
+
+def live(symbols: int, minutes: int) -> None:
+    rng = np.random.default_rng(0)
+    rollup = CandleRollup(Config.ROLLUP_TIMEFRAMES)
+    names = [f"SYM{i}-USDT" for i in range(symbols)]
+    frames = [candles(rng, 1, BASE_TIMESTAMP + minute * 60) for minute in range(minutes)]
+
+    per_call = []
+    start = time.perf_counter()
+    for frame in frames:
+        for symbol in names:
+            call_start = time.perf_counter()
+            rollup.ingest(symbol, frame)
+            per_call.append(time.perf_counter() - call_start)
+    elapsed = time.perf_counter() - start
+
+    p50, p99 = np.percentile(np.array(per_call) * 1e6, [50, 99])
+    print(f"{'live ingest':<28} {len(per_call) / elapsed:12,.0f} candles/s  "
+          f"p50={p50:6.1f}us p99={p99:6.1f}us per candle")
+
+
+def rebuild(symbols: int, days: int) -> bool:
+    rng = np.random.default_rng(1)
+    rows = days * 1440
+    ok = True
+    ours = theirs = 0.0
+    for symbol in range(symbols):
+        data = candles(rng, rows)
+        timestamps = data['timestamp'].to_numpy()
+        values = {column: data[column].to_numpy() for column in OHLCV}
+
+        start = time.perf_counter()
+        bars = {tf: aggregate(timestamps, values, TIMEFRAME_SECONDS[tf]) for tf in Config.ROLLUP_TIMEFRAMES}
+        ours += time.perf_counter() - start
+
+        if symbol < 3:  # pandas is the slow path; a few symbols give its rate
+            start = time.perf_counter()
+            expected = {tf: pandas_bars(data, tf) for tf in Config.ROLLUP_TIMEFRAMES}
+            theirs += time.perf_counter() - start
+            for tf in Config.ROLLUP_TIMEFRAMES:
+                try:
+                    pd.testing.assert_frame_equal(pd.DataFrame(bars[tf]), expected[tf], check_dtype=False)
+                except AssertionError as e:
+                    print(f"FAIL: {tf} bars differ from pandas resample: {e}")
+                    ok = False
+
+    total = symbols * rows
+    print(f"{'rebuild (aggregate)':<28} {total / ours:12,.0f} candles/s  "
+          f"{symbols} symbols x {days} days in {ours:.1f}s")
+    print(f"{'rebuild (pandas)':<28} {3 * rows / theirs:12,.0f} candles/s  "
+          f"-> {total / (3 * rows / theirs):.0f}s for the same data")
+    return ok
+
+
+def read(days: int) -> bool:
+    workdir = tempfile.mkdtemp()
+    Config.DB_PATH = os.path.join(workdir, 'bench.db')
+    Config.USE_COLUMNAR_STORE = False
+    from src.database.db_manager import DatabaseManager
+
+    db = DatabaseManager()
+    data = candles(np.random.default_rng(2), days * 1440)
+    symbol = 'SYM0-USDT'
+    with db.conn:
+        db.conn.executemany("INSERT INTO market_data VALUES (?, ?, ?, ?, ?, ?, ?)",
+                            db._market_data_rows(data, symbol))
+    end = int(data['timestamp'].iloc[-1]) // 86400 * 86400 + 86400
+    db.writer.call(lambda conn: db.rollup.recompute(conn, symbol, BASE_TIMESTAMP, end)).result()
+
+    timings = {}
+    frames = {}
+    rollup = db.rollup
+    for label, maintained in (('candle_rollups', rollup), ('resample', None)):
+        db.rollup = maintained
+        start = time.perf_counter()
+        for _ in range(5):
+            frames[label] = db.get_market_data(symbol, timeframe='1hour')
+        timings[label] = (time.perf_counter() - start) / 5
+        print(f"{'read 1hour from ' + label:<28} {timings[label] * 1000:12.1f} ms for "
+              f"{len(frames[label])} bars")
+    db.rollup = rollup
+    db.close()
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    try:
+        pd.testing.assert_frame_equal(frames['candle_rollups'], frames['resample'], check_dtype=False)
+    except AssertionError as e:
+        print(f"FAIL: stored 1hour bars differ from resampled ones: {e}")
+        return False
+    return True
+
+
+def main(symbols: int, days: int, live_minutes: int) -> int:
+    print(f"timeframes {', '.join(Config.ROLLUP_TIMEFRAMES)}")
+    live(symbols, live_minutes)
+    ok = rebuild(symbols, days)
+    ok &= read(days)
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--symbols', type=int, default=300)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--live-minutes', type=int, default=60)
+    args = parser.parse_args()
+    sys.exit(main(args.symbols, args.days, args.live_minutes))
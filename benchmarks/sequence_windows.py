@@ -0,0 +1,82 @@
+"""Training-window construction: strided views versus the copying loop
+
+Builds (samples, sequence_length, features) training windows from a scaled
+feature matrix the way `prepare_data` used to (a Python loop of slices
+copied into one array) and the way it does now (`_make_windows`, a strided
+view), then walks one shuffled epoch of `iter_batches`. Reports wall time
+and peak traced allocation for each, and checks that both produce the same
+windows.
+
+    python benchmarks/sequence_windows.py [--rows 50000] [--batch-size 32]
+
+Exits non-zero if the windows differ.
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config import Config
+from src.strategies.ml_models import MarketPredictionModel
+
+FEATURES = 17
+
+
+def loop_windows(scaled: np.ndarray, targets: np.ndarray, sequence_length: int):
+    """prepare_data before strided windows"""
+    X, y = [], []
+    for i in range(len(scaled) - sequence_length):
+        X.append(scaled[i:(i + sequence_length)])
+        y.append(targets[i + sequence_length])
+    return np.array(X), np.array(y)
+
+
+def measure(label: str, fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{label:<28} {elapsed * 1000:9.1f}ms  peak {peak / 2 ** 20:9.1f} MiB")
+    return result
+
+
+def main(rows: int, batch_size: int) -> int:
+    scaled = np.random.default_rng(0).normal(size=(rows, FEATURES))
+    targets = np.sign(scaled[:, 0])
+    sequence_length = Config.SEQUENCE_LENGTH
+    # _make_windows and iter_batches need no fitted state
+    model = object.__new__(MarketPredictionModel)
+    print(f"{rows} rows x {FEATURES} features, sequence_length {sequence_length}, "
+          f"input {scaled.nbytes / 2 ** 20:.1f} MiB")
+
+    loop_X, loop_y = measure('copying loop', lambda: loop_windows(scaled, targets, sequence_length))
+    X, y = measure('strided view', lambda: model._make_windows(scaled, targets, sequence_length))
+
+    def epoch():
+        batches = 0
+        for batch_X, batch_y in model.iter_batches(X, y, batch_size, shuffle=True):
+            batches += 1
+        return batches
+
+    batches = measure(f'shuffled epoch ({batch_size}/batch)', epoch)
+    print(f"{'':<28} {batches} batches of {batch_size * sequence_length * FEATURES * 8 / 2 ** 10:.0f} KiB")
+
+    if not (np.array_equal(loop_X, X) and np.array_equal(loop_y, y)):
+        print("FAIL: strided windows differ from the loop")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--batch-size', type=int, default=32)
+    args = parser.parse_args()
+    sys.exit(main(args.rows, args.batch_size))
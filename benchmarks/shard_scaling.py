@@ -0,0 +1,181 @@
+"""Sharded coordinator throughput per worker count against the fake exchange
+
+Starts a FakeExchange listing `--symbols` contracts and a ShardCoordinator
+that partitions them over N worker processes, for each N in `--workers`.
+Every worker makes `--cycles` passes over its assigned symbols doing the
+CPU-bound part of a bot cycle for each one (warming the streaming
+indicators over `--candles` candles and a NumPy LSTM forward pass the
+size of MarketPredictionModel), then asks the coordinator's risk
+authority to reserve a small order and places it on the fake exchange.
+Reports aggregate symbols/s from the first worker starting its passes to
+the last one finishing, the spread of symbols per worker and the order
+reservations, next to the ideal linear scaling from one worker. Scaling
+is bounded by the cores available (`os.cpu_count()`).
+
+    python benchmarks/shard_scaling.py [--symbols 200] [--workers 1,2,4] [--cycles 3]
+
+Exits non-zero if a worker does not finish or the symbols processed differ
+from symbols x cycles (a symbol missed or owned by two workers).
+"""
+import argparse
+import asyncio
+import functools
+import logging
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config.config import Config
+from src.api.fake_exchange import FakeExchange
+from src.api.kucoin_client import KuCoinClient
+from src.cluster.coordinator import ShardCoordinator
+from src.cluster.risk_authority import RiskAuthority
+
+FEATURES = 17
+
+
+def contracts(symbols: int) -> list:
+    return [{'symbol': f"S{i:04d}USDTM", 'status': 'Open', 'lotSize': 1, 'tickSize': 0.01,
+             'multiplier': 0.01, 'maxLeverage': 100, 'maxOrderQty': 1000000}
+            for i in range(symbols)]
+
+
+def synthetic_candles(rng: np.random.Generator, rows: int) -> pd.DataFrame:
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, rows)))
+    return pd.DataFrame({
+        'timestamp': np.arange(rows) * 60 + 1_700_000_000,
+        'open': close, 'high': close * 1.001, 'low': close * 0.999,
+        'close': close, 'volume': rng.uniform(1, 10, rows),
+    })
+
+
+async def run_worker(worker_id: int, address: str, url: str, cycles: int, candles: int) -> None:
+    from numpy_inference import network
+    from src.cluster.shard_client import ShardClient
+    from src.strategies.indicators import IndicatorEngine
+
+    rng = np.random.default_rng(worker_id)
+    model = network(rng, 'float32')
+    window = rng.normal(size=(1, Config.SEQUENCE_LENGTH, FEATURES)).astype(np.float32)
+    history = synthetic_candles(rng, candles)
+
+    shard = ShardClient(worker_id, address)
+    client = KuCoinClient(url)
+    await shard.connect()
+    symbols = await shard.assigned_symbols()
+    await client.get_contracts()
+
+    started = time.time()
+    processed = reserved = 0
+    for _ in range(cycles):
+        for symbol in symbols:
+            IndicatorEngine().warm_up(symbol, history)
+            signal = float(model.predict(window)[0, 0])
+            side = 'long' if signal >= 0 else 'short'
+            allowed, _ = await shard.reserve(symbol, side, notional=1.0, margin=0.2)
+            if allowed:
+                await client.place_order(symbol, side, 5, 1, price=100.0,
+                                         client_oid=f"{shard.client_oid_prefix}{processed}")
+                reserved += 1
+            processed += 1
+        # Clears this worker's reservations, as the bot's cycle report does
+        await shard.report({}, 0.0, {}, {'symbols': len(symbols)})
+
+    await shard.report({}, 0.0, {}, {'done': True, 'symbols': processed, 'assigned': len(symbols),
+                                     'reserved': reserved, 'started': started,
+                                     'finished': time.time()})
+    await shard.close()
+    await client.close()
+
+
+def worker(url: str, cycles: int, candles: int, worker_id: int, address: str) -> None:
+    logging.disable(logging.WARNING)
+    asyncio.run(run_worker(worker_id, address, url, cycles, candles))
+
+
+class RecordingAuthority(RiskAuthority):
+    """Keeps each worker's final report, which disconnecting would drop"""
+
+    def __init__(self):
+        super().__init__()
+        self.final = {}
+
+    def report(self, worker, exposures, margin_used, prices=None, stats=None):
+        super().report(worker, exposures, margin_used, prices, stats)
+        if stats and stats.get('done'):
+            self.final[worker] = stats
+
+
+async def run(exchange: FakeExchange, workers: int, symbols: int, cycles: int,
+              candles: int, timeout: float) -> tuple:
+    authority = RecordingAuthority()
+    address = os.path.join(tempfile.mkdtemp(), 'coordinator.sock')
+    coordinator = ShardCoordinator(
+        workers, functools.partial(worker, exchange.url, cycles, candles),
+        address=address, client=KuCoinClient(exchange.url), authority=authority
+    )
+    await coordinator.start()
+    deadline = time.monotonic() + timeout
+    while len(authority.final) < workers and time.monotonic() < deadline:
+        await asyncio.sleep(0.1)
+    # Let finished workers exit on their own rather than be interrupted by stop()
+    loop = asyncio.get_running_loop()
+    for process in coordinator.processes.values():
+        await loop.run_in_executor(None, process.join, 10)
+    await coordinator.stop()
+
+    final = list(authority.final.values())
+    if len(final) < workers:
+        return None, final
+    elapsed = max(stats['finished'] for stats in final) - min(stats['started'] for stats in final)
+    return sum(stats['symbols'] for stats in final) / elapsed, final
+
+
+async def main(symbols: int, worker_counts: list, cycles: int, candles: int, timeout: float) -> int:
+    Config.USE_ORDER_STREAM = False
+    exchange = FakeExchange(contracts=contracts(symbols), balance=1e9)
+    await exchange.start()
+    print(f"{symbols} symbols x {cycles} cycles, {candles} candles per symbol, "
+          f"{os.cpu_count()} CPU(s)")
+
+    ok = True
+    baseline = None
+    for workers in worker_counts:
+        throughput, final = await run(exchange, workers, symbols, cycles, candles, timeout)
+        if throughput is None:
+            print(f"{workers:>2} workers  FAIL: {len(final)}/{workers} finished within {timeout:.0f}s")
+            ok = False
+            continue
+        baseline = baseline or throughput / workers
+        processed = sum(stats['symbols'] for stats in final)
+        assigned = [stats['assigned'] for stats in final]
+        print(f"{workers:>2} workers  {throughput:8.1f} symbols/s  (linear {baseline * workers:8.1f})  "
+              f"per worker {min(assigned)}-{max(assigned)} symbols  "
+              f"{sum(stats['reserved'] for stats in final)} orders reserved and placed")
+        if processed != symbols * cycles:
+            print(f"FAIL: processed {processed} symbols, expected {symbols * cycles}")
+            ok = False
+
+    await exchange.stop()
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    logging.disable(logging.WARNING)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--symbols', type=int, default=200)
+    parser.add_argument('--workers', default='1,2,4')
+    parser.add_argument('--cycles', type=int, default=3)
+    parser.add_argument('--candles', type=int, default=100)
+    parser.add_argument('--timeout', type=float, default=300)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.symbols, [int(n) for n in args.workers.split(',')],
+                              args.cycles, args.candles, args.timeout)))
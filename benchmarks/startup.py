@@ -0,0 +1,213 @@
+"""Startup cost: lazy ML imports and warm restart from a state snapshot
+
+Two parts of the time from process start to the first trading decision:
+
+- imports: the modules main.py loads, timed in a fresh interpreter, with
+  a check that TensorFlow and scikit-learn are still unloaded afterwards;
+  importing those two is timed separately as what every start used to pay;
+- state: a bot's in-memory state (open positions with their history and
+  counters, trade statistics, portfolio covariance, contract specs and
+  per-symbol indicator state) saved to a snapshot and restored into fresh
+  components, against rebuilding the indicator state by replaying
+  ANALYSIS_LOOKBACK candles per symbol. Restored state must behave like
+  the original.
+
+    python benchmarks/startup.py [--symbols 300] [--positions 10000] [--python PATH]
+
+`--python` runs the import measurement under another interpreter, e.g.
+one with TensorFlow installed. Exits non-zero if TensorFlow or
+scikit-learn is imported eagerly or restored state differs.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from config.config import Config
+from src.api.instruments import InstrumentCache
+from src.database.state_snapshot import StateSnapshot
+from src.models.market_analyzer import MarketAnalyzer
+from src.models.order_manager import OrderManager
+from src.models.position_manager import PositionManager
+from src.models.risk_manager import RiskManager
+from src.strategies.indicators import IndicatorEngine
+
+BOT_MODULES = [
+    'src.monitoring.logs', 'src.api.kucoin_client', 'src.models.market_analyzer',
+    'src.models.position_manager', 'src.models.risk_manager', 'src.models.pre_trade',
+    'src.models.order_manager', 'src.database.db_manager', 'src.database.async_db',
+    'src.database.state_snapshot', 'src.monitoring.metrics', 'src.monitoring.profiler',
+    'src.monitoring.server', 'src.cluster.coordinator', 'src.cluster.shard_client',
+]
+ML_MODULES = ['tensorflow', 'sklearn.preprocessing']
+
+IMPORT_SCRIPT = """
+import sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+for name in {modules!r}:
+    __import__(name)
+elapsed = time.perf_counter() - start
+print(elapsed, ','.join(name for name in ('tensorflow', 'keras', 'sklearn') if name in sys.modules), sep='|')
+"""
+
+
+def timed_import(python: str, modules: list, runs: int = 3):
+    """Best-of-`runs` import time in a fresh interpreter and heavy modules loaded"""
+    best, loaded = None, ''
+    for _ in range(runs):
+        result = subprocess.run([python, '-c', IMPORT_SCRIPT.format(root=ROOT, modules=modules)],
+                                capture_output=True, text=True, cwd=ROOT)
+        if result.returncode != 0:
+            return None, result.stderr.strip().splitlines()[-1]
+        elapsed, loaded = result.stdout.strip().splitlines()[-1].split('|')
+        best = min(best, float(elapsed)) if best is not None else float(elapsed)
+    return best, loaded
+
+
+def imports(python: str) -> bool:
+    elapsed, loaded = timed_import(python, BOT_MODULES)
+    if elapsed is None:
+        print(f"{'bot modules':<28} could not import: {loaded}")
+        return False
+    print(f"{'bot modules':<28} {elapsed * 1000:9.0f}ms  ML modules loaded: {loaded or 'none'}")
+
+    ml, error = timed_import(python, ML_MODULES)
+    if ml is None:
+        print(f"{'tensorflow + sklearn':<28} not importable under {python} ({error})")
+    else:
+        print(f"{'tensorflow + sklearn':<28} {ml * 1000:9.0f}ms  deferred until a model is built")
+    return not loaded
+
+
+def components() -> dict:
+    """The components TradingBot registers with its StateSnapshot"""
+    instruments = InstrumentCache()
+    risk_manager = RiskManager()
+    return {
+        'instruments': instruments,
+        'positions': PositionManager(),
+        'orders': OrderManager(None, instruments=instruments, use_stream=False),
+        'trade_stats': risk_manager.trade_stats,
+        'portfolio': risk_manager.portfolio,
+        'analyzer': MarketAnalyzer(),
+    }
+
+
+def history(rng: np.random.Generator) -> pd.DataFrame:
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, Config.ANALYSIS_LOOKBACK)))
+    return pd.DataFrame({'close': close, 'volume': rng.uniform(1, 100, len(close))})
+
+
+def populate(state: dict, symbols: list, positions: int) -> dict:
+    """Fill the components as a bot would after a day of trading"""
+    rng = np.random.default_rng(0)
+    book = state['positions']
+    for i in range(positions):
+        book.open_position(symbols[i % len(symbols)], 'long' if i % 2 else 'short',
+                           100 * (1 + rng.normal(0, 0.01)), 10.0, 5, entry_time=time.time())
+    for symbol in symbols[:len(symbols) // 6]:
+        book.check_price(symbol, 90.0)  # longs stop out, shorts take profit
+    for pnl in rng.normal(0, 5, 200):
+        state['trade_stats'].record(float(pnl))
+    for _ in range(50):
+        state['portfolio'].update_prices({s: 100 * np.exp(rng.normal(0, 0.01)) for s in symbols})
+    state['portfolio'].set_exposures({s: e.net_exposure for s, e in book.exposure.items()})
+    state['instruments'].update([{'symbol': s, 'multiplier': 0.01, 'tickSize': 0.1, 'lotSize': 1,
+                                  'maxLeverage': 50} for s in symbols])
+
+    # Cold start: every symbol's indicators rebuilt from its recent candles
+    engines = {}
+    frames = [history(rng) for _ in symbols]
+    start = time.perf_counter()
+    for symbol, frame in zip(symbols, frames):
+        engines[symbol] = IndicatorEngine()
+        engines[symbol].warm_up(symbol, frame)
+    elapsed = time.perf_counter() - start
+    print(f"{'indicator replay':<28} {elapsed * 1000:9.1f}ms  {Config.ANALYSIS_LOOKBACK} candles x "
+          f"{len(symbols)} symbols, after fetching them")
+    state['analyzer']._saved_indicators = {symbol: engine.snapshot() for symbol, engine in engines.items()}
+    return engines
+
+
+def same_state(saved: dict, restored: dict, engines: dict, symbols: list) -> bool:
+    a, b = saved['positions'], restored['positions']
+    checks = {
+        'open positions': len(a.open_positions) == len(b.open_positions),
+        'counters': (a.closed_count, a.winning_count, a.realized_pnl)
+                    == (b.closed_count, b.winning_count, b.realized_pnl),
+        'history': list(a.position_history) == list(b.position_history),
+        'exposure': all(a.get_exposure(s).net_exposure == b.get_exposure(s).net_exposure for s in symbols),
+        'unrealized pnl': all(a.unrealized_pnl(s, 101.0) == b.unrealized_pnl(s, 101.0) for s in symbols),
+        'position ids': a.open_position('X', 'long', 1, 1, 1).id == b.open_position('X', 'long', 1, 1, 1).id,
+        'trade stats': saved['trade_stats'].all.snapshot() == restored['trade_stats'].all.snapshot(),
+        'portfolio VaR': saved['portfolio'].value_at_risk() == restored['portfolio'].value_at_risk(),
+        'instruments': not restored['instruments'].stale
+                       and restored['instruments'].get(symbols[0]).multiplier == 0.01,
+    }
+    # Restored indicator state must produce the same features on the next candle
+    for symbol in symbols:
+        engine = IndicatorEngine()
+        engine.restore(restored['analyzer']._saved_indicators[symbol])
+        candle = {'close': 100.5, 'volume': 7.0}
+        if engines[symbol].update(symbol, candle) != engine.update(symbol, candle):
+            checks['indicators'] = False
+            break
+    failed = [name for name, ok in checks.items() if not ok]
+    if failed:
+        print(f"FAIL: restored state differs: {', '.join(failed)}")
+    return not failed
+
+
+async def state(symbols: int, positions: int) -> bool:
+    names = [f"SYM{i}-USDTM" for i in range(symbols)]
+    workdir = tempfile.mkdtemp()
+    path = os.path.join(workdir, 'bot_state.snapshot')
+    try:
+        saved = components()
+        engines = populate(saved, names, positions)
+
+        snapshot = StateSnapshot(path, saved)
+        start = time.perf_counter()
+        data = snapshot.capture()
+        captured = time.perf_counter() - start
+        snapshot.write(data)
+        written = time.perf_counter() - start
+        print(f"{'snapshot save':<28} {written * 1000:9.1f}ms  ({captured * 1000:.1f}ms on the event loop), "
+              f"{snapshot.last_size / 1024:.0f} KiB")
+
+        restored = components()
+        start = time.perf_counter()
+        ok = StateSnapshot(path, restored).restore()
+        print(f"{'snapshot restore':<28} {(time.perf_counter() - start) * 1000:9.1f}ms  "
+              f"{len(restored['positions'].open_positions)} positions, {symbols} symbols")
+        return ok and same_state(saved, restored, engines, names)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main(symbols: int, positions: int, python: str) -> int:
+    logging.disable(logging.WARNING)
+    ok = imports(python)
+    ok &= asyncio.run(state(symbols, positions))
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--symbols', type=int, default=300)
+    parser.add_argument('--positions', type=int, default=10000)
+    parser.add_argument('--python', default=sys.executable)
+    args = parser.parse_args()
+    sys.exit(main(args.symbols, args.positions, args.python))
@@ -0,0 +1,132 @@
+"""Sustained market-data ingest: write-behind writer versus per-call to_sql
+
+Simulates a kline firehose: every simulated minute each of `--symbols`
+symbols delivers one closed candle, stored through the live async path
+(`AsyncDatabaseManager.store_market_data`) as fast as the event loop can
+submit them, once with the configured rollup timeframes maintained and
+once without. Reports sustained inserts/sec including the final flush,
+per-call event-loop cost, batches committed and backpressure waits, then
+replays the first minute with changed prices to check the upsert and
+closes the database to check that nothing queued is lost. The original
+path (`DataFrame.to_sql` per candle on a default-journal connection) is
+measured on a separate database for comparison.
+
+    python benchmarks/write_behind.py [--symbols 500] [--minutes 20]
+
+Exits non-zero if rows are missing or duplicated after shutdown.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config import Config
+
+BASE_TIMESTAMP = 1_700_000_040
+
+
+def candle(minute: int, close: float) -> pd.DataFrame:
+    return pd.DataFrame({'timestamp': [BASE_TIMESTAMP + minute * 60], 'open': [close],
+                         'high': [close], 'low': [close], 'close': [close], 'volume': [1.0]})
+
+
+def report(label: str, rows: int, elapsed: float, per_call: np.ndarray) -> None:
+    p50, p99 = np.percentile(per_call * 1e6, [50, 99])
+    print(f"{label:<22} {rows / elapsed:10,.0f} rows/s  per call p50={p50:7.1f}us p99={p99:8.1f}us")
+
+
+async def write_behind(path: str, symbols: list, minutes: int, rollups: list) -> bool:
+    Config.DB_PATH = path
+    Config.ROLLUP_TIMEFRAMES = rollups
+    from src.database.async_db import AsyncDatabaseManager
+    from src.database.db_manager import DatabaseManager
+
+    db = AsyncDatabaseManager(DatabaseManager())
+    frames = [candle(minute, 100.0) for minute in range(minutes)]
+    per_call = []
+    start = time.perf_counter()
+    for data in frames:
+        for symbol in symbols:
+            call_start = time.perf_counter()
+            await db.store_market_data(data, symbol)
+            per_call.append(time.perf_counter() - call_start)
+    await db.flush()
+    elapsed = time.perf_counter() - start
+    writer = db.db.writer
+    label = f"write-behind{' +rollups' if rollups else ''}"
+    report(label, len(per_call), elapsed, np.array(per_call))
+    print(f"{'':<22} {writer.batches} batches, {writer.backpressure_waits} backpressure waits")
+
+    # Same keys again with new prices: must replace, not duplicate
+    for symbol in symbols:
+        await db.store_market_data(candle(0, 200.0), symbol)
+    await db.close()
+
+    conn = sqlite3.connect(path)
+    total = conn.execute("SELECT COUNT(*) FROM market_data").fetchone()[0]
+    replaced = conn.execute("SELECT COUNT(*) FROM market_data WHERE timestamp = ? AND close = 200.0",
+                            (BASE_TIMESTAMP,)).fetchone()[0]
+    conn.close()
+    expected = len(symbols) * minutes
+    print(f"{'':<22} after close: {total}/{expected} rows, {replaced}/{len(symbols)} upserted")
+    return total == expected and replaced == len(symbols)
+
+
+def to_sql_baseline(path: str, symbols: list, minutes: int) -> None:
+    """The original store_market_data: to_sql per candle, commit per call"""
+    conn = sqlite3.connect(path)
+    conn.execute('''
+        CREATE TABLE market_data (
+            timestamp INTEGER, symbol TEXT, open REAL, high REAL, low REAL,
+            close REAL, volume REAL, PRIMARY KEY (timestamp, symbol)
+        )
+    ''')
+    frames = [candle(minute, 100.0) for minute in range(minutes)]
+    per_call = []
+    start = time.perf_counter()
+    for data in frames:
+        for symbol in symbols:
+            call_start = time.perf_counter()
+            data['symbol'] = symbol
+            data.to_sql('market_data', conn, if_exists='append', index=False)
+            per_call.append(time.perf_counter() - call_start)
+    elapsed = time.perf_counter() - start
+    conn.close()
+    report('to_sql per candle', len(per_call), elapsed, np.array(per_call))
+
+
+def main(symbols: int, minutes: int) -> int:
+    logging.disable(logging.WARNING)  # slow-query warnings under backpressure
+    workdir = tempfile.mkdtemp()
+    names = [f"SYM{i}-USDT" for i in range(symbols)]
+    print(f"{symbols} symbols x {minutes} minutes = {symbols * minutes} candles")
+    try:
+        ok = True
+        for rollups in (Config.ROLLUP_TIMEFRAMES, []):
+            path = os.path.join(workdir, f"write_behind_{len(rollups)}.db")
+            ok &= asyncio.run(write_behind(path, names, minutes, rollups))
+        to_sql_baseline(os.path.join(workdir, 'to_sql.db'), names, minutes)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    if not ok:
+        print("FAIL: rows lost or duplicated")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--symbols', type=int, default=500)
+    parser.add_argument('--minutes', type=int, default=20)
+    args = parser.parse_args()
+    sys.exit(main(args.symbols, args.minutes))
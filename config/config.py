@@ -1,2 +1,121 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
 class Config:
     MODEL_UPDATE_INTERVAL = 24  # hours
+
+    # Storage
+    DB_PATH = 'data/historical_data.db'
+    HISTORICAL_DATA_DAYS = 90  # days of market data kept
+    DB_WRITE_QUEUE_SIZE = 10000  # pending write batches before producers block
+    DB_WRITE_BATCH_ROWS = 5000  # rows committed per writer transaction
+    DB_WRITE_FLUSH_INTERVAL = 0.5  # seconds a partial batch waits before commit
+    DB_RETENTION_CHUNK_ROWS = 5000  # expired rows deleted per transaction
+    DB_RETENTION_TIME_BUDGET = 0.2  # seconds of deletes per maintenance pass
+    DB_VACUUM_INTERVAL = 3600  # seconds between incremental vacuums
+    DB_VACUUM_PAGES = 1000  # free pages released per incremental vacuum
+    DB_READ_WORKERS = 4  # threads with read-only connections
+    DB_SLOW_QUERY_MS = 200  # log database operations slower than this
+    ROLLUP_TIMEFRAMES = ['5min', '15min', '1hour', '4hour', '1day']  # bars maintained from 1min candles
+    # days of bars kept per rollup timeframe; unlisted timeframes keep HISTORICAL_DATA_DAYS
+    ROLLUP_RETENTION_DAYS = {'5min': 180, '15min': 365, '1hour': 730, '4hour': 1825, '1day': 3650}
+    USE_COLUMNAR_STORE = False  # serve market data reads from memory-mapped candle files
+    CANDLE_STORE_DIR = 'data/candles'
+    STATE_SNAPSHOT_PATH = 'data/bot_state.snapshot'
+    STATE_SNAPSHOT_INTERVAL = 60  # seconds between snapshots of in-memory bot state
+    STATE_SNAPSHOT_MAX_AGE = 86400  # seconds; older snapshots are ignored on boot
+
+    # Risk
+    MAX_DRAWDOWN = 20.0  # percent
+    INITIAL_RISK_PERCENTAGE = 1.0  # percent of available balance per trade
+    STOP_LOSS_PCT = 2.0  # default position stop loss threshold
+    TAKE_PROFIT_PCT = 4.0  # default position take profit threshold
+    REVERSAL_CONFIDENCE = 0.8  # an opposing signal above this closes open positions
+    MAX_PORTFOLIO_VAR_PCT = 10.0  # percent of equity at risk over VAR_HORIZON
+    VAR_CONFIDENCE = 0.99
+    VAR_HORIZON = 86400  # seconds
+    RISK_EWMA_DECAY = 0.94  # weight of the previous covariance per price sample
+    PERFORMANCE_MIN_TRADES = 20  # closed trades before performance scales risk
+    KELLY_WINDOW_TRADES = 0  # size from the last N closed trades, 0 = all trades
+    KELLY_WINDOW_HOURS = 0  # size from trades closed in the last N hours, 0 = disabled
+    POSITION_HISTORY_SIZE = 10000  # closed trades kept in memory; all are stored in the trades table
+
+    # KuCoin API
+    KUCOIN_API_KEY = os.getenv('KUCOIN_API_KEY', '')
+    KUCOIN_API_SECRET = os.getenv('KUCOIN_API_SECRET', '')
+    KUCOIN_API_PASSPHRASE = os.getenv('KUCOIN_API_PASSPHRASE', '')
+    KUCOIN_BASE_URL = os.getenv('KUCOIN_BASE_URL', 'https://api-futures.kucoin.com')
+    ACCOUNT_CURRENCY = 'USDT'
+
+    # Pre-trade checks
+    INSTRUMENT_MAX_AGE = 3600  # seconds before contract specs are considered stale
+    PRE_TRADE_BUDGET_MS = 1.0  # warn when the check pipeline takes longer
+    DUPLICATE_ORDER_WINDOW = 30  # seconds a symbol/side order blocks repeats
+    MIN_ORDER_VALUE = 5.0  # minimum order notional in ACCOUNT_CURRENCY
+
+    # Order tracking
+    USE_ORDER_STREAM = True  # follow order state from private WebSocket execution reports
+    ORDER_RECONCILE_INTERVAL = 30  # seconds between REST order reconciliations
+    ORDER_HISTORY_SIZE = 1000  # finished orders kept in memory
+
+    # HTTP transport
+    HTTP_POOL_SIZE = 100  # max pooled keep-alive connections
+    HTTP_KEEPALIVE_TIMEOUT = 30  # seconds
+    HTTP_REQUEST_TIMEOUT = 10  # seconds
+    HTTP_MAX_RETRIES = 5  # retries after a 429 response
+    HTTP_BACKOFF_BASE = 0.5  # seconds, doubled on every retry
+    HTTP_BACKOFF_MAX = 30  # seconds
+
+    # Market data streaming
+    USE_MARKET_STREAM = True  # stream ticker/level-2/kline data over WebSocket
+
+    # Model artifacts
+    MODEL_DIR = 'models'  # saved weights, scaler and feature order per model
+    FEATURE_CACHE_DIR = 'data/feature_cache'
+
+    # Model training
+    SEQUENCE_LENGTH = 60  # candles per model input sequence
+    ANALYSIS_LOOKBACK = 200  # 1min candles read per analysis: indicator warm-up plus one sequence
+    TRAINING_EPOCHS = 100
+    TRAINING_BATCH_SIZE = 32
+    VALIDATION_SPLIT = 0.2
+    TRAINING_WORKERS = 0  # training processes, 0 = one per CPU core
+
+    # Model inference
+    INFERENCE_MAX_BATCH_SIZE = 64  # requests run through the model together
+    INFERENCE_MAX_WAIT = 0.005  # seconds the oldest request waits for a batch to fill on a shared model
+    INFERENCE_BACKEND = 'numpy'  # 'numpy' runs exported weights without TensorFlow, 'keras' the full model
+    NUMPY_LSTM_PRECISION = 'float32'  # exported weight storage: float32, float16 or int8
+    NUMPY_LSTM_RESYNC = 15  # candles streamed through a symbol's LSTM state before it is rebuilt from the window
+
+    # Symbol pipeline
+    MAX_CONCURRENT_SYMBOLS = 32  # symbols analyzed/traded in parallel
+    SYMBOL_TIMEOUT = 30  # seconds per symbol before it is abandoned for the cycle
+    LOOP_INTERVAL = 60  # seconds between cycles
+
+    # Sharded deployment
+    SHARD_WORKERS = int(os.getenv('SHARD_WORKERS', '0'))  # worker processes splitting the symbols, 0 = single process
+    SHARD_IPC_PATH = 'data/coordinator.sock'  # Unix socket served by the coordinator
+    SHARD_HASH_REPLICAS = 128  # points per worker on the consistent hash ring
+    SHARD_STARTUP_TIMEOUT = 30  # seconds workers wait for each other before the first assignment
+    SHARD_COORDINATOR_RATE_SHARE = 0.1  # fraction of the API quota kept by the coordinator; workers split the rest
+
+    # Logging
+    LOG_FILE = 'trading_bot.log'
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+    LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')  # 'text' or 'json' (one object per line)
+    LOG_MAX_BYTES = 50 * 1024 * 1024  # rotate the log file at this size
+    LOG_BACKUP_COUNT = 10  # gzip-compressed rotated files kept
+    LOG_QUEUE_SIZE = 10000  # records buffered for the writer thread before new ones are dropped
+    LOG_SAMPLE_INTERVAL = 300  # seconds over which a repetitive per-symbol line is let through once
+    LOG_SAMPLE_BURST = 1  # such lines allowed per interval before they are suppressed
+
+    # Instrumentation
+    METRICS_ENABLED = True  # serve /metrics and /profile over HTTP
+    METRICS_HOST = '127.0.0.1'
+    METRICS_PORT = 9100
+    METRICS_TOP_SYMBOLS = 10  # slowest symbols exported individually
+    PROFILER_ENABLED = False  # sample the event loop's stacks continuously from startup
+    PROFILER_INTERVAL = 0.005  # seconds between stack samples
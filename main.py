@@ -1,19 +1,23 @@
+import time
+
+# Reference point for the time-to-first-decision startup measurement
+PROCESS_START = time.perf_counter()
+
 import asyncio
 import logging
 import os
-from datetime import datetime
+from collections import defaultdict
+from datetime import datetime, timedelta
 import sys
-from typing import List, Dict
-
-# Set up basic logging immediately
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler('trading_bot.log')
-    ]
-)
+from typing import List, Dict, Optional
+
+import numpy as np
+
+from src.monitoring.logs import LogPipeline, sampled, setup_logging
+
+# Installed by the process entry points, never at import: spawned shard
+# workers and training pool children re-import this module
+log_pipeline: Optional[LogPipeline] = None
 
 logger = logging.getLogger(__name__)
 
@@ -26,7 +30,16 @@ try:
     from src.models.market_analyzer import MarketAnalyzer
     from src.models.position_manager import PositionManager
     from src.models.risk_manager import RiskManager
+    from src.models.pre_trade import PreTradeChecker
+    from src.models.order_manager import NEW, OrderManager
     from src.database.db_manager import DatabaseManager
+    from src.database.async_db import AsyncDatabaseManager
+    from src.database.state_snapshot import StateSnapshot
+    from src.monitoring.metrics import METRICS
+    from src.monitoring.profiler import SamplingProfiler
+    from src.monitoring.server import MetricsServer
+    from src.cluster.coordinator import ShardCoordinator
+    from src.cluster.shard_client import ShardClient
     from config.config import Config
     
     logger.info("Successfully imported all required modules")
@@ -35,10 +48,16 @@ except ImportError as e:
     sys.exit(1)
 
 class TradingBot:
-    def __init__(self):
+    def __init__(self, shard: ShardClient = None):
         logger.info("Initializing TradingBot instance...")
         try:
-            self.kucoin = KuCoinClient()
+            # Set when running as one worker of a sharded deployment
+            self.shard = shard
+
+            # Shards split the account's request quota instead of each using all of it
+            self.kucoin = KuCoinClient(rate_share=(
+                (1 - Config.SHARD_COORDINATOR_RATE_SHARE) / Config.SHARD_WORKERS if shard else 1.0
+            ))
             logger.info("KuCoin client initialized")
             
             self.analyzer = MarketAnalyzer()
@@ -49,17 +68,96 @@ class TradingBot:
             
             self.risk_manager = RiskManager()
             logger.info("Risk manager initialized")
+
+            self.pre_trade = PreTradeChecker(self.kucoin.instruments)
+
+            # Positions are derived from fills reported for tracked orders
+            if shard is None:
+                self.order_manager = OrderManager(self.kucoin)
+            else:
+                # Reports come from the coordinator's stream; with it, REST
+                # reconciliation is spread over the workers so the account
+                # sees one pass per ORDER_RECONCILE_INTERVAL
+                interval = Config.ORDER_RECONCILE_INTERVAL
+                workers = Config.SHARD_WORKERS if Config.USE_ORDER_STREAM else 1
+                self.order_manager = OrderManager(
+                    self.kucoin, use_stream=False, client_oid_prefix=shard.client_oid_prefix,
+                    reconcile_interval=interval * workers,
+                    reconcile_offset=interval * (shard.worker_id % workers)
+                )
+            self.order_manager.fill_listeners.append(self._on_fill)
             
-            self.db = DatabaseManager()
+            # Shards open a database the coordinator has already migrated
+            self.db = AsyncDatabaseManager(DatabaseManager(migrate=shard is None))
             logger.info("Database manager initialized")
+
+            # In-memory history is bounded; every closed trade is persisted
+            self.position_manager.close_listeners.append(self._record_trade)
+            self.position_manager.close_listeners.append(self.risk_manager.record_trade)
+
+            self.symbols: List[str] = []
+
+            self.profiler = SamplingProfiler(Config.PROFILER_INTERVAL)
+            self.metrics_server = (MetricsServer(Config.METRICS_HOST, Config.METRICS_PORT,
+                                                 profiler=self.profiler)
+                                   if Config.METRICS_ENABLED else None)
+            self._register_gauges()
+
+            # Warm restart: positions, orders, statistics and indicator state
+            self.snapshot = StateSnapshot(Config.STATE_SNAPSHOT_PATH, {
+                'instruments': self.kucoin.instruments,
+                'positions': self.position_manager,
+                'orders': self.order_manager,
+                'trade_stats': self.risk_manager.trade_stats,
+                'portfolio': self.risk_manager.portfolio,
+                'analyzer': self.analyzer,
+            }, max_age=Config.STATE_SNAPSHOT_MAX_AGE)
+            self.snapshot.restore()
+            self.first_decision = None
+            self.last_cycle: Dict[str, float] = {}
             
         except Exception as e:
             logger.error(f"Initialization error: {str(e)}")
             raise
 
+    def _register_gauges(self) -> None:
+        """Expose component state read at scrape time"""
+        METRICS.gauge('open_positions', lambda: len(self.position_manager.open_positions))
+        METRICS.gauge('open_orders', lambda: len(self.order_manager.open_orders))
+        METRICS.gauge('order_fill_latency_ms_mean',
+                      lambda: self.order_manager.stats()['fill_latency']['mean_ms'])
+        METRICS.gauge('order_reconcile_repaired', lambda: self.order_manager.repaired)
+        METRICS.gauge('pre_trade_over_budget', lambda: self.pre_trade.over_budget)
+        METRICS.gauge('portfolio_var', self.risk_manager.portfolio.value_at_risk)
+        METRICS.gauge('drawdown_pct', lambda: self.risk_manager.portfolio.drawdown_pct)
+        METRICS.gauge('startup_seconds', lambda: self.first_decision or 0.0)
+        METRICS.gauge('db_write_queue_depth', lambda: self.db.db.writer.queue_depth)
+        METRICS.gauge('db_trades_deferred', lambda: self.db.trades_deferred)
+        METRICS.gauge('feature_cache_hits', lambda: self.analyzer.feature_cache.hits)
+        METRICS.gauge('feature_cache_misses', lambda: self.analyzer.feature_cache.misses)
+        if log_pipeline is not None:
+            pipeline = log_pipeline
+            METRICS.gauge('log_queue_depth', lambda: pipeline.queue.qsize())
+            METRICS.gauge('log_records_dropped', lambda: pipeline.queue_handler.dropped)
+            METRICS.gauge('log_records_suppressed', lambda: pipeline.sampler.suppressed)
+        # One series for all symbols; per-symbol detail only for the slowest few
+        self.symbol_seconds = METRICS.histogram('symbol_seconds')
+        self.slowest_symbols = METRICS.top('slowest_symbol_seconds', 'symbol', Config.METRICS_TOP_SYMBOLS)
+
+    @METRICS.timed('stage_seconds', stage='get_active_symbols')
     async def get_market_data(self) -> List[Dict]:
         """Get market data with error handling"""
         try:
+            if self.shard is not None:
+                # Keep managing symbols with open positions after they move away
+                symbols = await self.shard.assigned_symbols()
+                if self.kucoin.instruments.stale:
+                    await self.kucoin.get_contracts()
+                assigned = set(symbols)
+                symbols += [symbol for symbol in self.position_manager.exposure
+                            if symbol not in assigned]
+                logger.info(f"Shard {self.shard.worker} assigned {len(assigned)} symbols")
+                return symbols
             symbols = await self.kucoin.get_active_symbols()
             logger.info(f"Found {len(symbols)} active symbols")
             return symbols
@@ -70,94 +168,368 @@ class TradingBot:
     async def run(self):
         """Main bot loop"""
         logger.info("Starting main bot loop...")
+        await self.analyzer.load_models()
+        await self.order_manager.start()
+        if self.shard is not None and Config.USE_ORDER_STREAM:
+            if await self.shard.subscribe_orders(self.order_manager.on_report,
+                                                 self.order_manager.schedule_reconcile):
+                # Catch up on orders restored from the snapshot
+                self.order_manager.schedule_reconcile()
+        if self.metrics_server is not None:
+            await self.metrics_server.start()
+        if Config.PROFILER_ENABLED:
+            self.profiler.start()
         
         while True:
             try:
                 # Get active trading symbols
                 symbols = await self.get_market_data()
                 
+                if self.shard is not None and not self.shard.connected:
+                    # Without the coordinator there is no account-wide risk gate
+                    raise ConnectionAbortedError("lost connection to the shard coordinator")
+
                 if not symbols:
                     logger.warning("No active symbols found, waiting before retry...")
                     await asyncio.sleep(60)
                     continue
 
+                self.symbols = symbols
+
+                if Config.USE_MARKET_STREAM:
+                    await self.update_market_stream(symbols)
+
                 # Get account balance
                 try:
-                    balance = await self.kucoin.get_account_balance()
+                    if self.shard is not None:
+                        balance = await self.shard.balance()
+                    else:
+                        balance = await self.kucoin.get_account_balance()
                     logger.info(f"Current account balance: {balance}")
                 except Exception as e:
                     logger.error(f"Error getting account balance: {str(e)}")
                     await asyncio.sleep(60)
                     continue
 
-                for symbol in symbols:
-                    logger.info(f"Processing symbol: {symbol}")
-                    try:
-                        analysis = await self.analyzer.analyze_market(symbol)
-                        positions = self.position_manager.get_positions(symbol)
-                        
-                        if positions:
-                            logger.info(f"Managing existing positions for {symbol}")
-                            await self.position_manager.manage_positions(
-                                positions, analysis, self.risk_manager
-                            )
-                        elif analysis['confidence'] > 0.7:
-                            logger.info(f"Found trading opportunity for {symbol}")
-                            # Calculate position size and place order
-                            size = self.risk_manager.calculate_position_size(
-                                balance, analysis, positions
-                            )
-                            
-                            if size > 0:
-                                try:
-                                    order = await self.kucoin.place_order(
-                                        symbol=symbol,
-                                        side=analysis['direction'],
-                                        leverage=analysis['suggested_leverage'],
-                                        size=size,
-                                        price=analysis['suggested_entry']
-                                    )
-                                    logger.info(f"New order placed: {order}")
-                                except Exception as e:
-                                    logger.error(f"Error placing order: {str(e)}")
-
-                    except Exception as e:
-                        logger.error(f"Error processing symbol {symbol}: {str(e)}")
-                        continue
+                self.update_portfolio_risk(balance)
+                await self.process_symbols(symbols, balance)
+                if self.shard is not None:
+                    await self.report_to_coordinator()
+                if self.first_decision is None:
+                    self.first_decision = time.perf_counter() - PROCESS_START
+                    logger.info(f"First trading decisions made {self.first_decision:.2f}s after start")
+                await self.save_snapshot()
 
                 await self.maintenance_tasks()
                 logger.info("Waiting for next iteration...")
-                await asyncio.sleep(60)
+                await asyncio.sleep(Config.LOOP_INTERVAL)
 
+            except ConnectionAbortedError:
+                raise
             except Exception as e:
                 logger.error(f"Error in main loop: {str(e)}")
                 await asyncio.sleep(60)
 
+    async def update_market_stream(self, symbols: List[str]) -> None:
+        """Start the streaming market-data feed or resubscribe to new symbols"""
+        try:
+            first_start = self.kucoin.stream is None
+            stream = await self.kucoin.start_market_stream(symbols)
+            if first_start:
+                stream.subscribe(self._on_market_event)
+        except Exception as e:
+            logger.error(f"Error updating market stream: {str(e)}")
+
+    def _on_market_event(self, event: Dict) -> None:
+        """Check stop loss / take profit as soon as a price tick arrives"""
+        if event['type'] == 'ticker':
+            self.position_manager.check_price(event['symbol'], event['price'])
+
+    def update_portfolio_risk(self, balance: float) -> None:
+        """Sample prices and exposures into the portfolio risk engine"""
+        try:
+            if self.kucoin.stream is not None:
+                self.risk_manager.update_market(
+                    dict(self.kucoin.stream.latest_prices),
+                    {symbol: exposure.net_exposure
+                     for symbol, exposure in self.position_manager.exposure.items()}
+                )
+            # Available balance excludes margin locked in open positions
+            drawdown = self.risk_manager.update_equity(
+                balance + self.position_manager.total_margin_used
+            )
+            logger.info(f"Portfolio VaR {self.risk_manager.portfolio.value_at_risk():.2f}, "
+                        f"drawdown {drawdown:.2f}%")
+        except Exception as e:
+            logger.error(f"Error updating portfolio risk: {str(e)}")
+
+    async def save_snapshot(self, force: bool = False) -> None:
+        """Snapshot in-memory state if STATE_SNAPSHOT_INTERVAL has passed"""
+        last = self.snapshot.last_saved
+        if not force and last is not None and time.time() - last < Config.STATE_SNAPSHOT_INTERVAL:
+            return
+        try:
+            with METRICS.timer('stage_seconds', stage='snapshot'):
+                # Capture on the loop thread for a consistent view, write off it
+                data = self.snapshot.capture()
+                await asyncio.get_running_loop().run_in_executor(None, self.snapshot.write, data)
+        except Exception as e:
+            logger.error(f"Error saving state snapshot: {str(e)}")
+
+    def _on_fill(self, order, lots: int, price: float) -> None:
+        """Open or grow the order's position by a reported fill"""
+        try:
+            instrument = self.kucoin.instruments.get(order.symbol)
+            notional = instrument.order_value(lots, price) if instrument else lots * price
+            position = self.position_manager.apply_fill(
+                order.position_id, order.symbol, order.side, price,
+                notional / order.leverage, order.leverage
+            )
+            order.position_id = position.id
+        except Exception as e:
+            logger.error(f"Error applying fill for {order.symbol}: {str(e)}")
+
+    async def report_to_coordinator(self) -> None:
+        """Send this shard's exposures, margin and prices to the risk authority"""
+        try:
+            exposures = {symbol: exposure.net_exposure
+                         for symbol, exposure in self.position_manager.exposure.items()}
+            margin = self.position_manager.total_margin_used
+            for order in self.order_manager.open_orders:
+                # Margin of resting orders stays booked until they fill or cancel;
+                # notional / leverage, the same definition as Position.margin
+                instrument = self.kucoin.instruments.get(order.symbol)
+                if instrument is not None and order.price:
+                    margin += instrument.order_value(order.remaining, order.price) / order.leverage
+            prices = dict(self.kucoin.stream.latest_prices) if self.kucoin.stream is not None else {}
+            await self.shard.report(exposures, margin, prices, self.last_cycle)
+        except Exception as e:
+            logger.error(f"Error reporting to shard coordinator: {str(e)}")
+
+    def _record_trade(self, trade: Dict) -> None:
+        """Queue a closed position for the trades table"""
+        try:
+            self.db.queue_trade(dict(trade, strategy='ml'))
+        except Exception as e:
+            logger.error(f"Error recording trade for {trade['symbol']}: {str(e)}")
+
+    async def process_symbols(self, symbols: List[str], balance: float) -> None:
+        """Process all symbols concurrently with bounded fan-out"""
+        semaphore = asyncio.Semaphore(Config.MAX_CONCURRENT_SYMBOLS)
+        timings = defaultdict(list)
+        cycle_start = time.perf_counter()
+
+        results = await asyncio.gather(*[
+            self._run_symbol(symbol, balance, semaphore, timings)
+            for symbol in symbols
+        ])
+
+        # Log outcomes in symbol order regardless of completion order
+        for symbol, result in zip(symbols, results):
+            logger.info("%s: %s", symbol, result, extra=sampled(symbol, result))
+        for symbol in set(self.slowest_symbols.values).difference(symbols):
+            self.slowest_symbols.discard(symbol)
+
+        cycle_time = time.perf_counter() - cycle_start
+        self.last_cycle = {'symbols': len(symbols), 'cycle_seconds': cycle_time}
+        self._log_latency_summary(timings, cycle_time, len(symbols))
+
+    async def _run_symbol(self, symbol: str, balance: float,
+                          semaphore: asyncio.Semaphore,
+                          timings: Dict[str, List[float]]) -> str:
+        """Run one symbol under the concurrency limit and timeout"""
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                return await asyncio.wait_for(
+                    self.process_symbol(symbol, balance, timings),
+                    timeout=Config.SYMBOL_TIMEOUT
+                )
+            except asyncio.TimeoutError:
+                METRICS.counter('symbol_failures_total', reason='timeout').inc()
+                logger.error("Timed out processing symbol %s after %ss", symbol, Config.SYMBOL_TIMEOUT)
+                return "timed out"
+            except Exception as e:
+                METRICS.counter('symbol_failures_total', reason='error').inc()
+                logger.error("Error processing symbol %s: %s", symbol, str(e))
+                return f"error: {str(e)}"
+            finally:
+                elapsed = time.perf_counter() - start
+                timings['symbol'].append(elapsed)
+                self.symbol_seconds.record(elapsed)
+                self.slowest_symbols.set(symbol, elapsed)
+
+    async def process_symbol(self, symbol: str, balance: float,
+                             timings: Dict[str, List[float]]) -> str:
+        """Analyze a single symbol and act on the result"""
+        start = time.perf_counter()
+        candles = await self.db.get_market_data(
+            symbol, start_time=datetime.now() - timedelta(minutes=Config.ANALYSIS_LOOKBACK)
+        )
+        analysis = await self.analyzer.analyze_market(symbol, candles)
+        analysis['symbol'] = symbol
+        timings['analyze'].append(time.perf_counter() - start)
+
+        if self.kucoin.stream is not None:
+            price = self.kucoin.stream.latest_price(symbol)
+            if price is not None:
+                analysis['current_price'] = price
+
+        positions = self.position_manager.get_positions(symbol)
+
+        if positions:
+            start = time.perf_counter()
+            self.position_manager.manage_positions(positions, analysis)
+            timings['manage'].append(time.perf_counter() - start)
+            return f"managed {len(positions)} existing positions"
+
+        if analysis['confidence'] <= 0.7:
+            return "no trading opportunity"
+
+        # Calculate position size and place order
+        size = self.risk_manager.calculate_position_size(
+            balance, analysis, self.position_manager.get_exposure(symbol).margin_used
+        )
+        if size <= 0:
+            return "trading opportunity skipped, position size is zero"
+
+        start = time.perf_counter()
+        request, reason = self.pre_trade.check(
+            symbol, analysis['direction'], size, analysis['suggested_leverage'],
+            analysis.get('suggested_entry') or analysis.get('current_price')
+        )
+        timings['pre_trade'].append(time.perf_counter() - start)
+        if request is None:
+            METRICS.counter('orders_total', result='rejected').inc()
+            logger.info("Order for %s rejected by pre-trade checks: %s", symbol, reason,
+                        extra=sampled(symbol))
+            return f"order rejected: {reason}"
+
+        notional = request['instrument'].order_value(request['size'], request['price'])
+        if self.shard is not None:
+            # Account-wide limits are enforced by the coordinator across shards
+            allowed, reason = await self.shard.reserve(
+                symbol, request['side'], notional, notional / request['leverage']
+            )
+        else:
+            allowed, reason = self.risk_manager.check_order(symbol, request['side'], notional, balance)
+        if not allowed:
+            METRICS.counter('orders_total', result='blocked').inc()
+            logger.warning("Order for %s blocked by portfolio risk: %s", symbol, reason,
+                           extra=sampled(symbol))
+            return f"order blocked: {reason}"
+
+        start = time.perf_counter()
+        self.pre_trade.mark_submitted(symbol, request['side'])
+        try:
+            order = await self.order_manager.submit(request)
+        except Exception as e:
+            METRICS.counter('orders_total', result='failed').inc()
+            self.pre_trade.release(symbol, request['side'])
+            if self.shard is not None:
+                await self.shard.release(symbol, request['side'], notional,
+                                         notional / request['leverage'])
+            logger.error(f"Error placing order: {str(e)}")
+            return f"order failed: {str(e)}"
+        finally:
+            timings['order'].append(time.perf_counter() - start)
+
+        if order.order_id is None and order.state == NEW:
+            # No answer from the exchange; reconcile settles it, so the guard stays
+            METRICS.counter('orders_total', result='unknown').inc()
+            return f"order outcome unknown: {order.client_oid} ({order.size} lots), reconciling"
+
+        METRICS.counter('orders_total', result='placed').inc()
+        return f"new order placed: {order.order_id} ({order.size} lots, {order.state})"
+
+    def _log_latency_summary(self, timings: Dict[str, List[float]],
+                             cycle_time: float, symbol_count: int) -> None:
+        """Log p50/p95/max latency per stage for the cycle"""
+        logger.info(f"Cycle processed {symbol_count} symbols in {cycle_time:.3f}s")
+        METRICS.histogram('cycle_seconds').record(cycle_time)
+        for stage, samples in timings.items():
+            METRICS.histogram('stage_seconds', stage=stage).record_many(samples)
+            p50, p95 = np.percentile(samples, [50, 95])
+            logger.info(
+                f"Stage {stage}: n={len(samples)} p50={p50 * 1000:.1f}ms "
+                f"p95={p95 * 1000:.1f}ms max={max(samples) * 1000:.1f}ms"
+            )
+
+    @METRICS.timed('stage_seconds', stage='maintenance')
     async def maintenance_tasks(self):
         """Perform periodic maintenance tasks"""
         logger.info("Running maintenance tasks...")
         try:
-            self.db.clean_old_data()
+            # Shards share one database; only the first one runs retention
+            if self.shard is None or self.shard.worker_id == 0:
+                await self.db.clean_old_data()
             current_time = int(datetime.now().timestamp())
             last_update = self.analyzer.get_last_update_time()
             
-            if (current_time - last_update) > (Config.MODEL_UPDATE_INTERVAL * 3600):
-                await self.analyzer.update_models()
-                logger.info("Models updated successfully")
+            if ((current_time - last_update) > (Config.MODEL_UPDATE_INTERVAL * 3600)
+                    and not self.analyzer.is_training()):
+                frames = await asyncio.gather(*[
+                    self.db.get_market_data(symbol) for symbol in self.symbols
+                ])
+                market_data = dict(zip(self.symbols, frames))
+                await self.analyzer.update_models(market_data)
+                logger.info("Model retraining scheduled")
                 
         except Exception as e:
             logger.error(f"Error in maintenance tasks: {str(e)}")
 
-async def main():
+async def run_coordinator():
+    """Split the symbol universe over SHARD_WORKERS worker processes"""
+    # Migrate and create the shared database once, before any worker opens it
+    DatabaseManager().close()
+    coordinator = ShardCoordinator(Config.SHARD_WORKERS, run_worker)
+    try:
+        await coordinator.start()
+        await coordinator.run()
+    finally:
+        await coordinator.stop()
+
+def run_worker(worker_id: int, address: str):
+    """Process entry point of one shard"""
+    # Per-shard resources that would otherwise collide between processes
+    Config.METRICS_PORT += 1 + worker_id
+    Config.STATE_SNAPSHOT_PATH = f"{Config.STATE_SNAPSHOT_PATH}.shard{worker_id}"
+    global log_pipeline
+    log_pipeline = setup_logging(f"{Config.LOG_FILE}.shard{worker_id}")
+    try:
+        asyncio.run(main(ShardClient(worker_id, address)))
+    except KeyboardInterrupt:
+        pass
+
+async def main(shard: ShardClient = None):
     logger.info("Initializing main function...")
+    bot = None
     try:
-        bot = TradingBot()
+        if shard is None and Config.SHARD_WORKERS > 0:
+            await run_coordinator()
+            return
+        if shard is not None:
+            await shard.connect()
+        bot = TradingBot(shard)
         await bot.run()
     except Exception as e:
         logger.error(f"Fatal error in main: {str(e)}")
         raise
+    finally:
+        if bot is not None:
+            await bot.analyzer.stop()
+            await bot.order_manager.stop()
+            await bot.save_snapshot(force=True)
+            if bot.metrics_server is not None:
+                await bot.metrics_server.stop()
+            bot.profiler.stop()
+            await bot.kucoin.close()
+            await bot.db.close()
+        if shard is not None:
+            await shard.close()
 
 if __name__ == "__main__":
+    log_pipeline = setup_logging()
     try:
         print("Starting bot execution...")
         asyncio.run(main())
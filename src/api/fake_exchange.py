@@ -0,0 +1,377 @@
+import argparse
+import asyncio
+import json
+import logging
+import time
+import uuid
+from typing import Dict, List, Set
+
+from aiohttp import WSMsgType, web
+
+logger = logging.getLogger(__name__)
+
+ORDER_TOPIC = '/contractMarket/tradeOrders'
+
+DEFAULT_CONTRACTS = [
+    {'symbol': 'XBTUSDTM', 'status': 'Open', 'lotSize': 1, 'tickSize': 0.1,
+     'multiplier': 0.001, 'maxLeverage': 100, 'maxOrderQty': 1000000},
+    {'symbol': 'ETHUSDTM', 'status': 'Open', 'lotSize': 1, 'tickSize': 0.01,
+     'multiplier': 0.01, 'maxLeverage': 100, 'maxOrderQty': 1000000},
+]
+
+
+class FakeExchange:
+    """Local stand-in for the KuCoin futures REST API
+
+    Serves the endpoints used by KuCoinClient with a configurable response
+    latency and an optional request quota that answers 429 once exhausted,
+    so the transport can be exercised without touching the real exchange.
+
+    The public WebSocket endpoint acts as a replay server: recorded market
+    messages (`replay`) are streamed to every connection for the topics it
+    subscribed, and `publish` pushes ad-hoc messages to live connections.
+    `drop_after` closes each connection after that many replayed messages
+    to exercise reconnect handling.
+
+    Orders are simulated deterministically: with `auto_fill` every order
+    fills completely at its limit price (or `fill_price` for market orders)
+    right after it is accepted; otherwise `fill` and `cancel` drive it by
+    hand. Each change is pushed as an orderChange execution report on the
+    private /contractMarket/tradeOrders topic, except while
+    `drop_reports` is set, which simulates lost messages for the REST
+    reconciliation path.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0,
+                 latency: float = 0.0, quota: int = None, quota_window: float = 30.0,
+                 contracts: List[Dict] = None, balance: float = 1000.0,
+                 replay: List[Dict] = None, replay_interval: float = 0.0,
+                 drop_after: int = None, snapshots: Dict[str, Dict] = None,
+                 auto_fill: bool = False, fill_price: float = None):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.quota = quota
+        self.quota_window = quota_window
+        self.contracts = contracts if contracts is not None else list(DEFAULT_CONTRACTS)
+        self.balance = balance
+        self.replay = replay or []
+        self.replay_interval = replay_interval
+        self.drop_after = drop_after
+        self.snapshots = snapshots or {}
+        self.auto_fill = auto_fill
+        self.fill_price = fill_price
+        self.drop_reports = False
+
+        self.orders: Dict[str, Dict] = {}
+        self.request_counts: Dict[str, int] = {}
+        self.rate_limited = 0
+        self._window_start = time.monotonic()
+        self._window_used = 0
+        self._runner = None
+        self._connections: Dict[web.WebSocketResponse, Set[str]] = {}
+
+        self.app = web.Application(middlewares=[self._middleware])
+        self.app.router.add_get('/api/v1/contracts/active', self._contracts)
+        self.app.router.add_get('/api/v1/account-overview', self._account_overview)
+        self.app.router.add_post('/api/v1/orders', self._place_order)
+        self.app.router.add_get('/api/v1/orders', self._list_orders)
+        self.app.router.add_get('/api/v1/orders/{order_id}', self._get_order)
+        self.app.router.add_delete('/api/v1/orders/{order_id}', self._cancel_order)
+        self.app.router.add_post('/api/v1/bullet-public', self._bullet_public)
+        self.app.router.add_post('/api/v1/bullet-private', self._bullet_public)
+        self.app.router.add_get('/api/v1/level2/snapshot', self._level2_snapshot)
+        self.app.router.add_get('/endpoint', self._websocket)
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self) -> None:
+        """Start serving on host/port (port 0 picks a free port)"""
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        logger.info(f"Fake exchange listening on {self.url}")
+
+    async def stop(self) -> None:
+        for ws in list(self._connections):
+            await ws.close()
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def _quota_exceeded(self) -> float:
+        """Consume one request from the quota, returning ms until reset if exhausted"""
+        if self.quota is None:
+            return 0.0
+
+        now = time.monotonic()
+        if now - self._window_start >= self.quota_window:
+            self._window_start = now
+            self._window_used = 0
+
+        if self._window_used >= self.quota:
+            return (self._window_start + self.quota_window - now) * 1000
+
+        self._window_used += 1
+        return 0.0
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler):
+        self.request_counts[request.path] = self.request_counts.get(request.path, 0) + 1
+
+        reset_ms = self._quota_exceeded()
+        if reset_ms:
+            self.rate_limited += 1
+            return web.json_response(
+                {'code': '429000', 'msg': 'Too Many Requests'},
+                status=429,
+                headers={'gw-ratelimit-reset': str(int(reset_ms))}
+            )
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return await handler(request)
+
+    @staticmethod
+    def _ok(data) -> web.Response:
+        return web.json_response({'code': '200000', 'data': data})
+
+    async def _contracts(self, request: web.Request) -> web.Response:
+        return self._ok(self.contracts)
+
+    async def _account_overview(self, request: web.Request) -> web.Response:
+        return self._ok({
+            'currency': request.query.get('currency', 'USDT'),
+            'accountEquity': self.balance,
+            'availableBalance': self.balance
+        })
+
+    def _multiplier(self, symbol: str) -> float:
+        for contract in self.contracts:
+            if contract['symbol'] == symbol:
+                return float(contract.get('multiplier', 1))
+        return 1.0
+
+    async def _place_order(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        order_id = uuid.uuid4().hex
+        order = {
+            'id': order_id,
+            'clientOid': body.get('clientOid'),
+            'symbol': body['symbol'],
+            'side': body['side'],
+            'type': body.get('type', 'limit'),
+            'price': body.get('price'),
+            'size': int(body['size']),
+            'leverage': body.get('leverage'),
+            'filledSize': 0,
+            'filledValue': '0',
+            'status': 'open',
+            'isActive': True,
+            'cancelExist': False,
+            'createdAt': int(time.time() * 1000),
+        }
+        self.orders[order_id] = order
+        await self._report(order, 'open')
+        if self.auto_fill:
+            asyncio.create_task(self._auto_fill(order_id))
+        return self._ok({'orderId': order_id, 'clientOid': body.get('clientOid')})
+
+    async def _auto_fill(self, order_id: str) -> None:
+        order = self.orders[order_id]
+        price = float(order['price']) if order['price'] is not None else self.fill_price
+        await self.fill(order_id, order['size'], price)
+
+    async def fill(self, order_id: str, size: int, price: float) -> None:
+        """Match `size` lots of an open order at `price`"""
+        order = self.orders[order_id]
+        size = min(size, order['size'] - order['filledSize'])
+        if not order['isActive'] or size <= 0:
+            return
+
+        order['filledSize'] += size
+        value = float(order['filledValue']) + size * price * self._multiplier(order['symbol'])
+        order['filledValue'] = str(value)
+        done = order['filledSize'] == order['size']
+        if done:
+            order['status'], order['isActive'] = 'done', False
+        await self._report(order, 'filled' if done else 'match', match_size=size, match_price=price)
+
+    async def cancel(self, order_id: str) -> None:
+        """Cancel the unfilled remainder of an order"""
+        order = self.orders[order_id]
+        if not order['isActive']:
+            return
+        order['status'], order['isActive'], order['cancelExist'] = 'done', False, True
+        await self._report(order, 'canceled')
+
+    async def _report(self, order: Dict, change: str, match_size: int = 0,
+                      match_price: float = None) -> None:
+        data = {
+            'orderId': order['id'],
+            'clientOid': order['clientOid'],
+            'symbol': order['symbol'],
+            'type': change,
+            'status': 'done' if change in ('filled', 'canceled') else ('match' if match_size else 'open'),
+            'side': order['side'],
+            'orderType': order['type'],
+            'price': order['price'],
+            'size': str(order['size']),
+            'filledSize': str(order['filledSize']),
+            'remainSize': str(order['size'] - order['filledSize']),
+            'canceledSize': str(order['size'] - order['filledSize']) if change == 'canceled' else '0',
+            'ts': int(time.time() * 1e9),
+        }
+        if match_size:
+            data.update(matchSize=str(match_size), matchPrice=str(match_price),
+                        tradeId=uuid.uuid4().hex)
+        if not self.drop_reports:
+            await self.publish({
+                'type': 'message',
+                'topic': ORDER_TOPIC,
+                'subject': 'orderChange',
+                'channelType': 'private',
+                'data': data
+            })
+
+    async def _list_orders(self, request: web.Request) -> web.Response:
+        status = request.query.get('status')
+        page = int(request.query.get('currentPage', 1))
+        page_size = int(request.query.get('pageSize', 50))
+        start_at = int(request.query.get('startAt', 0))
+
+        orders = [
+            order for order in self.orders.values()
+            if (status is None or ('open' if order['isActive'] else 'done') == (
+                'open' if status == 'active' else 'done'))
+            and order['createdAt'] >= start_at
+        ]
+        orders.sort(key=lambda order: order['createdAt'], reverse=True)
+        items = orders[(page - 1) * page_size:page * page_size]
+        return self._ok({
+            'currentPage': page,
+            'pageSize': page_size,
+            'totalNum': len(orders),
+            'totalPage': max(1, -(-len(orders) // page_size)),
+            'items': items
+        })
+
+    async def _get_order(self, request: web.Request) -> web.Response:
+        order = self.orders.get(request.match_info['order_id'])
+        if order is None:
+            return web.json_response({'code': '100001', 'msg': 'order not exist'})
+        return self._ok(order)
+
+    async def _cancel_order(self, request: web.Request) -> web.Response:
+        order_id = request.match_info['order_id']
+        if order_id not in self.orders:
+            return web.json_response({'code': '100001', 'msg': 'order not exist'})
+        await self.cancel(order_id)
+        return self._ok({'cancelledOrderIds': [order_id]})
+
+    async def _bullet_public(self, request: web.Request) -> web.Response:
+        return self._ok({
+            'token': uuid.uuid4().hex,
+            'instanceServers': [{
+                'endpoint': f"ws://{self.host}:{self.port}/endpoint",
+                'protocol': 'websocket',
+                'encrypt': False,
+                'pingInterval': 18000,
+                'pingTimeout': 10000
+            }]
+        })
+
+    async def _level2_snapshot(self, request: web.Request) -> web.Response:
+        symbol = request.query['symbol']
+        snapshot = self.snapshots.get(symbol, {'sequence': 0, 'bids': [], 'asks': []})
+        return self._ok(dict(snapshot, symbol=symbol, ts=int(time.time() * 1e9)))
+
+    @staticmethod
+    def _expand_topic(topic: str) -> Set[str]:
+        """Split '/prefix:A,B' into {'/prefix:A', '/prefix:B'}"""
+        prefix, _, symbols = topic.partition(':')
+        if not symbols:
+            return {topic}
+        return {f"{prefix}:{symbol}" for symbol in symbols.split(',') if symbol}
+
+    async def publish(self, message: Dict) -> None:
+        """Send a market message to every connection subscribed to its topic"""
+        for ws, subscribed in list(self._connections.items()):
+            if message.get('topic') in subscribed and not ws.closed:
+                await ws.send_str(json.dumps(message))
+
+    async def _replay_to(self, ws: web.WebSocketResponse) -> None:
+        sent = 0
+        for message in self.replay:
+            if self.replay_interval:
+                await asyncio.sleep(self.replay_interval)
+            if ws.closed:
+                return
+            if message.get('topic') in self._connections.get(ws, ()):
+                await ws.send_str(json.dumps(message))
+                sent += 1
+                if self.drop_after is not None and sent >= self.drop_after:
+                    await ws.close()
+                    return
+
+    async def _websocket(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self._connections[ws] = set()
+        await ws.send_json({'id': request.query.get('connectId', ''), 'type': 'welcome'})
+
+        replay_task = None
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT:
+                    continue
+                message = json.loads(msg.data)
+
+                if message.get('type') == 'ping':
+                    await ws.send_json({'id': message.get('id'), 'type': 'pong'})
+                elif message.get('type') in ('subscribe', 'unsubscribe'):
+                    topics = self._expand_topic(message['topic'])
+                    if message['type'] == 'subscribe':
+                        self._connections[ws] |= topics
+                    else:
+                        self._connections[ws] -= topics
+                    if message.get('response'):
+                        await ws.send_json({'id': message.get('id'), 'type': 'ack'})
+                    if replay_task is None and self.replay:
+                        # Replay starts on the first subscription; topics
+                        # subscribed later only see messages from then on
+                        replay_task = asyncio.create_task(self._replay_to(ws))
+        finally:
+            if replay_task is not None:
+                replay_task.cancel()
+            self._connections.pop(ws, None)
+
+        return ws
+
+
+async def _serve(host: str, port: int, latency: float, quota: int) -> None:
+    exchange = FakeExchange(host=host, port=port, latency=latency, quota=quota)
+    await exchange.start()
+    print(f"Fake exchange running at {exchange.url} (Ctrl+C to stop)")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await exchange.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a local fake KuCoin futures exchange")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument('--quota', type=int, default=None, help="requests per 30s before answering 429")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(_serve(args.host, args.port, args.latency, args.quota))
+    except KeyboardInterrupt:
+        pass
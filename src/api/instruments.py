@@ -0,0 +1,74 @@
+import math
+import time
+from typing import Dict, List, Optional
+
+
+class Instrument:
+    """Contract specification used to validate and round orders"""
+
+    __slots__ = ('symbol', 'status', 'lot_size', 'tick_size', 'multiplier',
+                 'max_leverage', 'max_order_qty')
+
+    def __init__(self, contract: Dict):
+        self.symbol = contract['symbol']
+        self.status = contract.get('status', 'Open')
+        self.lot_size = int(contract.get('lotSize') or 1)
+        self.tick_size = float(contract.get('tickSize') or 0)
+        self.multiplier = float(contract.get('multiplier') or 1)
+        self.max_leverage = int(contract.get('maxLeverage') or 1)
+        self.max_order_qty = int(contract.get('maxOrderQty') or 0)
+
+    def lots_for_value(self, value: float, price: float) -> int:
+        """Whole lots (in contracts) worth at most `value` at `price`"""
+        contracts = value / (price * self.multiplier)
+        return int(math.floor(contracts / self.lot_size + 1e-9)) * self.lot_size
+
+    def round_price(self, price: float, side: str) -> float:
+        """Round to the tick, away from crossing: buys down, sells up"""
+        if self.tick_size <= 0:
+            return price
+        ticks = price / self.tick_size
+        ticks = math.floor(ticks + 1e-9) if side == 'long' else math.ceil(ticks - 1e-9)
+        # Strip float noise so the price serializes at tick precision
+        decimals = max(0, -int(math.floor(math.log10(self.tick_size))))
+        return round(ticks * self.tick_size, decimals)
+
+    def order_value(self, lots: int, price: float) -> float:
+        return lots * self.multiplier * price
+
+
+class InstrumentCache:
+    """Contract specs by symbol, refreshed from /api/v1/contracts/active"""
+
+    def __init__(self, max_age: float = 3600):
+        self.max_age = max_age
+        self.instruments: Dict[str, Instrument] = {}
+        self.updated = 0.0
+
+    def update(self, contracts: List[Dict]) -> None:
+        self.instruments = {contract['symbol']: Instrument(contract) for contract in contracts}
+        self.updated = time.monotonic()
+
+    @property
+    def stale(self) -> bool:
+        return not self.instruments or time.monotonic() - self.updated > self.max_age
+
+    def get(self, symbol: str) -> Optional[Instrument]:
+        return self.instruments.get(symbol)
+
+    def snapshot(self) -> Dict:
+        return {
+            'contracts': [{
+                'symbol': i.symbol, 'status': i.status, 'lotSize': i.lot_size,
+                'tickSize': i.tick_size, 'multiplier': i.multiplier,
+                'maxLeverage': i.max_leverage, 'maxOrderQty': i.max_order_qty
+            } for i in self.instruments.values()],
+            # Monotonic clocks restart with the process, so keep the age in wall time
+            'updated_at': time.time() - (time.monotonic() - self.updated),
+        }
+
+    def restore(self, state: Dict) -> None:
+        """Reload saved specs; they still go stale `max_age` after the original fetch"""
+        self.instruments = {contract['symbol']: Instrument(contract)
+                            for contract in state['contracts']}
+        self.updated = time.monotonic() - (time.time() - state['updated_at'])
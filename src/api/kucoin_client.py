@@ -1,38 +1,255 @@
-import logging
-from typing import List, Dict
 import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import random
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from urllib.parse import urlencode
+
+import aiohttp
+
+from config.config import Config
+from src.api.instruments import InstrumentCache
+from src.api.market_stream import MarketDataStream
+from src.api.rate_limiter import create_buckets, endpoint_weight
+from src.monitoring.logs import sampled
 
 logger = logging.getLogger(__name__)
 
+
+class KuCoinAPIError(Exception):
+    """Raised when the exchange rejects a request"""
+
+    def __init__(self, message: str, code: Optional[str] = None, status: Optional[int] = None):
+        super().__init__(message)
+        self.code = code
+        self.status = status
+
+
 class KuCoinClient:
-    def __init__(self):
+    def __init__(self, base_url: str = None, rate_share: float = 1.0):
         logger.info("Initializing KuCoin client")
-        # Add actual initialization here
+        self.base_url = (base_url or Config.KUCOIN_BASE_URL).rstrip('/')
+        self.api_key = Config.KUCOIN_API_KEY
+        self.api_secret = Config.KUCOIN_API_SECRET
+        self.api_passphrase = Config.KUCOIN_API_PASSPHRASE
+
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._buckets = create_buckets(rate_share)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.stream: Optional[MarketDataStream] = None
+        self.instruments = InstrumentCache(Config.INSTRUMENT_MAX_AGE)
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared pooled session, creating it on first use"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=Config.HTTP_POOL_SIZE,
+                keepalive_timeout=Config.HTTP_KEEPALIVE_TIMEOUT,
+                ttl_dns_cache=300
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=Config.HTTP_REQUEST_TIMEOUT)
+            )
+        return self._session
+
+    async def close(self) -> None:
+        """Stop market streaming and close the shared HTTP session"""
+        if self.stream is not None:
+            await self.stream.stop()
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def _sign_headers(self, method: str, path: str, body: str) -> Dict[str, str]:
+        """Build KuCoin v2 authentication headers"""
+        timestamp = str(int(time.time() * 1000))
+        secret = self.api_secret.encode('utf-8')
+        payload = f"{timestamp}{method}{path}{body}".encode('utf-8')
+
+        signature = base64.b64encode(hmac.new(secret, payload, hashlib.sha256).digest())
+        passphrase = base64.b64encode(
+            hmac.new(secret, self.api_passphrase.encode('utf-8'), hashlib.sha256).digest()
+        )
+
+        return {
+            'KC-API-KEY': self.api_key,
+            'KC-API-SIGN': signature.decode(),
+            'KC-API-TIMESTAMP': timestamp,
+            'KC-API-PASSPHRASE': passphrase.decode(),
+            'KC-API-KEY-VERSION': '2',
+            'Content-Type': 'application/json'
+        }
+
+    def _retry_delay(self, response: aiohttp.ClientResponse, attempt: int) -> float:
+        """Delay before retrying a rate limited request
+
+        KuCoin's gw-ratelimit-reset (milliseconds) wins, then a standard
+        Retry-After in seconds, then exponential backoff with jitter.
+        """
+        for header, scale in (('gw-ratelimit-reset', 1000), ('Retry-After', 1)):
+            value = response.headers.get(header)
+            if value is not None:
+                try:
+                    return max(float(value) / scale, 0.0)
+                except ValueError:
+                    pass
+
+        backoff = min(Config.HTTP_BACKOFF_BASE * (2 ** attempt), Config.HTTP_BACKOFF_MAX)
+        return backoff + random.uniform(0, backoff / 2)
+
+    async def _request(self, method: str, endpoint: str,
+                       params: Dict = None, body: Dict = None,
+                       signed: bool = True) -> Any:
+        """Send a rate limited request and return the response data"""
+        pool, weight = endpoint_weight(endpoint)
+        bucket = self._buckets[pool]
+
+        path = endpoint + ('?' + urlencode(params) if params else '')
+        data = json.dumps(body) if body is not None else ''
+
+        for attempt in range(Config.HTTP_MAX_RETRIES + 1):
+            await bucket.acquire(weight)
+            headers = self._sign_headers(method, path, data) if signed else {}
+            session = await self._get_session()
+
+            async with session.request(method, self.base_url + path,
+                                       data=data or None, headers=headers) as response:
+                if response.status == 429:
+                    delay = self._retry_delay(response, attempt)
+                    bucket.pause(delay)
+                    logger.warning("Rate limited on %s, retrying in %.2fs", endpoint, delay,
+                                   extra=sampled(endpoint))
+                    await asyncio.sleep(delay)
+                    continue
+
+                try:
+                    payload = await response.json(content_type=None)
+                except ValueError:
+                    payload = None
+
+            if not isinstance(payload, dict):
+                # Not a KuCoin envelope (empty body, gateway error page, bare list):
+                # no error code, so callers cannot tell whether it took effect
+                raise KuCoinAPIError(f"{method} {endpoint} returned an unexpected "
+                                     f"{response.status} response: {payload!r:.200}",
+                                     status=response.status)
+            if payload.get('code') != '200000':
+                raise KuCoinAPIError(
+                    f"{method} {endpoint} failed: {payload.get('msg', payload)}",
+                    code=payload.get('code'),
+                    status=response.status
+                )
+            return payload.get('data')
+
+        raise KuCoinAPIError(f"{method} {endpoint} still rate limited after "
+                             f"{Config.HTTP_MAX_RETRIES} retries", code='429000', status=429)
+
+    async def _coalesce(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Share a single in-flight request between concurrent callers"""
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(factory())
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(future)
+
+    async def get_contracts(self) -> List[Dict]:
+        """Get active contract specifications and refresh the instrument cache"""
+        contracts = await self._coalesce(
+            'contracts',
+            lambda: self._request('GET', '/api/v1/contracts/active', signed=False)
+        ) or []
+        self.instruments.update(contracts)
+        return contracts
 
     async def get_active_symbols(self) -> List[str]:
         """Get active trading symbols"""
         logger.info("Fetching active symbols")
-        # This is a placeholder implementation
-        await asyncio.sleep(1)  # Simulate API call
-        return ["BTC-USDT", "ETH-USDT"]  # Return sample symbols
+        contracts = await self.get_contracts()
+        return [c['symbol'] for c in contracts if c.get('status') == 'Open']
 
     async def get_account_balance(self) -> float:
         """Get account balance"""
         logger.info("Fetching account balance")
-        # This is a placeholder implementation
-        await asyncio.sleep(1)  # Simulate API call
-        return 1000.0  # Return sample balance
+        overview = await self._coalesce(
+            'account-overview',
+            lambda: self._request('GET', '/api/v1/account-overview',
+                                  params={'currency': Config.ACCOUNT_CURRENCY})
+        )
+        return float(overview['availableBalance'])
 
-    async def place_order(self, symbol: str, side: str, leverage: int, 
-                         size: float, price: float = None) -> Dict:
+    async def place_order(self, symbol: str, side: str, leverage: int,
+                         size: float, price: float = None,
+                         client_oid: str = None) -> Dict:
         """Place a new order"""
-        logger.info(f"Placing order: {symbol} {side} {size}")
-        # This is a placeholder implementation
-        await asyncio.sleep(1)  # Simulate API call
+        logger.info("Placing order: %s %s %s", symbol, side, size)
+        body = {
+            'clientOid': client_oid or uuid.uuid4().hex,
+            'symbol': symbol,
+            'side': 'buy' if side == 'long' else 'sell',
+            'leverage': str(leverage),
+            'size': size,
+            'type': 'market' if price is None else 'limit'
+        }
+        if price is not None:
+            body['price'] = str(price)
+
+        data = await self._request('POST', '/api/v1/orders', body=body)
         return {
-            "orderId": "sample-order-id",
+            "orderId": data['orderId'],
+            "clientOid": body['clientOid'],
             "symbol": symbol,
             "side": side,
             "size": size,
             "status": "success"
         }
+
+    async def get_orders(self, status: str = 'active', start_at: int = None,
+                         page_size: int = 1000) -> List[Dict]:
+        """List orders by status ('active' or 'done'), following every page"""
+        params = {'status': status, 'pageSize': page_size, 'currentPage': 1}
+        if start_at is not None:
+            params['startAt'] = start_at
+
+        orders = []
+        while True:
+            page = await self._request('GET', '/api/v1/orders', params=dict(params))
+            if not isinstance(page, dict):
+                # Unpaginated: a bare list of orders, or null when there are none
+                return orders + (page or [])
+            orders.extend(page.get('items') or [])
+            if params['currentPage'] >= page.get('totalPage', 1):
+                return orders
+            params['currentPage'] += 1
+
+    async def cancel_order(self, order_id: str) -> Dict:
+        """Cancel an open order"""
+        return await self._request('DELETE', f'/api/v1/orders/{order_id}')
+
+    async def get_private_ws_endpoint(self) -> Dict:
+        """Get a private WebSocket token and server list"""
+        return await self._request('POST', '/api/v1/bullet-private')
+
+    async def get_public_ws_endpoint(self) -> Dict:
+        """Get a public WebSocket token and server list"""
+        return await self._request('POST', '/api/v1/bullet-public', signed=False)
+
+    async def get_order_book_snapshot(self, symbol: str) -> Dict:
+        """Get a full level-2 order book snapshot"""
+        return await self._request('GET', '/api/v1/level2/snapshot',
+                                   params={'symbol': symbol}, signed=False)
+
+    async def start_market_stream(self, symbols: List[str]) -> MarketDataStream:
+        """Start streaming market data for symbols, or update the subscribed set"""
+        if self.stream is None:
+            self.stream = MarketDataStream(self, symbols)
+            await self.stream.start()
+        else:
+            await self.stream.set_symbols(symbols)
+        return self.stream
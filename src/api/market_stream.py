@@ -0,0 +1,375 @@
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+import aiohttp
+
+from src.monitoring.logs import sampled
+
+logger = logging.getLogger(__name__)
+
+TICKER_TOPIC = '/contractMarket/ticker'
+LEVEL2_TOPIC = '/contractMarket/level2'
+KLINE_TOPIC = '/contractMarket/limitCandle'
+
+MAX_SYMBOLS_PER_TOPIC = 100  # KuCoin limit on comma-separated symbols per subscription
+
+
+class OrderBook:
+    """Level-2 order book kept in sync with incremental updates"""
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.bids: Dict[float, float] = {}
+        self.asks: Dict[float, float] = {}
+        self.sequence: Optional[int] = None  # None until a snapshot is loaded
+        self.updated = 0.0
+
+    @property
+    def synced(self) -> bool:
+        return self.sequence is not None
+
+    def load_snapshot(self, snapshot: Dict) -> None:
+        """Replace the book with a REST snapshot"""
+        self.bids = {float(price): float(size) for price, size in snapshot.get('bids', [])}
+        self.asks = {float(price): float(size) for price, size in snapshot.get('asks', [])}
+        self.sequence = int(snapshot['sequence'])
+        self.updated = time.time()
+
+    def apply_change(self, sequence: int, change: str) -> bool:
+        """Apply an incremental update, returning False on a sequence gap"""
+        if sequence <= self.sequence:
+            return True  # Already contained in the snapshot
+
+        if sequence != self.sequence + 1:
+            return False
+
+        price, side, size = change.split(',')
+        levels = self.bids if side == 'buy' else self.asks
+        price, size = float(price), float(size)
+
+        if size == 0:
+            levels.pop(price, None)
+        else:
+            levels[price] = size
+
+        self.sequence = sequence
+        self.updated = time.time()
+        return True
+
+    def best_bid(self) -> Optional[float]:
+        return max(self.bids) if self.bids else None
+
+    def best_ask(self) -> Optional[float]:
+        return min(self.asks) if self.asks else None
+
+    def snapshot(self, depth: int = 20) -> Dict:
+        """Top `depth` levels per side"""
+        return {
+            'symbol': self.symbol,
+            'sequence': self.sequence,
+            'bids': sorted(self.bids.items(), reverse=True)[:depth],
+            'asks': sorted(self.asks.items())[:depth],
+        }
+
+
+class MarketDataStream:
+    """Multiplexed KuCoin futures market-data WebSocket
+
+    Subscribes ticker, level-2 and kline channels for a set of symbols over a
+    single connection, keeps the latest price, order book and candle per
+    symbol in memory and pushes every update to registered subscribers.
+    Dropped connections are re-established with backoff and order books are
+    resynced from REST snapshots on reconnect or when a sequence gap is seen.
+
+    Each symbol has at most one resync task at a time; it retries failed
+    snapshot fetches with the same backoff as reconnects and refetches
+    when buffered updates do not line up with the snapshot. Updates
+    received while a book resyncs are buffered up to `max_pending` per
+    symbol, oldest dropped first (which the replay then sees as a gap).
+    """
+
+    def __init__(self, client, symbols: Iterable[str] = (),
+                 kline_interval: str = '1min',
+                 reconnect_delay: float = 1.0, max_reconnect_delay: float = 30.0,
+                 max_pending: int = 10000):
+        self.client = client
+        self.symbols: Set[str] = set(symbols)
+        self.kline_interval = kline_interval
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.max_pending = max_pending
+
+        self.latest_prices: Dict[str, float] = {}
+        self.tickers: Dict[str, Dict] = {}
+        self.books: Dict[str, OrderBook] = {}
+        self.candles: Dict[str, Dict] = {}
+
+        self.reconnects = 0
+        self.gaps_detected = 0
+        self.connected = asyncio.Event()
+
+        self._subscribers: List[Callable[[Dict], None]] = []
+        self._ws: Optional[aiohttp.ClientWebSocketResponse] = None
+        self._task: Optional[asyncio.Task] = None
+        self._pending: Dict[str, deque] = {}
+        self._resync_tasks: Dict[str, asyncio.Task] = {}
+        self._callback_tasks: Set[asyncio.Task] = set()
+
+    def subscribe(self, callback: Callable[[Dict], None]) -> Callable[[Dict], None]:
+        """Register a callback (plain function or coroutine) for market events"""
+        self._subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback: Callable[[Dict], None]) -> None:
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def latest_price(self, symbol: str) -> Optional[float]:
+        return self.latest_prices.get(symbol)
+
+    def order_book(self, symbol: str) -> Optional[OrderBook]:
+        book = self.books.get(symbol)
+        return book if book is not None and book.synced else None
+
+    async def start(self) -> None:
+        """Start the connection loop in the background"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._ws is not None and not self._ws.closed:
+            await self._ws.close()
+        self.connected.clear()
+
+    async def set_symbols(self, symbols: Iterable[str]) -> None:
+        """Change the subscribed symbol set without reconnecting"""
+        symbols = set(symbols)
+        added, removed = symbols - self.symbols, self.symbols - symbols
+        self.symbols = symbols
+
+        for symbol in removed:
+            self.books.pop(symbol, None)
+            self._pending.pop(symbol, None)
+            task = self._resync_tasks.pop(symbol, None)
+            if task is not None:
+                task.cancel()
+        for symbol in added:
+            self.books[symbol] = OrderBook(symbol)
+            self._pending[symbol] = deque(maxlen=self.max_pending)
+
+        if self._ws is not None and not self._ws.closed:
+            if removed:
+                await self._send_subscriptions(removed, 'unsubscribe')
+            if added:
+                await self._send_subscriptions(added, 'subscribe')
+                for symbol in added:
+                    self._schedule_resync(symbol)
+
+    async def _run(self) -> None:
+        delay = self.reconnect_delay
+        while True:
+            try:
+                await self._connect_and_consume()
+                delay = self.reconnect_delay
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Market stream error: {str(e)}")
+
+            self.connected.clear()
+            self.reconnects += 1
+            logger.warning(f"Market stream disconnected, reconnecting in {delay:.1f}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    async def _connect_and_consume(self) -> None:
+        info = await self.client.get_public_ws_endpoint()
+        server = info['instanceServers'][0]
+        url = f"{server['endpoint']}?token={info['token']}&connectId={uuid.uuid4().hex}"
+        session = await self.client._get_session()
+
+        async with session.ws_connect(url) as ws:
+            self._ws = ws
+            welcome = await ws.receive_json(timeout=10)
+            if welcome.get('type') != 'welcome':
+                raise ConnectionError(f"Unexpected handshake message: {welcome}")
+
+            # Subscribe first so level-2 updates are buffered while snapshots load
+            for symbol in self.symbols:
+                self.books[symbol] = OrderBook(symbol)
+                self._pending[symbol] = deque(maxlen=self.max_pending)
+            await self._send_subscriptions(self.symbols, 'subscribe')
+            self.connected.set()
+            logger.info(f"Market stream connected, {len(self.symbols)} symbols subscribed")
+
+            ping_task = asyncio.create_task(self._ping(ws, server.get('pingInterval', 18000) / 1000))
+            for symbol in self.symbols:
+                self._schedule_resync(symbol)
+            try:
+                async for msg in ws:
+                    if msg.type == aiohttp.WSMsgType.TEXT:
+                        self._handle_message(json.loads(msg.data))
+                    elif msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                        break
+            finally:
+                ping_task.cancel()
+                for task in self._resync_tasks.values():
+                    task.cancel()
+                self._resync_tasks.clear()
+                self._ws = None
+
+    async def _ping(self, ws: aiohttp.ClientWebSocketResponse, interval: float) -> None:
+        while not ws.closed:
+            await asyncio.sleep(interval)
+            await ws.send_json({'id': uuid.uuid4().hex, 'type': 'ping'})
+
+    async def _send_subscriptions(self, symbols: Iterable[str], action: str) -> None:
+        symbols = sorted(symbols)
+        for i in range(0, len(symbols), MAX_SYMBOLS_PER_TOPIC):
+            chunk = symbols[i:i + MAX_SYMBOLS_PER_TOPIC]
+            joined = ','.join(chunk)
+            topics = [
+                f"{TICKER_TOPIC}:{joined}",
+                f"{LEVEL2_TOPIC}:{joined}",
+                f"{KLINE_TOPIC}:{','.join(f'{s}_{self.kline_interval}' for s in chunk)}",
+            ]
+            for topic in topics:
+                await self._ws.send_json({
+                    'id': uuid.uuid4().hex,
+                    'type': action,
+                    'topic': topic,
+                    'privateChannel': False,
+                    'response': True
+                })
+
+    def _schedule_resync(self, symbol: str) -> None:
+        """Mark a book unsynced and start its resync unless one is running"""
+        book = self.books.setdefault(symbol, OrderBook(symbol))
+        book.sequence = None
+        if symbol not in self._pending:
+            self._pending[symbol] = deque(maxlen=self.max_pending)
+        task = self._resync_tasks.get(symbol)
+        if task is None or task.done():
+            self._resync_tasks[symbol] = asyncio.create_task(self._resync(symbol, book))
+
+    async def _resync(self, symbol: str, book: OrderBook) -> None:
+        """Reload a book from a REST snapshot and replay buffered updates"""
+        delay = self.reconnect_delay
+        try:
+            while symbol in self.symbols:
+                try:
+                    snapshot = await self.client.get_order_book_snapshot(symbol)
+                except Exception as e:
+                    logger.error("Error loading order book snapshot for %s, retrying in %.1fs: %s",
+                                 symbol, delay, str(e), extra=sampled(symbol))
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, self.max_reconnect_delay)
+                    continue
+
+                if symbol not in self.symbols:
+                    return
+
+                book.load_snapshot(snapshot)
+                pending = self._pending.pop(symbol, ())
+                gap = next((sequence for sequence, change in pending
+                            if not book.apply_change(sequence, change)), None)
+                if gap is None:
+                    self._publish({'type': 'book', 'symbol': symbol, 'book': book, 'resync': True})
+                    return
+
+                # Buffered updates start after the snapshot; fetch a newer one
+                self.gaps_detected += 1
+                logger.warning("Order book snapshot for %s at %s predates buffered update %s; refetching",
+                               symbol, book.sequence, gap, extra=sampled(symbol))
+                book.sequence = None
+                self._pending[symbol] = deque(maxlen=self.max_pending)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+        finally:
+            if self._resync_tasks.get(symbol) is asyncio.current_task():
+                del self._resync_tasks[symbol]
+
+    def _on_gap(self, symbol: str, expected: int, received: int) -> None:
+        self.gaps_detected += 1
+        logger.warning("Order book sequence gap for %s: expected %s, got %s; resyncing",
+                       symbol, expected + 1, received, extra=sampled(symbol))
+        self._schedule_resync(symbol)
+
+    def _handle_message(self, message: Dict) -> None:
+        if message.get('type') != 'message':
+            if message.get('type') == 'error':
+                logger.error(f"Market stream error message: {message}")
+            return
+
+        topic = message.get('topic', '')
+        data = message.get('data', {})
+
+        if topic.startswith(TICKER_TOPIC + ':'):
+            self._handle_ticker(data)
+        elif topic.startswith(LEVEL2_TOPIC + ':'):
+            self._handle_level2(topic.split(':', 1)[1], data)
+        elif topic.startswith(KLINE_TOPIC + ':'):
+            self._handle_kline(data)
+
+    def _handle_ticker(self, data: Dict) -> None:
+        symbol = data['symbol']
+        price = float(data['price'])
+        self.latest_prices[symbol] = price
+        self.tickers[symbol] = data
+        self._publish({'type': 'ticker', 'symbol': symbol, 'price': price, 'ts': data.get('ts')})
+
+    def _handle_level2(self, symbol: str, data: Dict) -> None:
+        book = self.books.get(symbol)
+        if book is None:
+            return
+
+        sequence = int(data['sequence'])
+        if not book.synced:
+            if symbol in self._pending:
+                self._pending[symbol].append((sequence, data['change']))
+            return
+
+        if not book.apply_change(sequence, data['change']):
+            self._on_gap(symbol, book.sequence, sequence)
+            # Newer than the book, so the snapshot may not contain it yet
+            self._pending[symbol].append((sequence, data['change']))
+            return
+
+        self._publish({'type': 'book', 'symbol': symbol, 'book': book, 'resync': False})
+
+    def _handle_kline(self, data: Dict) -> None:
+        symbol = data['symbol']
+        ts, open_, close, high, low, volume = data['candles'][:6]
+        candle = {
+            'timestamp': int(ts),
+            'open': float(open_),
+            'high': float(high),
+            'low': float(low),
+            'close': float(close),
+            'volume': float(volume)
+        }
+        self.candles[symbol] = candle
+        self._publish({'type': 'candle', 'symbol': symbol, 'candle': candle})
+
+    def _publish(self, event: Dict) -> None:
+        for callback in list(self._subscribers):
+            try:
+                result = callback(event)
+                if asyncio.iscoroutine(result):
+                    task = asyncio.create_task(result)
+                    self._callback_tasks.add(task)
+                    task.add_done_callback(self._callback_tasks.discard)
+            except Exception as e:
+                logger.error(f"Market stream subscriber error: {str(e)}")
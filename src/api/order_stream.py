@@ -0,0 +1,123 @@
+import asyncio
+import json
+import logging
+import time
+import uuid
+from typing import Callable, Dict, List, Optional
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+ORDER_TOPIC = '/contractMarket/tradeOrders'
+
+
+class OrderEventStream:
+    """Private KuCoin futures WebSocket carrying execution reports
+
+    Subscribes to the account's orderChange messages and hands each one to
+    the registered callbacks together with its local receive time
+    (`time.perf_counter()`). Reports can be missed while disconnected, so
+    `on_reconnect` callbacks run after every successful (re)subscription to
+    let the owner reconcile over REST.
+    """
+
+    def __init__(self, client, reconnect_delay: float = 1.0, max_reconnect_delay: float = 30.0):
+        self.client = client
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+
+        self.reconnects = 0
+        self.connected = asyncio.Event()
+        self._callbacks: List[Callable[[Dict, float], None]] = []
+        self._reconnect_callbacks: List[Callable[[], None]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self, callback: Callable[[Dict, float], None]) -> None:
+        self._callbacks.append(callback)
+
+    def on_reconnect(self, callback: Callable[[], None]) -> None:
+        self._reconnect_callbacks.append(callback)
+
+    async def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.connected.clear()
+
+    async def _run(self) -> None:
+        delay = self.reconnect_delay
+        while True:
+            try:
+                await self._connect_and_consume()
+                delay = self.reconnect_delay
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Order stream error: {str(e)}")
+
+            self.connected.clear()
+            self.reconnects += 1
+            logger.warning(f"Order stream disconnected, reconnecting in {delay:.1f}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    async def _connect_and_consume(self) -> None:
+        info = await self.client.get_private_ws_endpoint()
+        server = info['instanceServers'][0]
+        url = f"{server['endpoint']}?token={info['token']}&connectId={uuid.uuid4().hex}"
+        session = await self.client._get_session()
+
+        async with session.ws_connect(url) as ws:
+            welcome = await ws.receive_json(timeout=10)
+            if welcome.get('type') != 'welcome':
+                raise ConnectionError(f"Unexpected handshake message: {welcome}")
+
+            await ws.send_json({
+                'id': uuid.uuid4().hex,
+                'type': 'subscribe',
+                'topic': ORDER_TOPIC,
+                'privateChannel': True,
+                'response': True
+            })
+            self.connected.set()
+            logger.info("Order stream connected")
+            for callback in self._reconnect_callbacks:
+                callback()
+
+            ping_task = asyncio.create_task(self._ping(ws, server.get('pingInterval', 18000) / 1000))
+            try:
+                async for msg in ws:
+                    if msg.type == aiohttp.WSMsgType.TEXT:
+                        self._handle_message(json.loads(msg.data), time.perf_counter())
+                    elif msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                        break
+            finally:
+                ping_task.cancel()
+
+    async def _ping(self, ws: aiohttp.ClientWebSocketResponse, interval: float) -> None:
+        while not ws.closed:
+            await asyncio.sleep(interval)
+            await ws.send_json({'id': uuid.uuid4().hex, 'type': 'ping'})
+
+    def _handle_message(self, message: Dict, received: float) -> None:
+        if message.get('type') != 'message' or message.get('topic') != ORDER_TOPIC:
+            if message.get('type') == 'error':
+                logger.error(f"Order stream error message: {message}")
+            return
+        if message.get('subject') != 'orderChange':
+            return
+
+        for callback in self._callbacks:
+            try:
+                callback(message['data'], received)
+            except Exception as e:
+                logger.error(f"Error in order stream callback: {str(e)}")
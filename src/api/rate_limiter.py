@@ -0,0 +1,76 @@
+import asyncio
+import time
+from typing import Dict, Tuple
+
+# KuCoin futures resource pools: (quota, window in seconds) for VIP0 accounts
+RATE_LIMIT_POOLS: Dict[str, Tuple[int, int]] = {
+    'public': (2000, 30),
+    'futures': (2000, 30),
+}
+
+# Request weight per endpoint: (resource pool, weight)
+ENDPOINT_WEIGHTS: Dict[str, Tuple[str, int]] = {
+    '/api/v1/contracts/active': ('public', 3),
+    '/api/v1/level2/snapshot': ('public', 3),
+    '/api/v1/bullet-public': ('public', 10),
+    '/api/v1/bullet-private': ('futures', 10),
+    '/api/v1/account-overview': ('futures', 5),
+    '/api/v1/orders': ('futures', 2),
+}
+
+DEFAULT_WEIGHT: Tuple[str, int] = ('futures', 1)
+
+
+class TokenBucket:
+    """Async token bucket refilled continuously over a fixed window"""
+
+    def __init__(self, capacity: int, window: float):
+        self.capacity = capacity
+        self.rate = capacity / window
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, weight: int = 1) -> None:
+        """Wait until `weight` tokens are available and consume them"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+
+                self._refill(now)
+                if self.tokens >= weight:
+                    self.tokens -= weight
+                    return
+
+                await asyncio.sleep((weight - self.tokens) / self.rate)
+
+    def pause(self, seconds: float) -> None:
+        """Block the bucket after the exchange reported the quota exhausted"""
+        self.tokens = 0.0
+        self.updated = time.monotonic()
+        self.blocked_until = max(self.blocked_until, self.updated + seconds)
+
+
+def create_buckets(share: float = 1.0) -> Dict[str, TokenBucket]:
+    """Create one token bucket per KuCoin resource pool
+
+    `share` is the fraction of each account-wide quota this process may
+    use, for processes sharing one API key.
+    """
+    return {
+        pool: TokenBucket(max(1, int(quota * share)), window)
+        for pool, (quota, window) in RATE_LIMIT_POOLS.items()
+    }
+
+
+def endpoint_weight(endpoint: str) -> Tuple[str, int]:
+    """Resource pool and weight charged for an endpoint"""
+    return ENDPOINT_WEIGHTS.get(endpoint, DEFAULT_WEIGHT)
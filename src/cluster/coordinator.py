@@ -0,0 +1,243 @@
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import signal
+from typing import Callable, Dict, List, Optional
+
+from config.config import Config
+from src.api.kucoin_client import KuCoinClient
+from src.api.order_stream import OrderEventStream
+from src.cluster.hash_ring import ConsistentHashRing, moved_keys
+from src.cluster.risk_authority import RiskAuthority
+
+logger = logging.getLogger(__name__)
+
+
+class ShardCoordinator:
+    """Runs the symbol universe across worker processes
+
+    The coordinator owns the exchange-wide view: it polls active symbols
+    and the account balance once per cycle, partitions symbols over the
+    connected workers with a consistent hash ring and serves every worker
+    over a local Unix socket (newline-delimited JSON request/response):
+
+        hello        register a worker, adding it to the ring
+        assignment   the worker's current symbols
+        balance      account balance net of margin reserved by any shard
+        reserve      account-wide risk check for one order (RiskAuthority)
+        release      undo a reservation for an order that failed
+        report       the worker's exposures, margin, prices and cycle stats
+        subscribe    turn this connection into the worker's order feed
+
+    The coordinator holds the account's only private order stream and
+    pushes each execution report down the feed of the worker named by the
+    report's clientOid prefix (`w<id>-`), followed by a reconnect notice
+    whenever the stream resubscribes, so workers neither open N streams
+    nor learn about each other's orders.
+
+    All processes share one API key, so the coordinator keeps
+    SHARD_COORDINATOR_RATE_SHARE of each request quota and every worker
+    rate-limits itself to an equal split of the rest.
+
+    A worker that disconnects leaves the ring, so its symbols move to the
+    others until it is restarted and says hello again. Worker processes are
+    started with `worker_target(worker_id, address)` and restarted if they
+    exit; a worker that loses the coordinator stops trading and exits.
+    """
+
+    def __init__(self, workers: int, worker_target: Callable[[int, str], None],
+                 address: str = None, client: KuCoinClient = None,
+                 authority: RiskAuthority = None):
+        self.worker_count = workers
+        self.worker_target = worker_target
+        self.address = address or Config.SHARD_IPC_PATH
+        self.client = client or KuCoinClient(rate_share=Config.SHARD_COORDINATOR_RATE_SHARE)
+        self.authority = authority or RiskAuthority()
+
+        self.ring = ConsistentHashRing(replicas=Config.SHARD_HASH_REPLICAS)
+        self.symbols: List[str] = []
+        self.assignment: Dict[str, List[str]] = {}
+        self.processes: Dict[int, multiprocessing.Process] = {}
+        self._context = multiprocessing.get_context('spawn')
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._all_connected = asyncio.Event()
+
+        self.stream: Optional[OrderEventStream] = None
+        self.feeds: Dict[str, asyncio.StreamWriter] = {}
+        self.unrouted_reports = 0
+
+    async def start(self) -> None:
+        try:
+            self.symbols = await self.client.get_active_symbols()
+            self.authority.set_balance(await self.client.get_account_balance())
+        except Exception as e:
+            logger.error(f"Error preparing shard coordinator: {str(e)}")
+
+        directory = os.path.dirname(os.path.abspath(self.address))
+        os.makedirs(directory, exist_ok=True)
+        if os.path.exists(self.address):
+            os.unlink(self.address)
+        self._server = await asyncio.start_unix_server(self._serve, path=self.address)
+        logger.info(f"Shard coordinator listening on {self.address}")
+        if Config.USE_ORDER_STREAM:
+            self.stream = OrderEventStream(self.client)
+            self.stream.subscribe(self._route_report)
+            self.stream.on_reconnect(self._broadcast_reconnect)
+            await self.stream.start()
+        for worker_id in range(self.worker_count):
+            self._spawn(worker_id)
+
+    async def stop(self) -> None:
+        # SIGINT lets each worker run its shutdown path and stop its own
+        # training pool; anything still running afterwards is terminated
+        for process in self.processes.values():
+            if process.is_alive():
+                os.kill(process.pid, signal.SIGINT)
+        for process in self.processes.values():
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+                process.join(timeout=5)
+        if self.stream is not None:
+            await self.stream.stop()
+            self.stream = None
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if os.path.exists(self.address):
+            os.unlink(self.address)
+        await self.client.close()
+
+    def _spawn(self, worker_id: int) -> None:
+        process = self._context.Process(
+            target=self.worker_target, args=(worker_id, self.address),
+            name=f"shard-{worker_id}"
+        )
+        process.start()
+        self.processes[worker_id] = process
+        logger.info(f"Started shard worker {worker_id} (pid {process.pid})")
+
+    async def run(self) -> None:
+        """Refresh symbols, balance and risk samples every cycle; supervise workers"""
+        while True:
+            try:
+                symbols = await self.client.get_active_symbols()
+                if symbols:
+                    self.symbols = symbols
+                    self._rebalance()
+
+                drawdown = self.authority.set_balance(await self.client.get_account_balance())
+                self.authority.sample_prices()
+                logger.info(
+                    f"Shards: {len(self.ring.nodes)}/{self.worker_count} workers, "
+                    f"{len(self.symbols)} symbols, {self.authority.throughput():.1f} symbols/s, "
+                    f"VaR {self.authority.risk_manager.portfolio.value_at_risk():.2f}, "
+                    f"drawdown {drawdown:.2f}%"
+                )
+
+                for worker_id, process in list(self.processes.items()):
+                    if not process.is_alive():
+                        logger.warning(f"Shard worker {worker_id} exited with {process.exitcode}, restarting")
+                        self._spawn(worker_id)
+            except Exception as e:
+                logger.error(f"Error in shard coordinator: {str(e)}")
+
+            await asyncio.sleep(Config.LOOP_INTERVAL)
+
+    def _rebalance(self) -> None:
+        assignment = self.ring.assign(self.symbols)
+        moved = moved_keys(self.assignment, assignment)
+        if moved:
+            logger.info(f"Rebalanced {len(moved)} symbols across {len(assignment)} workers")
+        self.assignment = assignment
+
+    def _push(self, worker: str, message: Dict) -> None:
+        writer = self.feeds.get(worker)
+        if writer is not None and not writer.is_closing():
+            writer.write(json.dumps(message).encode() + b'\n')
+
+    def _route_report(self, data: Dict, received: float) -> None:
+        """Forward an execution report to the worker that placed the order"""
+        prefix, separator, _ = (data.get('clientOid') or '').partition('-')
+        worker = f"worker-{prefix[1:]}" if separator and prefix[1:].isdigit() else None
+        if worker not in self.feeds:
+            self.unrouted_reports += 1
+            return
+        self._push(worker, {'report': data})
+
+    def _broadcast_reconnect(self) -> None:
+        # Reports may have been missed while the stream was down
+        for worker in list(self.feeds):
+            self._push(worker, {'reconnect': True})
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        worker = None
+        feed = None
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                request = json.loads(line)
+                try:
+                    if request['op'] == 'hello':
+                        worker = request['worker']
+                    if request['op'] == 'subscribe':
+                        feed = request['worker']
+                        self.feeds[feed] = writer
+                    response = await self._handle(request)
+                except Exception as e:
+                    response = {'error': str(e)}
+                writer.write(json.dumps(response).encode() + b'\n')
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            if feed is not None and self.feeds.get(feed) is writer:
+                del self.feeds[feed]
+            if worker is not None:
+                logger.warning(f"Shard worker {worker} disconnected")
+                self.ring.remove(worker)
+                self.authority.remove_worker(worker)
+                self._rebalance()
+
+    async def _handle(self, request: Dict) -> Dict:
+        op = request['op']
+        worker = request.get('worker')
+        authority = self.authority
+
+        if op == 'hello':
+            self.ring.add(worker)
+            self._rebalance()
+            if len(self.ring.nodes) >= self.worker_count:
+                self._all_connected.set()
+            return {'ok': True}
+        if op == 'assignment':
+            # Hold the first assignments until every worker has joined, so
+            # early starters do not briefly own the whole universe
+            try:
+                await asyncio.wait_for(self._all_connected.wait(), Config.SHARD_STARTUP_TIMEOUT)
+            except asyncio.TimeoutError:
+                self._all_connected.set()
+            return {'symbols': self.assignment.get(worker, [])}
+        if op == 'balance':
+            return {'balance': authority.available}
+        if op == 'reserve':
+            allowed, reason = authority.reserve(worker, request['symbol'], request['side'],
+                                                request['notional'], request['margin'])
+            return {'allowed': allowed, 'reason': reason}
+        if op == 'release':
+            authority.release(worker, request['symbol'], request['side'],
+                              request['notional'], request['margin'])
+            return {'ok': True}
+        if op == 'report':
+            authority.report(worker, request['exposures'], request['margin_used'],
+                             request.get('prices'), request.get('stats'))
+            return {'ok': True}
+        if op == 'subscribe':
+            return {'ok': True, 'stream': self.stream is not None}
+        raise ValueError(f"unknown op {op}")
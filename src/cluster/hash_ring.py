@@ -0,0 +1,69 @@
+import bisect
+import hashlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), 'big')
+
+
+class ConsistentHashRing:
+    """Consistent hash ring mapping symbols to worker nodes
+
+    Each node is placed at `replicas` pseudo-random points; a key belongs to
+    the first node point clockwise of its hash. Adding or removing a node
+    only moves the keys in the arcs it gains or loses (about 1/N of them),
+    and a symbol's owner never depends on which other symbols exist, so the
+    universe can grow or shrink without reshuffling live shards.
+    """
+
+    def __init__(self, nodes: Iterable[str] = (), replicas: int = 128):
+        self.replicas = replicas
+        self._points: List[int] = []
+        self._owners: List[str] = []
+        self.nodes: set = set()
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node: str) -> None:
+        if node in self.nodes:
+            return
+        self.nodes.add(node)
+        for replica in range(self.replicas):
+            point = _hash(f"{node}#{replica}")
+            index = bisect.bisect(self._points, point)
+            self._points.insert(index, point)
+            self._owners.insert(index, node)
+
+    def remove(self, node: str) -> None:
+        if node not in self.nodes:
+            return
+        self.nodes.discard(node)
+        kept = [(point, owner) for point, owner in zip(self._points, self._owners) if owner != node]
+        self._points = [point for point, _ in kept]
+        self._owners = [owner for _, owner in kept]
+
+    def node_for(self, key: str) -> Optional[str]:
+        if not self._points:
+            return None
+        index = bisect.bisect(self._points, _hash(key)) % len(self._points)
+        return self._owners[index]
+
+    def assign(self, keys: Iterable[str]) -> Dict[str, List[str]]:
+        """Partition keys by owner; every node gets an entry, possibly empty"""
+        shards: Dict[str, List[str]] = {node: [] for node in self.nodes}
+        for key in keys:
+            node = self.node_for(key)
+            if node is not None:
+                shards[node].append(key)
+        return shards
+
+
+def moved_keys(before: Dict[str, List[str]], after: Dict[str, List[str]]) -> List[Tuple[str, str, str]]:
+    """(key, old node, new node) for keys whose owner changed between assignments"""
+    owners = {key: node for node, keys in before.items() for key in keys}
+    return [
+        (key, owners[key], node)
+        for node, keys in after.items() for key in keys
+        if key in owners and owners[key] != node
+    ]
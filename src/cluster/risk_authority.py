@@ -0,0 +1,141 @@
+import logging
+import time
+from typing import Dict, Tuple
+
+from src.models.risk_manager import RiskManager
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerBook:
+    """What one worker last reported plus margin reserved since"""
+
+    __slots__ = ('exposures', 'margin_used', 'reserved', 'prices', 'stats', 'reported')
+
+    def __init__(self):
+        self.exposures: Dict[str, float] = {}
+        self.margin_used = 0.0
+        self.reserved: Dict[str, float] = {}
+        self.prices: Dict[str, float] = {}
+        self.stats: Dict = {}
+        self.reported = 0.0
+
+
+class RiskAuthority:
+    """Account-wide risk gate shared by every shard
+
+    Workers only see their own symbols, so limits that span the account
+    (available balance, drawdown, portfolio VaR) are enforced here. Each
+    worker periodically reports its net exposures, margin in use and
+    latest prices; before placing an order it asks `reserve`, which checks
+    the order against every shard's exposure plus margin already reserved
+    and, if allowed, books it immediately so concurrent requests from other
+    workers see it. A worker's reservations are dropped once its next
+    report includes the resulting positions and open orders.
+    """
+
+    def __init__(self, risk_manager: RiskManager = None):
+        self.risk_manager = risk_manager or RiskManager()
+        self.balance = 0.0
+        self.workers: Dict[str, WorkerBook] = {}
+        self.reservations = 0
+        self.rejections = 0
+
+    def _book(self, worker: str) -> WorkerBook:
+        book = self.workers.get(worker)
+        if book is None:
+            book = self.workers[worker] = WorkerBook()
+        return book
+
+    @property
+    def margin_used(self) -> float:
+        return sum(book.margin_used for book in self.workers.values())
+
+    @property
+    def reserved(self) -> float:
+        return sum(sum(book.reserved.values()) for book in self.workers.values())
+
+    @property
+    def available(self) -> float:
+        """Exchange available balance less margin reserved but not yet reported"""
+        return self.balance - self.reserved
+
+    @property
+    def equity(self) -> float:
+        return self.balance + self.margin_used
+
+    def exposures(self) -> Dict[str, float]:
+        merged: Dict[str, float] = {}
+        for book in self.workers.values():
+            for symbol, exposure in book.exposures.items():
+                merged[symbol] = merged.get(symbol, 0.0) + exposure
+        return merged
+
+    def set_balance(self, balance: float) -> float:
+        """Record the exchange balance; returns the account drawdown in percent"""
+        self.balance = balance
+        return self.risk_manager.update_equity(self.equity)
+
+    def report(self, worker: str, exposures: Dict[str, float], margin_used: float,
+               prices: Dict[str, float] = None, stats: Dict = None) -> None:
+        book = self._book(worker)
+        book.exposures = dict(exposures)
+        book.margin_used = margin_used
+        book.reserved.clear()
+        book.prices = dict(prices or {})
+        book.stats = dict(stats or {})
+        book.reported = time.time()
+        self.risk_manager.portfolio.set_exposures(self.exposures())
+
+    def remove_worker(self, worker: str) -> None:
+        if self.workers.pop(worker, None) is not None:
+            self.risk_manager.portfolio.set_exposures(self.exposures())
+
+    def sample_prices(self) -> None:
+        """Fold the latest prices from every shard into the covariance"""
+        prices: Dict[str, float] = {}
+        for book in self.workers.values():
+            prices.update(book.prices)
+        self.risk_manager.update_market(prices, self.exposures())
+
+    def reserve(self, worker: str, symbol: str, side: str,
+                notional: float, margin: float) -> Tuple[bool, str]:
+        """Check an order against account-wide limits and book it if allowed"""
+        if margin > self.available:
+            self.rejections += 1
+            return False, (f"margin {margin:.2f} exceeds available balance "
+                           f"{self.available:.2f} across shards")
+
+        allowed, reason = self.risk_manager.check_order(symbol, side, notional, self.equity)
+        if not allowed:
+            self.rejections += 1
+            return False, reason
+
+        book = self._book(worker)
+        book.reserved[symbol] = book.reserved.get(symbol, 0.0) + margin
+        delta = -notional if side == 'short' else notional
+        book.exposures[symbol] = book.exposures.get(symbol, 0.0) + delta
+        self.risk_manager.portfolio.set_exposure(symbol, self._symbol_exposure(symbol))
+        self.reservations += 1
+        return True, "ok"
+
+    def release(self, worker: str, symbol: str, side: str,
+                notional: float, margin: float) -> None:
+        """Undo a reservation whose order never reached the exchange"""
+        book = self._book(worker)
+        book.reserved[symbol] = max(book.reserved.get(symbol, 0.0) - margin, 0.0)
+        delta = -notional if side == 'short' else notional
+        book.exposures[symbol] = book.exposures.get(symbol, 0.0) - delta
+        self.risk_manager.portfolio.set_exposure(symbol, self._symbol_exposure(symbol))
+
+    def _symbol_exposure(self, symbol: str) -> float:
+        return sum(book.exposures.get(symbol, 0.0) for book in self.workers.values())
+
+    def throughput(self) -> float:
+        """Symbols processed per second summed over workers' last cycles"""
+        total = 0.0
+        for book in self.workers.values():
+            seconds = book.stats.get('cycle_seconds')
+            if seconds:
+                total += book.stats.get('symbols', 0) / seconds
+        return total
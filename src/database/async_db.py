@@ -0,0 +1,146 @@
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Set
+
+import pandas as pd
+
+from config.config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncDatabaseManager:
+    """Non-blocking facade over DatabaseManager for the asyncio bot
+
+    Reads run on a small thread pool, each thread holding its own read-only
+    connection (WAL lets them proceed while a write is in progress). Every
+    write goes through the DatabaseManager's single write-behind writer
+    connection, in submission order. Each operation is timed; anything
+    slower than Config.DB_SLOW_QUERY_MS is logged as a slow query.
+    """
+
+    def __init__(self, db, read_workers: int = None):
+        self.db = db
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._readers = ThreadPoolExecutor(
+            max_workers=read_workers or Config.DB_READ_WORKERS,
+            thread_name_prefix='db-reader'
+        )
+        self.timings: Dict[str, Dict[str, float]] = {}
+        # Trades waiting for room in a full write-behind queue
+        self._deferred_trades: Set[asyncio.Task] = set()
+        self.trades_deferred = 0
+
+    def _read_connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # Closed from the event loop thread in close(), hence check_same_thread
+            conn = sqlite3.connect(f"file:{Config.DB_PATH}?mode=ro", uri=True,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def _record(self, operation: str, elapsed: float, detail: str = '') -> None:
+        stats = self.timings.setdefault(operation, {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+        elapsed_ms = elapsed * 1000
+        stats['count'] += 1
+        stats['total_ms'] += elapsed_ms
+        stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+
+        if elapsed_ms >= Config.DB_SLOW_QUERY_MS:
+            logger.warning(f"Slow query {operation}{detail}: {elapsed_ms:.1f}ms")
+
+    async def _timed(self, operation: str, detail: str, awaitable) -> Any:
+        start = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            self._record(operation, time.perf_counter() - start, detail)
+
+    async def _read(self, operation: str, detail: str,
+                    fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        loop = asyncio.get_running_loop()
+        return await self._timed(operation, detail, loop.run_in_executor(
+            self._readers, lambda: fn(self._read_connection())
+        ))
+
+    async def _write(self, operation: str, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        async def run():
+            return await asyncio.wrap_future(await self.db.writer.call_async(fn))
+        return await self._timed(operation, '', run())
+
+    async def get_market_data(self, symbol: str,
+                              start_time: datetime = None,
+                              end_time: datetime = None,
+                              timeframe: str = '1min') -> pd.DataFrame:
+        return await self._read(
+            'get_market_data', f" [{symbol} {timeframe}]",
+            lambda conn: self.db.read_market_data(conn, symbol, start_time, end_time, timeframe)
+        )
+
+    async def store_market_data(self, data: pd.DataFrame, symbol: str) -> None:
+        await self._timed('store_market_data', f" [{symbol}]",
+                          self.db.store_market_data_async(data, symbol))
+
+    async def store_trade(self, trade_data: Dict) -> None:
+        await self._timed('store_trade', '', self.db.store_trade_async(trade_data))
+
+    def queue_trade(self, trade_data: Dict) -> None:
+        """Enqueue a trade from synchronous code such as price tick callbacks
+
+        Never blocks the event loop: when the write-behind queue is full the
+        trade is handed to a task that awaits room for it, so it is delayed
+        rather than dropped.
+        """
+        if self.db.try_store_trade(trade_data):
+            return
+        self.trades_deferred += 1
+        task = asyncio.get_running_loop().create_task(self.store_trade(trade_data))
+        self._deferred_trades.add(task)
+        task.add_done_callback(self._trade_stored)
+
+    def _trade_stored(self, task: asyncio.Task) -> None:
+        self._deferred_trades.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Failed to queue trade: {str(task.exception())}")
+
+    @property
+    def deferred_trades(self) -> int:
+        """Trades currently waiting for room in the writer queue"""
+        return len(self._deferred_trades)
+
+    async def clean_old_data(self) -> int:
+        return await self._write('clean_old_data', self.db.delete_old_data)
+
+    async def flush(self) -> None:
+        await self._timed('flush', '', asyncio.get_running_loop().run_in_executor(None, self.db.flush))
+
+    async def close(self) -> None:
+        """Flush pending writes and close every connection"""
+        if self._deferred_trades:
+            await asyncio.gather(*self._deferred_trades, return_exceptions=True)
+        await asyncio.get_running_loop().run_in_executor(None, self.db.writer.close)
+        # The manager's own connection belongs to the thread that created it
+        self.db.conn.close()
+        self._readers.shutdown(wait=True)
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Count, mean and max latency per operation"""
+        return {
+            operation: dict(stats, mean_ms=stats['total_ms'] / stats['count'])
+            for operation, stats in self.timings.items()
+        }
@@ -0,0 +1,209 @@
+import argparse
+import logging
+import os
+import sqlite3
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+COLUMNS: List[Tuple[str, np.dtype]] = [
+    ('timestamp', np.dtype('<i8')),
+    ('open', np.dtype('<f8')),
+    ('high', np.dtype('<f8')),
+    ('low', np.dtype('<f8')),
+    ('close', np.dtype('<f8')),
+    ('volume', np.dtype('<f8')),
+]
+
+
+class CandleStore:
+    """Append-only columnar candle files, memory-mapped for zero-copy reads
+
+    Each symbol gets a directory with one raw little-endian file per column.
+    Rows are appended in timestamp order, so the timestamp column doubles as
+    a sorted index: a time-range read is two binary searches over the mapped
+    file followed by slicing, and returned arrays are views into the page
+    cache rather than copies. The timestamp file is written last, so a
+    crash mid-append never exposes a partially written row.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._maps: Dict[str, Tuple[int, Dict[str, np.memmap]]] = {}
+        os.makedirs(root, exist_ok=True)
+
+    def _dir(self, symbol: str) -> str:
+        return os.path.join(self.root, symbol)
+
+    def _path(self, symbol: str, column: str) -> str:
+        return os.path.join(self._dir(symbol), f"{column}.bin")
+
+    def symbols(self) -> List[str]:
+        return sorted(
+            name for name in os.listdir(self.root)
+            if os.path.isdir(os.path.join(self.root, name))
+        )
+
+    def row_count(self, symbol: str) -> int:
+        path = self._path(symbol, 'timestamp')
+        if not os.path.exists(path):
+            return 0
+        return os.path.getsize(path) // COLUMNS[0][1].itemsize
+
+    def _columns(self, symbol: str) -> Optional[Dict[str, np.memmap]]:
+        """Memory maps for a symbol, remapped only when the files have grown"""
+        rows = self.row_count(symbol)
+        if rows == 0:
+            return None
+
+        cached = self._maps.get(symbol)
+        if cached is not None and cached[0] == rows:
+            return cached[1]
+
+        maps = {
+            column: np.memmap(self._path(symbol, column), dtype=dtype, mode='r', shape=(rows,))
+            for column, dtype in COLUMNS
+        }
+        self._maps[symbol] = (rows, maps)
+        return maps
+
+    def last_timestamp(self, symbol: str) -> Optional[int]:
+        columns = self._columns(symbol)
+        return int(columns['timestamp'][-1]) if columns is not None else None
+
+    def append(self, symbol: str, data: pd.DataFrame) -> int:
+        """Append candles newer than the last stored one; returns rows written
+
+        A candle with the last stored timestamp replaces that row, matching
+        the SQLite upsert. Older candles cannot be inserted into the
+        append-only files and are skipped with a warning.
+        """
+        if data.empty:
+            return 0
+
+        data = data.sort_values('timestamp').drop_duplicates('timestamp', keep='last')
+        last = self.last_timestamp(symbol)
+        replaced = 0
+        if last is not None:
+            older = int((data['timestamp'] < last).sum())
+            if older:
+                logger.warning(f"Skipping {older} {symbol} candles older than the last "
+                               f"stored one ({last}); the columnar store only appends")
+            current = data[data['timestamp'] == last]
+            if not current.empty:
+                self._replace_last(symbol, current.iloc[-1])
+                replaced = 1
+            data = data[data['timestamp'] > last]
+            if data.empty:
+                return replaced
+
+        os.makedirs(self._dir(symbol), exist_ok=True)
+        rows = self.row_count(symbol)
+
+        # Timestamp goes last: it defines the visible row count
+        for column, dtype in COLUMNS[1:] + COLUMNS[:1]:
+            values = np.ascontiguousarray(data[column].to_numpy(), dtype=dtype)
+            with open(self._path(symbol, column), 'ab') as f:
+                # Drop bytes left behind by an interrupted append
+                f.truncate(rows * dtype.itemsize)
+                f.write(values.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+
+        return replaced + len(data)
+
+    def _replace_last(self, symbol: str, candle: pd.Series) -> None:
+        """Overwrite the newest row's values in place; its timestamp is unchanged"""
+        row = self.row_count(symbol) - 1
+        for column, dtype in COLUMNS[1:]:
+            with open(self._path(symbol, column), 'r+b') as f:
+                f.seek(row * dtype.itemsize)
+                f.write(np.asarray(candle[column], dtype=dtype).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+
+    def read_columns(self, symbol: str, start: Optional[int] = None,
+                     end: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Zero-copy column views for timestamps within [start, end]"""
+        columns = self._columns(symbol)
+        if columns is None:
+            return {column: np.empty(0, dtype=dtype) for column, dtype in COLUMNS}
+
+        timestamps = columns['timestamp']
+        lo = 0 if start is None else int(np.searchsorted(timestamps, start, side='left'))
+        hi = len(timestamps) if end is None else int(np.searchsorted(timestamps, end, side='right'))
+
+        return {column: values[lo:hi] for column, values in columns.items()}
+
+    def read_frame(self, symbol: str, start_time: datetime = None,
+                   end_time: datetime = None) -> pd.DataFrame:
+        """Candles as a DataFrame shaped like the market_data table"""
+        columns = self.read_columns(
+            symbol,
+            int(start_time.timestamp()) if start_time else None,
+            int(end_time.timestamp()) if end_time else None
+        )
+        frame = pd.DataFrame({name: np.asarray(values) for name, values in columns.items()})
+        frame.insert(1, 'symbol', symbol)
+        return frame
+
+
+def migrate_from_sqlite(db_path: str, store: CandleStore,
+                        batch_rows: int = 500000) -> Dict[str, int]:
+    """Copy the market_data table into the columnar store, symbol by symbol
+
+    Rows are streamed in timestamp order in batches, so memory stays bounded
+    regardless of table size. Re-running only appends rows newer than what
+    the store already holds.
+    """
+    conn = sqlite3.connect(db_path)
+    migrated = {}
+    try:
+        symbols = [row[0] for row in conn.execute("SELECT DISTINCT symbol FROM market_data")]
+        for symbol in symbols:
+            start = time.perf_counter()
+            last = store.last_timestamp(symbol)
+            cursor = conn.execute(
+                "SELECT timestamp, open, high, low, close, volume FROM market_data "
+                "WHERE symbol = ? AND timestamp > ? ORDER BY timestamp",
+                (symbol, last if last is not None else -1)
+            )
+
+            written = 0
+            while True:
+                rows = cursor.fetchmany(batch_rows)
+                if not rows:
+                    break
+                batch = pd.DataFrame(rows, columns=[column for column, _ in COLUMNS])
+                written += store.append(symbol, batch)
+
+            migrated[symbol] = written
+            logger.info(f"Migrated {written} candles for {symbol} "
+                        f"in {time.perf_counter() - start:.2f}s")
+    finally:
+        conn.close()
+
+    return migrated
+
+
+if __name__ == "__main__":
+    from config.config import Config
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Columnar candle store tools")
+    subcommands = parser.add_subparsers(dest='command', required=True)
+
+    migrate = subcommands.add_parser('migrate', help="copy market_data from SQLite")
+    migrate.add_argument('--db', default=Config.DB_PATH)
+    migrate.add_argument('--root', default=Config.CANDLE_STORE_DIR)
+    migrate.add_argument('--batch-rows', type=int, default=500000)
+    args = parser.parse_args()
+
+    if args.command == 'migrate':
+        result = migrate_from_sqlite(args.db, CandleStore(args.root), args.batch_rows)
+        print(f"Migrated {sum(result.values())} candles across {len(result)} symbols")
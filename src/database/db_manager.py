@@ -1,12 +1,44 @@
+import logging
 import sqlite3
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
 from config.config import Config
+from src.database.candle_store import CandleStore
+from src.database.rollup import ROLLUP_INDEX, ROLLUP_SELECT, ROLLUP_TABLE, CandleRollup, resample_frame
+from src.database.retention import INDEXES, RetentionManager, enable_incremental_vacuum
+from src.database.write_behind import WriteBehindWriter, apply_pragmas
+
+logger = logging.getLogger(__name__)
+
+MARKET_DATA_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
 
 class DatabaseManager:
-    def __init__(self):
+    def __init__(self, migrate: bool = True):
         self.conn = sqlite3.connect(Config.DB_PATH)
+        apply_pragmas(self.conn)
+        if migrate:
+            enable_incremental_vacuum(self.conn)
+        self.candle_store = CandleStore(Config.CANDLE_STORE_DIR) if Config.USE_COLUMNAR_STORE else None
+        self.rollup = CandleRollup(Config.ROLLUP_TIMEFRAMES, self._load_candles) if Config.ROLLUP_TIMEFRAMES else None
         self.create_tables()
+        self.writer = WriteBehindWriter(
+            Config.DB_PATH,
+            max_queue=Config.DB_WRITE_QUEUE_SIZE,
+            batch_rows=Config.DB_WRITE_BATCH_ROWS,
+            flush_interval=Config.DB_WRITE_FLUSH_INTERVAL
+        )
+        self.retention = RetentionManager(
+            Config.HISTORICAL_DATA_DAYS,
+            chunk_rows=Config.DB_RETENTION_CHUNK_ROWS,
+            time_budget=Config.DB_RETENTION_TIME_BUDGET,
+            vacuum_interval=Config.DB_VACUUM_INTERVAL,
+            vacuum_pages=Config.DB_VACUUM_PAGES,
+            rollup_retention_days={
+                timeframe: Config.ROLLUP_RETENTION_DAYS.get(timeframe, Config.HISTORICAL_DATA_DAYS)
+                for timeframe in Config.ROLLUP_TIMEFRAMES
+            }
+        )
         
     def create_tables(self):
         """Create necessary database tables"""
@@ -24,6 +56,12 @@ class DatabaseManager:
                     PRIMARY KEY (timestamp, symbol)
                 )
             ''')
+            for index in INDEXES:
+                self.conn.execute(index)
+            
+            # Higher timeframe bars built from market_data
+            self.conn.execute(ROLLUP_TABLE)
+            self.conn.execute(ROLLUP_INDEX)
             
             # Trades table
             self.conn.execute('''
@@ -52,15 +90,92 @@ class DatabaseManager:
                 )
             ''')
 
+    def _market_data_rows(self, data: pd.DataFrame, symbol: str) -> List[Tuple]:
+        """market_data rows in insert column order"""
+        columns = [data[column].tolist() for column in MARKET_DATA_COLUMNS]
+        return list(zip(columns[0], [symbol] * len(data), *columns[1:]))
+    
     def store_market_data(self, data: pd.DataFrame, symbol: str):
-        """Store market data in database"""
-        data['symbol'] = symbol
-        data.to_sql('market_data', self.conn, if_exists='append', index=False)
+        """Queue market data for the background writer
+        
+        Returns immediately; rows with an existing (timestamp, symbol) key
+        replace the stored candle.
+        """
+        self.writer.submit('market_data', self._market_data_rows(data, symbol))
+        rows, rebuild = self._update_rollups(symbol, data)
+        if rebuild is not None:
+            self.writer.call(rebuild)
+        self.writer.submit('candle_rollups', rows)
+        if self.candle_store is not None:
+            self.writer.call(self._candle_store_append(symbol, data))
+    
+    async def store_market_data_async(self, data: pd.DataFrame, symbol: str):
+        """Queue market data, awaiting instead of blocking when the queue is full"""
+        await self.writer.submit_async('market_data', self._market_data_rows(data, symbol))
+        rows, rebuild = self._update_rollups(symbol, data)
+        if rebuild is not None:
+            await self.writer.call_async(rebuild)
+        await self.writer.submit_async('candle_rollups', rows)
+        if self.candle_store is not None:
+            await self.writer.call_async(self._candle_store_append(symbol, data))
+
+    def _candle_store_append(self, symbol: str, data: pd.DataFrame) -> Callable:
+        """Writer call appending candles to the columnar store
+        
+        Runs on the writer thread, so the file writes and fsyncs stay off the
+        event loop and appends for a symbol keep their submission order.
+        """
+        data = data[MARKET_DATA_COLUMNS].copy()
+
+        def append(conn: sqlite3.Connection) -> int:
+            try:
+                return self.candle_store.append(symbol, data)
+            except OSError as e:
+                logger.error(f"Failed to append {len(data)} {symbol} candles to the columnar store: {e}")
+                return 0
+        return append
+
+    def _update_rollups(self, symbol: str, data: pd.DataFrame) -> Tuple[List[Tuple], Optional[Callable]]:
+        """Fold new candles into the rollup bars
+        
+        Returns the rollup rows and, when some candles arrived late, a
+        writer call rebuilding the bars they touch; queue it behind the
+        candles so the rebuild sees them.
+        """
+        if self.rollup is None:
+            return [], None
+
+        rows = self.rollup.ingest(symbol, data)
+        late = self.rollup.late_range(symbol, data)
+        if late is None:
+            return rows, None
+        return rows, lambda conn: self.rollup.recompute(conn, symbol, *late)
+
+    def _load_candles(self, symbol: str, start: int, end: int) -> pd.DataFrame:
+        """Stored 1min candles in [start, end), used to seed the rollup day buffer"""
+        return pd.read_sql_query(
+            "SELECT * FROM market_data WHERE symbol = ? AND timestamp >= ? AND timestamp < ?",
+            self.conn, params=[symbol, start, end]
+        )
 
     def get_market_data(self, symbol: str, 
                        start_time: datetime = None,
-                       end_time: datetime = None) -> pd.DataFrame:
+                       end_time: datetime = None,
+                       timeframe: str = '1min') -> pd.DataFrame:
         """Retrieve market data for analysis"""
+        return self.read_market_data(self.conn, symbol, start_time, end_time, timeframe)
+
+    def read_market_data(self, conn: sqlite3.Connection, symbol: str,
+                         start_time: datetime = None,
+                         end_time: datetime = None,
+                         timeframe: str = '1min') -> pd.DataFrame:
+        """Run the market data query on a given connection"""
+        if timeframe != '1min':
+            return self._read_rollup(conn, symbol, start_time, end_time, timeframe)
+
+        if self.candle_store is not None:
+            return self.candle_store.read_frame(symbol, start_time, end_time)
+        
         query = "SELECT * FROM market_data WHERE symbol = ?"
         params = [symbol]
         
@@ -73,34 +188,68 @@ class DatabaseManager:
             
         query += " ORDER BY timestamp"
         
-        return pd.read_sql_query(query, self.conn, params=params)
+        return pd.read_sql_query(query, conn, params=params)
+
+    def _read_rollup(self, conn: sqlite3.Connection, symbol: str,
+                     start_time: datetime, end_time: datetime,
+                     timeframe: str) -> pd.DataFrame:
+        """Stored bars for a maintained timeframe, otherwise resampled from 1min"""
+        if self.rollup is None or timeframe not in self.rollup.timeframes:
+            bars = resample_frame(
+                self.read_market_data(conn, symbol, start_time, end_time), timeframe
+            )
+            bars.insert(1, 'symbol', symbol)
+            return bars
+
+        query = ROLLUP_SELECT
+        params = [symbol, timeframe]
+        if start_time:
+            query += " AND timestamp >= ?"
+            params.append(int(start_time.timestamp()))
+        if end_time:
+            query += " AND timestamp <= ?"
+            params.append(int(end_time.timestamp()))
+        query += " ORDER BY timestamp"
+
+        return pd.read_sql_query(query, conn, params=params)
+
+    def _trade_row(self, trade_data: Dict) -> Tuple:
+        return (
+            int(datetime.now().timestamp()),
+            trade_data['symbol'],
+            trade_data['side'],
+            trade_data['entry_price'],
+            trade_data['exit_price'],
+            trade_data['size'],
+            trade_data['pnl'],
+            trade_data['strategy']
+        )
 
     def store_trade(self, trade_data: Dict):
-        """Store completed trade information"""
-        with self.conn:
-            self.conn.execute('''
-                INSERT INTO trades (
-                    timestamp, symbol, side, entry_price, 
-                    exit_price, size, pnl, strategy
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                int(datetime.now().timestamp()),
-                trade_data['symbol'],
-                trade_data['side'],
-                trade_data['entry_price'],
-                trade_data['exit_price'],
-                trade_data['size'],
-                trade_data['pnl'],
-                trade_data['strategy']
-            ))
+        """Queue completed trade information for the background writer"""
+        self.writer.submit('trades', [self._trade_row(trade_data)])
+
+    def try_store_trade(self, trade_data: Dict) -> bool:
+        """Queue a completed trade unless the writer queue is full"""
+        return self.writer.try_submit('trades', [self._trade_row(trade_data)])
+
+    async def store_trade_async(self, trade_data: Dict):
+        """Queue a completed trade, awaiting instead of blocking when the queue is full"""
+        await self.writer.submit_async('trades', [self._trade_row(trade_data)])
+
+    def flush(self):
+        """Wait until all queued writes are committed"""
+        self.writer.flush()
+
+    def close(self):
+        """Flush pending writes and close connections"""
+        self.writer.close()
+        self.conn.close()
 
     def clean_old_data(self):
         """Remove old market data to manage database size"""
-        cutoff_time = int((datetime.now() - 
-                          timedelta(days=Config.HISTORICAL_DATA_DAYS)).timestamp())
-        
-        with self.conn:
-            self.conn.execute(
-                "DELETE FROM market_data WHERE timestamp < ?",
-                (cutoff_time,)
-            )
\ No newline at end of file
+        return self.writer.call(self.delete_old_data).result()
+
+    def delete_old_data(self, conn: sqlite3.Connection) -> int:
+        """Expire old market data in chunks on the writer connection"""
+        return self.retention.expire(conn)
@@ -0,0 +1,152 @@
+import logging
+import sqlite3
+import time
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_market_data_symbol_ts ON market_data (symbol, timestamp)",
+]
+
+EXPIRE_CHUNK = '''
+    DELETE FROM market_data WHERE rowid IN (
+        SELECT rowid FROM market_data WHERE timestamp < ? LIMIT ?
+    )
+'''
+
+# Served by idx_rollups_timeframe_ts (see rollup.ROLLUP_INDEX)
+ROLLUP_EXPIRE_CHUNK = '''
+    DELETE FROM candle_rollups WHERE rowid IN (
+        SELECT rowid FROM candle_rollups WHERE timeframe = ? AND timestamp < ? LIMIT ?
+    )
+'''
+
+
+def enable_incremental_vacuum(conn: sqlite3.Connection) -> bool:
+    """One-time migration of the database to auto_vacuum=INCREMENTAL
+
+    The mode only switches after a full VACUUM, which rewrites the file
+    under an exclusive lock, so this runs once per database: every later
+    start sees the mode already set and returns immediately. If the
+    database is busy the migration is skipped and retried on the next
+    start. Returns True when the database is in incremental mode.
+    """
+    mode = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+    if mode == 2:
+        return True
+
+    conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    if conn.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()[0]:
+        logger.info("Rebuilding database once to enable incremental vacuum...")
+    start = time.perf_counter()
+    try:
+        conn.execute("VACUUM")
+    except sqlite3.OperationalError as e:
+        logger.warning(f"Incremental vacuum migration skipped, will retry on next start: {str(e)}")
+        return False
+    logger.info(f"Database rebuilt in {time.perf_counter() - start:.2f}s")
+    return True
+
+
+class RetentionManager:
+    """Expires old market data in small, short transactions
+
+    Each pass deletes at most `chunk_rows` rows per transaction, walking the
+    timestamp-leading primary key, and stops once `time_budget` seconds are
+    spent; whatever is left is picked up on the next pass. Every chunk
+    commits on its own, so the write lock is never held for longer than one
+    chunk. Rollup bars are expired the same way with a horizon per
+    timeframe (`rollup_retention_days`), after the 1min candles. Freed
+    pages are handed back to the filesystem with an incremental vacuum at
+    most every `vacuum_interval` seconds.
+    """
+
+    def __init__(self, retention_days: int, chunk_rows: int = 5000,
+                 time_budget: float = 0.2, vacuum_interval: float = 3600,
+                 vacuum_pages: int = 1000, rollup_retention_days: Dict[str, int] = None):
+        self.retention_seconds = retention_days * 24 * 3600
+        # (name, chunked delete, leading parameters, retention seconds)
+        self.policies: List[Tuple[str, str, Tuple, int]] = [
+            ('market_data', EXPIRE_CHUNK, (), self.retention_seconds)
+        ]
+        for timeframe, days in (rollup_retention_days or {}).items():
+            self.policies.append((f"{timeframe} rollups", ROLLUP_EXPIRE_CHUNK,
+                                  (timeframe,), days * 24 * 3600))
+        self.chunk_rows = chunk_rows
+        self.time_budget = time_budget
+        self.vacuum_interval = vacuum_interval
+        self.vacuum_pages = vacuum_pages
+
+        self._last_vacuum = time.monotonic()
+        self.metrics = {
+            'runs': 0,
+            'rows_expired': 0,
+            'chunks': 0,
+            'lock_ms_total': 0.0,
+            'lock_ms_max': 0.0,
+            'vacuum_pages': 0,
+            'backlog': False,
+        }
+
+    def _delete_chunk(self, conn: sqlite3.Connection, sql: str, params: Tuple) -> int:
+        start = time.perf_counter()
+        with conn:
+            deleted = conn.execute(sql, params + (self.chunk_rows,)).rowcount
+        lock_ms = (time.perf_counter() - start) * 1000
+
+        self.metrics['chunks'] += 1
+        self.metrics['lock_ms_total'] += lock_ms
+        self.metrics['lock_ms_max'] = max(self.metrics['lock_ms_max'], lock_ms)
+        return deleted
+
+    def expire(self, conn: sqlite3.Connection, now: float = None) -> int:
+        """Delete expired candles and bars within the time budget; returns rows deleted"""
+        now = now if now is not None else time.time()
+        deadline = time.perf_counter() + self.time_budget
+        expired = 0
+        self.metrics['backlog'] = False
+
+        for name, sql, params, retention_seconds in self.policies:
+            cutoff = int(now - retention_seconds)
+            table_expired = 0
+            while True:
+                deleted = self._delete_chunk(conn, sql, params + (cutoff,))
+                table_expired += deleted
+                if deleted < self.chunk_rows:
+                    break
+                if time.perf_counter() >= deadline:
+                    self.metrics['backlog'] = True
+                    break
+
+            expired += table_expired
+            if table_expired:
+                logger.info(f"Expired {table_expired} {name} older than {cutoff}"
+                            f"{' (more pending)' if self.metrics['backlog'] else ''}")
+            if self.metrics['backlog']:
+                break
+
+        self.metrics['runs'] += 1
+        self.metrics['rows_expired'] += expired
+
+        if time.monotonic() - self._last_vacuum >= self.vacuum_interval:
+            self.vacuum(conn)
+        return expired
+
+    def vacuum(self, conn: sqlite3.Connection) -> int:
+        """Release up to `vacuum_pages` free pages; returns pages released"""
+        self._last_vacuum = time.monotonic()
+        free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if not free_pages:
+            return 0
+
+        # executescript steps the pragma to completion; execute() frees a single page
+        conn.executescript(f"PRAGMA incremental_vacuum({self.vacuum_pages});")
+        pages = free_pages - conn.execute("PRAGMA freelist_count").fetchone()[0]
+        self.metrics['vacuum_pages'] += pages
+        logger.info(f"Incremental vacuum released {pages} of {free_pages} free pages")
+        return pages
+
+    def stats(self) -> Dict:
+        chunks = self.metrics['chunks']
+        return dict(self.metrics, lock_ms_mean=self.metrics['lock_ms_total'] / chunks if chunks else 0.0)
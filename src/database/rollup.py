@@ -0,0 +1,260 @@
+import logging
+import sqlite3
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.database.write_behind import ROLLUP_INSERT
+
+logger = logging.getLogger(__name__)
+
+# KuCoin kline granularities up to a day; each divides a UTC day evenly
+TIMEFRAME_SECONDS = {
+    '1min': 60,
+    '5min': 300,
+    '15min': 900,
+    '30min': 1800,
+    '1hour': 3600,
+    '2hour': 7200,
+    '4hour': 14400,
+    '8hour': 28800,
+    '12hour': 43200,
+    '1day': 86400,
+}
+
+DAY_SECONDS = TIMEFRAME_SECONDS['1day']
+DAY_SLOTS = DAY_SECONDS // 60
+OHLCV = ['open', 'high', 'low', 'close', 'volume']
+
+ROLLUP_TABLE = '''
+    CREATE TABLE IF NOT EXISTS candle_rollups (
+        symbol TEXT,
+        timeframe TEXT,
+        timestamp INTEGER,
+        open REAL,
+        high REAL,
+        low REAL,
+        close REAL,
+        volume REAL,
+        PRIMARY KEY (symbol, timeframe, timestamp)
+    )
+'''
+
+# Lets retention walk one timeframe's bars by age
+ROLLUP_INDEX = "CREATE INDEX IF NOT EXISTS idx_rollups_timeframe_ts ON candle_rollups (timeframe, timestamp)"
+
+ROLLUP_SELECT = '''
+    SELECT timestamp, symbol, open, high, low, close, volume FROM candle_rollups
+    WHERE symbol = ? AND timeframe = ?
+'''
+
+DayLoader = Callable[[str, int, int], pd.DataFrame]
+
+
+def aggregate(timestamps: np.ndarray, values: Dict[str, np.ndarray],
+              seconds: int) -> Dict[str, np.ndarray]:
+    """OHLCV bars of `seconds` width from sorted, de-duplicated candles"""
+    if len(timestamps) == 0:
+        return {column: np.empty(0) for column in ['timestamp'] + OHLCV}
+
+    buckets = timestamps - timestamps % seconds
+    starts = np.concatenate([[0], np.flatnonzero(np.diff(buckets)) + 1])
+    ends = np.concatenate([starts[1:], [len(timestamps)]]) - 1
+
+    return {
+        'timestamp': buckets[starts],
+        'open': values['open'][starts],
+        'high': np.maximum.reduceat(values['high'], starts),
+        'low': np.minimum.reduceat(values['low'], starts),
+        'close': values['close'][ends],
+        'volume': np.add.reduceat(values['volume'], starts),
+    }
+
+
+def resample_frame(data: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+    """Aggregate a 1min candle frame into `timeframe` bars"""
+    data = data.sort_values('timestamp').drop_duplicates('timestamp', keep='last')
+    bars = aggregate(
+        data['timestamp'].to_numpy(dtype=np.int64),
+        {column: data[column].to_numpy(dtype=float) for column in OHLCV},
+        TIMEFRAME_SECONDS[timeframe]
+    )
+    return pd.DataFrame(bars)
+
+
+class _DayBuffer:
+    """The 1min candles of one UTC day for one symbol, one slot per minute"""
+
+    __slots__ = ('day', 'values', 'filled')
+
+    def __init__(self, day: int):
+        self.day = day
+        self.values = np.zeros((len(OHLCV), DAY_SLOTS))
+        self.filled = np.zeros(DAY_SLOTS, dtype=bool)
+
+    def bar(self, first: int, slots: int) -> Optional[Tuple[float, ...]]:
+        filled = np.flatnonzero(self.filled[first:first + slots])
+        if len(filled) == 0:
+            return None
+        index = filled + first
+        open_, high, low, close, volume = self.values
+        return (
+            float(open_[index[0]]),
+            float(high[index].max()),
+            float(low[index].min()),
+            float(close[index[-1]]),
+            float(volume[index].sum()),
+        )
+
+
+class CandleRollup:
+    """Maintains higher-timeframe bars from incoming 1min candles
+
+    Every timeframe divides a UTC day evenly, so each symbol keeps only the
+    current day's minutes in a fixed array; a new candle updates its slot
+    and the one bar per timeframe that contains it is recomputed from the
+    array. Rewriting a slot is how corrected candles are handled. Updated
+    bars, including the still-open ones, are returned as rows for the
+    candle_rollups table, and the latest bar per timeframe is kept in
+    memory.
+
+    Candles for days before the current buffer (late data or backfills)
+    are not handled here: `late_range` reports them and `recompute`
+    rebuilds those days from the stored 1min data.
+    """
+
+    def __init__(self, timeframes: List[str], load_day: DayLoader = None):
+        unknown = [tf for tf in timeframes if tf not in TIMEFRAME_SECONDS or tf == '1min']
+        if unknown:
+            raise ValueError(f"Unsupported rollup timeframes: {unknown}")
+
+        self.timeframes = list(timeframes)
+        self.load_day = load_day
+        self._days: Dict[str, _DayBuffer] = {}
+        self.latest: Dict[Tuple[str, str], Dict] = {}
+        self.candles_ingested = 0
+        self.late_candles = 0
+
+    def _buffer(self, symbol: str, day: int) -> _DayBuffer:
+        """Current day buffer, seeded from stored candles when a day starts"""
+        buffer = _DayBuffer(day)
+        if self.load_day is not None:
+            stored = self.load_day(symbol, day * DAY_SECONDS, (day + 1) * DAY_SECONDS)
+            if not stored.empty:
+                self._fill(buffer, *self._arrays(stored))
+        self._days[symbol] = buffer
+        return buffer
+
+    @staticmethod
+    def _arrays(data: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """Timestamps and an (OHLCV, rows) matrix, sorted, last duplicate kept
+
+        Plain NumPy because the live path feeds one candle per call, where
+        pandas sort/dedupe/filter overhead dwarfs the work itself.
+        """
+        timestamps = data['timestamp'].to_numpy(dtype=np.int64)
+        values = np.vstack([data[column].to_numpy(dtype=float) for column in OHLCV])
+        if len(timestamps) > 1:
+            order = np.argsort(timestamps, kind='stable')
+            timestamps, values = timestamps[order], values[:, order]
+            last = np.append(timestamps[1:] != timestamps[:-1], True)
+            timestamps, values = timestamps[last], values[:, last]
+        return timestamps, values
+
+    @staticmethod
+    def _fill(buffer: _DayBuffer, timestamps: np.ndarray, values: np.ndarray) -> np.ndarray:
+        slots = (timestamps % DAY_SECONDS) // 60
+        buffer.values[:, slots] = values
+        buffer.filled[slots] = True
+        return slots
+
+    def ingest(self, symbol: str, data: pd.DataFrame) -> List[Tuple]:
+        """Fold 1min candles into the open bars; returns candle_rollups rows
+
+        Only candles of the newest day seen for the symbol are applied;
+        older ones are left for `recompute`.
+        """
+        if data.empty or not self.timeframes:
+            return []
+
+        timestamps, values = self._arrays(data)
+        days = timestamps // DAY_SECONDS
+        newest = int(days[-1])
+
+        buffer = self._days.get(symbol)
+        if buffer is None or newest > buffer.day:
+            buffer = self._buffer(symbol, newest)
+
+        current = days == buffer.day
+        applied = int(current.sum())
+        self.candles_ingested += len(timestamps)
+        self.late_candles += len(timestamps) - applied
+        if applied == 0:
+            return []
+        if applied < len(timestamps):
+            timestamps, values = timestamps[current], values[:, current]
+
+        slots = np.unique(self._fill(buffer, timestamps, values))
+        day_start = buffer.day * DAY_SECONDS
+        # A correction may touch an earlier bar; latest is the newest one
+        last_slot = int(np.flatnonzero(buffer.filled)[-1])
+        rows = []
+        for timeframe in self.timeframes:
+            width = TIMEFRAME_SECONDS[timeframe] // 60
+            for first in np.unique(slots - slots % width):
+                bar = buffer.bar(int(first), width)
+                rows.append((symbol, timeframe, day_start + int(first) * 60) + bar)
+
+            first = last_slot - last_slot % width
+            self.latest[(symbol, timeframe)] = dict(
+                zip(['timestamp'] + OHLCV, (day_start + first * 60,) + buffer.bar(first, width))
+            )
+        return rows
+
+    def late_range(self, symbol: str, data: pd.DataFrame) -> Optional[Tuple[int, int]]:
+        """[start, end) of whole days in `data` older than the current buffer"""
+        buffer = self._days.get(symbol)
+        if buffer is None or data.empty:
+            return None
+        timestamps = data['timestamp'].to_numpy(dtype=np.int64)
+        late = timestamps[timestamps < buffer.day * DAY_SECONDS]
+        if len(late) == 0:
+            return None
+        return (int(late.min()) // DAY_SECONDS * DAY_SECONDS,
+                (int(late.max()) // DAY_SECONDS + 1) * DAY_SECONDS)
+
+    def recompute(self, conn: sqlite3.Connection, symbol: str, start: int, end: int) -> int:
+        """Rebuild every bar in [start, end) from market_data; returns bars written
+
+        `start` and `end` must be day aligned so no bar is built from a
+        partial range. Runs on the writer connection.
+        """
+        started = time.perf_counter()
+        rows = conn.execute(
+            "SELECT timestamp, open, high, low, close, volume FROM market_data "
+            "WHERE symbol = ? AND timestamp >= ? AND timestamp < ? ORDER BY timestamp",
+            (symbol, start, end)
+        ).fetchall()
+        if not rows:
+            return 0
+
+        candles = np.array(rows, dtype=float)
+        timestamps = candles[:, 0].astype(np.int64)
+        values = {column: candles[:, i + 1] for i, column in enumerate(OHLCV)}
+
+        written = 0
+        with conn:
+            for timeframe in self.timeframes:
+                bars = aggregate(timestamps, values, TIMEFRAME_SECONDS[timeframe])
+                conn.executemany(
+                    ROLLUP_INSERT,
+                    zip([symbol] * len(bars['timestamp']), [timeframe] * len(bars['timestamp']),
+                        bars['timestamp'].tolist(), *(bars[column].tolist() for column in OHLCV))
+                )
+                written += len(bars['timestamp'])
+
+        logger.info(f"Rebuilt {written} rollup bars for {symbol} from {len(rows)} candles "
+                    f"in {time.perf_counter() - started:.2f}s")
+        return written
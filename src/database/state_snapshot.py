@@ -0,0 +1,97 @@
+import logging
+import os
+import pickle
+import tempfile
+import time
+import zlib
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_MAGIC = b'KTSNAP'
+SNAPSHOT_VERSION = 1
+
+
+class StateSnapshot:
+    """Periodic binary snapshot of in-memory bot state, restored on boot
+
+    `components` maps a name to any object with `snapshot() -> dict` and
+    `restore(dict)`. Their states are pickled together (NumPy arrays stay
+    raw buffers), zlib-compressed and written atomically next to the
+    target file, so a crash mid-write leaves the previous snapshot intact.
+    A snapshot from another format version or older than `max_age`
+    seconds is ignored and the bot starts cold. Pickle is only safe for
+    files this process wrote itself; the path must not be shared.
+    """
+
+    def __init__(self, path: str, components: Dict[str, object], max_age: float = 86400):
+        self.path = path
+        self.components = components
+        self.max_age = max_age
+        self.last_saved: Optional[float] = None
+        self.last_size = 0
+
+    def capture(self) -> bytes:
+        """Serialize every component; call from the thread that owns their state"""
+        payload = {
+            'version': SNAPSHOT_VERSION,
+            'saved_at': time.time(),
+            'state': {name: component.snapshot() for name, component in self.components.items()},
+        }
+        return pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def write(self, data: bytes) -> None:
+        """Compress and atomically replace the snapshot file; safe to run in an executor"""
+        data = SNAPSHOT_MAGIC + zlib.compress(data, 1)
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, staging = tempfile.mkstemp(prefix='.snapshot-', dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(staging, self.path)
+        except Exception:
+            if os.path.exists(staging):
+                os.unlink(staging)
+            raise
+        self.last_saved = time.time()
+        self.last_size = len(data)
+
+    def save(self) -> int:
+        self.write(self.capture())
+        return self.last_size
+
+    def restore(self) -> bool:
+        """Load the snapshot into the components; False if there was none usable"""
+        if not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path, 'rb') as f:
+                data = f.read()
+            if not data.startswith(SNAPSHOT_MAGIC):
+                raise ValueError("not a state snapshot")
+            payload = pickle.loads(zlib.decompress(data[len(SNAPSHOT_MAGIC):]))
+        except Exception as e:
+            logger.error(f"Error reading state snapshot {self.path}: {str(e)}")
+            return False
+
+        age = time.time() - payload['saved_at']
+        if payload['version'] != SNAPSHOT_VERSION:
+            logger.warning(f"Ignoring state snapshot version {payload['version']}")
+            return False
+        if age > self.max_age:
+            logger.warning(f"Ignoring state snapshot from {age:.0f}s ago")
+            return False
+
+        for name, component in self.components.items():
+            state = payload['state'].get(name)
+            if state is None:
+                continue
+            try:
+                component.restore(state)
+            except Exception as e:
+                logger.error(f"Error restoring {name} from snapshot: {str(e)}")
+        logger.info(f"Restored state snapshot from {age:.0f}s ago ({len(data)} bytes)")
+        return True
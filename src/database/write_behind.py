@@ -0,0 +1,275 @@
+import asyncio
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+PRAGMAS = [
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",  # 64 MB
+    "PRAGMA busy_timeout=5000",
+]
+
+MARKET_DATA_INSERT = '''
+    INSERT OR REPLACE INTO market_data (
+        timestamp, symbol, open, high, low, close, volume
+    ) VALUES (?, ?, ?, ?, ?, ?, ?)
+'''
+
+TRADE_INSERT = '''
+    INSERT INTO trades (
+        timestamp, symbol, side, entry_price,
+        exit_price, size, pnl, strategy
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+ROLLUP_INSERT = '''
+    INSERT OR REPLACE INTO candle_rollups (
+        symbol, timeframe, timestamp, open, high, low, close, volume
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+INSERTS = {
+    'market_data': MARKET_DATA_INSERT,
+    'trades': TRADE_INSERT,
+    'candle_rollups': ROLLUP_INSERT,
+}
+
+# Attempts at a batch failing with OperationalError before it is split
+COMMIT_RETRIES = 2
+COMMIT_RETRY_DELAY = 0.05
+
+_STOP = object()
+
+
+def apply_pragmas(conn: sqlite3.Connection) -> None:
+    """WAL journaling and write-friendly settings for a connection"""
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+
+
+class WriteBehindWriter:
+    """Batched SQLite writer running on its own thread
+
+    Producers enqueue rows and return immediately; the writer thread drains
+    the queue and commits everything it collected (up to `batch_rows` rows
+    or `flush_interval` seconds) in one transaction with `executemany`.
+    The queue is bounded, so producers block (or await) once the writer
+    falls behind instead of growing memory without limit. `close()` drains
+    everything still queued before returning.
+
+    A batch that fails to commit is retried, then split by table and in
+    halves down to single rows, so only the rows SQLite itself refuses are
+    dropped (counted in `failed_rows`).
+    """
+
+    def __init__(self, db_path: str, max_queue: int = 10000,
+                 batch_rows: int = 5000, flush_interval: float = 0.5):
+        self.db_path = db_path
+        self.batch_rows = batch_rows
+        self.flush_interval = flush_interval
+
+        self.rows_written = 0
+        self.batches = 0
+        self.failed_rows = 0
+        self.backpressure_waits = 0
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, name='db-writer', daemon=True)
+        self._thread.start()
+
+    def _put(self, item: Tuple) -> None:
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.backpressure_waits += 1
+            self._queue.put(item)
+
+    async def _put_async(self, item: Tuple) -> None:
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.backpressure_waits += 1
+            await asyncio.get_running_loop().run_in_executor(None, self._queue.put, item)
+
+    def submit(self, table: str, rows: Sequence[Tuple]) -> None:
+        """Queue rows for `table` (a key of INSERTS), blocking while full"""
+        if rows:
+            self._put((table, rows))
+
+    def try_submit(self, table: str, rows: Sequence[Tuple]) -> bool:
+        """Queue rows if there is room; False (nothing queued) when full"""
+        if not rows:
+            return True
+        try:
+            self._queue.put_nowait((table, rows))
+            return True
+        except queue.Full:
+            self.backpressure_waits += 1
+            return False
+
+    async def submit_async(self, table: str, rows: Sequence[Tuple]) -> None:
+        """Queue rows without blocking the event loop; waits while the queue is full"""
+        if rows:
+            await self._put_async((table, rows))
+
+    def call(self, fn: Callable[[sqlite3.Connection], Any]) -> Future:
+        """Run `fn(conn)` on the writer thread after everything queued before it
+
+        This keeps every write on the single writer connection; the returned
+        future resolves with `fn`'s result. Blocks while the queue is full,
+        so use `call_async` from the event loop.
+        """
+        future = Future()
+        self._put(('call', (fn, future)))
+        return future
+
+    async def call_async(self, fn: Callable[[sqlite3.Connection], Any]) -> Future:
+        """`call` that awaits room in a full queue instead of blocking the event loop
+
+        Returns once `fn` is queued; await `asyncio.wrap_future` on the
+        result to wait for it to run.
+        """
+        future = Future()
+        await self._put_async(('call', (fn, future)))
+        return future
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def flush(self) -> None:
+        """Block until everything queued so far is committed"""
+        self._queue.join()
+
+    def close(self) -> None:
+        """Drain the queue, commit and stop the writer thread"""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+
+    @staticmethod
+    def _weight(item: Tuple) -> int:
+        return 1 if item[0] == 'call' else len(item[1])
+
+    def _collect(self) -> Tuple[List, bool]:
+        """Gather queued items until the batch is full or the interval passes"""
+        items = [self._queue.get()]
+        if items[0] is _STOP:
+            return [], True
+
+        rows = self._weight(items[0])
+        deadline = time.monotonic() + self.flush_interval
+        while rows < self.batch_rows:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return items, True
+            items.append(item)
+            rows += self._weight(item)
+
+        return items, False
+
+    def _write(self, conn: sqlite3.Connection, items: List) -> None:
+        """Commit queued rows, running queued calls in submission order"""
+        pending: Dict[str, List] = {}
+        for table, payload in items:
+            if table == 'call':
+                self._commit(conn, pending)
+                pending = {}
+                self._run_call(conn, *payload)
+            else:
+                pending.setdefault(table, []).extend(payload)
+        self._commit(conn, pending)
+
+    def _commit(self, conn: sqlite3.Connection, pending: Dict[str, List]) -> None:
+        rows = sum(len(table_rows) for table_rows in pending.values())
+        if not rows:
+            return
+        for attempt in range(COMMIT_RETRIES):
+            try:
+                self._execute(conn, [(table, pending[table]) for table in INSERTS if pending.get(table)])
+                self.rows_written += rows
+                self.batches += 1
+                return
+            except sqlite3.OperationalError as e:
+                # Locked or busy database, I/O errors: the same batch may go through
+                logger.warning(f"Failed to write batch of {rows} rows (attempt {attempt + 1}): {e}")
+                time.sleep(COMMIT_RETRY_DELAY * (attempt + 1))
+            except sqlite3.Error as e:
+                logger.warning(f"Failed to write batch of {rows} rows, splitting it: {e}")
+                break
+
+        # market_data first so rollups never reference uncommitted candles
+        for table in INSERTS:
+            if pending.get(table):
+                self._commit_split(conn, table, pending[table])
+        self.batches += 1
+
+    def _commit_split(self, conn: sqlite3.Connection, table: str, rows: List) -> None:
+        """Commit `rows` in halves, dropping only single rows that still fail"""
+        try:
+            self._execute(conn, [(table, rows)])
+            self.rows_written += len(rows)
+        except sqlite3.Error as e:
+            if len(rows) == 1:
+                self.failed_rows += 1
+                logger.error(f"Dropped {table} row {rows[0]}: {e}")
+                return
+            middle = len(rows) // 2
+            self._commit_split(conn, table, rows[:middle])
+            self._commit_split(conn, table, rows[middle:])
+
+    @staticmethod
+    def _execute(conn: sqlite3.Connection, batches: List[Tuple[str, List]]) -> None:
+        with conn:
+            for table, rows in batches:
+                conn.executemany(INSERTS[table], rows)
+
+    @staticmethod
+    def _run_call(conn: sqlite3.Connection, fn: Callable, future: Future) -> None:
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(fn(conn))
+        except BaseException as e:
+            future.set_exception(e)
+
+    def _run(self) -> None:
+        conn = sqlite3.connect(self.db_path)
+        apply_pragmas(conn)
+        try:
+            stopping = False
+            while not stopping:
+                items, stopping = self._collect()
+                if items:
+                    self._write(conn, items)
+                for _ in range(len(items) + (1 if stopping else 0)):
+                    self._queue.task_done()
+
+            # Drain anything enqueued after the stop request
+            leftover = []
+            while True:
+                try:
+                    leftover.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            items = [item for item in leftover if item is not _STOP]
+            if items:
+                self._write(conn, items)
+            for _ in leftover:
+                self._queue.task_done()
+        finally:
+            conn.close()
@@ -1,27 +1,244 @@
 import logging
-from typing import Dict
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
 import asyncio
+import time
+
+import numpy as np
+import pandas as pd
+
+from config.config import Config
+from src.models.training_scheduler import TrainingScheduler
+from src.monitoring.logs import sampled
+from src.strategies.inference_server import InferenceServer
+from src.strategies.model_store import FeatureCache
 
 logger = logging.getLogger(__name__)
 
+
+def _stream_step(numpy_model, symbol: str, sequence: np.ndarray) -> float:
+    """One new candle through a symbol's LSTM state, rebuilt when stale"""
+    steps = numpy_model.steps_since_warm(symbol)
+    if steps is None or steps >= Config.NUMPY_LSTM_RESYNC:
+        return numpy_model.warm(symbol, sequence)
+    return numpy_model.step(symbol, sequence[-1])
+
+
 class MarketAnalyzer:
+    """Per-symbol model predictions turned into trading signals
+
+    Each symbol's model (loaded from MODEL_DIR at startup or promoted by
+    the training scheduler) is served by its own InferenceServer; all
+    servers share one inference thread. A symbol is analysed at most once
+    per cycle, so its server has nothing to batch with and runs each
+    request as soon as it arrives (max_wait 0) rather than holding it. Swapping a
+    model replaces the symbol's model and server together on the event
+    loop, then drains the old server so requests already queued on it are
+    still answered. Models on the NumPy backend skip the server: each
+    symbol's LSTM state is stepped once per new candle (`predict_step`)
+    and saved with the rest of the bot state, so a restart resumes
+    streaming instead of re-running every window. Attached models share
+    one on-disk feature cache, so a
+    symbol analysed again before its next candle (or after a restart)
+    reuses the features computed last time.
+    """
+
     def __init__(self):
         self.last_update = 0
+        self.models: Dict[str, object] = {}
+        self.servers: Dict[str, InferenceServer] = {}
+        self.feature_cache = FeatureCache(Config.FEATURE_CACHE_DIR)
+        self._inference_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='inference')
+        self.training_scheduler = TrainingScheduler(on_promote=self.attach_model)
+        # Indicator and LSTM state restored before the symbol's model is loaded
+        self._saved_indicators: Dict[str, Dict] = {}
+        self._saved_streams: Dict[str, Dict] = {}
+        # symbol -> (model, newest candle timestamp, output) of the last streamed prediction
+        self._streamed: Dict[str, Tuple[object, int, float]] = {}
         logger.info("Market Analyzer initialized")
 
-    async def analyze_market(self, symbol: str) -> Dict:
-        logger.info(f"Analyzing market for {symbol}")
-        await asyncio.sleep(1)  # Simulate analysis
-        return {
-            "confidence": 0.5,
+    async def analyze_market(self, symbol: str, data: pd.DataFrame) -> Dict:
+        """Signal for a symbol from its recent candles (oldest first)
+
+        The model is trained toward the next candle's direction (+1 / -1),
+        so its tanh output in [-1, 1] gives the direction by its sign and
+        the confidence by its magnitude. Symbols without a model, or
+        without enough candles for a full window, get zero confidence.
+        """
+        logger.info("Analyzing market for %s", symbol, extra=sampled('analyze'))
+        current_price = float(data['close'].iloc[-1]) if not data.empty else None
+        analysis = {
+            "confidence": 0.0,
             "direction": "long",
             "suggested_leverage": 1,
-            "suggested_entry": 1000.0
+            "suggested_entry": current_price,
+            "current_price": current_price
         }
 
+        # Taken together so a swap mid-analysis cannot pair a model with another's server
+        model, server = self.models.get(symbol), self.servers.get(symbol)
+        if model is None or data.empty:
+            return analysis
+
+        loop = asyncio.get_running_loop()
+        try:
+            window = await loop.run_in_executor(
+                None, model.prepare_inference_input, data, Config.SEQUENCE_LENGTH, symbol
+            )
+        except ValueError as e:
+            logger.info("Skipping prediction for %s: %s", symbol, str(e), extra=sampled(symbol))
+            return analysis
+
+        if model.numpy_model is not None and 'timestamp' in data:
+            output = self._predict_streaming(symbol, model, window[0],
+                                             data['timestamp'].to_numpy()[-2:])
+        else:
+            output = float((await server.predict(window[0]))[0])
+        analysis['confidence'] = min(abs(output), 1.0)
+        analysis['direction'] = 'long' if output >= 0 else 'short'
+        analysis['prediction'] = output
+        return analysis
+
+    def _predict_streaming(self, symbol: str, model, sequence: np.ndarray,
+                           timestamps: np.ndarray) -> float:
+        """Output for the newest candle, advancing the LSTM state once per candle
+
+        `timestamps` are the last two candles' timestamps. Analysing the
+        same candle again reuses its output; unless the state last saw the
+        candle just before the newest one (a gap, or a new model), it is
+        rebuilt from the whole window.
+        """
+        newest = int(timestamps[-1])
+        last = self._streamed.get(symbol)
+        if last is not None and last[0] is model and last[1] == newest:
+            return last[2]
+        if last is None or last[0] is not model or len(timestamps) < 2 or last[1] != int(timestamps[-2]):
+            model.numpy_model.reset(symbol)
+        output = _stream_step(model.numpy_model, symbol, sequence)
+        self._streamed[symbol] = (model, newest, output)
+        return output
+
     def get_last_update_time(self) -> int:
         return self.last_update
 
-    async def update_models(self):
-        logger.info("Updating models")
-        await asyncio.sleep(1)  # Simulate update
+    async def update_models(self, market_data: Dict[str, pd.DataFrame]):
+        """Schedule background retraining; returns without waiting for it"""
+        logger.info(f"Scheduling model updates for {len(market_data)} symbols")
+        if self.training_scheduler.schedule(market_data):
+            self.last_update = int(time.time())
+
+    def is_training(self) -> bool:
+        return self.training_scheduler.running
+
+    async def load_models(self) -> List[str]:
+        """Attach every model saved under MODEL_DIR; returns the symbols loaded"""
+        from src.strategies.model_store import load_model_artifacts, read_artifact_metadata
+
+        if not os.path.isdir(Config.MODEL_DIR):
+            return []
+        loop = asyncio.get_running_loop()
+        loaded = []
+        for symbol in sorted(os.listdir(Config.MODEL_DIR)):
+            directory = os.path.join(Config.MODEL_DIR, symbol)
+            # Candidates and retired sets are dot-prefixed
+            if symbol.startswith('.') or read_artifact_metadata(directory) is None:
+                continue
+            try:
+                model = await loop.run_in_executor(
+                    None, lambda: load_model_artifacts(directory, backend=Config.INFERENCE_BACKEND)
+                )
+            except Exception as e:
+                logger.error(f"Error loading model for {symbol}: {str(e)}")
+                continue
+            await self.attach_model(symbol, model)
+            loaded.append(symbol)
+        logger.info(f"Loaded models for {len(loaded)} symbols")
+        return loaded
+
+    def snapshot(self) -> Dict:
+        indicators = dict(self._saved_indicators)
+        indicators.update({symbol: model.indicators.snapshot()
+                           for symbol, model in self.models.items()})
+        streams = dict(self._saved_streams)
+        for symbol, (model, timestamp, output) in self._streamed.items():
+            if self.models.get(symbol) is model:
+                streams[symbol] = {'version': model.version, 'timestamp': timestamp,
+                                   'output': output, 'state': model.numpy_model.snapshot()}
+        return {'last_update': self.last_update, 'indicators': indicators, 'streams': streams}
+
+    def restore(self, state: Dict) -> None:
+        """Restore timers now and indicator / LSTM state as each symbol's model is installed"""
+        self.last_update = state['last_update']
+        self._saved_indicators = dict(state['indicators'])
+        self._saved_streams = dict(state.get('streams', {}))
+        for symbol, model in self.models.items():
+            self._restore_model_state(symbol, model)
+
+    def _restore_model_state(self, symbol: str, model) -> None:
+        saved = self._saved_indicators.pop(symbol, None)
+        if saved is not None:
+            model.indicators.restore(saved)
+        stream = self._saved_streams.pop(symbol, None)
+        # LSTM state is only valid for the weights that produced it
+        if stream is not None and model.numpy_model is not None and stream['version'] == model.version:
+            try:
+                model.numpy_model.restore(stream['state'])
+                self._streamed[symbol] = (model, stream['timestamp'], stream['output'])
+            except ValueError as e:
+                logger.warning(f"Discarding saved LSTM state for {symbol}: {str(e)}")
+
+    async def attach_model(self, symbol: str, model) -> None:
+        """Serve a symbol's predictions from `model`, hot-swapping any previous one"""
+        # Weights are per symbol, so requests from other symbols cannot join a batch
+        options = dict(max_batch_size=Config.INFERENCE_MAX_BATCH_SIZE,
+                       max_wait=0.0, executor=self._inference_executor)
+        if model.numpy_model is not None:
+            server = InferenceServer(model.numpy_model.predict, **options)
+        else:
+            server = InferenceServer.from_keras_model(model.model, **options)
+        await server.start()
+
+        model.feature_cache = self.feature_cache
+        self._restore_model_state(symbol, model)
+        previous = self.servers.get(symbol)
+        # No await between these two, so every analysis sees a matching pair
+        self.models[symbol] = model
+        self.servers[symbol] = server
+        logger.info(f"Installed model {model.version} for {symbol}")
+        if previous is not None:
+            await previous.stop(drain=True)
+
+    async def predict(self, symbol: str, sequence: np.ndarray) -> float:
+        """Predict the next move for one symbol's feature sequence"""
+        server = self.servers.get(symbol)
+        if server is None:
+            raise RuntimeError(f"No model attached for {symbol}")
+        output = await server.predict(sequence)
+        return float(output[0])
+
+    def predict_step(self, symbol: str, sequence: np.ndarray) -> float:
+        """Predict for a symbol's latest window after one new candle
+
+        Call once per candle. While the symbol's LSTM state is fresh only
+        the newest feature row is run; every NUMPY_LSTM_RESYNC candles (or
+        for a new symbol) the state is rebuilt from the whole window so it
+        stays close to `predict`. Cheap enough to run on the event loop.
+        """
+        model = self.models.get(symbol)
+        numpy_model = model.numpy_model if model is not None else None
+        if numpy_model is None:
+            raise RuntimeError("Streaming prediction needs a model on the NumPy backend")
+        return _stream_step(numpy_model, symbol, sequence)
+
+    def get_inference_stats(self) -> Dict[str, Dict]:
+        return {symbol: server.stats() for symbol, server in self.servers.items()}
+
+    async def stop(self) -> None:
+        """Stop training and fail any prediction still waiting on a server"""
+        await self.training_scheduler.shutdown()
+        servers = list(self.servers.values())
+        self.servers.clear()
+        for server in servers:
+            await server.stop()
+        self._inference_executor.shutdown(wait=False)
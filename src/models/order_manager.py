@@ -0,0 +1,371 @@
+import asyncio
+import logging
+import time
+import uuid
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+from config.config import Config
+from src.api.instruments import InstrumentCache
+from src.api.kucoin_client import KuCoinAPIError
+from src.api.order_stream import OrderEventStream
+
+logger = logging.getLogger(__name__)
+
+NEW = 'new'
+OPEN = 'open'
+PARTIALLY_FILLED = 'partially_filled'
+FILLED = 'filled'
+CANCELLED = 'cancelled'
+REJECTED = 'rejected'
+
+TERMINAL_STATES = frozenset((FILLED, CANCELLED, REJECTED))
+
+# Slack when asking the exchange for orders finished since our oldest
+# live order, covering clock skew between us and the exchange
+RECONCILE_SLACK_MS = 60000
+
+# An order whose place_order call failed in transport is only rejected
+# once the exchange's listings have not shown it for this long
+UNKNOWN_ORDER_GRACE_MS = 10000
+
+
+class Order:
+    """One order's local state; `filled_value` is in quote currency"""
+
+    __slots__ = ('client_oid', 'order_id', 'symbol', 'side', 'size', 'price',
+                 'leverage', 'filled_size', 'filled_value', 'state', 'created',
+                 'updated', 'position_id')
+
+    def __init__(self, client_oid: str, symbol: str, side: str, size: int,
+                 price: Optional[float], leverage: int):
+        self.client_oid = client_oid
+        self.order_id: Optional[str] = None
+        self.symbol = symbol
+        self.side = side
+        self.size = size
+        self.price = price
+        self.leverage = leverage
+        self.filled_size = 0
+        self.filled_value = 0.0
+        self.state = NEW
+        self.created = int(time.time() * 1000)
+        self.updated = self.created
+        self.position_id: Optional[int] = None
+
+    @property
+    def done(self) -> bool:
+        return self.state in TERMINAL_STATES
+
+    @property
+    def remaining(self) -> int:
+        return self.size - self.filled_size
+
+    def to_dict(self) -> Dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class OrderManager:
+    """Local order book driven by execution reports
+
+    Orders are registered under their clientOid before they are sent, so a
+    report arriving ahead of the REST response is still matched. Private
+    WebSocket orderChange reports move each order through
+    new -> open -> partially_filled -> filled / cancelled; fills are applied
+    from the cumulative filled size, so a repeated or reordered report is a
+    no-op and a missed one is made up by the next. Every fill is handed to
+    `fill_listeners` as (order, lots, price), which is how positions are
+    derived locally instead of polling each order.
+
+    `reconcile` repairs drift from lost reports with one batched listing of
+    active orders and one of orders finished since the oldest live order;
+    it runs every ORDER_RECONCILE_INTERVAL seconds and after every stream
+    (re)connect. An order whose place_order call failed without an answer
+    from the exchange (timeout, dropped connection) may still have been
+    accepted, so it stays NEW and a reconcile settles it by clientOid:
+    reports and listings that mention it apply as usual, and it is only
+    rejected once the listings have not shown it for
+    UNKNOWN_ORDER_GRACE_MS. A shard worker (non-empty `client_oid_prefix`) skips the
+    listing while it has no live orders, since anything it would find
+    belongs to another shard; its first pass can be delayed by
+    `reconcile_offset` to stagger workers sharing one account. Finished orders stay indexed until they fall out of the
+    bounded history (ORDER_HISTORY_SIZE).
+    """
+
+    def __init__(self, client, instruments: InstrumentCache = None,
+                 history_size: int = None, reconcile_interval: float = None,
+                 use_stream: bool = None, client_oid_prefix: str = '',
+                 reconcile_offset: float = 0.0):
+        self.client = client
+        self.client_oid_prefix = client_oid_prefix
+        self.instruments = instruments if instruments is not None else client.instruments
+        self.history_size = history_size or Config.ORDER_HISTORY_SIZE
+        self.reconcile_interval = (Config.ORDER_RECONCILE_INTERVAL
+                                   if reconcile_interval is None else reconcile_interval)
+        self.reconcile_offset = reconcile_offset
+        self.use_stream = Config.USE_ORDER_STREAM if use_stream is None else use_stream
+
+        self.orders: Dict[str, Order] = {}
+        self._by_order_id: Dict[str, Order] = {}
+        self.history = deque()
+        self.fill_listeners: List[Callable[[Order, int, float], None]] = []
+
+        self.stream: Optional[OrderEventStream] = None
+        self._reconcile_task: Optional[asyncio.Task] = None
+        self._reconcile_lock = asyncio.Lock()
+        self._sending = set()
+        self._scheduled = set()
+        self.reconciliations = 0
+        self.repaired = 0
+        self.unknown_reports = 0
+        self.fill_latency = {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0}
+
+    def get(self, client_oid: str) -> Optional[Order]:
+        return self.orders.get(client_oid)
+
+    def get_by_order_id(self, order_id: str) -> Optional[Order]:
+        return self._by_order_id.get(order_id)
+
+    @property
+    def open_orders(self) -> List[Order]:
+        return [order for order in self.orders.values() if not order.done]
+
+    async def start(self) -> None:
+        """Connect the execution report stream and start periodic reconciliation"""
+        if self.use_stream and self.stream is None:
+            self.stream = OrderEventStream(self.client)
+            self.stream.subscribe(self.on_report)
+            self.stream.on_reconnect(self.schedule_reconcile)
+            await self.stream.start()
+        if self._reconcile_task is None:
+            self._reconcile_task = asyncio.create_task(self._reconcile_loop())
+
+    async def stop(self) -> None:
+        if self._reconcile_task is not None:
+            self._reconcile_task.cancel()
+            try:
+                await self._reconcile_task
+            except asyncio.CancelledError:
+                pass
+            self._reconcile_task = None
+        for task in list(self._scheduled):
+            task.cancel()
+        if self.stream is not None:
+            await self.stream.stop()
+            self.stream = None
+
+    async def submit(self, request: Dict) -> Order:
+        """Send an order produced by PreTradeChecker.check and start tracking it"""
+        order = Order(self.client_oid_prefix + uuid.uuid4().hex, request['symbol'], request['side'],
+                      request['size'], request['price'], request['leverage'])
+        self.orders[order.client_oid] = order
+        self._sending.add(order.client_oid)
+        try:
+            response = await self.client.place_order(
+                symbol=order.symbol,
+                side=order.side,
+                leverage=order.leverage,
+                size=order.size,
+                price=order.price,
+                client_oid=order.client_oid
+            )
+        except KuCoinAPIError as e:
+            # A report may already have shown the order reached the exchange
+            if e.code is None:
+                return self._unknown(order, e)
+            if order.state == NEW:
+                self._set_state(order, REJECTED)
+            raise
+        except Exception as e:
+            return self._unknown(order, e)
+        finally:
+            self._sending.discard(order.client_oid)
+
+        self._bind(order, response['orderId'])
+        if order.state == NEW:
+            self._set_state(order, OPEN)
+        return order
+
+    def _unknown(self, order: Order, error: Exception) -> Order:
+        """Keep an order whose placement got no answer and let reconcile settle it"""
+        logger.warning(f"No answer placing order {order.client_oid} ({order.symbol}), "
+                       f"reconciling: {str(error)}")
+        self.schedule_reconcile()
+        return order
+
+    async def cancel(self, order: Order) -> None:
+        """Ask the exchange to cancel; the state changes when it is reported"""
+        if not order.done and order.order_id is not None:
+            await self.client.cancel_order(order.order_id)
+
+    def on_report(self, data: Dict, received: float = None) -> None:
+        """Apply one orderChange execution report from the private stream"""
+        order = self._lookup(data.get('orderId'), data.get('clientOid'))
+        if order is None:
+            self.unknown_reports += 1
+            logger.debug(f"Execution report for untracked order {data.get('orderId')}")
+            return
+
+        filled_size = int(float(data.get('filledSize') or 0))
+        filled_value = order.filled_value
+        if filled_size > order.filled_size:
+            # A missed report is made up here at the latest match price
+            price = float(data.get('matchPrice') or data.get('price') or order.price)
+            filled_value += (filled_size - order.filled_size) * price * self._multiplier(order.symbol)
+
+        self._apply(order, filled_size, filled_value, data.get('status') == 'done', received)
+
+    async def reconcile(self) -> int:
+        """Repair local state from the exchange's order lists; returns orders changed"""
+        async with self._reconcile_lock:
+            live = self.open_orders
+            if not live and self.client_oid_prefix:
+                return 0
+            listed = int(time.time() * 1000)
+            active = await self.client.get_orders('active')
+            finished = []
+            if live:
+                since = min(order.created for order in live) - RECONCILE_SLACK_MS
+                finished = await self.client.get_orders('done', start_at=since)
+
+            changed = 0
+            seen = set()
+            for item, done in [(item, False) for item in active] + [(item, True) for item in finished]:
+                order = self._lookup(item.get('id'), item.get('clientOid'))
+                if order is None:
+                    # Orders from other shards of the same account carry their own prefix
+                    if not done and (item.get('clientOid') or '').startswith(self.client_oid_prefix):
+                        logger.warning(f"Untracked open order {item.get('id')} on {item.get('symbol')}")
+                    continue
+                seen.add(order.client_oid)
+                state = order.state
+                filled_size = order.filled_size
+                self._apply(order, int(float(item.get('filledSize') or 0)),
+                            float(item.get('filledValue') or 0), done)
+                if order.state != state or order.filled_size != filled_size:
+                    changed += 1
+
+            for order in live:
+                if order.client_oid in seen or order.done:
+                    continue
+                if order.order_id is not None:
+                    logger.warning(f"Order {order.order_id} ({order.symbol}) not found at the exchange")
+                elif (order.client_oid not in self._sending
+                      and listed - order.created >= UNKNOWN_ORDER_GRACE_MS):
+                    logger.warning(f"Order {order.client_oid} ({order.symbol}) never reached "
+                                   f"the exchange, marking it rejected")
+                    self._set_state(order, REJECTED)
+                    changed += 1
+
+            self.reconciliations += 1
+            self.repaired += changed
+            if changed:
+                logger.warning(f"Order reconciliation repaired {changed} orders")
+            return changed
+
+    def stats(self) -> Dict:
+        latency = dict(self.fill_latency)
+        latency['mean_ms'] = latency['total_ms'] / latency['count'] if latency['count'] else 0.0
+        return {
+            'open': len(self.open_orders),
+            'tracked': len(self.orders),
+            'reconciliations': self.reconciliations,
+            'repaired': self.repaired,
+            'unknown_reports': self.unknown_reports,
+            'fill_latency': latency,
+        }
+
+    def snapshot(self) -> Dict:
+        """Live orders, so fills after a restart still map to their positions"""
+        return {'orders': [order.to_dict() for order in self.open_orders]}
+
+    def restore(self, state: Dict) -> None:
+        """Reload live orders; the first reconcile catches up on missed fills"""
+        for saved in state['orders']:
+            order = Order(saved['client_oid'], saved['symbol'], saved['side'],
+                          saved['size'], saved['price'], saved['leverage'])
+            for name in ('filled_size', 'filled_value', 'state', 'created',
+                         'updated', 'position_id'):
+                setattr(order, name, saved[name])
+            self.orders[order.client_oid] = order
+            if saved['order_id'] is not None:
+                self._bind(order, saved['order_id'])
+
+    def _apply(self, order: Order, filled_size: int, filled_value: float,
+               done: bool, received: float = None) -> None:
+        """Move an order to the cumulative fill state reported by the exchange"""
+        if order.done:
+            return
+
+        delta = filled_size - order.filled_size
+        if delta > 0:
+            price = (filled_value - order.filled_value) / (delta * self._multiplier(order.symbol))
+            order.filled_size = filled_size
+            order.filled_value = filled_value
+            for listener in self.fill_listeners:
+                try:
+                    listener(order, delta, price)
+                except Exception as e:
+                    logger.error(f"Error in fill listener for {order.symbol}: {str(e)}")
+            if received is not None:
+                self._record_latency(time.perf_counter() - received)
+
+        if done:
+            self._set_state(order, FILLED if order.filled_size >= order.size else CANCELLED)
+        elif order.filled_size > 0:
+            self._set_state(order, PARTIALLY_FILLED)
+        elif order.state == NEW:
+            self._set_state(order, OPEN)
+
+    def _set_state(self, order: Order, state: str) -> None:
+        order.state = state
+        order.updated = int(time.time() * 1000)
+        if order.done:
+            self.history.append(order)
+            while len(self.history) > self.history_size:
+                self._forget(self.history.popleft())
+
+    def _forget(self, order: Order) -> None:
+        self.orders.pop(order.client_oid, None)
+        if order.order_id is not None:
+            self._by_order_id.pop(order.order_id, None)
+
+    def _bind(self, order: Order, order_id: str) -> None:
+        order.order_id = order_id
+        self._by_order_id[order_id] = order
+
+    def _lookup(self, order_id: str, client_oid: str) -> Optional[Order]:
+        order = self._by_order_id.get(order_id) if order_id else None
+        if order is None and client_oid:
+            order = self.orders.get(client_oid)
+            if order is not None and order_id and order.order_id is None:
+                # Report arrived before the place_order response
+                self._bind(order, order_id)
+        return order
+
+    def _multiplier(self, symbol: str) -> float:
+        instrument = self.instruments.get(symbol) if self.instruments is not None else None
+        return instrument.multiplier if instrument is not None else 1.0
+
+    def _record_latency(self, elapsed: float) -> None:
+        elapsed_ms = elapsed * 1000
+        self.fill_latency['count'] += 1
+        self.fill_latency['total_ms'] += elapsed_ms
+        self.fill_latency['max_ms'] = max(self.fill_latency['max_ms'], elapsed_ms)
+
+    def schedule_reconcile(self) -> None:
+        task = asyncio.create_task(self._reconcile_safely())
+        self._scheduled.add(task)
+        task.add_done_callback(self._scheduled.discard)
+
+    async def _reconcile_safely(self) -> None:
+        try:
+            await self.reconcile()
+        except Exception as e:
+            logger.error(f"Error reconciling orders: {str(e)}")
+
+    async def _reconcile_loop(self) -> None:
+        await asyncio.sleep(self.reconcile_offset)
+        while True:
+            await asyncio.sleep(self.reconcile_interval)
+            await self._reconcile_safely()
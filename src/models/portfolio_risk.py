@@ -0,0 +1,186 @@
+import logging
+import math
+from statistics import NormalDist
+from typing import Dict, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class PortfolioRiskEngine:
+    """Exponentially weighted covariance of symbol returns and portfolio VaR
+
+    `update_prices` is fed the latest price of every symbol once per sample
+    interval; log returns update the covariance in place (RiskMetrics-style
+    zero-mean EWMA, O(n^2) per sample). Net exposures are kept alongside,
+    together with Σw and the portfolio variance w'Σw, so changing one
+    symbol's exposure costs O(n) and pricing a candidate order is O(1).
+    Symbols are added on first sight; a symbol missing from a sample is
+    treated as unchanged for that interval.
+    """
+
+    def __init__(self, decay: float = 0.94, sample_seconds: float = 60,
+                 horizon_seconds: float = 86400, confidence: float = 0.99,
+                 capacity: int = 64):
+        self.decay = decay
+        self.sample_seconds = sample_seconds
+        self.horizon_scale = math.sqrt(horizon_seconds / sample_seconds)
+        self.z = NormalDist().inv_cdf(confidence)
+
+        self.index: Dict[str, int] = {}
+        self.cov = np.zeros((capacity, capacity))
+        self.last_prices = np.full(capacity, np.nan)
+        self.exposure = np.zeros(capacity)
+        self._sigma_w = np.zeros(capacity)
+        self._variance = 0.0
+        self.samples = 0
+
+        self.peak_equity = 0.0
+        self.equity = 0.0
+
+    @property
+    def size(self) -> int:
+        return len(self.index)
+
+    def _slot(self, symbol: str) -> int:
+        slot = self.index.get(symbol)
+        if slot is not None:
+            return slot
+
+        slot = len(self.index)
+        if slot == len(self.last_prices):
+            capacity = 2 * slot
+            cov = np.zeros((capacity, capacity))
+            cov[:slot, :slot] = self.cov
+            self.cov = cov
+            self.last_prices = np.concatenate([self.last_prices, np.full(slot, np.nan)])
+            self.exposure = np.concatenate([self.exposure, np.zeros(slot)])
+            self._sigma_w = np.concatenate([self._sigma_w, np.zeros(slot)])
+        self.index[symbol] = slot
+        return slot
+
+    def update_prices(self, prices: Dict[str, float]) -> None:
+        """Fold one sample of prices into the covariance matrix"""
+        if not prices:
+            return
+        slots = np.fromiter((self._slot(symbol) for symbol in prices), dtype=np.intp, count=len(prices))
+        current = np.fromiter(prices.values(), dtype=float, count=len(prices))
+
+        n = self.size
+        previous = self.last_prices[slots]
+        valid = (previous > 0) & (current > 0)
+        self.last_prices[slots] = current
+        if not valid.any():
+            return
+
+        returns = np.zeros(n)
+        returns[slots[valid]] = np.log(current[valid] / previous[valid])
+
+        cov = self.cov[:n, :n]
+        cov *= self.decay
+        cov += (1 - self.decay) * np.outer(returns, returns)
+        self.samples += 1
+        self._refresh()
+
+    def _refresh(self) -> None:
+        n = self.size
+        self._sigma_w[:n] = self.cov[:n, :n] @ self.exposure[:n]
+        self._variance = max(float(self.exposure[:n] @ self._sigma_w[:n]), 0.0)
+
+    def set_exposure(self, symbol: str, value: float) -> None:
+        """Set a symbol's net exposure, updating Σw and w'Σw in O(n)"""
+        slot = self._slot(symbol)
+        delta = value - self.exposure[slot]
+        if delta == 0:
+            return
+        n = self.size
+        self._variance = max(self._variance + 2 * delta * self._sigma_w[slot]
+                             + delta * delta * self.cov[slot, slot], 0.0)
+        self._sigma_w[:n] += delta * self.cov[:n, slot]
+        self.exposure[slot] = value
+
+    def set_exposures(self, exposures: Dict[str, float]) -> None:
+        """Replace every symbol's net exposure (symbols not given become flat)"""
+        for symbol in exposures:
+            self._slot(symbol)
+        self.exposure[:] = 0.0
+        for symbol, value in exposures.items():
+            self.exposure[self.index[symbol]] = value
+        self._refresh()
+
+    def volatility(self, symbol: str) -> Optional[float]:
+        """Per-sample return volatility of a symbol, None before any samples"""
+        slot = self.index.get(symbol)
+        if slot is None or self.samples == 0:
+            return None
+        return math.sqrt(self.cov[slot, slot])
+
+    def value_at_risk(self) -> float:
+        """Parametric portfolio VaR over the horizon, in exposure currency"""
+        return self.z * math.sqrt(self._variance) * self.horizon_scale
+
+    def order_impact(self, symbol: str, delta: float) -> Dict[str, float]:
+        """Portfolio VaR before and after adding `delta` exposure to a symbol"""
+        before = self.value_at_risk()
+        slot = self.index.get(symbol)
+        if slot is None:
+            # No return history yet: no measurable contribution
+            return {'var_before': before, 'var_after': before, 'marginal_var': 0.0}
+
+        variance = max(self._variance + 2 * delta * self._sigma_w[slot]
+                       + delta * delta * self.cov[slot, slot], 0.0)
+        after = self.z * math.sqrt(variance) * self.horizon_scale
+        return {'var_before': before, 'var_after': after, 'marginal_var': after - before}
+
+    def risk_contributions(self) -> Dict[str, float]:
+        """Each symbol's share of portfolio VaR (sums to the total)"""
+        sigma = math.sqrt(self._variance)
+        if sigma == 0:
+            return {symbol: 0.0 for symbol in self.index}
+        scale = self.z * self.horizon_scale / sigma
+        return {
+            symbol: float(self.exposure[slot] * self._sigma_w[slot] * scale)
+            for symbol, slot in self.index.items()
+        }
+
+    def snapshot(self) -> Dict:
+        """Covariance, prices and exposures, so VaR is warm after a restart"""
+        n = self.size
+        return {
+            'index': dict(self.index),
+            'cov': self.cov[:n, :n].copy(),
+            'last_prices': self.last_prices[:n].copy(),
+            'exposure': self.exposure[:n].copy(),
+            'samples': self.samples,
+            'peak_equity': self.peak_equity,
+            'equity': self.equity,
+        }
+
+    def restore(self, state: Dict) -> None:
+        n = len(state['index'])
+        capacity = max(len(self.last_prices), n)
+        self.index = dict(state['index'])
+        self.cov = np.zeros((capacity, capacity))
+        self.cov[:n, :n] = state['cov']
+        self.last_prices = np.full(capacity, np.nan)
+        self.last_prices[:n] = state['last_prices']
+        self.exposure = np.zeros(capacity)
+        self.exposure[:n] = state['exposure']
+        self._sigma_w = np.zeros(capacity)
+        self.samples = state['samples']
+        self.peak_equity = state['peak_equity']
+        self.equity = state['equity']
+        self._refresh()
+
+    def update_equity(self, equity: float) -> float:
+        """Track the equity peak; returns the current drawdown in percent"""
+        self.equity = equity
+        self.peak_equity = max(self.peak_equity, equity)
+        return self.drawdown_pct
+
+    @property
+    def drawdown_pct(self) -> float:
+        if self.peak_equity <= 0:
+            return 0.0
+        return (self.peak_equity - self.equity) / self.peak_equity * 100
@@ -1,4 +1,6 @@
-from typing import List, Dict
+from typing import Callable, List, Dict, Optional, Tuple
+import itertools
+from collections import deque
 import numpy as np
 from datetime import datetime
 import logging
@@ -6,105 +8,347 @@ from config.config import Config
 
 logger = logging.getLogger(__name__)
 
-class PositionManager:
+
+class Position:
+    """An open position; slotted so thousands of them stay compact
+
+    `size` is the margin committed to the position; its notional is
+    `size * leverage`.
+    """
+
+    __slots__ = ('id', 'symbol', 'side', 'entry_price', 'current_price', 'size',
+                 'leverage', 'stop_loss_pct', 'take_profit_pct', 'entry_time',
+                 'slot')
+
+    def __init__(self, id: int, symbol: str, side: str, entry_price: float,
+                 size: float, leverage: int, stop_loss_pct: float,
+                 take_profit_pct: float, entry_time: float):
+        self.id = id
+        self.symbol = symbol
+        self.side = side
+        self.entry_price = entry_price
+        self.current_price = entry_price
+        self.size = size
+        self.leverage = leverage
+        self.stop_loss_pct = stop_loss_pct
+        self.take_profit_pct = take_profit_pct
+        self.entry_time = entry_time
+        self.slot = -1
+
+    @property
+    def margin(self) -> float:
+        return self.size
+
+    @property
+    def exposure(self) -> float:
+        """Signed leveraged notional: positive long, negative short"""
+        notional = self.size * self.leverage
+        return -notional if self.side == 'short' else notional
+
+    def to_dict(self) -> Dict:
+        return {name: getattr(self, name) for name in self.__slots__ if name != 'slot'}
+
+
+class SymbolExposure:
+    """Running totals over a symbol's open positions"""
+
+    __slots__ = ('count', 'net_exposure', 'gross_exposure', 'margin_used')
+
     def __init__(self):
-        self.open_positions = {}
-        self.position_history = []
+        self.count = 0
+        self.net_exposure = 0.0
+        self.gross_exposure = 0.0
+        self.margin_used = 0.0
+
+    def add(self, position: Position, sign: int = 1) -> None:
+        self.count += sign
+        self.net_exposure += sign * position.exposure
+        self.gross_exposure += sign * abs(position.exposure)
+        self.margin_used += sign * position.margin
+
+
+class PositionColumns:
+    """NumPy columns of one symbol's open positions for vectorized checks
+
+    Row `position.slot` holds that position's entry price, side sign, size,
+    leverage and stop loss / take profit thresholds. Removal moves the last
+    row into the freed slot, so rows stay contiguous and every operation is
+    O(1) apart from the occasional capacity doubling.
+    """
+
+    ENTRY, SIGN, SIZE, LEVERAGE, STOP_LOSS, TAKE_PROFIT = range(6)
+
+    def __init__(self, capacity: int = 64):
+        self.count = 0
+        self.data = np.zeros((6, capacity))
+        self.positions: List[Position] = []
+
+    def add(self, position: Position) -> None:
+        if self.count == self.data.shape[1]:
+            self.data = np.concatenate([self.data, np.zeros_like(self.data)], axis=1)
+        position.slot = self.count
+        self.update(position)
+        self.positions.append(position)
+        self.count += 1
+
+    def update(self, position: Position) -> None:
+        """Rewrite a position's row after its entry price or size changed"""
+        self.data[:, position.slot] = (
+            position.entry_price, -1.0 if position.side == 'short' else 1.0,
+            position.size, position.leverage,
+            position.stop_loss_pct, position.take_profit_pct
+        )
+
+    def remove(self, position: Position) -> None:
+        slot, last = position.slot, self.count - 1
+        if slot != last:
+            moved = self.positions[last]
+            self.data[:, slot] = self.data[:, last]
+            self.positions[slot] = moved
+            moved.slot = slot
+        self.positions.pop()
+        self.count -= 1
+        position.slot = -1
+
+    def pnl(self, price: float) -> np.ndarray:
+        """Unrealized PnL of every position, same arithmetic as _calculate_pnl"""
+        entry, sign, size, leverage = self.data[:4, :self.count]
+        return ((price - entry) * sign / entry) * size * leverage
+
+    def triggered(self, price: float) -> Tuple[List[Position], List[Position]]:
+        """Positions whose stop loss / take profit is hit at `price`"""
+        pnl = self.pnl(price)
+        stop = pnl <= -self.data[self.STOP_LOSS, :self.count]
+        take = ~stop & (pnl >= self.data[self.TAKE_PROFIT, :self.count])
+        return ([self.positions[i] for i in np.flatnonzero(stop)],
+                [self.positions[i] for i in np.flatnonzero(take)])
+
+
+class PositionManager:
+    """Position book indexed by id and by symbol
+
+    Opening, closing and resizing a position are O(1): positions live in an
+    id-keyed dict plus an insertion-ordered dict per symbol, and per-symbol
+    exposure and margin totals are adjusted in place rather than recomputed.
+    Stop loss / take profit checks run on per-symbol NumPy columns, so a
+    price tick costs a few array operations however many positions are
+    open; only triggered positions are touched in Python.
+    Closed trades go to a bounded history (POSITION_HISTORY_SIZE most
+    recent) and to every callback in `close_listeners`, e.g. to persist
+    the full record or update trade statistics.
+    """
+
+    def __init__(self, history_size: int = None,
+                 on_close: Optional[Callable[[Dict], None]] = None):
+        self.open_positions: Dict[int, Position] = {}
+        self._by_symbol: Dict[str, Dict[int, Position]] = {}
+        self._columns: Dict[str, PositionColumns] = {}
+        self.last_prices: Dict[str, float] = {}
+        self.exposure: Dict[str, SymbolExposure] = {}
+        self.position_history = deque(maxlen=history_size or Config.POSITION_HISTORY_SIZE)
+        self.close_listeners: List[Callable[[Dict], None]] = [on_close] if on_close else []
+        self.closed_count = 0
+        self.winning_count = 0
+        self.realized_pnl = 0.0
+        self._ids = itertools.count(1)
         
-    def get_positions(self, symbol: str) -> List[Dict]:
+    def get_positions(self, symbol: str) -> List[Position]:
         """Get current open positions for a symbol"""
-        return self.open_positions.get(symbol, [])
+        return list(self._by_symbol.get(symbol, {}).values())
+
+    def get_position(self, position_id: int) -> Optional[Position]:
+        return self.open_positions.get(position_id)
+
+    def get_exposure(self, symbol: str) -> SymbolExposure:
+        """Open position totals for a symbol (zeros if none)"""
+        return self.exposure.get(symbol) or SymbolExposure()
+
+    @property
+    def total_margin_used(self) -> float:
+        return sum(exposure.margin_used for exposure in self.exposure.values())
+        
+    def open_position(self, symbol: str, side: str, entry_price: float,
+                      size: float, leverage: int,
+                      stop_loss_pct: float = None,
+                      take_profit_pct: float = None,
+                      entry_time: float = None) -> Position:
+        """Record a newly opened position"""
+        position = Position(
+            next(self._ids), symbol, side, entry_price, size, leverage,
+            Config.STOP_LOSS_PCT if stop_loss_pct is None else stop_loss_pct,
+            Config.TAKE_PROFIT_PCT if take_profit_pct is None else take_profit_pct,
+            datetime.now().timestamp() if entry_time is None else entry_time
+        )
+        self.open_positions[position.id] = position
+        self._by_symbol.setdefault(symbol, {})[position.id] = position
+        self._columns.setdefault(symbol, PositionColumns()).add(position)
+        self.exposure.setdefault(symbol, SymbolExposure()).add(position)
+        return position
         
-    def manage_positions(self, positions: List[Dict], 
-                        analysis: Dict, risk_manager) -> None:
-        """Manage open positions based on market analysis"""
+    def apply_fill(self, position_id: Optional[int], symbol: str, side: str,
+                   price: float, size: float, leverage: int) -> Position:
+        """Open a position from an order fill, or grow it on a later fill
+
+        `size` is the margin behind the fill (filled notional divided by
+        leverage), as for open_position. Later fills of the same order move the entry price to
+        the volume-weighted average of all fills.
+        """
+        position = self.open_positions.get(position_id) if position_id is not None else None
+        if position is None:
+            return self.open_position(symbol, side, price, size, leverage)
+
+        exposure = self.exposure[symbol]
+        exposure.add(position, -1)
+        # Weight by quantity (size / price), not by notional
+        quantity = position.size / position.entry_price + size / price
+        position.size += size
+        position.entry_price = position.size / quantity
+        exposure.add(position)
+        self._columns[symbol].update(position)
+        return position
+
+    def snapshot(self) -> Dict:
+        """Open positions, counters and recent history for a state snapshot"""
+        next_id = next(self._ids)
+        self._ids = itertools.count(next_id)
+        return {
+            'positions': [position.to_dict() for position in self.open_positions.values()],
+            'last_prices': dict(self.last_prices),
+            'history': list(self.position_history),
+            'closed_count': self.closed_count,
+            'winning_count': self.winning_count,
+            'realized_pnl': self.realized_pnl,
+            'next_id': next_id,
+        }
+
+    def restore(self, state: Dict) -> None:
+        """Rebuild the book from `snapshot()` output, replacing current contents"""
+        self.open_positions.clear()
+        self._by_symbol.clear()
+        self._columns.clear()
+        self.exposure.clear()
+        for saved in state['positions']:
+            position = Position(
+                saved['id'], saved['symbol'], saved['side'], saved['entry_price'],
+                saved['size'], saved['leverage'], saved['stop_loss_pct'],
+                saved['take_profit_pct'], saved['entry_time']
+            )
+            position.current_price = saved['current_price']
+            self.open_positions[position.id] = position
+            self._by_symbol.setdefault(position.symbol, {})[position.id] = position
+            self._columns.setdefault(position.symbol, PositionColumns()).add(position)
+            self.exposure.setdefault(position.symbol, SymbolExposure()).add(position)
+
+        self.last_prices = dict(state['last_prices'])
+        self.position_history.clear()
+        self.position_history.extend(state['history'])
+        self.closed_count = state['closed_count']
+        self.winning_count = state['winning_count']
+        self.realized_pnl = state['realized_pnl']
+        self._ids = itertools.count(state['next_id'])
+
+    def manage_positions(self, positions: List[Position], analysis: Dict) -> None:
+        """Manage open positions based on market analysis
+
+        Positions hit by their stop loss / take profit are closed, and so
+        is any position facing an opposing signal above
+        REVERSAL_CONFIDENCE. Reversing is left to the normal entry path on
+        a later cycle, which sizes from the account balance once this
+        position's margin is released.
+        """
+        price = analysis['current_price']
+        closed = set()
+        for symbol in {position.symbol for position in positions}:
+            closed.update(self._close_triggered(symbol, price))
+
+        if analysis['confidence'] <= Config.REVERSAL_CONFIDENCE:
+            return
         for position in positions:
+            if position.id in closed or not self._is_reversal(position, analysis):
+                continue
             try:
-                # Calculate current PnL
-                current_pnl = self._calculate_pnl(position, analysis['current_price'])
-                
-                # Check stop loss
-                if self._should_stop_loss(position, current_pnl):
-                    self._close_position(position, 'stop_loss')
-                    continue
-                
-                # Check take profit
-                if self._should_take_profit(position, current_pnl):
-                    self._close_position(position, 'take_profit')
-                    continue
-                
-                # Check for position adjustment
-                if self._should_adjust_position(position, analysis):
-                    self._adjust_position(position, analysis, risk_manager)
-                    
+                position.current_price = price
+                self._close_position(position, 'signal_reversal')
             except Exception as e:
-                logger.error(f"Error managing position {position['id']}: {e}")
+                logger.error(f"Error managing position {position.id}: {e}")
     
-    def _calculate_pnl(self, position: Dict, current_price: float) -> float:
+    def check_price(self, symbol: str, price: float) -> None:
+        """Run stop loss / take profit checks for a symbol on a price tick"""
+        self._close_triggered(symbol, price)
+
+    def _close_triggered(self, symbol: str, price: float) -> List[int]:
+        """Close every position of `symbol` whose stop loss / take profit is hit"""
+        self.last_prices[symbol] = price
+        columns = self._columns.get(symbol)
+        if columns is None:
+            return []
+
+        stops, takes = columns.triggered(price)
+        closed = []
+        for positions, reason in ((stops, 'stop_loss'), (takes, 'take_profit')):
+            for position in positions:
+                try:
+                    position.current_price = price
+                    self._close_position(position, reason)
+                    closed.append(position.id)
+                except Exception as e:
+                    logger.error(f"Error checking position {position.id}: {e}")
+        return closed
+
+    def unrealized_pnl(self, symbol: str, price: float) -> float:
+        """Total unrealized PnL of a symbol's open positions at `price`"""
+        columns = self._columns.get(symbol)
+        return float(columns.pnl(price).sum()) if columns is not None else 0.0
+
+    def _calculate_pnl(self, position: Position, current_price: float) -> float:
         """Calculate current PnL for a position"""
-        price_diff = current_price - position['entry_price']
-        if position['side'] == 'short':
+        price_diff = current_price - position.entry_price
+        if position.side == 'short':
             price_diff = -price_diff
             
-        return (price_diff / position['entry_price']) * position['size'] * position['leverage']
-    
-    def _should_stop_loss(self, position: Dict, current_pnl: float) -> bool:
-        """Determine if stop loss should be triggered"""
-        return current_pnl <= -position['stop_loss_pct']
-    
-    def _should_take_profit(self, position: Dict, current_pnl: float) -> bool:
-        """Determine if take profit should be triggered"""
-        return current_pnl >= position['take_profit_pct']
-    
-    def _should_adjust_position(self, position: Dict, analysis: Dict) -> bool:
-        """Determine if position should be adjusted"""
-        # Check if market direction has changed significantly
-        if position['side'] == 'long' and analysis['direction'] == 'short':
-            return analysis['confidence'] > 0.8
-        elif position['side'] == 'short' and analysis['direction'] == 'long':
-            return analysis['confidence'] > 0.8
-            
-        return False
+        return (price_diff / position.entry_price) * position.size * position.leverage
     
-    def _adjust_position(self, position: Dict, 
-                        analysis: Dict, risk_manager) -> None:
-        """Adjust position size or direction based on new analysis"""
-        try:
-            # Calculate new position size
-            new_size = risk_manager.calculate_position_size(
-                position['size'],
-                analysis,
-                self.open_positions.get(position['symbol'], [])
-            )
-            
-            # Update position
-            if new_size != position['size']:
-                self._modify_position(position, new_size)
-                
-        except Exception as e:
-            logger.error(f"Error adjusting position {position['id']}: {e}")
+    def _is_reversal(self, position: Position, analysis: Dict) -> bool:
+        """Whether the signal points against the position"""
+        return (position.side == 'long' and analysis['direction'] == 'short') or \
+               (position.side == 'short' and analysis['direction'] == 'long')
     
-    def _close_position(self, position: Dict, reason: str) -> None:
+    def _close_position(self, position: Position, reason: str) -> None:
         """Close an open position"""
         try:
-            # Record position in history
-            self.position_history.append({
-                'symbol': position['symbol'],
-                'side': position['side'],
-                'entry_price': position['entry_price'],
-                'exit_price': position['current_price'],
-                'size': position['size'],
-                'leverage': position['leverage'],
-                'pnl': self._calculate_pnl(position, position['current_price']),
+            if self.open_positions.pop(position.id, None) is None:
+                return
+            symbol_positions = self._by_symbol[position.symbol]
+            del symbol_positions[position.id]
+            self._columns[position.symbol].remove(position)
+            exposure = self.exposure[position.symbol]
+            exposure.add(position, -1)
+            if not symbol_positions:
+                del self._by_symbol[position.symbol]
+                del self._columns[position.symbol]
+                del self.exposure[position.symbol]
+
+            pnl = self._calculate_pnl(position, position.current_price)
+            closed_at = datetime.now().timestamp()
+            trade = {
+                'symbol': position.symbol,
+                'side': position.side,
+                'entry_price': position.entry_price,
+                'exit_price': position.current_price,
+                'size': position.size,
+                'leverage': position.leverage,
+                'pnl': pnl,
                 'reason': reason,
-                'duration': datetime.now().timestamp() - position['entry_time']
-            })
-            
-            # Remove from open positions
-            self.open_positions[position['symbol']] = [
-                p for p in self.open_positions[position['symbol']]
-                if p['id'] != position['id']
-            ]
+                'exit_time': closed_at,
+                'duration': closed_at - position.entry_time
+            }
+            self.position_history.append(trade)
+            self.closed_count += 1
+            self.winning_count += pnl > 0
+            self.realized_pnl += pnl
+
+            for listener in self.close_listeners:
+                listener(trade)
             
         except Exception as e:
-            logger.error(f"Error closing position {position['id']}: {e}")
\ No newline at end of file
+            logger.error(f"Error closing position {position.id}: {e}")
@@ -0,0 +1,142 @@
+import logging
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from config.config import Config
+from src.api.instruments import InstrumentCache
+from src.monitoring.logs import sampled
+
+logger = logging.getLogger(__name__)
+
+
+class OrderRejected(Exception):
+    """Raised by a pre-trade check to stop an order locally"""
+
+
+class PreTradeChecker:
+    """Validates and normalizes orders before they reach the exchange
+
+    Each check takes the order dict, may rewrite it (round price, convert
+    value to lots, cap leverage) and raises OrderRejected to stop it.
+    Checks only use cached contract specs and local state, so an invalid
+    order costs microseconds instead of a rate-limited round trip. Every
+    check is timed; a run exceeding `budget_ms` is logged.
+    """
+
+    def __init__(self, instruments: InstrumentCache, budget_ms: float = None,
+                 duplicate_window: float = None, min_order_value: float = None):
+        self.instruments = instruments
+        self.budget_ms = Config.PRE_TRADE_BUDGET_MS if budget_ms is None else budget_ms
+        self.duplicate_window = (Config.DUPLICATE_ORDER_WINDOW
+                                 if duplicate_window is None else duplicate_window)
+        self.min_order_value = Config.MIN_ORDER_VALUE if min_order_value is None else min_order_value
+
+        self._recent: Dict[Tuple[str, str], float] = {}
+        self.checks: List[Tuple[str, Callable[[Dict], None]]] = [
+            ('instrument', self._check_instrument),
+            ('duplicate', self._check_duplicate),
+            ('leverage', self._check_leverage),
+            ('price', self._check_price),
+            ('size', self._check_size),
+            ('min_value', self._check_min_value),
+        ]
+        self.timings: Dict[str, Dict[str, float]] = {}
+        self.rejections: Dict[str, int] = {}
+        self.over_budget = 0
+
+    def check(self, symbol: str, side: str, value: float, leverage: int,
+              price: float, limit: bool = True) -> Tuple[Optional[Dict], str]:
+        """Run every check; returns (order, 'ok') or (None, reason)
+
+        `value` is the position size in account currency and `price` the
+        reference price used to convert it to lots; the returned order has
+        `size` in lots and, for limit orders, a tick-rounded `price`.
+        """
+        order = {'symbol': symbol, 'side': side, 'value': value,
+                 'leverage': leverage, 'price': price, 'limit': limit}
+        started = time.perf_counter()
+        try:
+            for name, check in self.checks:
+                start = time.perf_counter()
+                try:
+                    check(order)
+                except OrderRejected as e:
+                    self.rejections[name] = self.rejections.get(name, 0) + 1
+                    return None, f"{name}: {e}"
+                finally:
+                    self._record(name, time.perf_counter() - start)
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self._record('total', elapsed_ms / 1000)
+            if elapsed_ms > self.budget_ms:
+                self.over_budget += 1
+                logger.warning("Pre-trade checks for %s took %.3fms (budget %sms)",
+                               symbol, elapsed_ms, self.budget_ms, extra=sampled(symbol))
+
+        if not limit:
+            order['price'] = None
+        return order, "ok"
+
+    def mark_submitted(self, symbol: str, side: str) -> None:
+        """Remember a sent order so repeats inside the window are rejected"""
+        self._recent[(symbol, side)] = time.monotonic()
+
+    def release(self, symbol: str, side: str) -> None:
+        """Forget a sent order, e.g. once it failed at the exchange"""
+        self._recent.pop((symbol, side), None)
+
+    def _record(self, name: str, elapsed: float) -> None:
+        stats = self.timings.setdefault(name, {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+        elapsed_ms = elapsed * 1000
+        stats['count'] += 1
+        stats['total_ms'] += elapsed_ms
+        stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Count, mean and max latency per check"""
+        return {
+            name: dict(stats, mean_ms=stats['total_ms'] / stats['count'])
+            for name, stats in self.timings.items()
+        }
+
+    def _check_instrument(self, order: Dict) -> None:
+        if self.instruments.stale:
+            raise OrderRejected("instrument metadata is missing or stale")
+        instrument = self.instruments.get(order['symbol'])
+        if instrument is None:
+            raise OrderRejected(f"unknown contract {order['symbol']}")
+        if instrument.status != 'Open':
+            raise OrderRejected(f"contract status is {instrument.status}")
+        order['instrument'] = instrument
+
+    def _check_duplicate(self, order: Dict) -> None:
+        sent = self._recent.get((order['symbol'], order['side']))
+        if sent is not None and time.monotonic() - sent < self.duplicate_window:
+            raise OrderRejected(f"{order['side']} order sent {time.monotonic() - sent:.1f}s ago")
+
+    def _check_leverage(self, order: Dict) -> None:
+        leverage = int(order['leverage'])
+        if leverage < 1:
+            raise OrderRejected(f"leverage {order['leverage']} below 1")
+        order['leverage'] = min(leverage, order['instrument'].max_leverage)
+
+    def _check_price(self, order: Dict) -> None:
+        price = order['price']
+        if price is None or not price > 0:
+            raise OrderRejected(f"invalid reference price {price}")
+        if order['limit']:
+            order['price'] = order['instrument'].round_price(price, order['side'])
+
+    def _check_size(self, order: Dict) -> None:
+        instrument = order['instrument']
+        lots = instrument.lots_for_value(order['value'] * order['leverage'], order['price'])
+        if lots <= 0:
+            raise OrderRejected(f"value {order['value']:.4f} is below one lot")
+        if instrument.max_order_qty and lots > instrument.max_order_qty:
+            raise OrderRejected(f"{lots} lots exceeds max order quantity {instrument.max_order_qty}")
+        order['size'] = lots
+
+    def _check_min_value(self, order: Dict) -> None:
+        value = order['instrument'].order_value(order['size'], order['price'])
+        if value < self.min_order_value:
+            raise OrderRejected(f"order value {value:.4f} below minimum {self.min_order_value}")
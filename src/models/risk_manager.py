@@ -1,27 +1,42 @@
-from typing import Dict
+from typing import Dict, List, Tuple
+import math
+import logging
 import numpy as np
 from config.config import Config
+from src.models.portfolio_risk import PortfolioRiskEngine
+from src.models.trade_stats import TradeStats
+
+logger = logging.getLogger(__name__)
 
 class RiskManager:
     def __init__(self):
         self.max_drawdown = Config.MAX_DRAWDOWN
-        self.position_history = []
+        self.trade_stats = TradeStats(Config.KELLY_WINDOW_TRADES, Config.KELLY_WINDOW_HOURS)
+        self.portfolio = PortfolioRiskEngine(
+            decay=Config.RISK_EWMA_DECAY,
+            sample_seconds=Config.LOOP_INTERVAL,
+            horizon_seconds=Config.VAR_HORIZON,
+            confidence=Config.VAR_CONFIDENCE
+        )
+
+    def record_trade(self, trade: Dict) -> None:
+        """Fold a closed trade into the running statistics"""
+        self.trade_stats.record(trade['pnl'], trade.get('exit_time'))
         
     def calculate_position_size(self, 
                               account_balance: float, 
                               analysis: Dict,
-                              current_positions: List[Dict]) -> float:
+                              margin_used: float = 0.0) -> float:
         """Calculate safe position size based on risk parameters"""
         
         # Calculate available margin
-        total_margin_used = sum([pos['margin'] for pos in current_positions])
-        available_balance = account_balance - total_margin_used
+        available_balance = account_balance - margin_used
         
         # Adjust risk based on model confidence
         risk_percentage = self._dynamic_risk_adjustment(
             base_risk=Config.INITIAL_RISK_PERCENTAGE,
             confidence=analysis['confidence'],
-            market_volatility=self._calculate_market_volatility()
+            market_volatility=self._calculate_market_volatility(analysis.get('symbol'))
         )
         
         # Calculate position size
@@ -52,30 +67,62 @@ class RiskManager:
         # Ensure risk stays within reasonable bounds
         return max(0.5, min(adjusted_risk, 5.0))
 
+    def _calculate_market_volatility(self, symbol: str = None) -> float:
+        """Daily volatility in percent for a symbol (portfolio average if unknown)"""
+        portfolio = self.portfolio
+        if portfolio.samples == 0 or portfolio.size == 0:
+            return 0.0
+
+        volatility = portfolio.volatility(symbol) if symbol else None
+        if volatility is None:
+            n = portfolio.size
+            volatility = float(np.sqrt(np.diag(portfolio.cov)[:n]).mean())
+
+        daily = volatility * math.sqrt(86400 / portfolio.sample_seconds) * 100
+        # Keep a floor on risk: volatility_factor never drops below 0.1
+        return min(daily, 90.0)
+
+    def _calculate_performance_factor(self) -> float:
+        """Scale risk by the recent profit factor, between 0.5 and 1.5"""
+        stats = self.trade_stats.window()
+        if stats.count < Config.PERFORMANCE_MIN_TRADES:
+            return 1.0
+        if stats.loss_sum == 0:
+            return 1.5
+        profit_factor = stats.win_sum / abs(stats.loss_sum)
+        return max(0.5, min(profit_factor, 1.5))
+
+    def update_market(self, prices: Dict[str, float], exposures: Dict[str, float]) -> None:
+        """Feed one price sample and the current net exposures to the portfolio engine"""
+        self.portfolio.update_prices(prices)
+        self.portfolio.set_exposures(exposures)
+
+    def update_equity(self, equity: float) -> float:
+        """Record account equity; returns the portfolio drawdown in percent"""
+        return self.portfolio.update_equity(equity)
+
+    def check_order(self, symbol: str, side: str, notional: float,
+                    equity: float) -> Tuple[bool, str]:
+        """Portfolio-level gate run before an order is placed
+
+        Rejects every new order once drawdown reaches MAX_DRAWDOWN, and any
+        order that would push portfolio VaR above MAX_PORTFOLIO_VAR_PCT of
+        equity unless it reduces VaR.
+        """
+        drawdown = self.portfolio.drawdown_pct
+        if drawdown >= self.max_drawdown:
+            return False, f"drawdown {drawdown:.2f}% at or above limit {self.max_drawdown}%"
+
+        delta = -notional if side == 'short' else notional
+        impact = self.portfolio.order_impact(symbol, delta)
+        if equity > 0 and impact['marginal_var'] > 0:
+            var_pct = impact['var_after'] / equity * 100
+            if var_pct > Config.MAX_PORTFOLIO_VAR_PCT:
+                return False, (f"portfolio VaR {var_pct:.2f}% of equity would exceed "
+                               f"limit {Config.MAX_PORTFOLIO_VAR_PCT}%")
+
+        return True, "ok"
+
     def _calculate_kelly_fraction(self) -> float:
         """Calculate Kelly Criterion fraction"""
-        if not self.position_history:
-            return 0.5  # Conservative default
-            
-        wins = sum(1 for pos in self.position_history if pos['pnl'] > 0)
-        total_trades = len(self.position_history)
-        
-        if total_trades == 0:
-            return 0.5
-            
-        win_rate = wins / total_trades
-        
-        # Calculate average win/loss ratio
-        avg_win = np.mean([pos['pnl'] for pos in self.position_history if pos['pnl'] > 0])
-        avg_loss = abs(np.mean([pos['pnl'] for pos in self.position_history if pos['pnl'] < 0]))
-        
-        if avg_loss == 0:
-            return 0.5
-            
-        win_loss_ratio = avg_win / avg_loss
-        
-        # Kelly Fraction formula
-        kelly = win_rate - ((1 - win_rate) / win_loss_ratio)
-        
-        # Limit kelly fraction to avoid excessive risk
-        return max(0, min(kelly, 0.5))
\ No newline at end of file
+        return self.trade_stats.window().kelly_fraction()
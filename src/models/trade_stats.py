@@ -0,0 +1,160 @@
+import time
+from collections import deque
+from typing import Deque, Dict, Tuple
+
+
+class RunningStats:
+    """Win/loss counts and sums over a set of closed trades"""
+
+    __slots__ = ('count', 'wins', 'losses', 'win_sum', 'loss_sum')
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.count = 0
+        self.wins = 0
+        self.losses = 0
+        self.win_sum = 0.0
+        self.loss_sum = 0.0
+
+    def add(self, pnl: float, sign: int = 1) -> None:
+        """Add a trade's PnL, or remove it with sign=-1"""
+        self.count += sign
+        if pnl > 0:
+            self.wins += sign
+            self.win_sum += sign * pnl
+        elif pnl < 0:
+            self.losses += sign
+            self.loss_sum += sign * pnl
+
+    @property
+    def win_rate(self) -> float:
+        return self.wins / self.count if self.count else 0.0
+
+    def kelly_fraction(self) -> float:
+        """Kelly Criterion fraction, capped to [0, 0.5]"""
+        if self.count == 0 or self.losses == 0:
+            return 0.5  # Conservative default
+        if self.wins == 0:
+            return 0.0
+
+        avg_win = self.win_sum / self.wins
+        avg_loss = abs(self.loss_sum / self.losses)
+        if avg_loss == 0:
+            return 0.5
+
+        win_rate = self.wins / self.count
+        kelly = win_rate - ((1 - win_rate) / (avg_win / avg_loss))
+        return max(0, min(kelly, 0.5))
+
+    def snapshot(self) -> Dict:
+        return {name: getattr(self, name) for name in RunningStats.__slots__}
+
+    def restore(self, state: Dict) -> None:
+        for name in RunningStats.__slots__:
+            setattr(self, name, state[name])
+
+    def to_dict(self) -> Dict:
+        return {
+            'trades': self.count,
+            'wins': self.wins,
+            'losses': self.losses,
+            'win_rate': self.win_rate,
+            'win_sum': self.win_sum,
+            'loss_sum': self.loss_sum,
+            'kelly_fraction': self.kelly_fraction(),
+        }
+
+
+class WindowedStats(RunningStats):
+    """RunningStats over the last `max_trades` trades and/or `max_age` seconds
+
+    Trades leaving the window are subtracted as they expire. Subtracting
+    floats accumulates rounding error, so the sums are rebuilt exactly from
+    the window contents once per window length of evictions, keeping the
+    amortized cost O(1).
+    """
+
+    __slots__ = ('max_trades', 'max_age', 'trades', '_evictions')
+
+    def __init__(self, max_trades: int = 0, max_age: float = 0):
+        super().__init__()
+        self.max_trades = max_trades
+        self.max_age = max_age
+        self.trades: Deque[Tuple[float, float]] = deque()
+        self._evictions = 0
+
+    def add_trade(self, pnl: float, closed_at: float) -> None:
+        self.trades.append((closed_at, pnl))
+        self.add(pnl)
+        if self.max_trades:
+            while len(self.trades) > self.max_trades:
+                self._evict()
+        self.expire(closed_at)
+
+    def snapshot(self) -> Dict:
+        return dict(super().snapshot(), trades=list(self.trades))
+
+    def restore(self, state: Dict) -> None:
+        super().restore(state)
+        self.trades = deque(tuple(trade) for trade in state['trades'])
+        self._evictions = 0
+
+    def expire(self, now: float = None) -> None:
+        """Drop trades older than `max_age` seconds"""
+        if not self.max_age:
+            return
+        cutoff = (time.time() if now is None else now) - self.max_age
+        while self.trades and self.trades[0][0] < cutoff:
+            self._evict()
+
+    def _evict(self) -> None:
+        _, pnl = self.trades.popleft()
+        self.add(pnl, -1)
+        self._evictions += 1
+        if self._evictions >= max(len(self.trades), 1):
+            self._evictions = 0
+            self.reset()
+            for _, kept in self.trades:
+                self.add(kept)
+
+
+class TradeStats:
+    """All-time and windowed statistics of closed trades, updated per trade"""
+
+    def __init__(self, window_trades: int = 0, window_hours: float = 0):
+        self.all = RunningStats()
+        self.recent = WindowedStats(max_trades=window_trades) if window_trades else None
+        self.period = WindowedStats(max_age=window_hours * 3600) if window_hours else None
+
+    def record(self, pnl: float, closed_at: float = None) -> None:
+        closed_at = time.time() if closed_at is None else closed_at
+        self.all.add(pnl)
+        if self.recent is not None:
+            self.recent.add_trade(pnl, closed_at)
+        if self.period is not None:
+            self.period.add_trade(pnl, closed_at)
+
+    def snapshot(self) -> Dict:
+        return {name: stats.snapshot() if stats is not None else None
+                for name, stats in (('all', self.all), ('recent', self.recent),
+                                    ('period', self.period))}
+
+    def restore(self, state: Dict) -> None:
+        """Restore saved statistics; windows configured differently now start empty"""
+        self.all.restore(state['all'])
+        for name in ('recent', 'period'):
+            stats = getattr(self, name)
+            if stats is not None and state.get(name) is not None:
+                stats.restore(state[name])
+                if stats.max_trades:
+                    while len(stats.trades) > stats.max_trades:
+                        stats._evict()
+
+    def window(self) -> RunningStats:
+        """Stats used for sizing: the time window if set, else the trade window, else all"""
+        if self.period is not None:
+            self.period.expire()
+            return self.period
+        return self.recent if self.recent is not None else self.all
@@ -0,0 +1,226 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import queue
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Awaitable, Callable, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from config.config import Config
+from src.strategies.indicators import FEATURE_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+
+def _validation_loss(model, X: np.ndarray, y: np.ndarray) -> float:
+    """Validation MSE against the next-candle direction targets"""
+    predicted = model.model.predict(X, verbose=0)[:, 0]
+    return float(np.mean((predicted - y) ** 2))
+
+
+def _train_symbol(symbol: str, data: pd.DataFrame, artifact_dir: str,
+                  sequence_length: int, epochs: int, batch_size: int,
+                  validation_split: float, progress) -> Dict:
+    """Train a candidate model for one symbol in a worker process
+
+    The candidate and the incumbent (if any) are scored on the same
+    held-out windows so the parent can decide whether to promote it. The
+    targets are unscaled directions, so the two losses are comparable
+    even though each model scales its inputs with its own scaler.
+    """
+    import tensorflow as tf
+    from src.strategies.ml_models import NON_FEATURE_COLUMNS, MarketPredictionModel
+    from src.strategies.model_store import load_model_artifacts, save_model_artifacts
+
+    class ProgressCallback(tf.keras.callbacks.Callback):
+        def on_epoch_end(self, epoch, logs=None):
+            progress.put({
+                'symbol': symbol,
+                'epoch': epoch + 1,
+                'epochs': epochs,
+                'loss': float(logs.get('loss', np.nan)),
+                'val_loss': float(logs.get('val_loss', np.nan))
+            })
+
+    start = time.time()
+    data = data.drop(columns=['symbol'], errors='ignore')
+
+    # _calculate_features appends FEATURE_COLUMNS to the input columns
+    inputs = [column for column in data.columns if column not in NON_FEATURE_COLUMNS]
+    model = MarketPredictionModel((sequence_length, len(inputs) + len(FEATURE_COLUMNS)))
+    X, y = model.prepare_data(data, sequence_length)
+
+    split = int(len(X) * (1 - validation_split))
+    if split == 0 or split == len(X):
+        raise ValueError(f"Not enough data to train {symbol}: {len(X)} sequences")
+
+    model.model.fit(
+        X[:split], y[:split],
+        validation_data=(X[split:], y[split:]),
+        epochs=epochs,
+        batch_size=batch_size,
+        verbose=0,
+        callbacks=[
+            tf.keras.callbacks.EarlyStopping(monitor='val_loss', patience=10,
+                                             restore_best_weights=True),
+            ProgressCallback()
+        ]
+    )
+    candidate_loss = _validation_loss(model, X[split:], y[split:])
+
+    # Score the incumbent on the same validation period with its own scaler
+    live_dir = os.path.join(artifact_dir, symbol)
+    incumbent_loss = None
+    if os.path.exists(live_dir):
+        try:
+            incumbent = load_model_artifacts(live_dir)
+            X_inc, y_inc = incumbent.prepare_data(data, sequence_length, fit_scaler=False)
+            split_inc = int(len(X_inc) * (1 - validation_split))
+            incumbent_loss = _validation_loss(incumbent, X_inc[split_inc:], y_inc[split_inc:])
+        except Exception as e:
+            progress.put({'symbol': symbol, 'warning': f"incumbent not comparable: {e}"})
+
+    candidate_dir = os.path.join(artifact_dir, f".{symbol}.candidate")
+    version = save_model_artifacts(model, candidate_dir, Config.NUMPY_LSTM_PRECISION)
+
+    return {
+        'symbol': symbol,
+        'candidate_dir': candidate_dir,
+        'version': version,
+        'candidate_loss': candidate_loss,
+        'incumbent_loss': incumbent_loss,
+        'train_seconds': time.time() - start
+    }
+
+
+class TrainingScheduler:
+    """Retrains per-symbol models in a process pool off the trading loop
+
+    Jobs run in spawned worker processes (one per core by default), report
+    per-epoch progress through a shared queue and return a candidate model
+    on disk. A candidate is promoted only if its validation loss beats the
+    incumbent's on the same held-out data; promotion swaps the artifact
+    directory atomically (`publish_artifacts`) and hands the loaded model
+    to `on_promote`, which installs it for live predictions.
+    Nothing here blocks the event loop: process results are awaited as
+    futures and model loading happens on a thread.
+    """
+
+    def __init__(self, on_promote: Callable[[str, object], Awaitable[None]],
+                 artifact_dir: str = None, max_workers: int = None):
+        self.on_promote = on_promote
+        self.artifact_dir = artifact_dir or Config.MODEL_DIR
+        self.max_workers = max_workers or Config.TRAINING_WORKERS or os.cpu_count() or 1
+
+        self._context = multiprocessing.get_context('spawn')
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._manager = None
+        self._progress = None
+        self._task: Optional[asyncio.Task] = None
+        self.last_results: Dict[str, Dict] = {}
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def _ensure_pool(self) -> None:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                 mp_context=self._context)
+            self._manager = self._context.Manager()
+            self._progress = self._manager.Queue()
+
+    def schedule(self, market_data: Dict[str, pd.DataFrame]) -> bool:
+        """Start retraining in the background; returns False if a run is active"""
+        if self.running:
+            logger.warning("Model retraining already in progress, skipping")
+            return False
+
+        self._ensure_pool()
+        os.makedirs(self.artifact_dir, exist_ok=True)
+        self._task = asyncio.create_task(self._run(market_data))
+        return True
+
+    async def _run(self, market_data: Dict[str, pd.DataFrame]) -> None:
+        loop = asyncio.get_running_loop()
+        logger.info(f"Retraining {len(market_data)} models on {self.max_workers} workers")
+
+        jobs = [
+            asyncio.wrap_future(self._executor.submit(
+                _train_symbol, symbol, data, self.artifact_dir,
+                Config.SEQUENCE_LENGTH, Config.TRAINING_EPOCHS, Config.TRAINING_BATCH_SIZE,
+                Config.VALIDATION_SPLIT, self._progress
+            ))
+            for symbol, data in market_data.items()
+        ]
+        progress_task = asyncio.create_task(self._stream_progress())
+
+        try:
+            for job in asyncio.as_completed(jobs):
+                try:
+                    result = await job
+                except Exception as e:
+                    logger.error(f"Model training failed: {str(e)}")
+                    continue
+
+                self.last_results[result['symbol']] = result
+                try:
+                    model = await loop.run_in_executor(None, self._promote_if_better, result)
+                except Exception as e:
+                    logger.error(f"Error promoting model for {result['symbol']}: {str(e)}")
+                    continue
+
+                # Swap on the event loop thread so no cycle sees a half-installed model
+                if model is not None:
+                    await self.on_promote(result['symbol'], model)
+        finally:
+            progress_task.cancel()
+
+        logger.info("Model retraining finished")
+
+    async def _stream_progress(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                update = await loop.run_in_executor(None, self._progress.get, True, 0.5)
+            except queue.Empty:
+                continue
+
+            if 'warning' in update:
+                logger.warning(f"Training {update['symbol']}: {update['warning']}")
+            else:
+                logger.info(f"Training {update['symbol']}: epoch {update['epoch']}/{update['epochs']} "
+                            f"loss={update['loss']:.5f} val_loss={update['val_loss']:.5f}")
+
+    def _promote_if_better(self, result: Dict) -> Optional[object]:
+        """Move a better candidate into place and load it (runs on a worker thread)"""
+        from src.strategies.model_store import discard_artifacts, load_model_artifacts, publish_artifacts
+
+        symbol = result['symbol']
+        incumbent_loss = result['incumbent_loss']
+        if incumbent_loss is not None and result['candidate_loss'] >= incumbent_loss:
+            logger.info(f"Keeping incumbent model for {symbol}: candidate val_loss "
+                        f"{result['candidate_loss']:.5f} >= {incumbent_loss:.5f}")
+            discard_artifacts(result['candidate_dir'])
+            return None
+
+        live_dir = os.path.join(self.artifact_dir, symbol)
+        publish_artifacts(result['candidate_dir'], live_dir, result['version'])
+
+        logger.info(f"Promoted model {result['version']} for {symbol} "
+                    f"(val_loss {result['candidate_loss']:.5f}, incumbent {incumbent_loss})")
+        return load_model_artifacts(live_dir, backend=Config.INFERENCE_BACKEND)
+
+    async def shutdown(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
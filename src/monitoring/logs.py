@@ -0,0 +1,242 @@
+import atexit
+import copy
+import gzip
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import shutil
+import sys
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from config.config import Config
+
+# Argument types that cannot change between the call and the listener
+# formatting the record later
+IMMUTABLE_ARGS = (str, int, float, bool, type(None))
+
+
+def sampled(*key) -> Dict:
+    """`extra` for a log call that is rate-limited per key, e.g. per symbol"""
+    return {'sample_key': key}
+
+
+class SamplingFilter(logging.Filter):
+    """Rate-limit repetitive records that carry a `sample_key`
+
+    Each key gets a token bucket of `burst` records refilled over
+    `interval` seconds. Records beyond that are dropped and counted; the
+    next record let through for the key carries the count as
+    `record.suppressed`. Records without a key always pass.
+    """
+
+    def __init__(self, interval: float = 300, burst: int = 1, max_keys: int = 10000):
+        super().__init__()
+        self.interval = interval
+        self.burst = burst
+        self.max_keys = max_keys
+        # key -> [tokens, last refill, suppressed since last emitted]
+        self.buckets: Dict[Tuple, list] = {}
+        self.suppressed = 0
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = getattr(record, 'sample_key', None)
+        if key is None:
+            return True
+        key = (record.name, record.msg) + key
+
+        now = time.monotonic()
+        with self._lock:
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                if len(self.buckets) >= self.max_keys:
+                    self._prune(now)
+                bucket = self.buckets[key] = [float(self.burst), now, 0]
+            else:
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.burst / self.interval)
+                bucket[1] = now
+
+            if bucket[0] < 1:
+                bucket[2] += 1
+                self.suppressed += 1
+                return False
+            bucket[0] -= 1
+            record.suppressed = bucket[2]
+            bucket[2] = 0
+        return True
+
+    def _prune(self, now: float) -> None:
+        """Forget keys idle long enough to have refilled completely"""
+        idle = [key for key, bucket in self.buckets.items()
+                if now - bucket[1] >= self.interval and bucket[2] == 0]
+        for key in idle:
+            del self.buckets[key]
+        if len(self.buckets) >= self.max_keys:
+            self.buckets.clear()
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that never blocks the caller and defers formatting
+
+    Messages whose arguments are immutable are formatted on the listener
+    thread instead of the caller's; anything else, and tracebacks, are
+    rendered before enqueueing. When the queue is full the record is
+    dropped and counted rather than stalling the trading loop.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._traceback_formatter = logging.Formatter()
+
+    def createLock(self) -> None:
+        # The queue is thread-safe; skip the per-record handler lock
+        self.lock = None
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        args = record.args
+        lazy = not args or (isinstance(args, tuple) and all(isinstance(arg, IMMUTABLE_ARGS) for arg in args))
+        if lazy and not record.exc_info:
+            return record
+
+        record = copy.copy(record)
+        if not lazy:
+            record.msg = record.getMessage()
+            record.args = None
+        if record.exc_info:
+            record.exc_text = self._traceback_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        suppressed = getattr(record, 'suppressed', 0)
+        return f"{text} (+{suppressed} similar suppressed)" if suppressed else text
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line for log shippers"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': record.created,
+            'level': record.levelname,
+            'logger': record.name,
+            'process': record.processName,
+            'message': record.getMessage(),
+        }
+        if getattr(record, 'suppressed', 0):
+            entry['suppressed'] = record.suppressed
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exception'] = record.exc_text  # rendered by the queue handler
+        return json.dumps(entry, default=str)
+
+
+def _gzip_namer(name: str) -> str:
+    return f"{name}.gz"
+
+
+def _gzip_rotator(source: str, dest: str) -> None:
+    with open(source, 'rb') as f_in, gzip.open(dest, 'wb', compresslevel=6) as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+
+def rotating_gzip_handler(path: str, max_bytes: int, backup_count: int) -> logging.Handler:
+    """Size-rotated log file whose backups are gzip-compressed on rotation"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes,
+                                                   backupCount=backup_count, delay=True)
+    handler.namer = _gzip_namer
+    handler.rotator = _gzip_rotator
+    return handler
+
+
+class LogPipeline:
+    """Root logging routed through a queue to a background writer thread
+
+    Callers only pay for the sampling check and an enqueue; formatting,
+    stdout and file writes, rotation and compression all happen on the
+    listener thread.
+    """
+
+    def __init__(self, path: str = None, level: str = None, fmt: str = None):
+        self.path = path or Config.LOG_FILE
+        self.level = getattr(logging, (level or Config.LOG_LEVEL).upper())
+        self.fmt = fmt or Config.LOG_FORMAT
+
+        if self.fmt == 'json':
+            formatter = JsonFormatter()
+        else:
+            formatter = TextFormatter('%(asctime)s - %(levelname)s - %(message)s')
+        self.handlers = [logging.StreamHandler(sys.stdout),
+                         rotating_gzip_handler(self.path, Config.LOG_MAX_BYTES, Config.LOG_BACKUP_COUNT)]
+        for handler in self.handlers:
+            handler.setFormatter(formatter)
+
+        self.queue = queue.Queue(maxsize=Config.LOG_QUEUE_SIZE)
+        self.sampler = SamplingFilter(Config.LOG_SAMPLE_INTERVAL, Config.LOG_SAMPLE_BURST)
+        self.queue_handler = NonBlockingQueueHandler(self.queue)
+        self.queue_handler.addFilter(self.sampler)
+        self.listener = logging.handlers.QueueListener(self.queue, *self.handlers,
+                                                       respect_handler_level=True)
+        self.running = False
+
+    def start(self) -> None:
+        # Neither format uses caller location or thread names, so skip
+        # collecting them for every record (logging HOWTO, "Optimization")
+        logging._srcfile = None
+        logging.logThreads = False
+
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(self.queue_handler)
+        root.setLevel(self.level)
+        self.listener.start()
+        self.running = True
+
+    def stop(self) -> None:
+        """Flush queued records and close the files"""
+        root = logging.getLogger()
+        if self.queue_handler in root.handlers:
+            root.removeHandler(self.queue_handler)
+        if self.running:
+            self.listener.stop()
+            self.running = False
+        for handler in self.handlers:
+            handler.close()
+
+    def stats(self) -> Dict:
+        return {'queued': self.queue.qsize(), 'dropped': self.queue_handler.dropped,
+                'suppressed': self.sampler.suppressed}
+
+
+_pipeline: Optional[LogPipeline] = None
+
+
+def setup_logging(path: str = None) -> LogPipeline:
+    """Install the queued pipeline, replacing one set up earlier in this process"""
+    global _pipeline
+    if _pipeline is not None:
+        _pipeline.stop()
+    else:
+        atexit.register(lambda: _pipeline.stop())
+    _pipeline = LogPipeline(path)
+    _pipeline.start()
+    return _pipeline
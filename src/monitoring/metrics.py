@@ -0,0 +1,249 @@
+import asyncio
+import functools
+import heapq
+import math
+import time
+from typing import Callable, Dict, Iterable, List, Tuple
+
+# Sub-buckets per power of two: bucket width is 1/64 of an octave, so
+# recorded values are reported within ~0.8% of their true value
+SUB_BUCKETS = 64
+
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """HDR-style log-linear latency histogram
+
+    Values (seconds) are bucketed by binary exponent and SUB_BUCKETS linear
+    steps within it, so relative precision is the same from microseconds
+    to minutes. Buckets are a sparse dict: recording is one frexp and one
+    dict update, and quantiles are only computed when read.
+    """
+
+    __slots__ = ('buckets', 'count', 'sum', 'max')
+
+    def __init__(self):
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def record(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+        if value > 0:
+            mantissa, exponent = math.frexp(value)
+            key = exponent * SUB_BUCKETS + int((mantissa - 0.5) * 2 * SUB_BUCKETS)
+        else:
+            key = -1 << 30
+        self.buckets[key] = self.buckets.get(key, 0) + 1
+
+    def record_many(self, values: Iterable[float]) -> None:
+        for value in values:
+            self.record(value)
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen >= rank:
+                if key == -1 << 30:
+                    return 0.0
+                exponent, sub = divmod(key, SUB_BUCKETS)
+                return min(math.ldexp(0.5 + (sub + 0.5) / (2 * SUB_BUCKETS), exponent), self.max)
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+
+class Counter:
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+
+class TopGauge:
+    """Latest value per key, exporting only the `n` largest
+
+    For per-entity detail (e.g. seconds per symbol) without one series per
+    entity: memory is one float per key, but a scrape carries at most `n`
+    series.
+    """
+
+    __slots__ = ('n', 'values')
+
+    def __init__(self, n: int):
+        self.n = n
+        self.values: Dict[str, float] = {}
+
+    def set(self, key: str, value: float) -> None:
+        self.values[key] = value
+
+    def discard(self, key: str) -> None:
+        self.values.pop(key, None)
+
+    def top(self) -> List[Tuple[str, float]]:
+        return heapq.nlargest(self.n, self.values.items(), key=lambda item: item[1])
+
+
+class _Timer:
+    """Context manager recording elapsed wall time into a histogram"""
+
+    __slots__ = ('histogram', 'start')
+
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+
+    def __enter__(self) -> '_Timer':
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.histogram.record(time.perf_counter() - self.start)
+
+
+class MetricsRegistry:
+    """Named histograms, counters and gauges rendered in Prometheus text format
+
+    Each metric name maps to one series per distinct label set. Hot paths
+    should keep the object returned by `histogram` / `counter` rather than
+    look it up per call. Gauges are callables read at scrape time, so
+    components expose existing state (queue depths, open orders) without
+    extra bookkeeping. Keep unbounded values such as symbols out of labels;
+    use `top` for per-entity detail.
+    """
+
+    def __init__(self, namespace: str = 'trading'):
+        self.namespace = namespace
+        self.histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self.counters: Dict[str, Dict[LabelKey, Counter]] = {}
+        self.gauges: Dict[str, Dict[LabelKey, Callable[[], float]]] = {}
+        self.tops: Dict[str, Tuple[str, TopGauge]] = {}
+        self.help: Dict[str, str] = {}
+
+    def histogram(self, name: str, **labels) -> Histogram:
+        series = self.histograms.setdefault(name, {})
+        key = tuple(sorted(labels.items()))
+        histogram = series.get(key)
+        if histogram is None:
+            histogram = series[key] = Histogram()
+        return histogram
+
+    def counter(self, name: str, **labels) -> Counter:
+        series = self.counters.setdefault(name, {})
+        key = tuple(sorted(labels.items()))
+        counter = series.get(key)
+        if counter is None:
+            counter = series[key] = Counter()
+        return counter
+
+    def gauge(self, name: str, read: Callable[[], float], **labels) -> None:
+        """Register a gauge whose value is read from `read()` at scrape time"""
+        self.gauges.setdefault(name, {})[tuple(sorted(labels.items()))] = read
+
+    def top(self, name: str, label: str, n: int = 10) -> TopGauge:
+        """Gauge exporting the `n` largest values, labelled `label`=key"""
+        entry = self.tops.get(name)
+        if entry is None:
+            entry = self.tops[name] = (label, TopGauge(n))
+        return entry[1]
+
+    def describe(self, name: str, text: str) -> None:
+        self.help[name] = text
+
+    def timer(self, name: str, **labels) -> _Timer:
+        """`with metrics.timer('stage_seconds', stage='analyze'): ...`"""
+        return _Timer(self.histogram(name, **labels))
+
+    def timed(self, name: str, **labels) -> Callable:
+        """Decorator timing every call of a sync or async function"""
+        def decorator(func: Callable) -> Callable:
+            histogram = self.histogram(name, **labels)
+
+            if asyncio.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    start = time.perf_counter()
+                    try:
+                        return await func(*args, **kwargs)
+                    finally:
+                        histogram.record(time.perf_counter() - start)
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    histogram.record(time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    def render(self) -> str:
+        """All series in the Prometheus text exposition format"""
+        lines: List[str] = []
+        for name, series in sorted(self.histograms.items()):
+            full = self._header(lines, name, 'summary')
+            for key, histogram in series.items():
+                for q in QUANTILES:
+                    lines.append(f"{full}{_labels(key + (('quantile', str(q)),))} "
+                                 f"{histogram.quantile(q):.9g}")
+                lines.append(f"{full}_sum{_labels(key)} {histogram.sum:.9g}")
+                lines.append(f"{full}_count{_labels(key)} {histogram.count}")
+            full = self._header(lines, f"{name}_max", 'gauge')
+            for key, histogram in series.items():
+                lines.append(f"{full}{_labels(key)} {histogram.max:.9g}")
+        for name, series in sorted(self.counters.items()):
+            full = self._header(lines, name, 'counter')
+            for key, counter in series.items():
+                lines.append(f"{full}{_labels(key)} {counter.value:.9g}")
+        for name, series in sorted(self.gauges.items()):
+            full = self._header(lines, name, 'gauge')
+            for key, read in series.items():
+                try:
+                    value = float(read())
+                except Exception:
+                    continue
+                lines.append(f"{full}{_labels(key)} {value:.9g}")
+        for name, (label, top) in sorted(self.tops.items()):
+            full = self._header(lines, name, 'gauge')
+            for key, value in top.top():
+                lines.append(f"{full}{_labels(((label, key),))} {value:.9g}")
+        return '\n'.join(lines) + '\n'
+
+    def _header(self, lines: List[str], name: str, kind: str) -> str:
+        full = f"{self.namespace}_{name}"
+        if name in self.help:
+            lines.append(f"# HELP {full} {self.help[name]}")
+        lines.append(f"# TYPE {full} {kind}")
+        return full
+
+
+def _labels(key: LabelKey) -> str:
+    if not key:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in key) + '}'
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# Process-wide registry used by the trading loop and the metrics endpoint
+METRICS = MetricsRegistry()
+
@@ -0,0 +1,69 @@
+import asyncio
+import logging
+from typing import Optional
+
+from aiohttp import web
+
+from src.monitoring.metrics import METRICS, MetricsRegistry
+from src.monitoring.profiler import SamplingProfiler
+
+logger = logging.getLogger(__name__)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class MetricsServer:
+    """Local HTTP endpoint for metrics scrapes and on-demand profiling
+
+    GET /metrics    registry in Prometheus text format
+    GET /profile    folded stacks; with ?seconds=N samples for N seconds
+                    first, otherwise returns what the running profiler
+                    has collected so far
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 9100,
+                 registry: MetricsRegistry = None,
+                 profiler: Optional[SamplingProfiler] = None):
+        self.host = host
+        self.port = port
+        self.registry = registry or METRICS
+        self.profiler = profiler or SamplingProfiler()
+        self._runner = None
+
+        self.app = web.Application()
+        self.app.router.add_get('/metrics', self._metrics)
+        self.app.router.add_get('/profile', self._profile)
+
+    async def start(self) -> None:
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        logger.info(f"Metrics endpoint listening on http://{self.host}:{self.port}/metrics")
+
+    async def stop(self) -> None:
+        self.profiler.stop()
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _metrics(self, request: web.Request) -> web.Response:
+        return web.Response(body=self.registry.render().encode(),
+                            headers={'Content-Type': PROMETHEUS_CONTENT_TYPE})
+
+    async def _profile(self, request: web.Request) -> web.Response:
+        seconds = request.query.get('seconds')
+        if seconds is None:
+            return web.Response(text=self.profiler.collapsed())
+
+        # Sample while this handler sleeps so the event loop keeps running
+        was_running = self.profiler.running
+        self.profiler.reset()
+        self.profiler.start()
+        try:
+            await asyncio.sleep(min(float(seconds), 300.0))
+        finally:
+            if not was_running:
+                self.profiler.stop()
+        return web.Response(text=self.profiler.collapsed())
@@ -0,0 +1,271 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Same windows as MarketPredictionModel._calculate_features
+VOLUME_WINDOW = 20
+VOLATILITY_WINDOW = 20
+BOLLINGER_WINDOW = 20
+RSI_PERIOD = 14
+MACD_FAST_SPAN = 12
+MACD_SLOW_SPAN = 26
+
+# Bump whenever feature definitions change so cached features and saved
+# model artifacts built from the old definitions are invalidated
+FEATURE_SET_VERSION = 2
+
+FEATURE_COLUMNS = [
+    'returns', 'log_returns', 'volume_ma', 'volume_std', 'rsi',
+    'macd', 'bb_upper', 'bb_lower', 'volatility'
+]
+
+
+class RollingWindow:
+    """Fixed-size rolling mean/std for many independent series at once
+
+    Each slot keeps a ring buffer plus Welford mean and sum of squared
+    deviations, updated in O(1) per value: growing-window Welford while the
+    buffer fills, then an add-and-remove update once it is full. The
+    statistics are recomputed exactly from the buffer every time it wraps,
+    which keeps floating-point drift bounded at O(1) amortized cost.
+    Like pandas, a window holding one repeated value has exactly that mean
+    and zero deviation, so e.g. an all-zero RSI window stays 0 / 0 = NaN
+    rather than a residue of the running update.
+    """
+
+    def __init__(self, window: int, capacity: int):
+        self.window = window
+        self.buffer = np.zeros((capacity, window))
+        self.mean = np.zeros(capacity)
+        self.m2 = np.zeros(capacity)
+        self.filled = np.zeros(capacity, dtype=np.int64)
+        self.pos = np.zeros(capacity, dtype=np.int64)
+        self.same = np.zeros(capacity, dtype=np.int64)  # run of values equal to the newest
+
+    def grow(self, capacity: int) -> None:
+        extra = capacity - len(self.mean)
+        self.buffer = np.vstack([self.buffer, np.zeros((extra, self.window))])
+        self.mean = np.concatenate([self.mean, np.zeros(extra)])
+        self.m2 = np.concatenate([self.m2, np.zeros(extra)])
+        self.filled = np.concatenate([self.filled, np.zeros(extra, dtype=np.int64)])
+        self.pos = np.concatenate([self.pos, np.zeros(extra, dtype=np.int64)])
+        self.same = np.concatenate([self.same, np.zeros(extra, dtype=np.int64)])
+
+    def reset(self, idx: np.ndarray) -> None:
+        self.buffer[idx] = 0.0
+        self.mean[idx] = 0.0
+        self.m2[idx] = 0.0
+        self.filled[idx] = 0
+        self.pos[idx] = 0
+        self.same[idx] = 0
+
+    def snapshot(self) -> Dict:
+        return {'buffer': self.buffer, 'mean': self.mean, 'm2': self.m2,
+                'filled': self.filled, 'pos': self.pos, 'same': self.same}
+
+    def restore(self, state: Dict) -> None:
+        for name in ('buffer', 'mean', 'm2', 'filled', 'pos'):
+            setattr(self, name, np.array(state[name]))
+        # Snapshots from before `same` was tracked restart the run count
+        self.same = np.array(state.get('same', np.zeros(len(self.mean), dtype=np.int64)))
+
+    def push(self, idx: np.ndarray, x: np.ndarray) -> None:
+        """Append one value per slot in `idx` (slots must be unique)"""
+        pos = self.pos[idx]
+        filled = self.filled[idx]
+        full = filled == self.window
+        old = self.buffer[idx, pos]
+        mean = self.mean[idx]
+        newest = self.buffer[idx, (pos - 1) % self.window]
+        self.same[idx] = np.where((filled > 0) & (x == newest),
+                                  np.minimum(self.same[idx] + 1, self.window), 1)
+
+        # Growing window: n -> n + 1
+        count = np.where(full, self.window, filled + 1)
+        grow_mean = mean + (x - mean) / count
+        grow_m2 = self.m2[idx] + (x - mean) * (x - grow_mean)
+
+        # Full window: replace the oldest value
+        slide_mean = mean + (x - old) / self.window
+        slide_m2 = self.m2[idx] + (x - old) * (x - slide_mean + old - mean)
+
+        self.mean[idx] = np.where(full, slide_mean, grow_mean)
+        self.m2[idx] = np.where(full, slide_m2, grow_m2)
+        self.buffer[idx, pos] = x
+        self.pos[idx] = (pos + 1) % self.window
+        self.filled[idx] = count
+
+        wrapped = idx[(self.pos[idx] == 0) & (count == self.window)]
+        if len(wrapped):
+            values = self.buffer[wrapped]
+            self.mean[wrapped] = values.mean(axis=1)
+            self.m2[wrapped] = ((values - self.mean[wrapped, None]) ** 2).sum(axis=1)
+
+    def rolling_mean(self, idx: np.ndarray) -> np.ndarray:
+        constant = self.same[idx] == self.window
+        mean = np.where(constant, self.buffer[idx, (self.pos[idx] - 1) % self.window], self.mean[idx])
+        return np.where(self.filled[idx] == self.window, mean, np.nan)
+
+    def rolling_std(self, idx: np.ndarray) -> np.ndarray:
+        std = np.sqrt(np.maximum(self.m2[idx], 0.0) / (self.window - 1))
+        std = np.where(self.same[idx] == self.window, 0.0, std)
+        return np.where(self.filled[idx] == self.window, std, np.nan)
+
+
+class IndicatorEngine:
+    """Streaming per-symbol state for the MarketPredictionModel features
+
+    Produces the same values as the pandas batch path in
+    `MarketPredictionModel._calculate_features` but updates in constant time
+    per candle. State for all symbols lives in NumPy arrays, so a whole
+    universe can be advanced with one `update_batch` call.
+    """
+
+    def __init__(self, capacity: int = 64):
+        self.capacity = capacity
+        self.slots: Dict[str, int] = {}
+
+        self.count = np.zeros(capacity, dtype=np.int64)
+        self.prev_close = np.zeros(capacity)
+        self.ema_fast = np.zeros(capacity)
+        self.ema_slow = np.zeros(capacity)
+
+        self.volume = RollingWindow(VOLUME_WINDOW, capacity)
+        self.close = RollingWindow(BOLLINGER_WINDOW, capacity)
+        self.returns = RollingWindow(VOLATILITY_WINDOW, capacity)
+        self.gain = RollingWindow(RSI_PERIOD, capacity)
+        self.loss = RollingWindow(RSI_PERIOD, capacity)
+
+    def _grow(self, capacity: int) -> None:
+        extra = capacity - self.capacity
+        self.count = np.concatenate([self.count, np.zeros(extra, dtype=np.int64)])
+        self.prev_close = np.concatenate([self.prev_close, np.zeros(extra)])
+        self.ema_fast = np.concatenate([self.ema_fast, np.zeros(extra)])
+        self.ema_slow = np.concatenate([self.ema_slow, np.zeros(extra)])
+        for window in (self.volume, self.close, self.returns, self.gain, self.loss):
+            window.grow(capacity)
+        self.capacity = capacity
+
+    def slot(self, symbol: str) -> int:
+        """State slot for a symbol, allocated on first use"""
+        idx = self.slots.get(symbol)
+        if idx is None:
+            idx = len(self.slots)
+            if idx >= self.capacity:
+                self._grow(self.capacity * 2)
+            self.slots[symbol] = idx
+        return idx
+
+    def slots_for(self, symbols: Sequence[str]) -> np.ndarray:
+        """Slot indices for a batch of symbols, reusable across updates"""
+        return np.array([self.slot(symbol) for symbol in symbols], dtype=np.int64)
+
+    def snapshot(self) -> Dict:
+        """All per-symbol state, so a restart resumes without a warm-up replay"""
+        return {
+            'slots': dict(self.slots),
+            'count': self.count, 'prev_close': self.prev_close,
+            'ema_fast': self.ema_fast, 'ema_slow': self.ema_slow,
+            'windows': {name: getattr(self, name).snapshot()
+                        for name in ('volume', 'close', 'returns', 'gain', 'loss')},
+        }
+
+    def restore(self, state: Dict) -> None:
+        self.slots = dict(state['slots'])
+        for name in ('count', 'prev_close', 'ema_fast', 'ema_slow'):
+            setattr(self, name, np.array(state[name]))
+        for name, window in state['windows'].items():
+            getattr(self, name).restore(window)
+        self.capacity = len(self.count)
+
+    def reset(self, symbol: str) -> None:
+        """Forget all history for a symbol"""
+        idx = np.array([self.slot(symbol)])
+        self.count[idx] = 0
+        for window in (self.volume, self.close, self.returns, self.gain, self.loss):
+            window.reset(idx)
+
+    def update_batch(self, idx: np.ndarray, close: np.ndarray,
+                     volume: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Advance many symbols by one candle each
+
+        `idx` holds unique slot indices (see `slots_for`). Returns the feature
+        matrix in FEATURE_COLUMNS order and a mask of rows that are complete,
+        i.e. rows the batch path would keep after `dropna`.
+        """
+        idx = np.asarray(idx, dtype=np.int64)
+        close = np.asarray(close, dtype=float)
+        volume = np.asarray(volume, dtype=float)
+
+        first = self.count[idx] == 0
+        prev = np.where(first, close, self.prev_close[idx])
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns = np.where(first, np.nan, close / prev - 1)
+            log_returns = np.where(first, np.nan, np.log(close) - np.log(prev))
+
+            # pct_change leaves the first row NaN, so it never enters the window
+            has_return = idx[~first]
+            if len(has_return):
+                self.returns.push(has_return, returns[~first])
+
+            # delta.where(delta > 0, 0) maps the leading NaN delta to 0
+            delta = close - prev
+            self.gain.push(idx, np.where(delta > 0, delta, 0.0))
+            self.loss.push(idx, np.where(delta < 0, -delta, 0.0))
+            rs = self.gain.rolling_mean(idx) / self.loss.rolling_mean(idx)
+            rsi = 100 - (100 / (1 + rs))
+
+        self.volume.push(idx, volume)
+        self.close.push(idx, close)
+
+        alpha_fast = 2 / (MACD_FAST_SPAN + 1)
+        alpha_slow = 2 / (MACD_SLOW_SPAN + 1)
+        ema_fast = np.where(first, close, (1 - alpha_fast) * self.ema_fast[idx] + alpha_fast * close)
+        ema_slow = np.where(first, close, (1 - alpha_slow) * self.ema_slow[idx] + alpha_slow * close)
+        self.ema_fast[idx] = ema_fast
+        self.ema_slow[idx] = ema_slow
+
+        bb_mean = self.close.rolling_mean(idx)
+        bb_std = self.close.rolling_std(idx)
+
+        features = np.column_stack([
+            returns,
+            log_returns,
+            self.volume.rolling_mean(idx),
+            self.volume.rolling_std(idx),
+            rsi,
+            ema_fast - ema_slow,
+            bb_mean + bb_std * 2,
+            bb_mean - bb_std * 2,
+            self.returns.rolling_std(idx),
+        ])
+
+        self.prev_close[idx] = close
+        self.count[idx] += 1
+
+        return features, ~np.isnan(features).any(axis=1)
+
+    def update(self, symbol: str, candle: Dict) -> Optional[Dict]:
+        """Advance one symbol by a candle
+
+        Returns the candle merged with its features, matching the row the
+        batch path would produce, or None while the indicators warm up.
+        """
+        idx = np.array([self.slot(symbol)])
+        features, valid = self.update_batch(idx, [candle['close']], [candle['volume']])
+        if not valid[0]:
+            return None
+
+        row = dict(candle)
+        row.update(zip(FEATURE_COLUMNS, features[0].tolist()))
+        return row
+
+    def warm_up(self, symbol: str, data: pd.DataFrame) -> List[Dict]:
+        """Replay historical candles, returning the rows that are complete"""
+        rows = []
+        for candle in data.to_dict('records'):
+            row = self.update(symbol, candle)
+            if row is not None:
+                rows.append(row)
+        return rows
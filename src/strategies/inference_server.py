@@ -0,0 +1,202 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class ServerStopped(RuntimeError):
+    """The inference server stopped before answering a request"""
+
+
+class InferenceServer:
+    """Micro-batching inference service for one model
+
+    Callers submit one input sequence each and await a future. Pending
+    requests are collected until `max_batch_size` is reached or the oldest
+    has waited `max_wait` seconds, then run as a single batch through
+    `predict_fn` on a worker thread so the event loop never blocks on the
+    model. Batching pays off when many callers share the model; with
+    `max_wait=0` a request only joins others already queued, so a lone
+    caller is never held back. Throughput and latency counters are
+    exposed via `stats()`.
+
+    Servers for several models can share one `executor`. `stop(drain=True)`
+    answers everything already submitted before stopping; otherwise queued
+    and in-flight requests fail with ServerStopped, so no caller is left
+    waiting on a future nobody will resolve.
+    """
+
+    def __init__(self, predict_fn: Callable[[np.ndarray], np.ndarray],
+                 max_batch_size: int = 64, max_wait: float = 0.005,
+                 latency_samples: int = 10000, executor: ThreadPoolExecutor = None):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+
+        self.requests = 0
+        self.batches = 0
+        self.errors = 0
+        self.model_time = 0.0
+        self._latencies = deque(maxlen=latency_samples)
+        self._batch_sizes = deque(maxlen=latency_samples)
+        self._started_at: Optional[float] = None
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._inflight: List[Tuple[np.ndarray, asyncio.Future, float]] = []
+        self._stopped = False
+        self._owns_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix='inference')
+
+    @classmethod
+    def from_keras_model(cls, model, **kwargs) -> 'InferenceServer':
+        """Serve a Keras model through a compiled tf.function"""
+        import tensorflow as tf
+
+        signature = [tf.TensorSpec(shape=(None,) + tuple(model.input_shape[1:]), dtype=tf.float32)]
+        compiled = tf.function(lambda x: model(x, training=False), input_signature=signature)
+        return cls(lambda batch: compiled(batch).numpy(), **kwargs)
+
+    @classmethod
+    def from_saved_model(cls, path: str, **kwargs) -> 'InferenceServer':
+        """Serve the default signature of an exported SavedModel"""
+        import tensorflow as tf
+
+        serving_fn = tf.saved_model.load(path).signatures['serving_default']
+
+        def predict(batch: np.ndarray) -> np.ndarray:
+            outputs = serving_fn(tf.constant(batch))
+            return next(iter(outputs.values())).numpy()
+
+        return cls(predict, **kwargs)
+
+    async def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._started_at = time.perf_counter()
+            self._task = asyncio.create_task(self._batch_loop())
+            logger.info(f"Inference server started (max batch {self.max_batch_size}, "
+                        f"max wait {self.max_wait * 1000:.1f}ms)")
+
+    async def stop(self, drain: bool = False) -> None:
+        """Stop serving; with `drain`, first answer every request already queued"""
+        self._stopped = True
+        if self._task is not None:
+            if drain and not self._task.done():
+                await self._queue.join()
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        error = ServerStopped("inference server stopped")
+        pending = self._inflight
+        self._inflight = []
+        while self._queue is not None and not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        for _, future, _ in pending:
+            if not future.done():
+                future.set_exception(error)
+        if self._owns_executor:
+            self._executor.shutdown(wait=False)
+
+    async def predict(self, x: np.ndarray) -> np.ndarray:
+        """Predict a single (sequence_length, features) input"""
+        if self._stopped:
+            raise ServerStopped("inference server stopped")
+        if self._task is None:
+            await self.start()
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((x, future, time.perf_counter()))
+        return await future
+
+    async def _collect_batch(self, batch: List[Tuple[np.ndarray, asyncio.Future, float]]) -> None:
+        """Fill `batch` in place, so a cancelled collection leaves no request behind"""
+        loop = asyncio.get_running_loop()
+        batch.append(await self._queue.get())
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            # Drain anything already queued without waiting
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+    async def _batch_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            # Requests taken off the queue stay in _inflight until answered;
+            # stop() fails whatever is left there
+            self._inflight = []
+            await self._collect_batch(self._inflight)
+            batch = [item for item in self._inflight if not item[1].cancelled()]
+            if batch:
+                self._run_batch(batch, await self._predict(loop, batch))
+            for _ in self._inflight:
+                self._queue.task_done()
+
+    async def _predict(self, loop: asyncio.AbstractEventLoop,
+                       batch: List[Tuple[np.ndarray, asyncio.Future, float]]) -> Optional[np.ndarray]:
+        inputs = np.stack([item[0] for item in batch]).astype(np.float32)
+        start = time.perf_counter()
+        try:
+            outputs = await loop.run_in_executor(self._executor, self.predict_fn, inputs)
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Inference batch of {len(batch)} failed: {str(e)}")
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return None
+        self.model_time += time.perf_counter() - start
+        return outputs
+
+    def _run_batch(self, batch: List[Tuple[np.ndarray, asyncio.Future, float]],
+                   outputs: Optional[np.ndarray]) -> None:
+        if outputs is None:
+            return
+        done = time.perf_counter()
+        self.batches += 1
+        self.requests += len(batch)
+        self._batch_sizes.append(len(batch))
+
+        for (_, future, submitted), output in zip(batch, outputs):
+            self._latencies.append(done - submitted)
+            if not future.done():
+                future.set_result(output)
+
+    def stats(self) -> Dict:
+        """Throughput and latency counters for tuning batch size and wait"""
+        elapsed = time.perf_counter() - self._started_at if self._started_at else 0.0
+        latencies = np.array(self._latencies) * 1000 if self._latencies else np.zeros(1)
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+
+        return {
+            'requests': self.requests,
+            'batches': self.batches,
+            'errors': self.errors,
+            'mean_batch_size': float(np.mean(self._batch_sizes)) if self._batch_sizes else 0.0,
+            'throughput_per_sec': self.requests / elapsed if elapsed else 0.0,
+            'model_time_sec': self.model_time,
+            'latency_p50_ms': float(p50),
+            'latency_p95_ms': float(p95),
+            'latency_p99_ms': float(p99),
+            'queue_depth': self._queue.qsize() if self._queue is not None else 0
+        }
@@ -1,19 +1,42 @@
 import numpy as np
 import pandas as pd
-from sklearn.preprocessing import StandardScaler
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import LSTM, Dense, Dropout
-from tensorflow.keras.optimizers import Adam
-import tensorflow as tf
-from typing import Tuple, List
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import Tuple, List, Dict, Optional, Iterator, TYPE_CHECKING
+
+from src.strategies.indicators import IndicatorEngine
+from src.strategies.numpy_lstm import NumpyLSTMModel
+
+# TensorFlow and scikit-learn take seconds to import, so they are loaded
+# when the first model is built rather than when this module is imported
+if TYPE_CHECKING:
+    import tensorflow as tf
+
+# Columns carried through _calculate_features that identify a row rather
+# than describe the market; never fed to the scaler or the network
+NON_FEATURE_COLUMNS = ('timestamp', 'symbol')
 
 class MarketPredictionModel:
-    def __init__(self, input_shape: Tuple[int, int]):
-        self.model = self._build_model(input_shape)
+    def __init__(self, input_shape: Tuple[int, int], feature_cache=None,
+                 backend: str = 'keras'):
+        from sklearn.preprocessing import StandardScaler
+
+        self.input_shape = input_shape
+        # With the numpy backend no Keras model is built; `numpy_model` is
+        # set from exported weights and serves `predict`
+        self.model = self._build_model(input_shape) if backend == 'keras' else None
+        self.numpy_model: Optional[NumpyLSTMModel] = None
         self.scaler = StandardScaler()
+        self.feature_columns: Optional[List[str]] = None
+        self.feature_cache = feature_cache
+        self.version: Optional[str] = None  # set when loaded from saved artifacts
+        self.indicators = IndicatorEngine()
         
-    def _build_model(self, input_shape: Tuple[int, int]) -> Sequential:
+    def _build_model(self, input_shape: Tuple[int, int]) -> 'tf.keras.Sequential':
         """Build and compile the LSTM model"""
+        from tensorflow.keras.models import Sequential
+        from tensorflow.keras.layers import LSTM, Dense, Dropout
+        from tensorflow.keras.optimizers import Adam
+
         model = Sequential([
             LSTM(128, return_sequences=True, input_shape=input_shape),
             Dropout(0.2),
@@ -34,21 +57,105 @@ class MarketPredictionModel:
         return model
     
     def prepare_data(self, data: pd.DataFrame, 
-                    sequence_length: int) -> Tuple[np.ndarray, np.ndarray]:
-        """Prepare data for training or prediction"""
+                    sequence_length: int,
+                    fit_scaler: bool = True,
+                    symbol: str = None,
+                    timeframe: str = '1min') -> Tuple[np.ndarray, np.ndarray]:
+        """Prepare data for training or prediction
+        
+        Each window's target is the direction of the following candle's
+        return (+1, -1, or 0 when unchanged), the quantity the model's tanh
+        output is read as. With `fit_scaler=False` the scaler fitted at
+        training time is reused, so inference sees exactly the training
+        scale and column order.
+        """
         # Calculate features
-        features = self._calculate_features(data)
+        features = self._get_features(data, symbol, timeframe)
         
         # Scale features
-        scaled_features = self.scaler.fit_transform(features)
+        if fit_scaler:
+            self.feature_columns = [column for column in features.columns
+                                    if column not in NON_FEATURE_COLUMNS]
+            scaled_features = self.scaler.fit_transform(features[self.feature_columns])
+        else:
+            scaled_features = self._transform(features)
+        
+        # Create sequences as zero-copy views
+        targets = np.sign(features['log_returns'].to_numpy())
+        return self._make_windows(scaled_features, targets, sequence_length)
+    
+    def prepare_inference_input(self, data: pd.DataFrame, sequence_length: int,
+                                symbol: str = None,
+                                timeframe: str = '1min') -> np.ndarray:
+        """Latest (1, sequence_length, features) window, scaled with the fitted scaler"""
+        scaled_features = self._transform(self._get_features(data, symbol, timeframe))
+        if len(scaled_features) < sequence_length:
+            raise ValueError(f"Need {sequence_length} feature rows, got {len(scaled_features)}")
+        
+        return scaled_features[None, -sequence_length:]
+    
+    def _transform(self, features: pd.DataFrame) -> np.ndarray:
+        if self.feature_columns is None:
+            raise RuntimeError("Scaler has not been fitted; train or load model artifacts first")
+        return self.scaler.transform(features[self.feature_columns])
+    
+    def _get_features(self, data: pd.DataFrame, symbol: str = None,
+                      timeframe: str = '1min') -> pd.DataFrame:
+        """Calculate features, reusing the on-disk feature cache when available"""
+        if self.feature_cache is None or symbol is None or data.empty:
+            return self._calculate_features(data)
+        
+        last_timestamp = int(data['timestamp'].iloc[-1])
+        features = self.feature_cache.get(symbol, timeframe, last_timestamp, len(data))
+        if features is None:
+            features = self._calculate_features(data)
+            self.feature_cache.put(symbol, timeframe, last_timestamp, len(data), features)
+        
+        return features
+    
+    def _make_windows(self, scaled_features: np.ndarray, targets: np.ndarray,
+                      sequence_length: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Build (samples, sequence_length, features) windows as a strided view
+        
+        No data is copied; each window shares memory with `scaled_features`
+        and is paired with `targets` at the row right after it.
+        """
+        n_samples = max(len(scaled_features) - sequence_length, 0)
+        if n_samples == 0:
+            return (np.empty((0, sequence_length, scaled_features.shape[1])),
+                    np.empty((0,)))
         
-        # Create sequences
-        X, y = [], []
-        for i in range(len(scaled_features) - sequence_length):
-            X.append(scaled_features[i:(i + sequence_length)])
-            y.append(scaled_features[i + sequence_length, 0])  # Predict next price
-            
-        return np.array(X), np.array(y)
+        windows = sliding_window_view(scaled_features, sequence_length, axis=0)
+        X = windows[:n_samples].transpose(0, 2, 1)
+        y = targets[sequence_length:]
+        
+        return X, y
+    
+    def iter_batches(self, X: np.ndarray, y: np.ndarray,
+                     batch_size: int = 32,
+                     shuffle: bool = False) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """Yield training batches, materializing only one batch of windows at a time"""
+        order = np.random.permutation(len(X)) if shuffle else np.arange(len(X))
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            yield X[batch], y[batch]
+    
+    def make_dataset(self, X: np.ndarray, y: np.ndarray,
+                     batch_size: int = 32,
+                     shuffle: bool = False) -> 'tf.data.Dataset':
+        """Wrap windowed views in a tf.data pipeline fed batch by batch"""
+        import tensorflow as tf
+
+        signature = (
+            tf.TensorSpec(shape=(None,) + X.shape[1:], dtype=tf.float32),
+            tf.TensorSpec(shape=(None,), dtype=tf.float32)
+        )
+        dataset = tf.data.Dataset.from_generator(
+            lambda: ((bx.astype(np.float32), by.astype(np.float32))
+                     for bx, by in self.iter_batches(X, y, batch_size, shuffle)),
+            output_signature=signature
+        )
+        return dataset.prefetch(tf.data.AUTOTUNE)
     
     def _calculate_features(self, data: pd.DataFrame) -> pd.DataFrame:
         """Calculate technical indicators and features"""
@@ -75,6 +182,14 @@ class MarketPredictionModel:
         
         return df
     
+    def update_features(self, symbol: str, candle: Dict) -> Optional[Dict]:
+        """Incrementally calculate features for a new candle
+
+        Constant-time equivalent of the latest row of `_calculate_features`;
+        returns None until enough candles have been seen.
+        """
+        return self.indicators.update(symbol, candle)
+    
     def _calculate_rsi(self, prices: pd.Series, period: int = 14) -> pd.Series:
         """Calculate Relative Strength Index"""
         delta = prices.diff()
@@ -104,8 +219,10 @@ class MarketPredictionModel:
     def train(self, X: np.ndarray, y: np.ndarray, 
              validation_split: float = 0.2,
              epochs: int = 100,
-             batch_size: int = 32) -> tf.keras.callbacks.History:
+             batch_size: int = 32) -> 'tf.keras.callbacks.History':
         """Train the model"""
+        import tensorflow as tf
+
         return self.model.fit(
             X, y,
             validation_split=validation_split,
@@ -120,6 +237,39 @@ class MarketPredictionModel:
             ]
         )
     
+    def train_windowed(self, data: pd.DataFrame, sequence_length: int,
+                       validation_split: float = 0.2,
+                       epochs: int = 100,
+                       batch_size: int = 32) -> 'tf.keras.callbacks.History':
+        """Train on lazily batched windows instead of a materialized sequence array
+        
+        The most recent `validation_split` of samples is held out, matching
+        the chronological split `train` gets from Keras.
+        """
+        import tensorflow as tf
+
+        X, y = self.prepare_data(data, sequence_length)
+        split = int(len(X) * (1 - validation_split))
+        
+        return self.model.fit(
+            self.make_dataset(X[:split], y[:split], batch_size, shuffle=True),
+            validation_data=self.make_dataset(X[split:], y[split:], batch_size),
+            epochs=epochs,
+            callbacks=[
+                tf.keras.callbacks.EarlyStopping(
+                    monitor='val_loss',
+                    patience=10,
+                    restore_best_weights=True
+                )
+            ]
+        )
+    
+    def export_numpy(self, precision: str = 'float32') -> NumpyLSTMModel:
+        """Convert the trained network for TensorFlow-free inference"""
+        return NumpyLSTMModel.from_keras(self.model, precision)
+    
     def predict(self, X: np.ndarray) -> np.ndarray:
         """Make predictions"""
+        if self.model is None:
+            return self.numpy_model.predict(X)
         return self.model.predict(X)
\ No newline at end of file
@@ -0,0 +1,253 @@
+import hashlib
+import json
+import logging
+import os
+import pickle
+import shutil
+import tempfile
+import time
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+
+from src.strategies.indicators import FEATURE_SET_VERSION
+
+logger = logging.getLogger(__name__)
+
+WEIGHTS_FILE = 'model.weights.h5'
+NUMPY_WEIGHTS_FILE = 'model.npz'
+SCALER_FILE = 'scaler.pkl'
+METADATA_FILE = 'metadata.json'
+
+
+def _file_digest(path: str, digest) -> None:
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+
+
+def _artifact_version(directory: str, metadata: dict) -> str:
+    """Hash of weights, scaler, feature columns and feature-set version"""
+    digest = hashlib.sha256()
+    _file_digest(os.path.join(directory, WEIGHTS_FILE), digest)
+    _file_digest(os.path.join(directory, SCALER_FILE), digest)
+    if 'numpy_precision' in metadata:
+        _file_digest(os.path.join(directory, NUMPY_WEIGHTS_FILE), digest)
+    digest.update(json.dumps(metadata['feature_columns']).encode())
+    digest.update(str(metadata['feature_set_version']).encode())
+    return digest.hexdigest()[:16]
+
+
+def publish_artifacts(source: str, directory: str, version: str) -> None:
+    """Atomically make the artifact set in `source` live at `directory`
+
+    `directory` is a symlink to a versioned sibling (`.<name>.<version>`),
+    so going live is a single rename of a new link over the old one;
+    readers always find a complete model at `directory`. A plain
+    directory left by an older layout is converted on its first publish.
+    """
+    if os.path.islink(source):
+        # A set saved with save_model_artifacts, e.g. a training candidate
+        link, source = source, os.path.realpath(source)
+        os.remove(link)
+    parent, name = os.path.split(os.path.abspath(directory))
+    target = os.path.join(parent, f".{name}.{version}")
+    previous = os.path.realpath(directory) if os.path.islink(directory) else None
+    if previous == target:
+        shutil.rmtree(source, ignore_errors=True)  # identical artifacts already live
+        return
+    shutil.rmtree(target, ignore_errors=True)
+    os.replace(source, target)
+
+    if os.path.isdir(directory) and not os.path.islink(directory):
+        previous = os.path.join(parent, f".{name}.legacy")
+        shutil.rmtree(previous, ignore_errors=True)
+        os.replace(directory, previous)
+    link = os.path.join(parent, f".{name}.link")
+    if os.path.lexists(link):
+        os.remove(link)
+    os.symlink(os.path.basename(target), link)
+    os.replace(link, directory)
+    if previous is not None:
+        shutil.rmtree(previous, ignore_errors=True)
+
+
+def discard_artifacts(directory: str) -> None:
+    """Remove an artifact set, including the versioned directory a link points to"""
+    if os.path.islink(directory):
+        target = os.path.realpath(directory)
+        os.remove(directory)
+        shutil.rmtree(target, ignore_errors=True)
+    else:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def save_model_artifacts(model, directory: str, numpy_precision: Optional[str] = 'float32') -> str:
+    """Persist weights, fitted scaler and feature order together
+
+    The artifact set is written to a temporary directory and swapped in
+    atomically (`publish_artifacts`), so readers never see a half-written
+    or missing model. Unless
+    `numpy_precision` is None, the weights are also exported for the NumPy
+    inference backend. Returns the version hash recorded in the metadata.
+    """
+    if model.feature_columns is None:
+        raise ValueError("Model has no fitted scaler to save")
+
+    parent = os.path.dirname(os.path.abspath(directory))
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix='.artifacts-', dir=parent)
+
+    try:
+        model.model.save_weights(os.path.join(staging, WEIGHTS_FILE))
+        with open(os.path.join(staging, SCALER_FILE), 'wb') as f:
+            pickle.dump(model.scaler, f)
+
+        metadata = {
+            'input_shape': list(model.input_shape),
+            'feature_columns': model.feature_columns,
+            'feature_set_version': FEATURE_SET_VERSION,
+            'created': int(time.time())
+        }
+        if numpy_precision is not None:
+            model.export_numpy(numpy_precision).save(os.path.join(staging, NUMPY_WEIGHTS_FILE))
+            metadata['numpy_precision'] = numpy_precision
+        metadata['version'] = _artifact_version(staging, metadata)
+        with open(os.path.join(staging, METADATA_FILE), 'w') as f:
+            json.dump(metadata, f, indent=2)
+
+        publish_artifacts(staging, directory, metadata['version'])
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    logger.info(f"Saved model artifacts {metadata['version']} to {directory}")
+    return metadata['version']
+
+
+def read_artifact_metadata(directory: str) -> Optional[dict]:
+    path = os.path.join(directory, METADATA_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def load_model_artifacts(directory: str, feature_cache=None, backend: str = 'keras'):
+    """Rebuild a MarketPredictionModel from saved artifacts
+
+    With `backend='numpy'` the exported weights are loaded and TensorFlow
+    is never imported; artifacts saved without an export fall back to
+    Keras. Raises ValueError when the artifacts were built for another
+    feature-set version or their contents do not match the recorded
+    version hash.
+    """
+    from src.strategies.ml_models import MarketPredictionModel
+    from src.strategies.numpy_lstm import NumpyLSTMModel
+
+    metadata = read_artifact_metadata(directory)
+    if metadata is None:
+        raise FileNotFoundError(f"No model artifacts in {directory}")
+
+    if metadata['feature_set_version'] != FEATURE_SET_VERSION:
+        raise ValueError(f"Artifacts use feature set v{metadata['feature_set_version']}, "
+                         f"current is v{FEATURE_SET_VERSION}")
+    if _artifact_version(directory, metadata) != metadata['version']:
+        raise ValueError(f"Model artifacts in {directory} do not match version {metadata['version']}")
+
+    if backend == 'numpy' and 'numpy_precision' not in metadata:
+        logger.warning(f"Model artifacts in {directory} have no NumPy export, loading with Keras")
+        backend = 'keras'
+
+    model = MarketPredictionModel(tuple(metadata['input_shape']), feature_cache=feature_cache,
+                                  backend=backend)
+    if backend == 'numpy':
+        model.numpy_model = NumpyLSTMModel.load(os.path.join(directory, NUMPY_WEIGHTS_FILE))
+    else:
+        model.model.load_weights(os.path.join(directory, WEIGHTS_FILE))
+    with open(os.path.join(directory, SCALER_FILE), 'rb') as f:
+        model.scaler = pickle.load(f)
+    model.feature_columns = metadata['feature_columns']
+    model.version = metadata['version']
+
+    logger.info(f"Loaded model artifacts {metadata['version']} from {directory} ({backend})")
+    return model
+
+
+class FeatureCache:
+    """On-disk cache of computed feature matrices
+
+    Entries are keyed by symbol, timeframe, last candle timestamp, number of
+    input rows and the feature-set version, so a restart or repeated analysis
+    over the same history skips feature computation entirely. Only the newest
+    entry per symbol and timeframe is kept; writing one removes the older.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        # (symbol, timeframe) -> path of the entry written last
+        self._latest: Dict[Tuple[str, str], str] = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, symbol: str, timeframe: str, last_timestamp: int, rows: int) -> str:
+        key = f"{symbol}|{timeframe}|{last_timestamp}|{rows}|{FEATURE_SET_VERSION}"
+        name = hashlib.sha256(key.encode()).hexdigest()[:32]
+        return os.path.join(self.directory, f"{symbol}-{timeframe}-{name}.pkl")
+
+    def get(self, symbol: str, timeframe: str, last_timestamp: int,
+            rows: int) -> Optional[pd.DataFrame]:
+        path = self._path(symbol, timeframe, last_timestamp, rows)
+        if not os.path.exists(path):
+            self.misses += 1
+            return None
+
+        try:
+            features = pd.read_pickle(path)
+        except Exception as e:
+            logger.warning(f"Discarding unreadable feature cache entry {path}: {e}")
+            os.remove(path)
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return features
+
+    def put(self, symbol: str, timeframe: str, last_timestamp: int,
+            rows: int, features: pd.DataFrame) -> None:
+        path = self._path(symbol, timeframe, last_timestamp, rows)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        os.close(fd)
+        features.to_pickle(tmp_path)
+        os.replace(tmp_path, path)
+        self._prune(symbol, timeframe, path)
+
+    def _prune(self, symbol: str, timeframe: str, keep: str) -> None:
+        """Drop entries for a symbol and timeframe other than `keep`"""
+        previous = self._latest.get((symbol, timeframe))
+        self._latest[(symbol, timeframe)] = keep
+        if previous is not None:
+            stale = [previous] if previous != keep else []
+        else:
+            # First write in this process: clear entries left by earlier runs
+            prefix = f"{symbol}-{timeframe}-"
+            stale = [os.path.join(self.directory, name) for name in os.listdir(self.directory)
+                     if name.startswith(prefix) and name.endswith('.pkl')
+                     and os.path.join(self.directory, name) != keep]
+        for path in stale:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def purge(self, symbol: str = None) -> int:
+        """Remove cached entries, optionally only for one symbol"""
+        removed = 0
+        for name in os.listdir(self.directory):
+            if symbol is None or name.startswith(f"{symbol}-"):
+                os.remove(os.path.join(self.directory, name))
+                removed += 1
+        self._latest = {key: path for key, path in self._latest.items()
+                        if symbol is not None and key[0] != symbol}
+        return removed
@@ -0,0 +1,260 @@
+import json
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+PRECISIONS = ('float32', 'float16', 'int8')
+WEIGHT_KEYS = ('kernel', 'kernel_scale', 'recurrent', 'recurrent_scale', 'bias')
+
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    # tanh form never overflows, unlike 1 / (1 + exp(-x))
+    return 0.5 * (np.tanh(0.5 * x) + 1.0)
+
+
+ACTIVATIONS = {
+    'linear': lambda x: x,
+    'relu': lambda x: np.maximum(x, 0.0),
+    'tanh': np.tanh,
+    'sigmoid': _sigmoid,
+}
+
+
+def _quantize(weight: np.ndarray, precision: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """Store a weight matrix at `precision`; int8 gets a symmetric scale per output column"""
+    if precision == 'float32':
+        return weight.astype(np.float32), None
+    if precision == 'float16':
+        return weight.astype(np.float16), None
+    if precision == 'int8':
+        scale = np.abs(weight).max(axis=0) / 127.0
+        scale[scale == 0] = 1.0
+        return np.round(weight / scale).astype(np.int8), scale.astype(np.float32)
+    raise ValueError(f"Unsupported precision {precision}, expected one of {PRECISIONS}")
+
+
+def _matmul(x: np.ndarray, weight: np.ndarray, scale: Optional[np.ndarray]) -> np.ndarray:
+    out = x @ weight.astype(np.float32, copy=False)
+    return out if scale is None else out * scale
+
+
+class NumpyLSTMModel:
+    """TensorFlow-free forward pass of the MarketPredictionModel network
+
+    Holds the weights of a stack of LSTM and Dense layers (Dropout is a
+    no-op at inference) converted from Keras, optionally stored as float16
+    or per-column int8 and dequantized inside each matmul; activations and
+    state are always float32. `predict` runs full windows exactly like
+    `model.predict`. For streaming, per-symbol hidden and cell states live
+    in slot-indexed arrays: `warm` runs a symbol's window from zero state
+    and keeps the final states, after which `step` advances the symbol by
+    one candle at the cost of a single timestep.
+
+    A streamed state carries history from before the window the network
+    was trained on, so it drifts slowly from the windowed prediction;
+    callers re-`warm` every few candles to bound that (see
+    `MarketAnalyzer.predict_step`).
+    """
+
+    def __init__(self, layers: List[Dict], precision: str = 'float32', capacity: int = 16):
+        self.layers = layers
+        self.precision = precision
+        self.lstm = [layer for layer in layers if layer['type'] == 'lstm']
+        self.dense = [layer for layer in layers if layer['type'] == 'dense']
+
+        self.capacity = capacity
+        self.slots: Dict[str, int] = {}
+        self.steps = np.zeros(capacity, dtype=np.int64)  # timesteps since the last warm
+        self.h = [np.zeros((capacity, layer['units']), dtype=np.float32) for layer in self.lstm]
+        self.c = [np.zeros((capacity, layer['units']), dtype=np.float32) for layer in self.lstm]
+
+    @classmethod
+    def from_keras(cls, model, precision: str = 'float32') -> 'NumpyLSTMModel':
+        """Convert a Sequential of LSTM, Dropout and Dense layers"""
+        layers = []
+        for layer in model.layers:
+            kind = type(layer).__name__
+            config = layer.get_config()
+            weights = layer.get_weights()
+            if kind == 'Dropout':
+                continue
+            if kind == 'LSTM':
+                if config['activation'] != 'tanh' or config['recurrent_activation'] != 'sigmoid':
+                    raise ValueError(f"LSTM {layer.name} uses non-default activations")
+                kernel, kernel_scale = _quantize(weights[0], precision)
+                recurrent, recurrent_scale = _quantize(weights[1], precision)
+                layers.append({
+                    'type': 'lstm', 'units': config['units'],
+                    'return_sequences': config['return_sequences'],
+                    'kernel': kernel, 'kernel_scale': kernel_scale,
+                    'recurrent': recurrent, 'recurrent_scale': recurrent_scale,
+                    'bias': (weights[2] if config['use_bias']
+                             else np.zeros(4 * config['units'])).astype(np.float32),
+                })
+            elif kind == 'Dense':
+                if config['activation'] not in ACTIVATIONS:
+                    raise ValueError(f"Unsupported activation {config['activation']} in {layer.name}")
+                kernel, kernel_scale = _quantize(weights[0], precision)
+                layers.append({
+                    'type': 'dense', 'activation': config['activation'],
+                    'kernel': kernel, 'kernel_scale': kernel_scale,
+                    'bias': (weights[1] if config['use_bias']
+                             else np.zeros(config['units'])).astype(np.float32),
+                })
+            else:
+                raise ValueError(f"Cannot convert {kind} layer {layer.name}")
+
+        kinds = [layer['type'] for layer in layers]
+        stacked = kinds.count('lstm')
+        if not stacked or kinds != ['lstm'] * stacked + ['dense'] * (len(kinds) - stacked) \
+                or [layer['return_sequences'] for layer in layers[:stacked]] != [True] * (stacked - 1) + [False]:
+            raise ValueError("Expected stacked LSTMs returning sequences, then Dense layers")
+        return cls(layers, precision)
+
+    def save(self, path: str) -> None:
+        """Write weights to an .npz file loadable without TensorFlow or pickle"""
+        arrays = {}
+        layout = []
+        for i, layer in enumerate(self.layers):
+            spec = {}
+            for key, value in layer.items():
+                if isinstance(value, np.ndarray):
+                    arrays[f"{i}.{key}"] = value
+                elif value is not None:
+                    spec[key] = value
+            layout.append(spec)
+        arrays['layout'] = np.array(json.dumps({'precision': self.precision, 'layers': layout}))
+        with open(path, 'wb') as f:
+            np.savez(f, **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> 'NumpyLSTMModel':
+        with np.load(path, allow_pickle=False) as data:
+            layout = json.loads(str(data['layout']))
+            layers = []
+            for i, spec in enumerate(layout['layers']):
+                layer = dict(spec)
+                keys = WEIGHT_KEYS if layer['type'] == 'lstm' else WEIGHT_KEYS[:2] + WEIGHT_KEYS[4:]
+                for key in keys:
+                    name = f"{i}.{key}"
+                    layer[key] = data[name] if name in data else None
+                layers.append(layer)
+        return cls(layers, layout['precision'])
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by weights"""
+        return sum(value.nbytes for layer in self.layers for value in layer.values()
+                   if isinstance(value, np.ndarray))
+
+    def _cell(self, z: np.ndarray, h: np.ndarray, c: np.ndarray, recurrent: np.ndarray,
+              scale: Optional[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        """One timestep given the precomputed input projection `z` (Keras gate order i, f, c, o)"""
+        z = z + _matmul(h, recurrent, scale)
+        i, f, g, o = np.split(z, 4, axis=-1)
+        c = _sigmoid(f) * c + _sigmoid(i) * np.tanh(g)
+        h = _sigmoid(o) * np.tanh(c)
+        return h, c
+
+    def _head(self, h: np.ndarray) -> np.ndarray:
+        for layer in self.dense:
+            h = ACTIVATIONS[layer['activation']](
+                _matmul(h, layer['kernel'], layer['kernel_scale']) + layer['bias'])
+        return h
+
+    def _run(self, X: np.ndarray) -> Tuple[np.ndarray, List[np.ndarray], List[np.ndarray]]:
+        """Full windows from zero state; returns outputs and final states per layer"""
+        sequence = np.asarray(X, dtype=np.float32)
+        batch, steps = sequence.shape[:2]
+        final_h, final_c = [], []
+        for layer in self.lstm:
+            units = layer['units']
+            # Input projections for every timestep in one matmul
+            projected = _matmul(sequence.reshape(batch * steps, -1), layer['kernel'],
+                                layer['kernel_scale']).reshape(batch, steps, 4 * units) + layer['bias']
+            # Dequantize once rather than at every timestep
+            recurrent = layer['recurrent'].astype(np.float32, copy=False)
+            h = np.zeros((batch, units), dtype=np.float32)
+            c = np.zeros((batch, units), dtype=np.float32)
+            outputs = np.empty((batch, steps, units), dtype=np.float32)
+            for t in range(steps):
+                h, c = self._cell(projected[:, t], h, c, recurrent, layer['recurrent_scale'])
+                outputs[:, t] = h
+            final_h.append(h)
+            final_c.append(c)
+            sequence = outputs
+        return self._head(final_h[-1]), final_h, final_c
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """(batch, sequence_length, features) -> (batch, outputs), like `model.predict`"""
+        return self._run(X)[0]
+
+    def _grow(self, capacity: int) -> None:
+        extra = capacity - self.capacity
+        self.steps = np.concatenate([self.steps, np.zeros(extra, dtype=np.int64)])
+        self.h = [np.concatenate([h, np.zeros((extra, h.shape[1]), dtype=np.float32)]) for h in self.h]
+        self.c = [np.concatenate([c, np.zeros((extra, c.shape[1]), dtype=np.float32)]) for c in self.c]
+        self.capacity = capacity
+
+    def slot(self, symbol: str) -> int:
+        """State slot for a symbol, allocated on first use"""
+        idx = self.slots.get(symbol)
+        if idx is None:
+            idx = len(self.slots)
+            if idx >= self.capacity:
+                self._grow(self.capacity * 2)
+            self.slots[symbol] = idx
+        return idx
+
+    def steps_since_warm(self, symbol: str) -> Optional[int]:
+        """Candles streamed since `warm`, None if the symbol has no state"""
+        idx = self.slots.get(symbol)
+        return None if idx is None or self.steps[idx] == 0 else int(self.steps[idx])
+
+    def warm(self, symbol: str, window: np.ndarray) -> float:
+        """Run a (sequence_length, features) window and keep its final state"""
+        output, final_h, final_c = self._run(window[None])
+        idx = self.slot(symbol)
+        for layer, (h, c) in enumerate(zip(final_h, final_c)):
+            self.h[layer][idx] = h[0]
+            self.c[layer][idx] = c[0]
+        self.steps[idx] = 1
+        return float(output[0, 0])
+
+    def step(self, symbol: str, features: np.ndarray) -> float:
+        """Advance one symbol by a single feature row"""
+        return float(self.step_batch(np.array([self.slot(symbol)]), features[None])[0, 0])
+
+    def step_batch(self, idx: np.ndarray, features: np.ndarray) -> np.ndarray:
+        """Advance many symbols (unique slots) by one feature row each"""
+        x = np.asarray(features, dtype=np.float32)
+        for layer_index, layer in enumerate(self.lstm):
+            z = _matmul(x, layer['kernel'], layer['kernel_scale']) + layer['bias']
+            h, c = self._cell(z, self.h[layer_index][idx], self.c[layer_index][idx],
+                              layer['recurrent'], layer['recurrent_scale'])
+            self.h[layer_index][idx] = h
+            self.c[layer_index][idx] = c
+            x = h
+        self.steps[idx] += 1
+        return self._head(x)
+
+    def reset(self, symbol: str) -> None:
+        idx = self.slot(symbol)
+        self.steps[idx] = 0
+        for h, c in zip(self.h, self.c):
+            h[idx] = 0.0
+            c[idx] = 0.0
+
+    def snapshot(self) -> Dict:
+        # Copied: stepping updates the state arrays in place
+        return {'slots': dict(self.slots), 'steps': self.steps.copy(),
+                'h': [h.copy() for h in self.h], 'c': [c.copy() for c in self.c]}
+
+    def restore(self, state: Dict) -> None:
+        if [h.shape[1] for h in state['h']] != [h.shape[1] for h in self.h]:
+            raise ValueError("Saved LSTM state does not match this network")
+        self.slots = dict(state['slots'])
+        self.steps = np.array(state['steps'])
+        self.h = [np.array(h) for h in state['h']]
+        self.c = [np.array(c) for c in state['c']]
+        self.capacity = len(self.steps)
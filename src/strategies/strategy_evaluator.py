@@ -0,0 +1,311 @@
+import asyncio
+import itertools
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Union
+
+import numpy as np
+import pandas as pd
+
+from config.config import Config
+from src.models.position_manager import PositionManager
+from src.models.risk_manager import RiskManager
+
+logger = logging.getLogger(__name__)
+
+SECONDS_PER_YEAR = 365 * 24 * 3600
+
+SWEEP_PARAMETERS = ['confidence_threshold', 'stop_loss_pct', 'take_profit_pct', 'leverage', 'risk_pct']
+
+AnalyzeFn = Callable[[str, pd.DataFrame], Union[Dict, Awaitable[Dict]]]
+
+
+def periods_per_year(timestamps: np.ndarray) -> float:
+    """Annualization factor from the median candle spacing (timestamps in seconds)"""
+    if len(timestamps) < 2:
+        return 1.0
+    interval = float(np.median(np.diff(timestamps)))
+    return SECONDS_PER_YEAR / interval if interval > 0 else 1.0
+
+
+def performance_metrics(equity: np.ndarray, annualization: float) -> Dict:
+    """Sharpe ratio, max drawdown and total return of an equity curve"""
+    if len(equity) < 2:
+        return {'sharpe_ratio': 0.0, 'max_drawdown': 0.0, 'total_return': 0.0}
+
+    returns = np.diff(equity) / equity[:-1]
+    std = returns.std(ddof=1)
+    peak = np.maximum.accumulate(equity)
+
+    return {
+        'sharpe_ratio': float(returns.mean() / std * np.sqrt(annualization)) if std > 0 else 0.0,
+        'max_drawdown': float(((peak - equity) / peak).max()),
+        'total_return': float(equity[-1] / equity[0] - 1)
+    }
+
+
+def simulate_vectorized(close: np.ndarray, confidence: np.ndarray, direction: np.ndarray,
+                        params: Dict[str, np.ndarray], initial_balance: float,
+                        annualization: float) -> Dict[str, np.ndarray]:
+    """Simulate every parameter combination at once
+
+    Walks the candles once with all combinations held in NumPy arrays, so
+    each step costs a handful of array operations regardless of how many
+    combinations are evaluated. Stop loss / take profit are checked at each
+    close and, as in `manage_positions`, an opposing signal above
+    REVERSAL_CONFIDENCE closes the position; a new position is opened on a
+    later close when flat and the signal confidence exceeds the threshold.
+    Sizing is a fixed `risk_pct` of balance rather than RiskManager's
+    Kelly sizing.
+    Metrics are accumulated on the fly, so memory is O(combinations).
+    """
+    threshold = params['confidence_threshold']
+    stop_loss = params['stop_loss_pct']
+    take_profit = params['take_profit_pct']
+    leverage = params['leverage']
+    risk = params['risk_pct']
+    n = len(threshold)
+
+    balance = np.full(n, float(initial_balance))
+    in_position = np.zeros(n, dtype=bool)
+    side = np.zeros(n)
+    entry = np.ones(n)
+    size = np.zeros(n)
+
+    prev_equity = balance.copy()
+    peak = balance.copy()
+    max_drawdown = np.zeros(n)
+    return_sum = np.zeros(n)
+    return_sq = np.zeros(n)
+    trades = np.zeros(n, dtype=np.int64)
+    wins = np.zeros(n, dtype=np.int64)
+
+    for t in range(len(close)):
+        price = close[t]
+
+        pnl = np.where(in_position, (price - entry) / entry * size * leverage * side, 0.0)
+        closing = in_position & ((pnl <= -stop_loss) | (pnl >= take_profit))
+        reversing = in_position & ~closing & (side == -direction[t])
+        if confidence[t] <= Config.REVERSAL_CONFIDENCE:
+            reversing[:] = False
+        closing |= reversing
+        balance += np.where(closing, pnl, 0.0)
+        trades += closing
+        wins += closing & (pnl > 0)
+        in_position &= ~closing
+        unrealized = np.where(in_position, pnl, 0.0)
+
+        # A reversal re-enters on a later close, once the margin is released
+        opening = ~in_position & ~reversing & (confidence[t] > threshold)
+        if opening.any():
+            entry = np.where(opening, price, entry)
+            side = np.where(opening, direction[t], side)
+            size = np.where(opening, balance * risk / 100, size)
+            in_position |= opening
+
+        equity = balance + unrealized
+        step_return = equity / prev_equity - 1
+        return_sum += step_return
+        return_sq += step_return * step_return
+        prev_equity = equity
+
+        np.maximum(peak, equity, out=peak)
+        np.maximum(max_drawdown, (peak - equity) / peak, out=max_drawdown)
+
+    steps = max(len(close), 2)
+    mean = return_sum / steps
+    std = np.sqrt(np.maximum(return_sq - return_sum ** 2 / steps, 0.0) / (steps - 1))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = np.where(std > 0, mean / std * np.sqrt(annualization), 0.0)
+
+    return {
+        'sharpe_ratio': sharpe,
+        'max_drawdown': max_drawdown,
+        'total_return': prev_equity / initial_balance - 1,
+        'trades': trades,
+        'win_rate': np.where(trades > 0, wins / np.maximum(trades, 1), 0.0)
+    }
+
+
+def _simulate_chunk(args) -> pd.DataFrame:
+    close, confidence, direction, params, initial_balance, annualization = args
+    results = simulate_vectorized(close, confidence, direction, params,
+                                  initial_balance, annualization)
+    return pd.DataFrame({**params, **results})
+
+
+class BacktestEngine:
+    """Replays stored candles through the trading components
+
+    `run_event_driven` reproduces the live per-symbol flow exactly: the
+    analyzer is called on every candle, sizing goes through RiskManager and
+    positions through PositionManager's stop loss / take profit logic.
+    `run_parameter_sweep` evaluates a precomputed signal series against a
+    grid of parameters with the vectorized simulator, spread across cores.
+    """
+
+    def __init__(self, db=None, initial_balance: float = 1000.0,
+                 confidence_threshold: float = 0.7,
+                 stop_loss_pct: float = None, take_profit_pct: float = None):
+        self.db = db
+        self.initial_balance = initial_balance
+        self.confidence_threshold = confidence_threshold
+        self.stop_loss_pct = Config.STOP_LOSS_PCT if stop_loss_pct is None else stop_loss_pct
+        self.take_profit_pct = Config.TAKE_PROFIT_PCT if take_profit_pct is None else take_profit_pct
+
+    def load_candles(self, symbol: str, start_time: datetime = None,
+                     end_time: datetime = None, timeframe: str = '1min') -> pd.DataFrame:
+        """Load candles for a symbol from the market data store"""
+        if self.db is None:
+            from src.database.db_manager import DatabaseManager
+            self.db = DatabaseManager()
+        return self.db.get_market_data(symbol, start_time, end_time, timeframe)
+
+    @staticmethod
+    def analyzer_fn(analyzer) -> AnalyzeFn:
+        """Adapt a MarketAnalyzer to the (symbol, history) signal interface"""
+        return lambda symbol, history: analyzer.analyze_market(symbol, history)
+
+    @staticmethod
+    async def _call(analyze: AnalyzeFn, symbol: str, history: pd.DataFrame) -> Dict:
+        result = analyze(symbol, history)
+        if asyncio.iscoroutine(result):
+            result = await result
+        return dict(result)
+
+    async def run_event_driven(self, symbol: str, candles: pd.DataFrame,
+                               analyze: AnalyzeFn,
+                               risk_manager: RiskManager = None,
+                               position_manager: PositionManager = None) -> Dict:
+        """Exact candle-by-candle replay through the live components"""
+        risk_manager = risk_manager or RiskManager()
+        position_manager = position_manager or PositionManager()
+        # Kelly sizing should learn from the trades closed during the replay
+        position_manager.close_listeners.append(risk_manager.record_trade)
+
+        closes = candles['close'].to_numpy(dtype=float)
+        timestamps = candles['timestamp'].to_numpy()
+        equity = np.empty(len(candles))
+        realized_before = position_manager.realized_pnl
+        closed_before = position_manager.closed_count
+        wins_before = position_manager.winning_count
+        start = time.perf_counter()
+
+        try:
+            for i, price in enumerate(closes):
+                position_manager.check_price(symbol, price)
+                balance = self.initial_balance + position_manager.realized_pnl - realized_before
+
+                analysis = await self._call(analyze, symbol, candles.iloc[:i + 1])
+                analysis['current_price'] = price
+                analysis['symbol'] = symbol
+                positions = position_manager.get_positions(symbol)
+
+                if positions:
+                    position_manager.manage_positions(positions, analysis)
+                elif analysis['confidence'] > self.confidence_threshold:
+                    size = risk_manager.calculate_position_size(
+                        balance, analysis, position_manager.get_exposure(symbol).margin_used
+                    )
+                    if size > 0:
+                        position_manager.open_position(
+                            symbol, analysis['direction'], price, size,
+                            analysis['suggested_leverage'],
+                            self.stop_loss_pct, self.take_profit_pct,
+                            entry_time=float(timestamps[i])
+                        )
+
+                equity[i] = balance + position_manager.unrealized_pnl(symbol, price)
+        finally:
+            position_manager.close_listeners.remove(risk_manager.record_trade)
+
+        elapsed = time.perf_counter() - start
+        trades = position_manager.closed_count - closed_before
+        wins = position_manager.winning_count - wins_before
+        result = performance_metrics(np.concatenate([[self.initial_balance], equity]),
+                                     periods_per_year(timestamps))
+        result.update({
+            'symbol': symbol,
+            'candles': len(candles),
+            'trades': trades,
+            'win_rate': wins / trades if trades else 0.0,
+            'candles_per_sec': len(candles) / elapsed if elapsed else 0.0,
+            'equity': equity
+        })
+        logger.info(f"Event-driven backtest {symbol}: {len(candles)} candles, "
+                    f"sharpe={result['sharpe_ratio']:.2f} drawdown={result['max_drawdown']:.2%} "
+                    f"({result['candles_per_sec']:.0f} candles/sec)")
+        return result
+
+    async def collect_signals(self, symbol: str, candles: pd.DataFrame,
+                              analyze: AnalyzeFn) -> pd.DataFrame:
+        """Precompute confidence and direction per candle for parameter sweeps"""
+        confidence = np.empty(len(candles))
+        direction = np.empty(len(candles))
+        for i in range(len(candles)):
+            analysis = await self._call(analyze, symbol, candles.iloc[:i + 1])
+            confidence[i] = analysis['confidence']
+            direction[i] = 1.0 if analysis['direction'] == 'long' else -1.0
+        return pd.DataFrame({'confidence': confidence, 'direction': direction}, index=candles.index)
+
+    def run_vectorized(self, candles: pd.DataFrame, signals: pd.DataFrame,
+                       params: Dict[str, np.ndarray]) -> pd.DataFrame:
+        """Evaluate explicit parameter arrays in one vectorized pass"""
+        params = {name: np.asarray(params[name], dtype=float) for name in SWEEP_PARAMETERS}
+        return _simulate_chunk((
+            candles['close'].to_numpy(dtype=float),
+            signals['confidence'].to_numpy(dtype=float),
+            signals['direction'].to_numpy(dtype=float),
+            params,
+            self.initial_balance,
+            periods_per_year(candles['timestamp'].to_numpy())
+        ))
+
+    def run_parameter_sweep(self, candles: pd.DataFrame, signals: pd.DataFrame,
+                            param_grid: Dict[str, List[float]],
+                            workers: int = None) -> pd.DataFrame:
+        """Evaluate the cartesian product of `param_grid` across processes
+
+        Parameters missing from the grid use the engine defaults. Returns
+        one row per combination sorted by Sharpe ratio; throughput is
+        logged as candle evaluations per second.
+        """
+        defaults = {
+            'confidence_threshold': [self.confidence_threshold],
+            'stop_loss_pct': [self.stop_loss_pct],
+            'take_profit_pct': [self.take_profit_pct],
+            'leverage': [1],
+            'risk_pct': [Config.INITIAL_RISK_PERCENTAGE],
+        }
+        grid = {name: param_grid.get(name, defaults[name]) for name in SWEEP_PARAMETERS}
+        combos = np.array(list(itertools.product(*grid.values())), dtype=float)
+
+        workers = min(workers or os.cpu_count() or 1, len(combos))
+        close = candles['close'].to_numpy(dtype=float)
+        confidence = signals['confidence'].to_numpy(dtype=float)
+        direction = signals['direction'].to_numpy(dtype=float)
+        annualization = periods_per_year(candles['timestamp'].to_numpy())
+
+        chunks = [
+            (close, confidence, direction,
+             {name: chunk[:, i] for i, name in enumerate(SWEEP_PARAMETERS)},
+             self.initial_balance, annualization)
+            for chunk in np.array_split(combos, workers)
+        ]
+
+        start = time.perf_counter()
+        if workers == 1:
+            frames = [_simulate_chunk(chunks[0])]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                frames = list(executor.map(_simulate_chunk, chunks))
+        elapsed = time.perf_counter() - start
+
+        results = pd.concat(frames, ignore_index=True).sort_values('sharpe_ratio', ascending=False)
+        logger.info(f"Parameter sweep: {len(combos)} combinations x {len(close)} candles "
+                    f"on {workers} workers in {elapsed:.2f}s "
+                    f"({len(combos) * len(close) / elapsed:,.0f} candles/sec)")
+        return results.reset_index(drop=True)
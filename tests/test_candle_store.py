@@ -0,0 +1,46 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+from src.database.candle_store import CandleStore
+
+SYMBOL = 'XBTUSDTM'
+
+
+def candles(minutes, close: float) -> pd.DataFrame:
+    timestamps = [minute * 60 for minute in minutes]
+    return pd.DataFrame({'timestamp': timestamps, 'open': close, 'high': close + 1,
+                         'low': close - 1, 'close': close, 'volume': 1.0})
+
+
+def test_append_keeps_timestamp_order(tmp_path):
+    store = CandleStore(str(tmp_path))
+    assert store.append(SYMBOL, candles([2, 0, 1], 100.0)) == 3
+    assert store.append(SYMBOL, candles([3, 4], 101.0)) == 2
+    np.testing.assert_array_equal(store.read_columns(SYMBOL)['timestamp'], [0, 60, 120, 180, 240])
+
+
+def test_candle_with_last_timestamp_replaces_it(tmp_path):
+    store = CandleStore(str(tmp_path))
+    store.append(SYMBOL, candles(range(3), 100.0))
+    before = store.read_columns(SYMBOL)
+
+    # The still-forming candle is re-sent with new prices, then the next one closes
+    assert store.append(SYMBOL, candles([2, 3], 105.0)) == 2
+    frame = store.read_frame(SYMBOL)
+    assert frame['timestamp'].tolist() == [0, 60, 120, 180]
+    assert frame['close'].tolist() == [100.0, 100.0, 105.0, 105.0]
+    assert frame['high'].tolist() == [101.0, 101.0, 106.0, 106.0]
+    # Views mapped before the replacement see it too
+    assert before['close'][2] == 105.0
+
+
+def test_older_candles_are_skipped_with_warning(tmp_path, caplog):
+    store = CandleStore(str(tmp_path))
+    store.append(SYMBOL, candles(range(3), 100.0))
+
+    with caplog.at_level(logging.WARNING, logger='src.database.candle_store'):
+        assert store.append(SYMBOL, candles([0, 1], 90.0)) == 0
+    assert 'Skipping 2' in caplog.text
+    assert store.read_frame(SYMBOL)['close'].tolist() == [100.0] * 3
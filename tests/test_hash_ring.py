@@ -0,0 +1,60 @@
+from src.cluster.hash_ring import ConsistentHashRing, moved_keys
+
+KEYS = [f"S{i:04d}USDTM" for i in range(2000)]
+NODES = [f"worker-{i}" for i in range(4)]
+
+
+def test_assign_partitions_every_key_once():
+    ring = ConsistentHashRing(NODES)
+    shards = ring.assign(KEYS)
+    assert set(shards) == set(NODES)
+    assert sorted(key for keys in shards.values() for key in keys) == sorted(KEYS)
+    # 128 points per node keep the shards within a reasonable spread
+    assert min(len(keys) for keys in shards.values()) > len(KEYS) / len(NODES) / 2
+
+
+def test_owner_depends_only_on_key_and_nodes():
+    ring = ConsistentHashRing(NODES)
+    other = ConsistentHashRing(reversed(NODES))
+    assert ring.assign(KEYS[:10]) == {node: [key for key in KEYS[:10] if ring.node_for(key) == node]
+                                      for node in NODES}
+    assert all(ring.node_for(key) == other.node_for(key) for key in KEYS)
+
+
+def test_adding_a_node_only_moves_keys_to_it():
+    ring = ConsistentHashRing(NODES)
+    before = ring.assign(KEYS)
+    ring.add('worker-4')
+    after = ring.assign(KEYS)
+
+    moved = moved_keys(before, after)
+    assert {new for _, _, new in moved} == {'worker-4'}
+    assert len(moved) == len(after['worker-4'])
+    assert 0.1 < len(moved) / len(KEYS) < 0.35
+
+
+def test_removing_a_node_only_moves_its_keys():
+    ring = ConsistentHashRing(NODES)
+    before = ring.assign(KEYS)
+    ring.remove('worker-2')
+    after = ring.assign(KEYS)
+
+    moved = moved_keys(before, after)
+    assert 'worker-2' not in after
+    assert sorted(key for key, _, _ in moved) == sorted(before['worker-2'])
+    assert {old for _, old, _ in moved} == {'worker-2'}
+
+
+def test_moved_keys_ignores_keys_entering_or_leaving():
+    before = {'a': ['X', 'Y'], 'b': ['Z']}
+    after = {'a': ['Y'], 'b': ['X', 'W']}
+    assert moved_keys(before, after) == [('X', 'a', 'b')]
+
+
+def test_empty_ring():
+    ring = ConsistentHashRing()
+    assert ring.node_for('S0000USDTM') is None
+    assert ring.assign(KEYS) == {}
+    ring.add('worker-0')
+    ring.remove('worker-0')
+    assert ring.assign(KEYS) == {}
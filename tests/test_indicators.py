@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.strategies.indicators import FEATURE_COLUMNS, IndicatorEngine
+from src.strategies.ml_models import MarketPredictionModel
+
+
+def batch_features(data: pd.DataFrame) -> pd.DataFrame:
+    # _calculate_features needs no fitted state, so skip building the network
+    model = object.__new__(MarketPredictionModel)
+    return model._calculate_features(data)
+
+
+def candles(rows: int, seed: int = 0, price: float = 100.0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = price * np.exp(np.cumsum(rng.normal(0, 0.01, rows)))
+    return pd.DataFrame({
+        'timestamp': np.arange(rows) * 60 + 1_700_000_000,
+        'open': close,
+        'high': close * 1.002,
+        'low': close * 0.998,
+        'close': close,
+        'volume': rng.uniform(1, 100, rows),
+    })
+
+
+def assert_matches_batch(rows, data: pd.DataFrame) -> None:
+    expected = batch_features(data)
+    streamed = pd.DataFrame(rows)
+    assert len(streamed) == len(expected)
+    np.testing.assert_array_equal(streamed['timestamp'].to_numpy(), expected['timestamp'].to_numpy())
+    np.testing.assert_allclose(streamed[FEATURE_COLUMNS].to_numpy(),
+                               expected[FEATURE_COLUMNS].to_numpy(), rtol=1e-9, atol=1e-9)
+
+
+@pytest.mark.parametrize('rows', [30, 500, 5000])
+def test_warm_up_matches_calculate_features(rows):
+    data = candles(rows)
+    assert_matches_batch(IndicatorEngine().warm_up('BTC-USDT', data), data)
+
+
+def test_parity_holds_for_large_prices():
+    # Rolling std of prices far from zero is where naive running sums lose precision
+    data = candles(3000, seed=1, price=60000.0)
+    assert_matches_batch(IndicatorEngine().warm_up('BTC-USDT', data), data)
+
+
+def test_parity_through_flat_prices():
+    data = candles(200, seed=2)
+    data.loc[80:110, 'close'] = data['close'].iloc[80]
+    data.loc[150:155, 'close'] = data['close'].iloc[150] * np.linspace(1, 1.01, 6)
+    assert_matches_batch(IndicatorEngine().warm_up('ETH-USDT', data), data)
+
+
+def test_update_batch_matches_single_symbol_updates():
+    symbols = ['A-USDT', 'B-USDT', 'C-USDT']
+    data = {symbol: candles(300, seed=i) for i, symbol in enumerate(symbols)}
+
+    engine = IndicatorEngine(capacity=2)  # forces the state arrays to grow
+    idx = engine.slots_for(symbols)
+    streamed = {symbol: [] for symbol in symbols}
+    for t in range(300):
+        close = [data[symbol]['close'].iloc[t] for symbol in symbols]
+        volume = [data[symbol]['volume'].iloc[t] for symbol in symbols]
+        features, valid = engine.update_batch(idx, close, volume)
+        for i, symbol in enumerate(symbols):
+            if valid[i]:
+                streamed[symbol].append(features[i])
+
+    for symbol in symbols:
+        expected = batch_features(data[symbol])[FEATURE_COLUMNS].to_numpy()
+        np.testing.assert_allclose(np.array(streamed[symbol]), expected, rtol=1e-9, atol=1e-9)
+
+
+def test_restore_resumes_where_snapshot_left_off():
+    data = candles(400)
+    engine = IndicatorEngine()
+    rows = engine.warm_up('BTC-USDT', data.iloc[:250])
+
+    resumed = IndicatorEngine()
+    resumed.restore(engine.snapshot())
+    rows += resumed.warm_up('BTC-USDT', data.iloc[250:])
+
+    assert_matches_batch(rows, data)
+
+
+def test_update_returns_none_until_warm():
+    engine = IndicatorEngine()
+    data = candles(40)
+    results = [engine.update('BTC-USDT', candle) for candle in data.to_dict('records')]
+    first = next(i for i, row in enumerate(results) if row is not None)
+    assert first == data.index.get_loc(batch_features(data).index[0])
+    assert all(row is not None for row in results[first:])
@@ -0,0 +1,128 @@
+import asyncio
+import time
+
+import pytest
+from aiohttp import web
+
+from src.api.fake_exchange import FakeExchange
+from src.api.kucoin_client import KuCoinAPIError, KuCoinClient
+from src.api.rate_limiter import TokenBucket
+
+ODD_PATH = '/api/v1/odd'
+
+
+def run(test, routes=None, **exchange_options):
+    """Run `test(exchange, client)` against a fresh fake exchange"""
+    async def main():
+        exchange = FakeExchange(**exchange_options)
+        for path, handler in (routes or {}).items():
+            exchange.app.router.add_get(path, handler)
+        await exchange.start()
+        client = KuCoinClient(exchange.url)
+        try:
+            await test(exchange, client)
+        finally:
+            await client.close()
+            await exchange.stop()
+    asyncio.run(main())
+
+
+def respond(response):
+    """Handler answering every request with `response()`"""
+    async def handler(request):
+        return response()
+    return handler
+
+
+def test_token_bucket_paces_requests():
+    async def test(exchange, client):
+        # 10 weight per 0.5s: five 2-weight order listings pass at once, five more wait 0.5s
+        client._buckets['futures'] = TokenBucket(10, 0.5)
+        start = time.perf_counter()
+        await asyncio.gather(*(client.get_orders(start_at=i) for i in range(10)))
+        assert time.perf_counter() - start >= 0.45
+        assert exchange.request_counts['/api/v1/orders'] == 10
+        assert exchange.rate_limited == 0
+
+    run(test)
+
+
+def test_rate_limited_requests_wait_for_the_reset():
+    async def test(exchange, client):
+        start = time.perf_counter()
+        results = await asyncio.gather(*(client.get_orders(start_at=i) for i in range(5)))
+        assert results == [[]] * 5
+        # Two requests were answered 429 and retried once the quota window reset
+        assert exchange.rate_limited >= 2
+        assert time.perf_counter() - start >= 0.25
+
+    run(test, quota=3, quota_window=0.3)
+
+
+def test_retry_after_header_is_honoured():
+    answered = []
+
+    async def limited(request):
+        answered.append(time.perf_counter())
+        if len(answered) == 1:
+            return web.json_response({'code': '429000'}, status=429, headers={'Retry-After': '0.3'})
+        return web.json_response({'code': '200000', 'data': {'ok': True}})
+
+    async def test(exchange, client):
+        assert await client._request('GET', ODD_PATH) == {'ok': True}
+        # Not the 0.5s+ exponential backoff used without a header
+        assert 0.29 <= answered[1] - answered[0] < 0.45
+
+    run(test, routes={ODD_PATH: limited})
+
+
+def test_concurrent_balance_requests_are_coalesced():
+    async def test(exchange, client):
+        balances = await asyncio.gather(*(client.get_account_balance() for _ in range(50)))
+        assert balances == [1000.0] * 50
+        assert exchange.request_counts['/api/v1/account-overview'] == 1
+
+        # A later call is not served from the finished request
+        exchange.balance = 900.0
+        assert await client.get_account_balance() == 900.0
+
+    run(test, latency=0.05)
+
+
+@pytest.mark.parametrize('body, expected', [
+    ({'code': '200000', 'data': None}, None),
+    ({'code': '200000', 'data': [1, 2]}, [1, 2]),
+])
+def test_list_and_null_data(body, expected):
+    async def test(exchange, client):
+        assert await client._request('GET', ODD_PATH) == expected
+
+    run(test, routes={ODD_PATH: respond(lambda: web.json_response(body))})
+
+
+@pytest.mark.parametrize('response', [
+    lambda: web.json_response([{'orderId': '1'}]),
+    lambda: web.json_response(None),
+    lambda: web.Response(text='<html>Bad Gateway</html>', status=502),
+])
+def test_non_envelope_response_raises_api_error(response):
+    async def test(exchange, client):
+        with pytest.raises(KuCoinAPIError) as error:
+            await client._request('GET', ODD_PATH)
+        # No exchange code: the outcome of the call is unknown
+        assert error.value.code is None
+
+    run(test, routes={ODD_PATH: respond(response)})
+
+
+@pytest.mark.parametrize('data', [None, [{'id': 'a'}, {'id': 'b'}]])
+def test_unpaginated_order_lists(monkeypatch, data):
+    # The order listing answers with a bare list, or null when there are none
+    async def list_orders(exchange, request):
+        return web.json_response({'code': '200000', 'data': data})
+    monkeypatch.setattr(FakeExchange, '_list_orders', list_orders)
+
+    async def test(exchange, client):
+        assert await client.get_orders() == (data or [])
+
+    run(test)
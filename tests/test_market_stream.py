@@ -0,0 +1,58 @@
+import asyncio
+
+from src.api.fake_exchange import FakeExchange
+from src.api.kucoin_client import KuCoinClient
+from src.api.market_stream import LEVEL2_TOPIC, MarketDataStream
+
+SYMBOL = 'XBTUSDTM'
+TOPIC = f"{LEVEL2_TOPIC}:{SYMBOL}"
+
+
+def level2(sequence: int, change: str) -> dict:
+    return {'type': 'message', 'topic': TOPIC, 'subject': 'level2',
+            'data': {'sequence': sequence, 'change': change, 'timestamp': sequence}}
+
+
+async def wait_for(condition, timeout: float = 5.0) -> None:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+def test_gap_resyncs_and_replays_the_update_that_exposed_it():
+    async def main():
+        exchange = FakeExchange(snapshots={SYMBOL: {'sequence': 10, 'bids': [[100, 1]], 'asks': [[101, 1]]}})
+        await exchange.start()
+        client = KuCoinClient(exchange.url)
+        stream = MarketDataStream(client, [SYMBOL])
+        resyncs = []
+        stream.subscribe(lambda event: resyncs.append(event['book'].sequence)
+                         if event['type'] == 'book' and event['resync'] else None)
+        try:
+            await stream.start()
+            await wait_for(lambda: stream.order_book(SYMBOL) is not None
+                           and any(TOPIC in topics for topics in exchange._connections.values()))
+
+            await exchange.publish(level2(11, '100,buy,2'))
+            await wait_for(lambda: stream.books[SYMBOL].sequence == 11)
+
+            # 12 is lost; the snapshot served for the resync has it but not 13
+            exchange.snapshots[SYMBOL] = {'sequence': 12, 'bids': [[100, 2], [99, 5]], 'asks': [[101, 1]]}
+            await exchange.publish(level2(13, '101,sell,3'))
+            await wait_for(lambda: len(resyncs) == 2)
+
+            book = stream.order_book(SYMBOL)
+            assert stream.gaps_detected == 1
+            assert resyncs == [10, 13]
+            assert book.bids == {100.0: 2.0, 99.0: 5.0}
+            assert book.asks == {101.0: 3.0}
+
+            await exchange.publish(level2(14, '99,buy,0'))
+            await wait_for(lambda: book.sequence == 14)
+            assert book.bids == {100.0: 2.0}
+        finally:
+            await stream.stop()
+            await client.close()
+            await exchange.stop()
+    asyncio.run(main())
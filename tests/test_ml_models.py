@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from src.strategies.indicators import FEATURE_COLUMNS
+from src.strategies.ml_models import MarketPredictionModel
+from tests.test_indicators import candles
+
+SEQUENCE_LENGTH = 20
+
+
+@pytest.fixture
+def model():
+    pytest.importorskip('sklearn')
+    from sklearn.preprocessing import StandardScaler
+
+    # prepare_data only needs the scaler, so skip building the network
+    model = object.__new__(MarketPredictionModel)
+    model.scaler = StandardScaler()
+    model.feature_cache = None
+    return model
+
+
+def test_timestamp_is_not_a_feature(model):
+    X, _ = model.prepare_data(candles(200), SEQUENCE_LENGTH)
+    assert 'timestamp' not in model.feature_columns
+    assert set(FEATURE_COLUMNS) <= set(model.feature_columns)
+    assert X.shape[2] == len(model.feature_columns)
+
+
+def test_targets_are_next_candle_direction(model):
+    data = candles(200)
+    X, y = model.prepare_data(data, SEQUENCE_LENGTH)
+    features = model._calculate_features(data)
+
+    # Window i ends at feature row i + SEQUENCE_LENGTH - 1; its target is the move after it
+    close = features['close'].to_numpy()
+    expected = np.sign(close[SEQUENCE_LENGTH:] - close[SEQUENCE_LENGTH - 1:-1])
+    np.testing.assert_array_equal(y, expected)
+    assert len(y) == len(X)
@@ -0,0 +1,171 @@
+import numpy as np
+import pytest
+
+from src.models.market_analyzer import MarketAnalyzer
+from src.strategies.indicators import IndicatorEngine
+from src.strategies.numpy_lstm import NumpyLSTMModel
+
+SEQUENCE_LENGTH = 60
+FEATURES = 17
+
+# Max |numpy - keras| allowed per storage precision on the tanh output
+TOLERANCE = {'float32': 1e-5, 'float16': 5e-3, 'int8': 5e-2}
+
+
+def random_layers(rng, features: int = FEATURES):
+    """Random weights in the MarketPredictionModel layout"""
+    layers, inputs = [], features
+    for units, return_sequences in ((32, True), (16, False)):
+        layers.append({
+            'type': 'lstm', 'units': units, 'return_sequences': return_sequences,
+            'kernel': rng.normal(0, 0.3, (inputs, 4 * units)).astype(np.float32), 'kernel_scale': None,
+            'recurrent': rng.normal(0, 0.3, (units, 4 * units)).astype(np.float32), 'recurrent_scale': None,
+            'bias': rng.normal(0, 0.1, 4 * units).astype(np.float32),
+        })
+        inputs = units
+    for units, activation in ((8, 'relu'), (1, 'tanh')):
+        layers.append({
+            'type': 'dense', 'activation': activation,
+            'kernel': rng.normal(0, 0.3, (inputs, units)).astype(np.float32), 'kernel_scale': None,
+            'bias': np.zeros(units, dtype=np.float32),
+        })
+        inputs = units
+    return layers
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(0)
+
+
+def test_save_and_load_round_trip(tmp_path, rng):
+    model = NumpyLSTMModel(random_layers(rng))
+    X = rng.normal(size=(4, SEQUENCE_LENGTH, FEATURES)).astype(np.float32)
+    path = str(tmp_path / 'model.npz')
+    model.save(path)
+
+    loaded = NumpyLSTMModel.load(path)
+    assert loaded.precision == 'float32'
+    np.testing.assert_array_equal(loaded.predict(X), model.predict(X))
+
+
+def test_warm_matches_predict_and_steps_match_batched_steps(rng):
+    model = NumpyLSTMModel(random_layers(rng), capacity=2)
+    windows = rng.normal(size=(3, SEQUENCE_LENGTH, FEATURES)).astype(np.float32)
+    rows = rng.normal(size=(3, FEATURES)).astype(np.float32)
+    expected = model.predict(windows)[:, 0]
+
+    symbols = ['A', 'B', 'C']
+    for symbol, window, output in zip(symbols, windows, expected):
+        assert model.warm(symbol, window) == pytest.approx(output, abs=1e-6)
+    batched = model.step_batch(np.array([model.slot(s) for s in symbols]), rows)[:, 0]
+
+    single = NumpyLSTMModel(model.layers)
+    for symbol, window, row, output in zip(symbols, windows, rows, batched):
+        single.warm(symbol, window)
+        assert single.step(symbol, row) == pytest.approx(output, abs=1e-6)
+    assert model.steps_since_warm('A') == 2
+
+
+def test_restore_resumes_streamed_state(rng):
+    model = NumpyLSTMModel(random_layers(rng))
+    window = rng.normal(size=(SEQUENCE_LENGTH, FEATURES)).astype(np.float32)
+    row = rng.normal(size=FEATURES).astype(np.float32)
+    model.warm('A', window)
+
+    resumed = NumpyLSTMModel(model.layers)
+    resumed.restore(model.snapshot())
+    assert resumed.step('A', row) == model.step('A', row)
+
+
+class StreamedModel:
+    """The parts of MarketPredictionModel MarketAnalyzer needs for streaming"""
+
+    def __init__(self, numpy_model: NumpyLSTMModel, version: str):
+        self.numpy_model = numpy_model
+        self.version = version
+        self.indicators = IndicatorEngine()
+
+
+def candle_windows(rng, candles: int):
+    """Sliding feature windows and timestamps for consecutive 1-minute candles"""
+    rows = rng.normal(size=(SEQUENCE_LENGTH + candles, FEATURES)).astype(np.float32)
+    timestamps = np.arange(len(rows)) * 60
+    return [(rows[i:i + SEQUENCE_LENGTH], timestamps[i + SEQUENCE_LENGTH - 2:i + SEQUENCE_LENGTH])
+            for i in range(candles + 1)]
+
+
+def test_analyzer_steps_once_per_candle(rng):
+    analyzer = MarketAnalyzer()
+    model = StreamedModel(NumpyLSTMModel(random_layers(rng)), 'v1')
+    windows = candle_windows(rng, 5)
+
+    first = analyzer._predict_streaming('A', model, *windows[0])
+    assert first == pytest.approx(float(model.numpy_model.predict(windows[0][0][None])[0, 0]), abs=1e-6)
+    # The same candle analysed again reuses its output without stepping
+    assert analyzer._predict_streaming('A', model, *windows[0]) == first
+    assert model.numpy_model.steps_since_warm('A') == 1
+
+    for window, timestamps in windows[1:4]:
+        analyzer._predict_streaming('A', model, window, timestamps)
+    assert model.numpy_model.steps_since_warm('A') == 4
+
+    # A skipped candle rebuilds the state from the window
+    window, timestamps = windows[5]
+    output = analyzer._predict_streaming('A', model, window, timestamps)
+    assert model.numpy_model.steps_since_warm('A') == 1
+    assert output == pytest.approx(float(model.numpy_model.predict(window[None])[0, 0]), abs=1e-6)
+
+
+def test_analyzer_snapshot_resumes_lstm_state(rng):
+    layers = random_layers(rng)
+    windows = candle_windows(rng, 3)
+    analyzer = MarketAnalyzer()
+    model = StreamedModel(NumpyLSTMModel(layers), 'v1')
+    analyzer.models['A'] = model
+    for window, timestamps in windows[:3]:
+        analyzer._predict_streaming('A', model, window, timestamps)
+    state = analyzer.snapshot()
+    expected = analyzer._predict_streaming('A', model, *windows[3])
+
+    resumed = MarketAnalyzer()
+    resumed.restore(state)
+    same = StreamedModel(NumpyLSTMModel(layers), 'v1')
+    resumed._restore_model_state('A', same)
+    assert resumed._predict_streaming('A', same, *windows[3]) == expected
+    assert same.numpy_model.steps_since_warm('A') == 4
+
+    # State saved for other weights is not restored
+    resumed = MarketAnalyzer()
+    resumed.restore(state)
+    other = StreamedModel(NumpyLSTMModel(layers), 'v2')
+    resumed._restore_model_state('A', other)
+    resumed._predict_streaming('A', other, *windows[3])
+    assert other.numpy_model.steps_since_warm('A') == 1
+
+
+@pytest.fixture(scope='module')
+def keras_model():
+    pytest.importorskip('tensorflow')
+    pytest.importorskip('sklearn')
+    from src.strategies.ml_models import MarketPredictionModel
+
+    rng = np.random.default_rng(1)
+    model = MarketPredictionModel((SEQUENCE_LENGTH, FEATURES))
+    # Move away from the initializer so gates and the tanh head are not near zero
+    model.model.set_weights([w + rng.normal(0, 0.1, w.shape).astype(w.dtype)
+                             for w in model.model.get_weights()])
+    return model
+
+
+@pytest.mark.parametrize('precision', ['float32', 'float16', 'int8'])
+def test_matches_keras_within_precision_tolerance(keras_model, tmp_path, precision):
+    X = np.random.default_rng(2).normal(size=(64, SEQUENCE_LENGTH, FEATURES)).astype(np.float32)
+    expected = keras_model.model.predict(X, verbose=0)
+
+    path = str(tmp_path / 'model.npz')
+    keras_model.export_numpy(precision).save(path)
+    output = NumpyLSTMModel.load(path).predict(X)
+
+    assert output.shape == expected.shape
+    assert np.abs(output - expected).max() <= TOLERANCE[precision]
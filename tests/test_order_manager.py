@@ -0,0 +1,162 @@
+import asyncio
+
+import aiohttp
+import pytest
+
+from src.api.fake_exchange import FakeExchange
+from src.api.kucoin_client import KuCoinAPIError, KuCoinClient
+from src.models.order_manager import (FILLED, NEW, OPEN, PARTIALLY_FILLED, REJECTED,
+                                      UNKNOWN_ORDER_GRACE_MS, OrderManager)
+
+SYMBOL = 'XBTUSDTM'
+REQUEST = {'symbol': SYMBOL, 'side': 'long', 'size': 10, 'price': 100.0, 'leverage': 5}
+
+
+class FlakyClient:
+    """KuCoinClient whose place_order fails after (or instead of) reaching the exchange"""
+
+    def __init__(self, client: KuCoinClient, error: Exception, reaches: bool = True):
+        self.client = client
+        self.error = error
+        self.reaches = reaches
+
+    async def place_order(self, **kwargs):
+        if self.reaches:
+            await self.client.place_order(**kwargs)
+        raise self.error
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+
+def run(test, error: Exception = None, reaches: bool = True):
+    """Run `test(exchange, manager, reports, fills)` against a fresh fake exchange"""
+    async def main():
+        exchange = FakeExchange()
+        reports = []
+
+        async def publish(message):
+            reports.append(message['data'])
+        exchange.publish = publish
+        await exchange.start()
+        client = KuCoinClient(exchange.url)
+        try:
+            await client.get_contracts()
+            manager = OrderManager(client if error is None else FlakyClient(client, error, reaches),
+                                   use_stream=False)
+            fills = []
+            manager.fill_listeners.append(lambda order, lots, price: fills.append((lots, price)))
+            await test(exchange, manager, reports, fills)
+            await manager.stop()
+        finally:
+            await client.close()
+            await exchange.stop()
+    asyncio.run(main())
+
+
+def exchange_order(exchange: FakeExchange, client_oid: str) -> dict:
+    return next(order for order in exchange.orders.values() if order['clientOid'] == client_oid)
+
+
+def test_lost_response_keeps_order_and_applies_late_fill():
+    async def test(exchange, manager, reports, fills):
+        order = await manager.submit(REQUEST)
+        assert order.state == NEW and order.order_id is None
+
+        await exchange.fill(exchange_order(exchange, order.client_oid)['id'], 10, 100.0)
+        manager.on_report(reports[-1])
+        assert order.state == FILLED
+        assert fills == [(10, pytest.approx(100.0))]
+
+    run(test, aiohttp.ServerDisconnectedError())
+
+
+def test_lost_response_is_settled_by_reconcile():
+    async def test(exchange, manager, reports, fills):
+        order = await manager.submit(REQUEST)
+        await exchange.fill(exchange_order(exchange, order.client_oid)['id'], 4, 99.0)
+
+        await manager.reconcile()
+        assert order.order_id == exchange_order(exchange, order.client_oid)['id']
+        assert order.state == PARTIALLY_FILLED
+        assert fills == [(4, pytest.approx(99.0))]
+
+    run(test, asyncio.TimeoutError())
+
+
+def test_unsent_order_rejected_after_grace():
+    async def test(exchange, manager, reports, fills):
+        order = await manager.submit(REQUEST)
+        await manager.reconcile()
+        assert order.state == NEW
+
+        order.created -= UNKNOWN_ORDER_GRACE_MS
+        await manager.reconcile()
+        assert order.state == REJECTED
+
+    run(test, aiohttp.ClientConnectionError(), reaches=False)
+
+
+def test_exchange_error_rejects():
+    async def test(exchange, manager, reports, fills):
+        with pytest.raises(KuCoinAPIError):
+            await manager.submit(REQUEST)
+        assert [order.state for order in manager.orders.values()] == [REJECTED]
+
+    run(test, KuCoinAPIError("insufficient balance", code='300003'), reaches=False)
+
+
+async def filled_in_three(exchange, manager, reports):
+    """Submit an order and fill it 3 + 3 + 4 lots, returning the order and its reports"""
+    order = await manager.submit(REQUEST)
+    for lots, price in ((3, 100.0), (3, 101.0), (4, 102.0)):
+        await exchange.fill(order.order_id, lots, price)
+    return order, [report for report in reports if report['orderId'] == order.order_id]
+
+
+def test_repeated_reports_apply_once():
+    async def test(exchange, manager, reports, fills):
+        order, order_reports = await filled_in_three(exchange, manager, reports)
+        for report in order_reports:
+            manager.on_report(report)
+            manager.on_report(report)
+        assert order.state == FILLED
+        assert fills == [(3, pytest.approx(100.0)), (3, pytest.approx(101.0)), (4, pytest.approx(102.0))]
+
+    run(test)
+
+
+def test_out_of_order_reports_never_undo_fills():
+    async def test(exchange, manager, reports, fills):
+        order, (opened, first, second, last) = await filled_in_three(exchange, manager, reports)
+        for report in (second, opened, first):
+            manager.on_report(report)
+        assert (order.state, order.filled_size) == (PARTIALLY_FILLED, 6)
+        manager.on_report(last)
+        assert order.state == FILLED
+        assert sum(lots for lots, _ in fills) == 10
+
+    run(test)
+
+
+def test_missed_reports_are_made_up():
+    async def test(exchange, manager, reports, fills):
+        order, (opened, _, _, last) = await filled_in_three(exchange, manager, reports)
+        manager.on_report(opened)
+        assert order.state == OPEN
+        manager.on_report(last)
+        assert order.state == FILLED
+        assert fills == [(10, pytest.approx(102.0))]
+
+    run(test)
+
+
+def test_missed_final_report_repaired_by_reconcile():
+    async def test(exchange, manager, reports, fills):
+        order, (_, first, _, _) = await filled_in_three(exchange, manager, reports)
+        manager.on_report(first)
+        assert await manager.reconcile() == 1
+        assert order.state == FILLED
+        assert order.filled_value == pytest.approx(float(exchange.orders[order.order_id]['filledValue']))
+
+    run(test)
@@ -0,0 +1,109 @@
+import math
+from statistics import NormalDist
+
+import numpy as np
+import pytest
+
+from src.models.portfolio_risk import PortfolioRiskEngine
+
+SYMBOLS = [f"S{i}-USDT" for i in range(6)]
+
+
+def price_samples(rng, samples: int = 300):
+    """Random walks; S4 and S5 list late and S3 misses some samples"""
+    prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (samples, len(SYMBOLS))), axis=0))
+    batches = []
+    for t in range(samples):
+        batch = {}
+        for i, symbol in enumerate(SYMBOLS):
+            if (symbol == 'S4-USDT' and t < 100) or (symbol == 'S5-USDT' and t < 200):
+                continue
+            if symbol == 'S3-USDT' and t % 7 == 3:
+                continue
+            batch[symbol] = float(prices[t, i])
+        batches.append(batch)
+    return batches
+
+
+def full_covariance(batches, decay: float) -> np.ndarray:
+    """Σ_t (1 - λ) λ^(T-1-t) r_t r_tᵀ over the whole return history"""
+    last = {}
+    returns = []
+    for batch in batches:
+        r = np.zeros(len(SYMBOLS))
+        for symbol, price in batch.items():
+            if symbol in last:
+                r[SYMBOLS.index(symbol)] = math.log(price / last[symbol])
+            last[symbol] = price
+        returns.append(r)
+    returns = np.array(returns[1:])  # the first sample has nothing to diff against
+    weights = (1 - decay) * decay ** np.arange(len(returns) - 1, -1, -1)
+    return (returns * weights[:, None]).T @ returns
+
+
+def reference_var(cov: np.ndarray, exposure: np.ndarray, engine: PortfolioRiskEngine) -> float:
+    return engine.z * math.sqrt(exposure @ cov @ exposure) * engine.horizon_scale
+
+
+@pytest.fixture
+def loaded():
+    rng = np.random.default_rng(0)
+    batches = price_samples(rng)
+    engine = PortfolioRiskEngine(decay=0.94, capacity=2)  # forces slot growth
+    for batch in batches:
+        engine.update_prices(batch)
+    exposure = rng.normal(0, 1000, len(SYMBOLS))
+    return engine, full_covariance(batches, 0.94), exposure
+
+
+def test_incremental_covariance_matches_full_recompute(loaded):
+    engine, cov, _ = loaded
+    order = [SYMBOLS.index(symbol) for symbol in sorted(engine.index, key=engine.index.get)]
+    np.testing.assert_allclose(engine.cov[:engine.size, :engine.size], cov[np.ix_(order, order)],
+                               rtol=1e-9, atol=1e-15)
+
+
+def test_var_matches_full_recompute(loaded):
+    engine, cov, exposure = loaded
+    engine.set_exposures(dict(zip(SYMBOLS, exposure)))
+    assert engine.value_at_risk() == pytest.approx(reference_var(cov, exposure, engine), rel=1e-9)
+    assert engine.z == pytest.approx(NormalDist().inv_cdf(0.99))
+
+
+def test_incremental_exposure_changes_match_full_recompute(loaded):
+    engine, cov, exposure = loaded
+    rng = np.random.default_rng(1)
+    current = np.zeros(len(SYMBOLS))
+    for _ in range(200):
+        i = rng.integers(len(SYMBOLS))
+        current[i] = 0.0 if rng.random() < 0.2 else rng.normal(0, 1000)
+        engine.set_exposure(SYMBOLS[i], current[i])
+    assert engine.value_at_risk() == pytest.approx(reference_var(cov, current, engine), rel=1e-7)
+
+
+def test_order_impact_matches_recompute_with_the_order(loaded):
+    engine, cov, exposure = loaded
+    engine.set_exposures(dict(zip(SYMBOLS, exposure)))
+    impact = engine.order_impact('S2-USDT', 2500.0)
+
+    after = exposure.copy()
+    after[2] += 2500.0
+    assert impact['var_before'] == pytest.approx(reference_var(cov, exposure, engine), rel=1e-9)
+    assert impact['var_after'] == pytest.approx(reference_var(cov, after, engine), rel=1e-9)
+    assert engine.order_impact('NEW-USDT', 1e6)['marginal_var'] == 0.0
+
+
+def test_risk_contributions_sum_to_var(loaded):
+    engine, _, exposure = loaded
+    engine.set_exposures(dict(zip(SYMBOLS, exposure)))
+    assert sum(engine.risk_contributions().values()) == pytest.approx(engine.value_at_risk(), rel=1e-9)
+
+
+def test_restore_keeps_var(loaded):
+    engine, _, exposure = loaded
+    engine.set_exposures(dict(zip(SYMBOLS, exposure)))
+    restored = PortfolioRiskEngine(decay=0.94)
+    restored.restore(engine.snapshot())
+    assert restored.value_at_risk() == pytest.approx(engine.value_at_risk(), rel=1e-12)
+    np.testing.assert_array_equal(restored.cov[:restored.size, :restored.size],
+                                  engine.cov[:engine.size, :engine.size])
@@ -0,0 +1,70 @@
+import numpy as np
+
+from config.config import Config
+from src.models.position_manager import PositionManager
+from src.models.risk_manager import RiskManager
+from src.strategies.strategy_evaluator import simulate_vectorized
+
+SYMBOL = 'BTC-USDTM'
+
+
+def analysis(direction: str, confidence: float, price: float = 100.0) -> dict:
+    return {'symbol': SYMBOL, 'direction': direction, 'confidence': confidence, 'current_price': price}
+
+
+def test_opposing_signal_closes_instead_of_shrinking():
+    # Regression: a long of size 50 at 5x facing a 0.9 short used to be
+    # resized from its own margin down to 0 and never closed
+    manager = PositionManager()
+    position = manager.open_position(SYMBOL, 'long', 100.0, 50.0, 5, entry_time=0.0)
+
+    manager.manage_positions([position], analysis('short', 0.9, 100.5))
+
+    assert manager.get_positions(SYMBOL) == []
+    assert manager.get_exposure(SYMBOL).margin_used == 0
+    trade = manager.position_history[-1]
+    assert trade['reason'] == 'signal_reversal'
+    assert trade['size'] == 50.0
+
+    # The entry path now sizes the reversal from the whole balance
+    size = RiskManager().calculate_position_size(1000.0, analysis('short', 0.9),
+                                                 manager.get_exposure(SYMBOL).margin_used)
+    assert size > 0
+
+
+def test_weak_or_agreeing_signal_keeps_position():
+    manager = PositionManager()
+    long = manager.open_position(SYMBOL, 'long', 100.0, 50.0, 5, entry_time=0.0)
+    short = manager.open_position(SYMBOL, 'short', 100.0, 50.0, 5, entry_time=0.0)
+
+    manager.manage_positions([long, short], analysis('short', Config.REVERSAL_CONFIDENCE))
+    assert len(manager.get_positions(SYMBOL)) == 2
+
+    manager.manage_positions([long, short], analysis('short', 0.9))
+    assert manager.get_positions(SYMBOL) == [short]
+    assert manager.get_position(short.id).size == 50.0
+
+
+def test_stop_loss_takes_precedence_over_reversal():
+    manager = PositionManager()
+    position = manager.open_position(SYMBOL, 'long', 100.0, 50.0, 5,
+                                     stop_loss_pct=2.0, entry_time=0.0)
+
+    manager.manage_positions([position], analysis('short', 0.9, 90.0))
+
+    assert manager.closed_count == 1
+    assert manager.position_history[-1]['reason'] == 'stop_loss'
+
+
+def test_vectorized_simulation_closes_on_reversal():
+    params = {name: np.array([value]) for name, value in (
+        ('confidence_threshold', 0.5), ('stop_loss_pct', 1e9), ('take_profit_pct', 1e9),
+        ('leverage', 1.0), ('risk_pct', 10.0))}
+    close = np.array([100.0, 101.0, 102.0, 103.0])
+    direction = np.array([1.0, -1.0, -1.0, -1.0])
+
+    strong = simulate_vectorized(close, np.array([0.6, 0.9, 0.6, 0.0]), direction, params, 1000.0, 1.0)
+    weak = simulate_vectorized(close, np.array([0.6, 0.7, 0.0, 0.0]), direction, params, 1000.0, 1.0)
+
+    assert strong['trades'][0] == 1  # the long closes at 101, the short opens at 102
+    assert weak['trades'][0] == 0
@@ -0,0 +1,78 @@
+import pytest
+
+from config.config import Config
+from src.cluster.risk_authority import RiskAuthority
+
+
+@pytest.fixture
+def authority():
+    authority = RiskAuthority()
+    authority.set_balance(1000.0)
+    return authority
+
+
+def portfolio_exposure(authority: RiskAuthority, symbol: str) -> float:
+    portfolio = authority.risk_manager.portfolio
+    return float(portfolio.exposure[portfolio.index[symbol]])
+
+
+def test_reserve_books_margin_and_exposure(authority):
+    assert authority.reserve('worker-0', 'XBTUSDTM', 'long', 500.0, 100.0) == (True, "ok")
+    assert authority.reserve('worker-1', 'XBTUSDTM', 'short', 200.0, 40.0) == (True, "ok")
+
+    assert authority.reserved == pytest.approx(140.0)
+    assert authority.available == pytest.approx(860.0)
+    assert authority.exposures() == {'XBTUSDTM': pytest.approx(300.0)}
+    assert portfolio_exposure(authority, 'XBTUSDTM') == pytest.approx(300.0)
+    assert authority.reservations == 2
+
+
+def test_reserve_rejects_margin_beyond_available_across_shards(authority):
+    assert authority.reserve('worker-0', 'XBTUSDTM', 'long', 3000.0, 600.0)[0]
+    allowed, reason = authority.reserve('worker-1', 'ETHUSDTM', 'long', 3000.0, 600.0)
+
+    assert not allowed and 'exceeds available balance' in reason
+    assert authority.rejections == 1
+    assert authority.reserved == pytest.approx(600.0)
+    assert 'ETHUSDTM' not in authority.exposures()
+
+
+def test_reserve_rejects_in_drawdown(authority):
+    authority.set_balance(1000.0 * (1 - (Config.MAX_DRAWDOWN + 1) / 100))
+    allowed, reason = authority.reserve('worker-0', 'XBTUSDTM', 'long', 10.0, 2.0)
+    assert not allowed and 'drawdown' in reason
+    assert authority.reserved == 0.0
+
+
+def test_release_undoes_a_reservation(authority):
+    authority.reserve('worker-0', 'XBTUSDTM', 'long', 500.0, 100.0)
+    authority.reserve('worker-0', 'XBTUSDTM', 'short', 200.0, 40.0)
+    authority.release('worker-0', 'XBTUSDTM', 'short', 200.0, 40.0)
+
+    assert authority.reserved == pytest.approx(100.0)
+    assert authority.exposures() == {'XBTUSDTM': pytest.approx(500.0)}
+    assert portfolio_exposure(authority, 'XBTUSDTM') == pytest.approx(500.0)
+
+    # Releasing more than was reserved never leaves negative margin
+    authority.release('worker-0', 'XBTUSDTM', 'long', 500.0, 150.0)
+    assert authority.reserved == 0.0
+
+
+def test_report_replaces_the_workers_book(authority):
+    authority.reserve('worker-0', 'XBTUSDTM', 'long', 500.0, 100.0)
+    authority.reserve('worker-1', 'ETHUSDTM', 'long', 100.0, 20.0)
+
+    # worker-0's order filled: its report carries the position, the reservation goes
+    authority.report('worker-0', {'XBTUSDTM': 480.0}, margin_used=96.0,
+                     stats={'symbols': 10, 'cycle_seconds': 2.0})
+    assert authority.reserved == pytest.approx(20.0)
+    assert authority.margin_used == pytest.approx(96.0)
+    assert authority.equity == pytest.approx(1096.0)
+    assert authority.exposures() == {'XBTUSDTM': pytest.approx(480.0), 'ETHUSDTM': pytest.approx(100.0)}
+    assert portfolio_exposure(authority, 'XBTUSDTM') == pytest.approx(480.0)
+    assert authority.throughput() == pytest.approx(5.0)
+
+    authority.remove_worker('worker-1')
+    assert authority.reserved == 0.0
+    assert authority.exposures() == {'XBTUSDTM': pytest.approx(480.0)}
+    assert portfolio_exposure(authority, 'ETHUSDTM') == 0.0
@@ -0,0 +1,109 @@
+import math
+
+import numpy as np
+import pytest
+
+from src.models.trade_stats import RunningStats, TradeStats, WindowedStats
+
+
+def batch_stats(pnls) -> dict:
+    """Win rate, Kelly fraction and sums recomputed from the trade list"""
+    wins = [pnl for pnl in pnls if pnl > 0]
+    losses = [pnl for pnl in pnls if pnl < 0]
+    if not pnls or not losses:
+        kelly = 0.5
+    elif not wins:
+        kelly = 0.0
+    else:
+        win_rate = len(wins) / len(pnls)
+        kelly = win_rate - (1 - win_rate) / (np.mean(wins) / abs(np.mean(losses)))
+        kelly = max(0, min(kelly, 0.5))
+    return {
+        'trades': len(pnls),
+        'wins': len(wins),
+        'losses': len(losses),
+        'win_rate': len(wins) / len(pnls) if pnls else 0.0,
+        'win_sum': math.fsum(wins),
+        'loss_sum': math.fsum(losses),
+        'kelly_fraction': kelly,
+    }
+
+
+def assert_matches(stats: RunningStats, pnls) -> None:
+    got, expected = stats.to_dict(), batch_stats(list(pnls))
+    for name in ('trades', 'wins', 'losses'):
+        assert got[name] == expected[name], name
+    for name in ('win_rate', 'win_sum', 'loss_sum', 'kelly_fraction'):
+        assert got[name] == pytest.approx(expected[name], rel=1e-9, abs=1e-9), name
+
+
+def trade_pnls(rng, n: int) -> list:
+    # Skewed wins and losses with some break-even trades
+    pnls = np.where(rng.random(n) < 0.45, rng.lognormal(1, 1, n), -rng.lognormal(0.5, 1, n))
+    pnls[rng.random(n) < 0.05] = 0.0
+    return pnls.tolist()
+
+
+def test_running_stats_match_batch_formulas():
+    pnls = trade_pnls(np.random.default_rng(0), 500)
+    stats = RunningStats()
+    for i, pnl in enumerate(pnls):
+        stats.add(pnl)
+        if i % 25 == 0:
+            assert_matches(stats, pnls[:i + 1])
+    assert_matches(stats, pnls)
+
+
+@pytest.mark.parametrize('pnls, kelly', [([], 0.5), ([1.0, 2.0], 0.5), ([-1.0, -2.0], 0.0),
+                                         ([0.0, 0.0], 0.5)])
+def test_kelly_edge_cases(pnls, kelly):
+    stats = RunningStats()
+    for pnl in pnls:
+        stats.add(pnl)
+    assert stats.kelly_fraction() == kelly
+    assert_matches(stats, pnls)
+
+
+def test_trade_window_evicts_oldest():
+    pnls = trade_pnls(np.random.default_rng(1), 2000)
+    stats = WindowedStats(max_trades=50)
+    for i, pnl in enumerate(pnls):
+        stats.add_trade(pnl, closed_at=float(i))
+        assert_matches(stats, pnls[max(0, i - 49):i + 1])
+
+
+def test_time_window_expires_old_trades():
+    rng = np.random.default_rng(2)
+    pnls = trade_pnls(rng, 1000)
+    closed = np.cumsum(rng.exponential(60, len(pnls))).tolist()
+    stats = WindowedStats(max_age=3600)
+    for i, (pnl, now) in enumerate(zip(pnls, closed)):
+        stats.add_trade(pnl, closed_at=now)
+        assert_matches(stats, [p for p, t in zip(pnls[:i + 1], closed) if t >= now - 3600])
+
+    stats.expire(closed[-1] + 3601)
+    assert_matches(stats, [])
+
+
+def test_window_sums_do_not_drift():
+    # Large trades passing through a window of small ones leave no residue
+    stats = WindowedStats(max_trades=10)
+    for i in range(10000):
+        stats.add_trade(1e9 if i % 100 == 0 else 1e-3 * (1 + i % 7), closed_at=float(i))
+    assert_matches(stats, [1e-3 * (1 + i % 7) for i in range(9990, 10000)])
+
+
+def test_trade_stats_window_selection_and_restore():
+    pnls = trade_pnls(np.random.default_rng(3), 300)
+    stats = TradeStats(window_trades=40)
+    for i, pnl in enumerate(pnls):
+        stats.record(pnl, closed_at=1000.0 + i)
+    assert stats.window() is stats.recent
+    assert_matches(stats.all, pnls)
+    assert_matches(stats.window(), pnls[-40:])
+
+    # A smaller trade window after a restart keeps only the newest trades
+    restored = TradeStats(window_trades=10)
+    restored.restore(stats.snapshot())
+    assert_matches(restored.all, pnls)
+    assert_matches(restored.window(), pnls[-10:])
@@ -0,0 +1,33 @@
+import os
+
+from src.models.training_scheduler import TrainingScheduler
+from src.strategies.model_store import publish_artifacts
+
+
+async def promoted(symbol, model):
+    pass
+
+
+def candidate(artifact_dir: str, symbol: str, version: str) -> str:
+    """A candidate laid out as save_model_artifacts leaves it: a link to a versioned directory"""
+    staging = os.path.join(artifact_dir, f"staging-{version}")
+    os.makedirs(staging)
+    with open(os.path.join(staging, 'model.npz'), 'w') as f:
+        f.write(version)
+    candidate_dir = os.path.join(artifact_dir, f".{symbol}.candidate")
+    publish_artifacts(staging, candidate_dir, version)
+    return candidate_dir
+
+
+def test_rejected_candidate_is_removed_with_its_target(tmp_path):
+    scheduler = TrainingScheduler(promoted, artifact_dir=str(tmp_path))
+    for version in ('v1', 'v2'):
+        candidate_dir = candidate(str(tmp_path), 'XBTUSDTM', version)
+        assert os.path.islink(candidate_dir)
+
+        model = scheduler._promote_if_better({
+            'symbol': 'XBTUSDTM', 'candidate_dir': candidate_dir, 'version': version,
+            'candidate_loss': 0.9, 'incumbent_loss': 0.5,
+        })
+        assert model is None
+        assert os.listdir(tmp_path) == []
@@ -0,0 +1,79 @@
+import asyncio
+import sqlite3
+import threading
+
+import pytest
+
+from src.database.write_behind import WriteBehindWriter
+
+SYMBOL = 'XBTUSDTM'
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'bot.db')
+    conn = sqlite3.connect(path)
+    conn.execute('''
+        CREATE TABLE market_data (
+            timestamp INTEGER, symbol TEXT, open REAL, high REAL,
+            low REAL, close REAL, volume REAL,
+            PRIMARY KEY (timestamp, symbol)
+        )
+    ''')
+    conn.close()
+    return path
+
+
+def candle_row(minute: int, close: float = 100.0) -> tuple:
+    return (minute * 60, SYMBOL, close, close, close, close, 1.0)
+
+
+def stored_timestamps(db_path: str) -> list:
+    conn = sqlite3.connect(db_path)
+    try:
+        return [row[0] for row in conn.execute("SELECT timestamp FROM market_data ORDER BY timestamp")]
+    finally:
+        conn.close()
+
+
+def test_bad_rows_are_dropped_alone(db_path):
+    writer = WriteBehindWriter(db_path, flush_interval=0.01)
+    rows = [candle_row(minute) for minute in range(100)]
+    # Wrong number of bindings: fails on its own, the rest of the batch must not
+    rows[17] = rows[17][:-1]
+    rows[60] = rows[60][:-1]
+    writer.submit('market_data', rows)
+    writer.close()
+
+    assert writer.failed_rows == 2
+    assert writer.rows_written == 98
+    assert stored_timestamps(db_path) == [minute * 60 for minute in range(100) if minute not in (17, 60)]
+
+
+def test_call_async_does_not_block_the_event_loop_when_full(db_path):
+    writer = WriteBehindWriter(db_path, max_queue=1, flush_interval=0.01)
+    started, release = threading.Event(), threading.Event()
+
+    def hold(conn):
+        started.set()
+        release.wait()
+
+    writer.call(hold)
+    started.wait()
+    writer.submit('market_data', [candle_row(0)])  # fills the queue
+
+    async def main():
+        queued = asyncio.ensure_future(writer.call_async(
+            lambda conn: conn.execute("SELECT COUNT(*) FROM market_data").fetchone()[0]
+        ))
+        # The loop keeps running while the call waits for room
+        await asyncio.sleep(0.05)
+        assert not queued.done()
+        assert writer.backpressure_waits == 1
+
+        release.set()
+        return await asyncio.wrap_future(await queued)
+
+    assert asyncio.run(main()) == 1
+    writer.close()
+    assert stored_timestamps(db_path) == [0]